@@ -12,6 +12,9 @@ Solo afecta las plataformas meteorológicas:
 Ejecutar UNA sola vez dentro del contenedor api_ingestor:
     python backfill_historico_weatherlink.py
 
+Al terminar cada estación recalcula los rollups (measurement_hourly/daily)
+del rango cargado.
+
 Requisitos en .env:
     POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT
     API_KEY_PUERTO, API_SECRET_PUERTO
@@ -27,6 +30,8 @@ import psycopg2
 import requests
 from dotenv import load_dotenv
 
+from services.rollups import refresh_range
+
 load_dotenv()
 
 logging.basicConfig(
@@ -393,6 +398,13 @@ def backfill_estacion(station_cfg):
 
             dia += timedelta(days=1)
 
+        # Las filas insertadas acá no pasan por copy_measurements: los
+        # rollups horarios/diarios del rango se recalculan al final.
+        if total_ins and dia_inicio_real is not None:
+            log.info("  📈 Recalculando rollups del rango cargado...")
+            refresh_range(conn, dia_inicio_real.replace(tzinfo=None), now.replace(tzinfo=None),
+                          log=lambda m: log.info(f"  {m}"))
+
     finally:
         conn.close()
 
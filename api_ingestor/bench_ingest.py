@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+bench_ingest.py
+===============
+Benchmark de la ingesta sin pegarle a los servicios reales: reproduce
+respuestas HTTP grabadas (CSV de EMAC, JSON de WeatherLink y del SHN, HTML
+del mareógrafo y de la predicción de marea) a través de los fetch_* de
+task_config.TASKS y mide las dos estrategias de escritura de DBHandler.
+
+  grabar    Corre los scrapers una vez contra los servicios reales y guarda
+            cada intercambio HTTP en --fixtures/<tarea>.json. Sólo hace
+            falta repetirlo si cambia el formato de algún servicio.
+
+  correr    Con las respuestas grabadas (ninguna sale a la red), por tarea:
+              - parseo: mediana de --repeticiones ejecuciones del fetch_*,
+                filas devueltas y pico de memoria de Python (tracemalloc);
+              - escritura, por cada --estrategias (copy = copy_measurements,
+                values = insert_measurements): filas/s del lote nuevo y
+                filas/s del mismo lote repetido (todo duplicado, el caso
+                normal de los históricos de 30 días de EMAC), con las
+                filas efectivamente insertadas y omitidas;
+              - ocupación estimada del worker según el schedule de la tarea.
+
+Para que cada estrategia parta de cero, `correr` borra de measurement las
+claves (sensor_id, timestamp) del lote antes de escribirlo: sólo contra una
+base local o de prueba (hay que repetir su nombre con --confirmar). Las
+tablas derivadas quedan desfasadas; el script imprime cómo repararlas.
+
+Los scrapers de EMAC son incrementales (sólo devuelven lo posterior al
+último dato en la base). Por defecto el benchmark los corre como en la
+primera ingesta, con el histórico completo; --incremental respeta la base.
+
+Uso (dentro del contenedor api_ingestor):
+    python bench_ingest.py grabar
+    python bench_ingest.py grabar --tareas buoy,emac_cmd0_station
+    python bench_ingest.py correr --confirmar oogsj_dev
+    python bench_ingest.py correr --confirmar oogsj_dev --estrategias copy --repeticiones 10 --json ingesta.json
+"""
+
+import argparse
+import base64
+import contextlib
+import io
+import json
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from services.config import DB_CONFIG
+from services.db_handler import DBHandler
+from services.task_config import TASKS
+
+AVISOS_TASKS = {"shn_avisos"}           # igual que celery_tasks.AVISOS_TASKS
+EXCLUIDAS    = {"documentos_scraper"}   # igual que celery_tasks.SELF_PERSISTING_TASKS
+
+# Parámetros que cambian en cada pedido (timestamp y firma de WeatherLink):
+# no cuentan para encontrar la respuesta grabada.
+_PARAMS_VOLATILES = {"t", "api-signature"}
+
+# Encabezados que describen el cuerpo tal como viajó; se guarda ya decodificado.
+_HEADERS_DESCARTADOS = {"content-encoding", "transfer-encoding", "content-length"}
+
+_REPARAR = """
+Las claves borradas y reinsertadas no pasaron por las tablas derivadas
+igual que en producción. Para repararlas (en este contenedor):
+    python refresh_rollups.py --desde {desde:%Y-%m-%d}
+    python check_sensor_latest.py --reparar
+    celery -A celery_tasks call celery_tasks.reconcile_sensor_stats
+"""
+
+
+# ── Grabación y reproducción HTTP ───────────────────────────────────────────
+
+def _clave(method, url):
+    partes = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(partes.query, keep_blank_values=True)
+                   if k not in _PARAMS_VOLATILES)
+    return f"{method} {partes.netloc}{partes.path}?{urlencode(query)}"
+
+
+@contextlib.contextmanager
+def grabando(intercambios):
+    """Deja pasar los pedidos reales y agrega cada respuesta a `intercambios`."""
+    send_original = HTTPAdapter.send
+    lock = threading.Lock()
+
+    def send(adapter, request, **kwargs):
+        resp = send_original(adapter, request, **kwargs)
+        with lock:
+            intercambios.append({
+                "method":   request.method,
+                "url":      request.url,
+                "status":   resp.status_code,
+                "headers":  {k: v for k, v in resp.headers.items()
+                             if k.lower() not in _HEADERS_DESCARTADOS},
+                "body_b64": base64.b64encode(resp.content).decode(),
+            })
+        return resp
+
+    with mock.patch.object(HTTPAdapter, "send", send):
+        yield
+
+
+@contextlib.contextmanager
+def reproduciendo(intercambios):
+    """
+    Responde cada pedido con el intercambio grabado de la misma clave
+    (método, host, path y query sin los parámetros volátiles); si hay varios,
+    en el orden en que se grabaron. Un pedido sin grabación falla como un
+    error de red.
+    """
+    por_clave = {}
+    for i in intercambios:
+        por_clave.setdefault(_clave(i["method"], i["url"]), []).append(i)
+    turno = {k: 0 for k in por_clave}
+    lock = threading.Lock()
+
+    def send(adapter, request, **kwargs):
+        clave = _clave(request.method, request.url)
+        with lock:
+            grabados = por_clave.get(clave)
+            if not grabados:
+                raise requests.ConnectionError(f"sin grabación para {clave}", request=request)
+            i = grabados[turno[clave] % len(grabados)]
+            turno[clave] += 1
+        resp = requests.Response()
+        resp.status_code = i["status"]
+        resp.headers = CaseInsensitiveDict(i["headers"])
+        resp._content = base64.b64decode(i["body_b64"])
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp.url, resp.request = request.url, request
+        return resp
+
+    with mock.patch.object(HTTPAdapter, "send", send):
+        yield
+
+
+@contextlib.contextmanager
+def _historico_completo():
+    """Los scrapers de EMAC sin el último dato de la base: devuelven los 30 días."""
+    from services import emac_cmd0_scraper, emac_cmd1_scraper
+
+    parches = []
+    for modulo in (emac_cmd0_scraper, emac_cmd1_scraper):
+        original = modulo._resolve_ids
+
+        def sin_last_ts(original=original):
+            variables, location_id = original()
+            return {k: (sid, fn, None) for k, (sid, fn, _) in variables.items()}, location_id
+
+        parches.append(mock.patch.object(modulo, "_resolve_ids", sin_last_ts))
+    with contextlib.ExitStack() as stack:
+        for parche in parches:
+            stack.enter_context(parche)
+        yield
+
+
+def _callado(verbose):
+    return contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+
+def _tareas(texto):
+    nombres = [t for t in TASKS if t not in EXCLUIDAS]
+    if not texto:
+        return nombres
+    pedidas = texto.split(",")
+    desconocidas = set(pedidas) - set(nombres)
+    if desconocidas:
+        sys.exit(f"❌ Tareas desconocidas: {', '.join(sorted(desconocidas))}. "
+                 f"Opciones: {', '.join(nombres)}")
+    return pedidas
+
+
+def grabar(args):
+    carpeta = Path(args.fixtures)
+    carpeta.mkdir(parents=True, exist_ok=True)
+    for tarea in _tareas(args.tareas):
+        intercambios = []
+        with grabando(intercambios), _callado(args.verbose):
+            filas = TASKS[tarea]["scraper"]() or []
+        destino = carpeta / f"{tarea}.json"
+        destino.write_text(json.dumps({
+            "tarea":        tarea,
+            "grabado":      datetime.utcnow().isoformat() + "Z",
+            "intercambios": intercambios,
+        }, ensure_ascii=False))
+        kb = destino.stat().st_size / 1024
+        print(f"📼 {tarea}: {len(intercambios)} respuestas, {len(filas)} filas → {destino} ({kb:,.0f} KB)")
+
+
+# ── Medición ────────────────────────────────────────────────────────────────
+
+def medir_parseo(tarea, intercambios, repeticiones, incremental, verbose):
+    """(filas de la primera ejecución, mediana en ms, pico de memoria en MB)."""
+    tiempos, filas, pico = [], None, 0
+    with reproduciendo(intercambios), \
+         (contextlib.nullcontext() if incremental else _historico_completo()):
+        for _ in range(repeticiones):
+            tracemalloc.start()
+            inicio = time.perf_counter()
+            with _callado(verbose):
+                resultado = TASKS[tarea]["scraper"]() or []
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            pico = max(pico, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            if filas is None:
+                filas = resultado
+    return filas, statistics.median(tiempos), pico / 1024 / 1024
+
+
+_CLAVES_SQL = """
+    SELECT COUNT(*) FROM oogsj_data.measurement m
+    JOIN (SELECT DISTINCT * FROM unnest(%s::int[], %s::timestamp[]) AS k(sensor_id, ts)) k
+      ON m.sensor_id = k.sensor_id AND m.timestamp = k.ts;
+"""
+
+_BORRAR_SQL = """
+    DELETE FROM oogsj_data.measurement m
+    USING unnest(%s::int[], %s::timestamp[]) AS k(sensor_id, ts)
+    WHERE m.sensor_id = k.sensor_id AND m.timestamp = k.ts;
+"""
+
+
+def _claves(filas):
+    # Tuplas de measurement: (timestamp, value, quality_flag, processing_level_id, sensor_id, location_id)
+    return [f[4] for f in filas], [f[0] for f in filas]
+
+
+def _contar(db, claves):
+    db.cur.execute(_CLAVES_SQL, claves)
+    n = db.cur.fetchone()[0]
+    db.conn.commit()
+    return n
+
+
+def _escribir(db, estrategia, filas):
+    if estrategia == "copy":
+        db.copy_measurements(filas)
+    else:
+        db.insert_measurements(filas)
+
+
+def medir_escritura(db, estrategia, filas, verbose):
+    """Lote nuevo y lote repetido: filas/s, insertadas y omitidas de cada pasada."""
+    claves = _claves(filas)
+    db.cur.execute(_BORRAR_SQL, claves)
+    db.conn.commit()
+
+    resultado, antes = {}, _contar(db, claves)
+    for pasada in ("nuevo", "repetido"):
+        inicio = time.perf_counter()
+        with _callado(verbose):
+            _escribir(db, estrategia, filas)
+        segundos = time.perf_counter() - inicio
+        despues = _contar(db, claves)
+        resultado[pasada] = {
+            "ms":          round(segundos * 1000, 1),
+            "filas_s":     round(len(filas) / segundos) if segundos else None,
+            "insertadas":  despues - antes,
+            "omitidas":    len(filas) - (despues - antes),
+        }
+        antes = despues
+    return resultado
+
+
+def _ejecuciones_por_hora(schedule):
+    """Ejecuciones por hora (promedio del día) de un crontab de Celery."""
+    return len(schedule.minute) * len(schedule.hour) / 24
+
+
+def correr(args):
+    if args.confirmar != DB_CONFIG["dbname"]:
+        sys.exit(f"❌ El benchmark borra y reescribe mediciones en '{DB_CONFIG['dbname']}': "
+                 f"hay que pasar --confirmar {DB_CONFIG['dbname']}")
+    estrategias = args.estrategias.split(",")
+    if set(estrategias) - {"copy", "values"}:
+        sys.exit("❌ --estrategias admite copy y values")
+
+    db = DBHandler()
+    if db.conn is None:
+        sys.exit("❌ Sin conexión a la base.")
+
+    resultados, desde = {}, None
+    try:
+        for tarea in _tareas(args.tareas):
+            archivo = Path(args.fixtures) / f"{tarea}.json"
+            if not archivo.exists():
+                print(f"⏭️  {tarea}: no hay grabación ({archivo}); correr antes `grabar`.")
+                continue
+            intercambios = json.loads(archivo.read_text())["intercambios"]
+
+            filas, parse_ms, pico_mb = medir_parseo(tarea, intercambios, args.repeticiones,
+                                                    args.incremental, args.verbose)
+            r = {"filas": len(filas), "parseo_ms": round(parse_ms, 1),
+                 "memoria_mb": round(pico_mb, 1), "escritura": {}}
+            if filas and tarea in AVISOS_TASKS:
+                inicio = time.perf_counter()
+                with _callado(args.verbose):
+                    db.insert_avisos(filas)
+                segundos = time.perf_counter() - inicio
+                r["escritura"]["avisos"] = {"upsert": {"ms": round(segundos * 1000, 1),
+                                                       "filas_s": round(len(filas) / segundos)}}
+            elif filas:
+                primero = min(f[0] for f in filas)
+                desde = primero if desde is None else min(desde, primero)
+                for estrategia in estrategias:
+                    r["escritura"][estrategia] = medir_escritura(db, estrategia, filas, args.verbose)
+
+            escritura_ms = max((p["ms"] for e in r["escritura"].values() for p in e.values()),
+                               default=0)
+            por_hora = _ejecuciones_por_hora(TASKS[tarea]["schedule"])
+            r["worker_s_por_hora"] = round(por_hora * (parse_ms + escritura_ms) / 1000, 1)
+            resultados[tarea] = r
+            _imprimir(tarea, r)
+    finally:
+        db.close()
+
+    total = sum(r["worker_s_por_hora"] for r in resultados.values())
+    print(f"\n⚙️  Ocupación estimada: {total:,.1f} s de worker por hora "
+          f"({total / 36:.1f} % de un proceso), con la estrategia más lenta.")
+    if desde is not None:
+        print(_REPARAR.format(desde=desde))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"fecha": datetime.utcnow().isoformat() + "Z",
+                       "parametros": {k: v for k, v in vars(args).items() if k != "func"},
+                       "tareas": resultados}, f, indent=2, ensure_ascii=False)
+        print(f"💾 Resultados en {args.json}")
+    return 0
+
+
+def _imprimir(tarea, r):
+    print(f"📦 {tarea}: {r['filas']:,} filas · parseo {r['parseo_ms']:,.1f} ms · "
+          f"{r['memoria_mb']:,.1f} MB pico · {r['worker_s_por_hora']} s/h de worker")
+    for estrategia, pasadas in r["escritura"].items():
+        for pasada, p in pasadas.items():
+            extra = (f" · {p['insertadas']:,} insertadas, {p['omitidas']:,} omitidas"
+                     if "insertadas" in p else "")
+            print(f"     {estrategia:<7} {pasada:<9} {p['ms']:>10,.1f} ms "
+                  f"{p['filas_s'] or 0:>10,} filas/s{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la ingesta con respuestas HTTP grabadas.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("grabar", help="grabar las respuestas de los servicios reales")
+    p.add_argument("--tareas", help="separadas por coma (default: todas)")
+    p.add_argument("--fixtures", default="bench_fixtures", help="default: bench_fixtures/")
+    p.add_argument("--verbose", action="store_true", help="mostrar la salida de los scrapers")
+    p.set_defaults(func=grabar)
+
+    p = sub.add_parser("correr", help="medir parseo y escritura con las respuestas grabadas")
+    p.add_argument("--tareas", help="separadas por coma (default: todas las grabadas)")
+    p.add_argument("--fixtures", default="bench_fixtures", help="default: bench_fixtures/")
+    p.add_argument("--estrategias", default="copy,values",
+                   help="copy (copy_measurements) y/o values (insert_measurements)")
+    p.add_argument("--repeticiones", type=int, default=5, help="ejecuciones del parseo (default: 5)")
+    p.add_argument("--incremental", action="store_true",
+                   help="EMAC sólo con lo posterior al último dato de la base")
+    p.add_argument("--json", help="archivo donde guardar los resultados")
+    p.add_argument("--verbose", action="store_true", help="mostrar la salida de los scrapers")
+    p.add_argument("--confirmar", metavar="BASE", required=True,
+                   help="nombre de la base conectada, para confirmar que se puede escribir")
+    p.set_defaults(func=correr)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+bench_queries.py
+================
+Mide las consultas de los endpoints sobre measurement antes y después de
+los índices de db_init/migrations/20261024_add_query_indexes.sql, con
+datos sintéticos.
+
+Trabaja en un schema aparte (--schema, default oogsj_bench) que crea al
+empezar y borra al terminar: no lee ni escribe oogsj_data. Igual carga
+millones de filas, así que conviene correrlo en una base de desarrollo o en
+una copia, no en la de producción.
+
+  1) Crea platform / sensor / measurement con las columnas de oogsj_data y
+     la restricción UNIQUE (sensor_id, timestamp) original.
+  2) Siembra --anios de mediciones cada --intervalo minutos para
+     --plataformas × --sensores, en orden de timestamp (como escribe el
+     ingestor), con ~0,5 % de valores negativos. --semilla la hace
+     reproducible.
+  3) VACUUM ANALYZE y mide cada consulta: mediana de --repeticiones
+     ejecuciones (con las filas leídas por el cliente) y el plan de
+     EXPLAIN (ANALYZE, BUFFERS). Es el "antes".
+  4) Aplica los índices de la migración, VACUUM ANALYZE y vuelve a medir.
+
+Las consultas reproducen la forma de las de cada endpoint (mismos filtros,
+orden y límite), no su SQL literal.
+
+Uso (dentro del contenedor api_ingestor):
+    python bench_queries.py                          # 2 años, 5 plataformas × 8 sensores, cada 10 min
+    python bench_queries.py --anios 5 --repeticiones 10
+    python bench_queries.py --json bench.json        # además guarda los resultados
+    python bench_queries.py --conservar              # deja el schema para mirarlo con psql
+"""
+
+import argparse
+import json
+import statistics
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import psycopg2
+from psycopg2 import sql as pgsql
+
+from services.config import DB_CONFIG
+
+# Código de estación de la plataforma 1, como la APPCR 160710 que consulta
+# /api/appcr/muelle_cc/history.
+STATION_CODE = "160710"
+
+_SCHEMA_SQL = """
+    CREATE SCHEMA {s};
+    CREATE TABLE {s}.platform (
+        id   INT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL
+    );
+    CREATE TABLE {s}.sensor (
+        id          INT PRIMARY KEY,
+        platform_id INT REFERENCES {s}.platform(id),
+        name        VARCHAR(255) NOT NULL
+    );
+    CREATE TABLE {s}.measurement (
+        id                  SERIAL PRIMARY KEY,
+        sensor_id           INT REFERENCES {s}.sensor(id),
+        timestamp           TIMESTAMP NOT NULL,
+        value               FLOAT NOT NULL,
+        quality_flag        INT,
+        processing_level_id INT,
+        location_id         INT,
+        UNIQUE (sensor_id, timestamp)
+    );
+"""
+
+_SEED_SQL = """
+    INSERT INTO {s}.platform (id, name)
+    SELECT p, 'Plataforma ' || p FROM generate_series(1, %(plataformas)s) p;
+
+    INSERT INTO {s}.sensor (id, platform_id, name)
+    SELECT (p - 1) * %(sensores)s + k, p, 'var_' || k || ' - ' || (%(codigo)s::int + p - 1)
+    FROM generate_series(1, %(plataformas)s) p, generate_series(1, %(sensores)s) k;
+
+    INSERT INTO {s}.measurement (sensor_id, timestamp, value, quality_flag, processing_level_id)
+    SELECT s.id, t.ts,
+           CASE WHEN random() < 0.005 THEN -5 * random()
+                ELSE 10 + 5 * sin(extract(epoch FROM t.ts) / 86400 * 2 * pi() + s.id) + random()
+           END,
+           0, 1
+    FROM generate_series(%(desde)s::timestamp, %(hasta)s::timestamp - INTERVAL '1 minute',
+                         %(intervalo)s * INTERVAL '1 minute') t(ts)
+    CROSS JOIN {s}.sensor s
+    ORDER BY t.ts, s.id;
+"""
+
+# Mismos índices que la migración, sobre el schema de prueba.
+_INDEXES_SQL = """
+    ALTER TABLE {s}.sensor
+        ADD COLUMN station_code VARCHAR(32)
+        GENERATED ALWAYS AS (substring(name from ' - ([0-9]+)$')) STORED;
+    CREATE INDEX idx_sensor_station_code ON {s}.sensor (station_code);
+    CREATE UNIQUE INDEX uq_measurement_sensor_ts_value
+        ON {s}.measurement (sensor_id, timestamp) INCLUDE (value);
+    ALTER TABLE {s}.measurement DROP CONSTRAINT measurement_sensor_id_timestamp_key;
+    CREATE INDEX idx_measurement_ts_brin
+        ON {s}.measurement USING brin (timestamp) WITH (pages_per_range = 32);
+    CREATE INDEX idx_measurement_negativas
+        ON {s}.measurement (timestamp DESC) INCLUDE (sensor_id, value) WHERE value < 0;
+"""
+
+# antes / despues: SQL de cada etapa (despues None = la misma consulta).
+Consulta = namedtuple("Consulta", ["nombre", "endpoint", "antes", "despues"])
+
+CONSULTAS = [
+    Consulta("historico_sensor", "/api/mareograph (30 días, un sensor)", """
+        SELECT m.sensor_id, m.timestamp AS ts, m.value
+        FROM {s}.measurement m
+        WHERE m.sensor_id = 1
+          AND m.timestamp >= %(hace_30d)s AND m.timestamp < %(fin)s
+        ORDER BY ts, m.sensor_id LIMIT 50001;
+    """, None),
+    Consulta("historico_plataforma", "/api/platforms/<id>/history (10 días)", """
+        SELECT m.sensor_id, m.timestamp AS ts, m.value
+        FROM {s}.measurement m
+        WHERE m.sensor_id = ANY(%(sensores_p2)s)
+          AND m.timestamp >= %(hace_10d)s AND m.timestamp < %(fin)s
+        ORDER BY ts, m.sensor_id LIMIT 5001;
+    """, None),
+    Consulta("muelle_cc_history", "/api/appcr/muelle_cc/history (15 días)", """
+        SELECT m.sensor_id, s.name, m.timestamp AS ts, m.value
+        FROM {s}.measurement m
+        JOIN {s}.sensor s ON s.id = m.sensor_id
+        WHERE s.name LIKE '%%' || %(codigo)s || '%%'
+          AND m.timestamp >= %(hace_15d)s AND m.timestamp < %(fin)s
+        ORDER BY ts, m.sensor_id LIMIT 50001;
+    """, """
+        SELECT m.sensor_id, s.name, m.timestamp AS ts, m.value
+        FROM {s}.measurement m
+        JOIN {s}.sensor s ON s.id = m.sensor_id
+        WHERE s.station_code = %(codigo)s
+          AND m.timestamp >= %(hace_15d)s AND m.timestamp < %(fin)s
+        ORDER BY ts, m.sensor_id LIMIT 50001;
+    """),
+    Consulta("export_mes", "CSVExportService (plataforma y mes)", """
+        SELECT m.timestamp, s.name, m.value, m.quality_flag
+        FROM {s}.measurement m
+        JOIN {s}.sensor s ON m.sensor_id = s.id
+        WHERE s.platform_id = 2
+          AND m.timestamp >= %(mes)s AND m.timestamp < %(mes_fin)s
+        ORDER BY m.timestamp, s.name;
+    """, None),
+    Consulta("export_huella", "CSVExportService._fingerprint", """
+        SELECT COUNT(*), MAX(m.timestamp), MAX(m.id)
+        FROM {s}.measurement m
+        JOIN {s}.sensor s ON m.sensor_id = s.id
+        WHERE s.platform_id = 2
+          AND m.timestamp >= %(mes)s AND m.timestamp < %(mes_fin)s;
+    """, None),
+    Consulta("ventana_24h", "conteo de las últimas 24h, todos los sensores", """
+        SELECT COUNT(*) FROM {s}.measurement m
+        WHERE m.timestamp >= %(hace_24h)s;
+    """, None),
+    Consulta("mediciones_negativas", "/api/mediciones_negativas", """
+        SELECT s.name, m.value, m.timestamp
+        FROM {s}.measurement m
+        JOIN {s}.sensor s ON m.sensor_id = s.id
+        WHERE m.value < 0 ORDER BY m.timestamp DESC;
+    """, None),
+]
+
+
+def _sql(texto, schema):
+    return pgsql.SQL(texto).format(s=pgsql.Identifier(schema))
+
+
+def _escaneos(plan, out):
+    """Nodos que leen measurement: 'Index Only Scan (uq_...)', 'Seq Scan', ..."""
+    if plan.get("Relation Name") == "measurement":
+        nodo = plan["Node Type"]
+        if plan.get("Index Name"):
+            nodo += f" ({plan['Index Name']})"
+        out.append(nodo)
+    for hijo in plan.get("Plans", []):
+        _escaneos(hijo, out)
+    return out
+
+
+def medir(conn, schema, texto, params, repeticiones):
+    """{"ms": mediana, "filas": n, "plan": [...], "buffers": n} de una consulta."""
+    query = _sql(texto, schema)
+    tiempos = []
+    with conn.cursor() as cur:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            cur.execute(query, params)
+            filas = len(cur.fetchall())
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        cur.execute(pgsql.SQL("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ") + query, params)
+        plan = cur.fetchone()[0][0]["Plan"]
+    conn.rollback()
+    return {
+        "ms":      round(statistics.median(tiempos), 2),
+        "filas":   filas,
+        "plan":    _escaneos(plan, []),
+        "buffers": plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0),
+    }
+
+
+def _vacuum_analyze(conn, schema):
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        for tabla in ("sensor", "measurement"):
+            cur.execute(pgsql.SQL("VACUUM ANALYZE {}.{};").format(pgsql.Identifier(schema),
+                                                                  pgsql.Identifier(tabla)))
+    conn.autocommit = False
+
+
+def _etapa(conn, schema, params, repeticiones, despues):
+    resultados = {}
+    for c in CONSULTAS:
+        texto = (c.despues or c.antes) if despues else c.antes
+        resultados[c.nombre] = medir(conn, schema, texto, params, repeticiones)
+        print(f"   {c.nombre:<22} {resultados[c.nombre]['ms']:>10.2f} ms")
+    return resultados
+
+
+def _reporte(antes, despues):
+    print()
+    print(f"{'consulta':<22} {'antes ms':>10} {'después ms':>11} {'mejora':>8}")
+    for c in CONSULTAS:
+        a, d = antes[c.nombre], despues[c.nombre]
+        mejora = a["ms"] / d["ms"] if d["ms"] else float("inf")
+        print(f"{c.nombre:<22} {a['ms']:>10.2f} {d['ms']:>11.2f} {mejora:>7.1f}x   {c.endpoint}")
+        print(f"{'':<22}   antes:   {', '.join(a['plan']) or '-'} · {a['buffers']:,} buffers")
+        print(f"{'':<22}   después: {', '.join(d['plan']) or '-'} · {d['buffers']:,} buffers")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de consultas sobre measurement antes/después de los índices.")
+    parser.add_argument("--anios", type=float, default=2, help="años de datos sintéticos (default: 2)")
+    parser.add_argument("--plataformas", type=int, default=5, help="default: 5")
+    parser.add_argument("--sensores", type=int, default=8, help="sensores por plataforma (default: 8)")
+    parser.add_argument("--intervalo", type=int, default=10, help="minutos entre mediciones (default: 10)")
+    parser.add_argument("--repeticiones", type=int, default=5, help="ejecuciones por consulta (default: 5)")
+    parser.add_argument("--semilla", type=float, default=0.42, help="setseed() de Postgres, entre -1 y 1")
+    parser.add_argument("--schema", default="oogsj_bench")
+    parser.add_argument("--dsn", help="conexión libpq (default: la del ingestor)")
+    parser.add_argument("--json", help="archivo donde guardar los resultados")
+    parser.add_argument("--conservar", action="store_true", help="no borrar el schema al terminar")
+    args = parser.parse_args()
+
+    if args.schema == "oogsj_data":
+        parser.error("el benchmark no puede usar el schema oogsj_data")
+
+    fin = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    desde = fin - timedelta(days=round(365 * args.anios))
+    mes = (fin - timedelta(days=60)).replace(day=1, hour=0)
+    params = {
+        "fin": fin, "codigo": STATION_CODE,
+        "hace_24h": fin - timedelta(hours=24), "hace_10d": fin - timedelta(days=10),
+        "hace_15d": fin - timedelta(days=15), "hace_30d": fin - timedelta(days=30),
+        "mes": mes, "mes_fin": (mes + timedelta(days=32)).replace(day=1),
+        "sensores_p2": list(range(args.sensores + 1, 2 * args.sensores + 1)),
+    }
+
+    conn = psycopg2.connect(args.dsn) if args.dsn else psycopg2.connect(**DB_CONFIG)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(_sql("DROP SCHEMA IF EXISTS {s} CASCADE;", args.schema))
+            cur.execute(_sql(_SCHEMA_SQL, args.schema))
+            cur.execute("SELECT setseed(%s);", (args.semilla,))
+            print(f"🌱 Sembrando {desde:%Y-%m-%d} → {fin:%Y-%m-%d}, "
+                  f"{args.plataformas * args.sensores} sensores cada {args.intervalo} min...")
+            inicio = time.perf_counter()
+            cur.execute(_sql(_SEED_SQL, args.schema), {
+                "plataformas": args.plataformas, "sensores": args.sensores,
+                "codigo": STATION_CODE, "intervalo": args.intervalo,
+                "desde": desde, "hasta": fin,
+            })
+            filas = cur.rowcount
+        conn.commit()
+        print(f"   {filas:,} mediciones en {time.perf_counter() - inicio:.0f} s")
+        _vacuum_analyze(conn, args.schema)
+
+        print("⏱️  Antes (sólo UNIQUE (sensor_id, timestamp)):")
+        antes = _etapa(conn, args.schema, params, args.repeticiones, despues=False)
+
+        with conn.cursor() as cur:
+            inicio = time.perf_counter()
+            cur.execute(_sql(_INDEXES_SQL, args.schema))
+        conn.commit()
+        print(f"🧱 Índices creados en {time.perf_counter() - inicio:.0f} s")
+        _vacuum_analyze(conn, args.schema)
+
+        print("⏱️  Después:")
+        despues = _etapa(conn, args.schema, params, args.repeticiones, despues=True)
+        _reporte(antes, despues)
+
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump({"parametros": vars(args), "filas": filas,
+                           "antes": antes, "despues": despues}, f, indent=2, ensure_ascii=False)
+            print(f"💾 Resultados en {args.json}")
+    finally:
+        if not args.conservar:
+            conn.rollback()
+            with conn.cursor() as cur:
+                cur.execute(_sql("DROP SCHEMA IF EXISTS {s} CASCADE;", args.schema))
+            conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,40 @@
-from celery import Celery
+import os
+
+import psycopg2
+from celery import Celery, chain, chord, group
 from celery.schedules import crontab
+from services.cache_invalidation import invalidate as invalidate_web_cache
+from services.config import DB_CONFIG
 from services.db_handler import DBHandler
 from services.task_config import TASKS
 from services.csv_export_service import CSVExportService
+from services.partitions import ensure_upcoming_partitions
+from services import rollups, sensor_stats
 
 app = Celery('tasks', broker='redis://cache:6379/0', backend='redis://cache:6379/0')
 
 # Tareas que usan insert_avisos en lugar de insert_measurements
 AVISOS_TASKS = {"shn_avisos"}
 
-def create_celery_task(task_name, scraper):
+# Tareas cuyo scraper escribe sus propias filas y devuelve un resumen (dict):
+# no pasan por DBHandler.
+SELF_PERSISTING_TASKS = {"documentos_scraper"}
+
+def create_celery_task(task_name, scraper, allow_empty=False):
     @app.task(bind=True, name=f"celery_tasks.fetch_{task_name}",
               max_retries=3, default_retry_delay=60)
     def task(self):
         try:
             print(f"🚀 Ejecutando {task_name}...")
             datos = scraper()
+            if task_name in SELF_PERSISTING_TASKS:
+                print(f"✅ {task_name} completado.")
+                return {"status": "success" if not datos.get("errors") else "partial", **datos}
+            if not datos and allow_empty:
+                # Scrapers incrementales: sin registros nuevos no hay nada que
+                # insertar y no hace falta tocar la BD.
+                print(f"💤 {task_name}: sin registros nuevos.")
+                return {"status": "success", "records": 0, "inserted": 0, "skipped": 0}
             if not datos:
                 print(f"🚨 Sin datos para {task_name}.")
                 raise ValueError("Datos vacíos.")
@@ -25,11 +44,18 @@ def create_celery_task(task_name, scraper):
 
             if task_name in AVISOS_TASKS:
                 db.insert_avisos(datos)
-            else:
-                db.insert_measurements(datos)
+                invalidate_web_cache(task_name)
+                print(f"✅ {task_name} completado.")
+                return {"status": "success", "records": len(datos)}
+
+            conteo = db.copy_measurements(datos)
+            if conteo is None:
+                raise RuntimeError("No se pudieron persistir las mediciones.")
+            if conteo["inserted"]:
+                invalidate_web_cache(task_name)
 
             print(f"✅ {task_name} completado.")
-            return {"status": "success", "records": len(datos)}
+            return {"status": "success", "records": len(datos), **conteo}
 
         except Exception as e:
             print(f"⚠️ Error en {task_name}: {e}")
@@ -38,7 +64,7 @@ def create_celery_task(task_name, scraper):
     return task
 
 for task_name, config in TASKS.items():
-    create_celery_task(task_name, config["scraper"])
+    create_celery_task(task_name, config["scraper"], config.get("allow_empty", False))
 
 app.conf.beat_schedule = {
     task_name: {
@@ -58,26 +84,196 @@ def monthly_csv_export(self, year: int = None, month: int = None):
         print(f"❌ Error en exportación mensual: {exc}")
         raise self.retry(exc=exc, countdown=300)
 
-app.conf.beat_schedule["monthly_csv_export"] = {
-    "task":     "celery_tasks.monthly_csv_export",
-    "schedule": crontab(minute=0, hour=0, day_of_month=1),
+
+# La exportación programada es incremental: cada hora se regeneran sólo los
+# (plataforma, mes) cerrados cuyas mediciones cambiaron, incluido el mes que
+# acaba de cerrar. monthly_csv_export queda para regenerar un mes a pedido.
+@app.task(bind=True, name="celery_tasks.incremental_csv_export",
+          max_retries=1, default_retry_delay=300,
+          soft_time_limit=3000, time_limit=3300)
+def incremental_csv_export(self):
+    try:
+        summary = CSVExportService.sync_exports()
+        return {"status": "success" if not summary["failed"] else "partial", **summary}
+    except Exception as exc:
+        print(f"❌ Error en exportación incremental: {exc}")
+        raise self.retry(exc=exc, countdown=300)
+
+app.conf.beat_schedule["incremental_csv_export"] = {
+    "task":     "celery_tasks.incremental_csv_export",
+    "schedule": crontab(minute=20),
 }
 
 
+# ── Backfill de exports en paralelo ──────────────────────────────
+# backfill_all_exports reparte el plan (plataforma, mes) en
+# EXPORT_BACKFILL_CONCURRENCY "carriles": cada carril es un chain de
+# subtareas export_platform_month que corren de a una, y los carriles corren
+# en paralelo dentro de un chord. Así el backfill nunca ocupa más de N slots
+# del worker y las tareas de scraping siguen corriendo mientras tanto.
+#
+# Cada subtarea recibe el progreso acumulado de su carril (resultado de la
+# anterior en el chain) y le suma el suyo; el callback del chord junta los
+# carriles en el resumen final. Con task_acks_late, una subtarea cortada por
+# un reinicio del worker se vuelve a entregar, y las que ya estaban al día se
+# saltean (CSVExportService.is_up_to_date), así que relanzar el backfill
+# retoma donde quedó.
+EXPORT_BACKFILL_CONCURRENCY = int(os.getenv("EXPORT_BACKFILL_CONCURRENCY", 3))
+
+
+def _empty_progress():
+    return {"generated": 0, "skipped": 0, "empty": 0, "failed": 0,
+            "files": 0, "failures": []}
+
+
+@app.task(bind=True, name="celery_tasks.export_platform_month",
+          max_retries=2, default_retry_delay=60,
+          soft_time_limit=900, time_limit=1200)
+def export_platform_month(self, progress=None, *, platform_id: int, year: int, month: int,
+                          force: bool = False, position: int = None, total: int = None):
+    progress = dict(progress or _empty_progress())
+    label    = f"plataforma {platform_id} {year}-{month:02d}"
+    try:
+        result = CSVExportService.export_platform_month(platform_id, year, month, force=force)
+    except Exception as exc:
+        if self.request.retries < self.max_retries:
+            print(f"⚠️ Error exportando {label}, reintentando: {exc}")
+            raise self.retry(exc=exc, countdown=60)
+        # Agotados los reintentos se registra la falla y el carril sigue.
+        print(f"❌ Error exportando {label}: {exc}")
+        progress["failed"]  += 1
+        progress["failures"] = progress["failures"] + [f"{label}: {exc}"]
+        return progress
+
+    status = result["status"]
+    progress[status if status in progress else "empty"] += 1
+    progress["files"] += len(result["paths"])
+    print(f"📊 Backfill [{position}/{total}] {result['platform'] or label} "
+          f"{year}-{month:02d}: {status}")
+    return progress
+
+
+@app.task(name="celery_tasks.backfill_exports_summary")
+def backfill_exports_summary(lane_results, total: int = None):
+    summary = _empty_progress()
+    for lane in lane_results:
+        for key in ("generated", "skipped", "empty", "failed", "files"):
+            summary[key] += lane[key]
+        summary["failures"] += lane["failures"]
+    print(f"🏁 Backfill completo ({total} plataforma-mes): {summary['generated']} regenerados, "
+          f"{summary['skipped']} al día, {summary['empty']} sin datos, "
+          f"{summary['failed']} con error, {summary['files']} archivos")
+    return {"status": "success" if not summary["failed"] else "partial", "total": total, **summary}
+
+
 @app.task(bind=True, name="celery_tasks.backfill_all_exports",
-          max_retries=1, default_retry_delay=600,
-          soft_time_limit=10800, time_limit=12600)
-def backfill_all_exports(self, start_year: int = None, start_month: int = None):
-    """Genera CSV y TXT históricos para todas las plataformas desde el inicio de los datos."""
+          max_retries=1, default_retry_delay=600)
+def backfill_all_exports(self, start_year: int = None, start_month: int = None,
+                         force: bool = False, concurrency: int = None):
+    """
+    Encola el backfill de los exports históricos (CSV, TXT y, con pyarrow,
+    Parquet) para todas las plataformas y
+    retorna enseguida; el resumen lo deja la tarea backfill_exports_summary.
+    force=True regenera también los meses que ya están al día.
+    """
     try:
-        results = CSVExportService.backfill_all_months(
-            start_year=start_year, start_month=start_month
-        )
-        return {"status": "success", "files_generated": len(results), "paths": results}
+        conn = CSVExportService._connect()
+        try:
+            plan = CSVExportService.backfill_plan(conn, start_year, start_month)
+        finally:
+            conn.close()
+        if not plan:
+            print("⚠️  No hay mediciones en la base de datos.")
+            return {"status": "success", "total": 0}
+
+        lanes_n = max(1, min(concurrency or EXPORT_BACKFILL_CONCURRENCY, len(plan)))
+        total   = len(plan)
+        subtasks = [
+            export_platform_month.s(platform_id=pid, year=year, month=month, force=force,
+                                    position=i, total=total)
+            for i, (pid, _pname, _ptype, year, month) in enumerate(plan, start=1)
+        ]
+        lanes  = [chain(*subtasks[i::lanes_n]) for i in range(lanes_n)]
+        result = chord(group(lanes))(backfill_exports_summary.s(total=total))
+
+        print(f"🗂️  Backfill encolado: {total} plataforma-mes en {lanes_n} carriles "
+              f"(resumen: {result.id})")
+        return {"status": "dispatched", "total": total, "lanes": lanes_n, "summary_task_id": result.id}
     except Exception as exc:
         print(f"❌ Error en backfill: {exc}")
         raise self.retry(exc=exc, countdown=600)
 
+
+# ── Particiones de measurement ───────────────────────────────────
+# Crea por adelantado las particiones mensuales del mes actual y los
+# PARTITION_MONTHS_AHEAD siguientes (ver services/partitions.py). Corre a
+# diario: si una pasada falla, sobran días antes de que el mes haga falta.
+@app.task(bind=True, name="celery_tasks.ensure_measurement_partitions",
+          max_retries=3, default_retry_delay=600)
+def ensure_measurement_partitions(self):
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        try:
+            created = ensure_upcoming_partitions(conn)
+        finally:
+            conn.close()
+        return {"status": "success", "created": created}
+    except Exception as exc:
+        print(f"❌ Error creando particiones de measurement: {exc}")
+        raise self.retry(exc=exc, countdown=600)
+
+app.conf.beat_schedule["ensure_measurement_partitions"] = {
+    "task":     "celery_tasks.ensure_measurement_partitions",
+    "schedule": crontab(hour=2, minute=40),
+}
+
+# ── Contadores del dashboard admin ───────────────────────────────
+# El ingestor suma cada lote a oogsj_data.sensor_stats; una vez por día se
+# recuentan desde measurement (cargas por fuera del ingestor, lotes cuyo
+# refresh falló) y se descartan los intervalos vencidos de
+# sensor_stats_recent (ver services/sensor_stats.py).
+@app.task(bind=True, name="celery_tasks.reconcile_sensor_stats",
+          max_retries=3, default_retry_delay=600)
+def reconcile_sensor_stats(self):
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        try:
+            corregidos = sensor_stats.reconcile(conn)
+        finally:
+            conn.close()
+        return {"status": "success", "corrected": corregidos}
+    except Exception as exc:
+        print(f"❌ Error recontando sensor_stats: {exc}")
+        raise self.retry(exc=exc, countdown=600)
+
+app.conf.beat_schedule["reconcile_sensor_stats"] = {
+    "task":     "celery_tasks.reconcile_sensor_stats",
+    "schedule": crontab(hour=3, minute=20),
+}
+
+# Reconciliación diaria de measurement_hourly/daily: los últimos
+# rollups.RECONCILE_DAYS días se recalculan desde measurement, para las
+# cargas por fuera de copy_measurements y los lotes cuyo refresh falló.
+# Rangos más largos: refresh_rollups.py.
+@app.task(bind=True, name="celery_tasks.reconcile_rollups",
+          max_retries=3, default_retry_delay=600)
+def reconcile_rollups(self):
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        try:
+            horas, dias = rollups.reconcile_recent(conn)
+        finally:
+            conn.close()
+        return {"status": "success", "hours": horas, "days": dias}
+    except Exception as exc:
+        print(f"❌ Error reconciliando rollups: {exc}")
+        raise self.retry(exc=exc, countdown=600)
+
+app.conf.beat_schedule["reconcile_rollups"] = {
+    "task":     "celery_tasks.reconcile_rollups",
+    "schedule": crontab(hour=3, minute=40),
+}
+
 app.conf.timezone                   = 'UTC'
 app.conf.task_acks_late             = True
 app.conf.worker_prefetch_multiplier = 1
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+check_sensor_latest.py
+======================
+Compara oogsj_data.sensor_latest con el último dato real de cada sensor en
+oogsj_data.measurement y, con --reparar, la reconstruye desde cero.
+
+Hace falta después de cargas que no pasan por DBHandler.copy_measurements
+(p. ej. backfill_historico_weatherlink.py), de borrar mediciones, o si el
+ingestor avisó "No se pudo actualizar el último dato por sensor".
+
+Uso (dentro del contenedor api_ingestor):
+    python check_sensor_latest.py             # sólo informa (exit 1 si hay diferencias)
+    python check_sensor_latest.py --reparar
+"""
+
+import argparse
+import sys
+
+import psycopg2
+
+from services.config import DB_CONFIG
+from services import sensor_latest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica y reconstruye oogsj_data.sensor_latest.")
+    parser.add_argument("--reparar", action="store_true",
+                        help="reconstruir la tabla desde measurement")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        diferencias = sensor_latest.check(conn)
+        for sensor_id, ts_raw, val_raw, ts_tabla, val_tabla in diferencias:
+            print(f"❗ Sensor {sensor_id}: measurement={ts_raw} {val_raw} | "
+                  f"sensor_latest={ts_tabla} {val_tabla}")
+        if not diferencias:
+            print("✅ sensor_latest coincide con measurement.")
+            return 0
+        print(f"⚠️  {len(diferencias)} sensores con diferencias.")
+        if not args.reparar:
+            return 1
+        filas = sensor_latest.rebuild(conn)
+        print(f"🏁 sensor_latest reconstruida: {filas} sensores.")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
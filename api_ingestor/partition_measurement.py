@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+partition_measurement.py
+========================
+Mueve oogsj_data.measurement a la tabla particionada por mes
+oogsj_data.measurement_new (migración 20261020_partition_measurement.sql)
+sin frenar el ingestor.
+
+1) Copia (default): crea las particiones de todos los meses con datos y
+   copia las filas en lotes por rango de id, con un commit por lote. El
+   ingestor sigue escribiendo en measurement mientras tanto. Se puede cortar
+   y relanzar: retoma desde MAX(id) de measurement_new.
+
+2) --cutover: con las escrituras bloqueadas (las lecturas siguen), copia lo
+   que entró desde la última pasada y renombra
+       measurement     → measurement_old
+       measurement_new → measurement
+   en una sola transacción. La secuencia de id pasa a ser de la tabla nueva.
+   measurement_old queda para verificar; se borra a mano.
+
+measurement sólo recibe INSERTs (sin UPDATE ni DELETE), así que copiar por
+id alcanza. Como un lote del ingestor puede confirmar ids más bajos que
+otro ya confirmado, cada pasada relee los últimos --solape ids y el
+ON CONFLICT DO NOTHING descarta los ya copiados.
+
+Uso (dentro del contenedor api_ingestor):
+    python partition_measurement.py                        # copia
+    python partition_measurement.py --lote 20000 --pausa 0.5
+    python partition_measurement.py --cutover
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import psycopg2
+
+from services.config import DB_CONFIG
+from services.partitions import PARTITION_MONTHS_AHEAD, ensure_partitions
+
+COLUMNS = "id, sensor_id, timestamp, value, quality_flag, processing_level_id, location_id"
+
+COPY_SQL = f"""
+    INSERT INTO oogsj_data.measurement_new ({COLUMNS})
+    SELECT {COLUMNS} FROM oogsj_data.measurement
+    WHERE id > %s AND id <= %s
+    ON CONFLICT DO NOTHING;
+"""
+
+
+def _table_exists(cur, name):
+    cur.execute("SELECT to_regclass(%s);", (f"oogsj_data.{name}",))
+    return cur.fetchone()[0] is not None
+
+
+def _watermark(cur, solape):
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM oogsj_data.measurement_new;")
+    return max(cur.fetchone()[0] - solape, 0)
+
+
+def copiar(conn, lote, solape, pausa):
+    with conn.cursor() as cur:
+        cur.execute("SELECT MIN(timestamp), MAX(timestamp), COALESCE(MAX(id), 0) FROM oogsj_data.measurement;")
+        min_ts, max_ts, max_id = cur.fetchone()
+    conn.commit()
+    if min_ts is None:
+        print("⚠️  measurement está vacía: no hay nada que copiar.")
+        return
+
+    horizonte = datetime.utcnow() + timedelta(days=31 * PARTITION_MONTHS_AHEAD)
+    ensure_partitions(conn, min_ts, max(max_ts, horizonte))
+
+    with conn.cursor() as cur:
+        desde = _watermark(cur, solape)
+    conn.commit()
+    print(f"📦 Copiando ids {desde + 1:,} → {max_id:,} en lotes de {lote:,}")
+
+    total = 0
+    while desde < max_id:
+        hasta = min(desde + lote, max_id)
+        with conn.cursor() as cur:
+            cur.execute(COPY_SQL, (desde, hasta))
+            total += cur.rowcount
+        conn.commit()
+        print(f"   ids ≤ {hasta:,}: {total:,} filas copiadas")
+        desde = hasta
+        if pausa:
+            time.sleep(pausa)
+    print(f"🏁 Copia completa: {total:,} filas. Siguiente paso: --cutover")
+
+
+def cutover(conn, solape):
+    with conn.cursor() as cur:
+        # Bloquea INSERT/UPDATE/DELETE (el ingestor espera) pero no SELECT.
+        cur.execute("LOCK TABLE oogsj_data.measurement IN SHARE ROW EXCLUSIVE MODE;")
+        desde = _watermark(cur, solape)
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM oogsj_data.measurement;")
+        max_id = cur.fetchone()[0]
+        cur.execute(COPY_SQL, (desde, max_id))
+        print(f"📦 Puesta al día: {cur.rowcount:,} filas (ids > {desde:,})")
+
+        cur.execute("ALTER TABLE oogsj_data.measurement RENAME TO measurement_old;")
+        cur.execute("ALTER TABLE oogsj_data.measurement_new RENAME TO measurement;")
+        cur.execute("ALTER SEQUENCE oogsj_data.measurement_id_seq OWNED BY oogsj_data.measurement.id;")
+    conn.commit()
+    print("🏁 Cutover completo: oogsj_data.measurement ya es la tabla particionada.")
+    print("   Verificar y después: DROP TABLE oogsj_data.measurement_old;")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migra oogsj_data.measurement a particiones mensuales.")
+    parser.add_argument("--cutover", action="store_true",
+                        help="copiar lo pendiente y renombrar las tablas")
+    parser.add_argument("--lote", type=int, default=50000, help="ids por transacción (default: 50000)")
+    parser.add_argument("--solape", type=int, default=10000,
+                        help="ids que se releen en cada pasada (default: 10000)")
+    parser.add_argument("--pausa", type=float, default=0.0,
+                        help="segundos de espera entre lotes (default: 0)")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        with conn.cursor() as cur:
+            pendiente = _table_exists(cur, "measurement_new")
+        conn.commit()
+        if not pendiente:
+            print("⚠️  No existe oogsj_data.measurement_new: falta aplicar la migración "
+                  "20261020_partition_measurement.sql o el cutover ya se hizo.")
+            return
+        if args.cutover:
+            cutover(conn, args.solape)
+        else:
+            copiar(conn, args.lote, args.solape, args.pausa)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+refresh_rollups.py
+==================
+Recalcula los rollups oogsj_data.measurement_hourly y measurement_daily
+a partir de oogsj_data.measurement.
+
+El ingestor los mantiene solo en cada lote; este script sirve para:
+  - poblarlos la primera vez, después de aplicar
+    db_init/migrations/20261019_add_measurement_rollups.sql, y recalcularlos
+    después de 20261026_add_rollup_angular_means.sql;
+  - repararlos después de cargas que no pasan por DBHandler.copy_measurements
+    (p. ej. backfill_historico_weatherlink.py) o de un lote cuyo rollup falló.
+
+Es idempotente: cada hora/día se recalcula completo.
+
+Uso (dentro del contenedor api_ingestor):
+    python refresh_rollups.py                          # todo el histórico
+    python refresh_rollups.py --desde 2026-05-01       # desde una fecha
+    python refresh_rollups.py --desde 2026-05-01 --hasta 2026-06-01 --dias-por-tramo 1
+"""
+
+import argparse
+from datetime import datetime, timedelta
+
+import psycopg2
+
+from services.config import DB_CONFIG
+from services.rollups import refresh_range
+
+
+def _fecha(texto):
+    return datetime.strptime(texto, "%Y-%m-%d")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcula los rollups horarios y diarios de measurement.")
+    parser.add_argument("--desde", type=_fecha, help="YYYY-MM-DD (default: primera medición)")
+    parser.add_argument("--hasta", type=_fecha, help="YYYY-MM-DD, excluida (default: mañana)")
+    parser.add_argument("--dias-por-tramo", type=int, default=7,
+                        help="días por transacción (default: 7)")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        desde = args.desde
+        if desde is None:
+            with conn.cursor() as cur:
+                cur.execute("SELECT MIN(timestamp) FROM oogsj_data.measurement")
+                min_ts = cur.fetchone()[0]
+            if min_ts is None:
+                print("⚠️  No hay mediciones en la base de datos.")
+                return
+            desde = min_ts.replace(hour=0, minute=0, second=0, microsecond=0)
+        hasta = args.hasta or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+        print(f"🗂️  Rollups: {desde:%Y-%m-%d} → {hasta:%Y-%m-%d}")
+        horas, dias = refresh_range(conn, desde, hasta, step=timedelta(days=args.dias_por_tramo))
+        print(f"🏁 Rollups completos: {horas:,} horas y {dias:,} días actualizados")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
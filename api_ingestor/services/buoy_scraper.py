@@ -1,7 +1,8 @@
 import requests
-import pandas as pd
-import io
-from datetime import datetime
+
+from .history_csv import build_measurement_tuples, parse_history_csv
+from .http_fetch import fetch_all
+
 
 class BuoyScraper:
     BASE_URL = "http://emac.criba.edu.ar/servicios/getHistoryValues.php"
@@ -25,30 +26,23 @@ class BuoyScraper:
         processing_level_id = 1
         location_id = 2
 
+        respuestas = fetch_all(
+            {
+                var_code: f"{BuoyScraper.BASE_URL}?station_code={BuoyScraper.STATION_CODE}&var_code={var_code}"
+                for var_code in BuoyScraper.VARIABLES
+            },
+            timeout=10,
+        )
+
         for var_code, sensor_id in BuoyScraper.VARIABLES.items():
-            url = f"{BuoyScraper.BASE_URL}?station_code={BuoyScraper.STATION_CODE}&var_code={var_code}"
             try:
-                response = requests.get(url, timeout=10)
+                response = respuestas[var_code].result()
                 response.raise_for_status()
 
-                if not response.text.strip():
-                    raise ValueError("Respuesta vacía")
-
-                df = pd.read_csv(io.StringIO(response.text))
-
-                if df.shape[1] < 2:
-                    raise ValueError("Formato inesperado en el CSV")
-
-                df.columns = ["timestamp", "value"]
-                df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
-                df["value"] = pd.to_numeric(df["value"], errors="coerce")
-
-                df = df.dropna()
-
-                tuples = [
-                    (row["timestamp"], row["value"], quality_flag, processing_level_id, sensor_id, location_id)
-                    for _, row in df.iterrows()
-                ]
+                df = parse_history_csv(response.text)
+                tuples = build_measurement_tuples(
+                    df, sensor_id, location_id, quality_flag, processing_level_id
+                )
                 results.extend(tuples)
 
             except requests.RequestException as e:
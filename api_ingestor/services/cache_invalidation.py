@@ -0,0 +1,41 @@
+"""
+cache_invalidation.py
+=====================
+Invalida el cache de respuestas de web_app (web_app/cache.py) cuando una
+tarea de ingesta guarda datos nuevos: incrementa la versión de la etiqueta
+(el nombre de la tarea en task_config.TASKS) y web_app deja de usar las
+respuestas cacheadas con la versión anterior. También guarda el instante,
+que web_app usa como Last-Modified / ETag (web_app/conditional.py).
+
+Si Redis no responde no pasa nada grave: las respuestas viejas expiran por
+TTL. Por eso los errores sólo se loguean.
+"""
+
+import os
+import time
+
+import redis
+
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://cache:6379/1")
+VERSION_KEY     = "oogsj:cache:ver:{tag}"       # igual que en web_app/cache.py
+LASTMOD_KEY     = "oogsj:cache:lastmod:{tag}"
+
+_client = None
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(CACHE_REDIS_URL, socket_connect_timeout=1, socket_timeout=1)
+    return _client
+
+
+def invalidate(*tags):
+    try:
+        client = _get_client()
+        now = int(time.time())
+        for tag in tags:
+            client.incr(VERSION_KEY.format(tag=tag))
+            client.set(LASTMOD_KEY.format(tag=tag), now)
+    except redis.RedisError as e:
+        print(f"⚠️ No se pudo invalidar el cache web de {', '.join(tags)}: {e}")
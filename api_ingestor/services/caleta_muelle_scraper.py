@@ -1,17 +1,16 @@
 import requests
 import time
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 import os
-import psycopg2
-from psycopg2 import sql
 
 # Cargar claves desde archivo .env
 load_dotenv(".env")
 
 class WeatherCMScraper:
     """
-    Clase para obtener, procesar e insertar datos de la estación meteorológica
-    del Muelle de Caleta Córdova en la base de datos.
+    Clase para obtener y procesar los datos de la estación meteorológica
+    del Muelle de Caleta Córdova; la tarea Celery los inserta.
     """
 
     # --- Mapeo y Configuración ---
@@ -152,62 +151,42 @@ class WeatherCMScraper:
         return datos_transformados
 
     @staticmethod
-    def insertar_datos_en_bd(datos_esenciales):
-        """Inserta los datos procesados en la tabla de mediciones de la base de datos."""
-        conn = None
-        try:
-            conn = psycopg2.connect(
-                dbname=os.getenv("POSTGRES_DB"), # Corregido de DB_NAME
-                user=os.getenv("POSTGRES_USER"),
-                password=os.getenv("POSTGRES_PASSWORD"),
-                host=os.getenv("POSTGRES_HOST"),
-                port=os.getenv("POSTGRES_PORT")
-            )
-            cur = conn.cursor()
-            
-            timestamp = int(time.time())
-            
-            for key, item in datos_esenciales.items():
-                map_info = WeatherCMScraper.SENSOR_DB_MAP.get(key)
-                if not map_info:
-                    print(f"⚠️ Clave '{key}' no encontrada en el mapeo de la base de datos.")
-                    continue
-                sensor_id = map_info["sensor_id"]
-                value = item["value"]
-                quality_flag = 4 if map_info["is_sentinel"] or value is None else 1
-                
-                query = sql.SQL("""
-                    INSERT INTO oogsj_data.measurement
-                    (sensor_id, timestamp, value, quality_flag, processing_level_id, location_id)
-                    VALUES (%s, to_timestamp(%s), %s, %s, %s, %s)
-                    ON CONFLICT (sensor_id, timestamp) DO NOTHING;
-                """)
-                
-                cur.execute(query, (
-                    sensor_id,
-                    timestamp,
-                    value,
-                    quality_flag,
-                    WeatherCMScraper.PROCESSING_LEVEL_ID,
-                    WeatherCMScraper.LOCATION_ID
-                ))
-            
-            conn.commit()
-            print("✅ Datos insertados en la base de datos correctamente.")
-
-        except psycopg2.Error as e:
-            print(f"❌ Error de base de datos: {e}")
-            if conn:
-                conn.rollback()
-        finally:
-            if conn:
-                cur.close()
-                conn.close()
+    def armar_filas(datos_esenciales, timestamp=None):
+        """
+        Arma las tuplas (timestamp, value, quality_flag, processing_level_id,
+        sensor_id, location_id) de los datos procesados para
+        DBHandler.copy_measurements. Las variables sin valor se omiten
+        (measurement.value es NOT NULL).
+        """
+        if timestamp is None:
+            timestamp = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+        filas = []
+        for key, item in datos_esenciales.items():
+            map_info = WeatherCMScraper.SENSOR_DB_MAP.get(key)
+            if not map_info:
+                print(f"⚠️ Clave '{key}' no encontrada en el mapeo de la base de datos.")
+                continue
+            value = item["value"]
+            if value is None:
+                continue
+            quality_flag = 4 if map_info["is_sentinel"] else 1
+            filas.append((
+                timestamp,
+                value,
+                quality_flag,
+                WeatherCMScraper.PROCESSING_LEVEL_ID,
+                map_info["sensor_id"],
+                WeatherCMScraper.LOCATION_ID,
+            ))
+        return filas
 
     @staticmethod
     def fetch_station_data():
         """
-        Método principal que orquesta la obtención, procesamiento e inserción de datos.
+        Método principal que orquesta la obtención y el procesamiento de los
+        datos. Devuelve las tuplas para DBHandler.copy_measurements, que
+        además mantiene sensor_latest, sensor_stats y los rollups.
         """
         print(f"--- Ejecutando tarea para la estación {WeatherCMScraper.STATION_ID} ---")
         datos_crudos = WeatherCMScraper.obtener_datos_estacion(WeatherCMScraper.STATION_ID)
@@ -224,8 +203,9 @@ class WeatherCMScraper:
         print("\n✅ Diccionario final con unidades métricas y esenciales:")
         print(datos_finales)
 
-        WeatherCMScraper.insertar_datos_en_bd(datos_finales)
+        filas = WeatherCMScraper.armar_filas(datos_finales)
         print("--- Tarea finalizada ---")
+        return filas
 
 # Para probar el método directamente (si no usas Celery)
 if __name__ == "__main__":
@@ -111,6 +111,13 @@ class WeatherCRScraper:
 
     @staticmethod
     def fetch_station_data():
+        """
+        Consulta la estación y devuelve las tuplas (timestamp, value,
+        quality_flag, processing_level_id, sensor_id, location_id) para
+        DBHandler.copy_measurements, que además mantiene sensor_latest,
+        sensor_stats y los rollups. La conexión propia sólo resuelve
+        plataforma, sensores y catálogos.
+        """
         data = WeatherCRScraper.fetch_data()
         if not data:
             return
@@ -122,6 +129,8 @@ class WeatherCRScraper:
         now_utc = datetime.now(timezone.utc)
         if timestamp > now_utc:
             timestamp = now_utc  # recorte por seguridad
+        # measurement.timestamp es TIMESTAMP sin zona, en UTC
+        timestamp = timestamp.replace(tzinfo=None)
 
         conn = psycopg2.connect(**DB_CONFIG)
         cur = conn.cursor()
@@ -133,6 +142,12 @@ class WeatherCRScraper:
                 return
             platform_id = platform[0]
 
+            cur.execute("""
+                SELECT (SELECT flag FROM oogsj_data.quality_flag WHERE flag = 0),
+                       (SELECT id FROM oogsj_data.processing_level WHERE level = 'Raw')
+            """)
+            quality_flag, processing_level_id = cur.fetchone()
+
             variables = {
                 "Temperatura Exterior": ("temp_out", "Grados Celsius", "°C"),
                 "Humedad Exterior": ("hum_out", "Porcentaje", "%"),
@@ -140,6 +155,7 @@ class WeatherCRScraper:
                 "Velocidad del Viento": ("wind_speed", "Metros por segundo", "m/s")
             }
 
+            filas = []
             for nombre, (clave_json, unidad_si, simbolo_si) in variables.items():
                 # Saltear None/centinelas ANTES de convertir
                 if clave_json not in data:
@@ -164,24 +180,11 @@ class WeatherCRScraper:
                     conn, nombre, unidad_si, simbolo_si, sensor_name, platform_id
                 )
 
-                try:
-                    cur.execute("""
-                        INSERT INTO oogsj_data.measurement (
-                            sensor_id, timestamp, value, quality_flag, processing_level_id, location_id
-                        ) VALUES (
-                            %s, %s, %s,
-                            (SELECT flag FROM oogsj_data.quality_flag WHERE flag = 0),
-                            (SELECT id FROM oogsj_data.processing_level WHERE level = 'Raw'),
-                            %s
-                        )
-                        ON CONFLICT (sensor_id, timestamp) DO NOTHING;
-                    """, (sensor_id, timestamp, float(valor_si), LOCATION_ID))
-                    print(f"✅ Insertado: {nombre} = {valor_si:.2f} {simbolo_si} @ {timestamp}")
-                except Exception as e:
-                    print(f"❌ Error insertando {nombre}: {e}")
-                    conn.rollback()
-
-            conn.commit()
+                filas.append((timestamp, float(valor_si), quality_flag,
+                              processing_level_id, sensor_id, LOCATION_ID))
+                print(f"📥 {nombre} = {valor_si:.2f} {simbolo_si} @ {timestamp}")
+
+            return filas
         finally:
             try:
                 cur.close()
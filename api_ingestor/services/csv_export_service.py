@@ -3,17 +3,29 @@ from __future__ import annotations
 import csv
 import os
 import re
+import shutil
+import tempfile
 from calendar import monthrange
-from collections import defaultdict
 from datetime import date, datetime, timedelta
 
 import psycopg2
 
 from services.config import DB_CONFIG
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:     # imagen sin pyarrow: se siguen generando CSV y TXT
+    pa = pq = None
+
 EXPORT_DIR = os.environ.get("EXPORT_DIR", "/app/exports")
 
 
+def export_formats() -> tuple:
+    """Formatos que genera cada plataforma-mes: Parquet sólo con pyarrow."""
+    return ("csv", "txt", "parquet") if pa is not None else ("csv", "txt")
+
+
 def slugify(text: str) -> str:
     text = text.lower()
     for src, dst in [("á","a"),("à","a"),("ä","a"),("â","a"),("ã","a"),
@@ -47,6 +59,29 @@ MEASUREMENT_QUERY = """
     ORDER BY m.timestamp, v.name;
 """
 
+# Huella de los datos de una plataforma y mes: si no cambió desde la última
+# exportación (oogsj_data.export_manifest), los archivos siguen al día.
+FINGERPRINT_QUERY = """
+    SELECT COUNT(*), MAX(m.timestamp), MAX(m.id)
+    FROM oogsj_data.measurement m
+    JOIN oogsj_data.sensor s ON m.sensor_id = s.id
+    WHERE s.platform_id = %s
+      AND m.timestamp >= %s
+      AND m.timestamp <  %s;
+"""
+
+# (plataforma, mes) con mediciones ingresadas después de un measurement.id.
+CHANGED_MONTHS_QUERY = """
+    SELECT DISTINCT s.platform_id, date_trunc('month', m.timestamp)
+    FROM oogsj_data.measurement m
+    JOIN oogsj_data.sensor s ON m.sensor_id = s.id
+    WHERE m.id > %s AND m.id <= %s;
+"""
+
+# Las inserciones concurrentes pueden confirmarse fuera de orden de id: cada
+# corrida incremental vuelve a mirar este margen por debajo del último id.
+EXPORT_ID_OVERLAP = int(os.environ.get("EXPORT_ID_OVERLAP", 10000))
+
 CSV_HEADER = ["timestamp", "variable", "unidad", "valor",
               "quality_flag", "flag_descripcion", "nivel_procesamiento"]
 
@@ -73,6 +108,248 @@ def _month_range(start_year: int, start_month: int, end_year: int, end_month: in
             y += 1
 
 
+# ── Exportación en streaming ──────────────────────────────────────
+# Las filas se leen con un cursor del lado del servidor (named cursor) de a
+# EXPORT_ITERSIZE y se escriben a medida que llegan, así la memoria del
+# worker no depende de cuántas mediciones tenga el mes. Como el encabezado
+# lleva totales (registros, timestamps, columnas) que recién se conocen al
+# final, el cuerpo va a un archivo temporal y el archivo final se arma al
+# terminar (.part + os.replace: nunca se sirve un export a medio escribir).
+EXPORT_ITERSIZE = int(os.environ.get("EXPORT_ITERSIZE", 5000))
+
+
+def _period(year: int, month: int):
+    """(inicio, último día, fin exclusivo) del mes."""
+    period_start = datetime(year, month, 1)
+    period_last  = datetime(year, month, monthrange(year, month)[1])
+    return period_start, period_last, period_last + timedelta(days=1)
+
+
+def _export_path(platform_name: str, year: int, month: int, ext: str, mkdir: bool = True) -> str:
+    slug   = slugify(platform_name)
+    folder = os.path.join(EXPORT_DIR, slug, str(year))
+    if mkdir:
+        os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{year}_{month:02d}_{slug}.{ext}")
+
+
+def _parquet_path(platform_name: str, year: int, month: int, mkdir: bool = True) -> str:
+    """
+    Los Parquet forman un dataset por plataforma particionado estilo Hive:
+    <slug>/parquet/year=YYYY/month=MM/YYYY_MM_<slug>.parquet, así
+    pandas.read_parquet("<slug>/parquet") lee varios años de una vez (con
+    year y month como columnas) y cada mes sigue siendo un archivo suelto.
+    """
+    slug   = slugify(platform_name)
+    folder = os.path.join(EXPORT_DIR, slug, "parquet", f"year={year}", f"month={month:02d}")
+    if mkdir:
+        os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{year}_{month:02d}_{slug}.parquet")
+
+
+def _stream_measurements(conn, platform_id: int, period_start: datetime, period_end: datetime):
+    """Itera las filas de MEASUREMENT_QUERY sin traer el mes completo a memoria."""
+    try:
+        with conn.cursor(name=f"export_platform_{platform_id}") as cur:
+            cur.itersize = EXPORT_ITERSIZE
+            cur.execute(MEASUREMENT_QUERY, (platform_id, period_start, period_end))
+            yield from cur
+    finally:
+        # Sólo lectura: cerrar la transacción libera el snapshot entre meses.
+        conn.rollback()
+
+
+class _ExportWriter:
+    """Base: cuerpo en un temporal junto al destino, armado final atómico."""
+
+    def __init__(self, filepath: str, newline=None):
+        self.filepath = filepath
+        self._newline = newline
+        self._body    = tempfile.TemporaryFile("w+", newline=newline, encoding="utf-8",
+                                               dir=os.path.dirname(filepath))
+
+    def _publish(self, header_lines: list[str], write_body) -> str:
+        part = self.filepath + ".part"
+        try:
+            with open(part, "w", newline=self._newline, encoding="utf-8") as fh:
+                for line in header_lines:
+                    fh.write(line + "\n")
+                self._body.seek(0)
+                write_body(fh)
+            os.replace(part, self.filepath)
+        except Exception:
+            if os.path.exists(part):
+                os.remove(part)
+            raise
+        return self.filepath
+
+    def close(self):
+        self._body.close()
+
+
+class _LongCSVWriter(_ExportWriter):
+    """CSV largo: una fila por medición, en el orden en que llegan."""
+
+    def __init__(self, filepath: str):
+        super().__init__(filepath, newline="")
+        self._writer = csv.writer(self._body)
+        self.rows    = 0
+
+    def add(self, row):
+        ts, variable, unit, value, qf, qfd, pl = row
+        unit_d, value_d = _to_display(variable, unit, value)
+        self._writer.writerow((ts, variable, unit_d, value_d, qf, qfd, pl))
+        self.rows += 1
+
+    def finish(self, platform_name: str, platform_type: str,
+               period_start: datetime, period_last: datetime) -> str | None:
+        if not self.rows:
+            return None
+        header = [
+            f"# Plataforma: {platform_name}",
+            f"# Tipo: {platform_type}",
+            f"# Período: {period_start.strftime('%Y-%m-%d')} / {period_last.strftime('%Y-%m-%d')}",
+            f"# Generado: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC",
+            f"# Registros: {self.rows}",
+        ]
+
+        def write_body(fh):
+            csv.writer(fh).writerow(CSV_HEADER)
+            shutil.copyfileobj(self._body, fh)
+
+        return self._publish(header, write_body)
+
+
+class _PivotTXTWriter(_ExportWriter):
+    """
+    TXT pivotado armado de a un timestamp por vez: como la consulta viene
+    ordenada por timestamp, alcanza con acumular la fila actual. Las columnas
+    se numeran en orden de aparición; una fila sólo conoce las columnas vistas
+    hasta ese momento, así que al armar el archivo final se completa con NaN
+    a la derecha hasta el ancho total.
+    """
+
+    def __init__(self, filepath: str):
+        super().__init__(filepath)
+        self.columns: dict[str, int] = {}     # "variable[unidad]" → índice
+        self.timestamps = 0
+        self._ts        = None
+        self._current: dict[int, object] = {}
+
+    def add(self, row):
+        ts, variable, unit, value = row[:4]
+        if self._current and ts != self._ts:
+            self._flush()
+        self._ts = ts
+        unit_d, value_d = _to_display(variable, unit, value)
+        col = f"{variable}[{unit_d}]"
+        idx = self.columns.setdefault(col, len(self.columns))
+        self._current[idx] = value_d
+
+    def _flush(self):
+        vals = [str(self._current[i]) if i in self._current else "NaN"
+                for i in range(len(self.columns))]
+        self._body.write(str(self._ts) + "\t" + "\t".join(vals) + "\n")
+        self.timestamps += 1
+        self._current = {}
+
+    def finish(self, platform_name: str, platform_type: str,
+               period_start: datetime, period_last: datetime) -> str | None:
+        if self._current:
+            self._flush()
+        if not self.timestamps:
+            return None
+        col_order = list(self.columns)
+        width     = len(col_order)
+        header = [
+            f"# Plataforma: {platform_name}",
+            f"# Tipo: {platform_type}",
+            f"# Periodo: {period_start.strftime('%Y-%m-%d')} / {period_last.strftime('%Y-%m-%d')}",
+            f"# Generado: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC",
+            f"# Timestamps: {self.timestamps}  Variables: {width}",
+            "# Separador: TAB  |  Valor ausente: NaN",
+            "\t".join(["timestamp"] + col_order),
+        ]
+
+        def write_body(fh):
+            for line in self._body:
+                missing = width - line.count("\t")
+                if missing:
+                    line = line[:-1] + "\tNaN" * missing + "\n"
+                fh.write(line)
+
+        return self._publish(header, write_body)
+
+
+# Parquet: mismas columnas que el CSV largo pero tipadas (timestamp, float);
+# los textos repetidos (variable, unidad, flags) quedan con dictionary
+# encoding y el archivo comprimido.
+PARQUET_COMPRESSION = os.environ.get("EXPORT_PARQUET_COMPRESSION", "zstd")
+PARQUET_ROW_GROUP   = int(os.environ.get("EXPORT_PARQUET_ROW_GROUP", 50000))
+
+if pa is not None:
+    PARQUET_SCHEMA = pa.schema([
+        ("timestamp",           pa.timestamp("us")),
+        ("variable",            pa.string()),
+        ("unidad",              pa.string()),
+        ("valor",               pa.float64()),
+        ("quality_flag",        pa.string()),
+        ("flag_descripcion",    pa.string()),
+        ("nivel_procesamiento", pa.string()),
+    ])
+
+
+class _ParquetWriter:
+    """
+    Parquet largo escrito de a un row group (PARQUET_ROW_GROUP filas) por
+    vez: la memoria queda acotada al row group, no al mes. Los datos de la
+    plataforma y el período van en la metadata del schema.
+    """
+
+    def __init__(self, filepath: str, metadata: dict):
+        self.filepath = filepath
+        self.rows     = 0
+        self._part    = filepath + ".part"
+        self._schema  = PARQUET_SCHEMA.with_metadata(metadata)
+        self._writer  = None
+        self._columns = {name: [] for name in PARQUET_SCHEMA.names}
+
+    def add(self, row):
+        ts, variable, unit, value, qf, qfd, pl = row
+        unit_d, value_d = _to_display(variable, unit, value)
+        for name, v in zip(PARQUET_SCHEMA.names, (ts, variable, unit_d, value_d, qf, qfd, pl)):
+            self._columns[name].append(v)
+        self.rows += 1
+        if len(self._columns["timestamp"]) >= PARQUET_ROW_GROUP:
+            self._flush()
+
+    def _flush(self):
+        if not self._columns["timestamp"]:
+            return
+        table = pa.Table.from_pydict(self._columns, schema=self._schema)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self._part, self._schema,
+                                            compression=PARQUET_COMPRESSION)
+        self._writer.write_table(table)
+        self._columns = {name: [] for name in PARQUET_SCHEMA.names}
+
+    def finish(self) -> str | None:
+        self._flush()
+        if self._writer is None:
+            return None
+        self._writer.close()
+        self._writer = None
+        os.replace(self._part, self.filepath)
+        return self.filepath
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self._part):
+            os.remove(self._part)
+
+
 class CSVExportService:
 
     @staticmethod
@@ -91,43 +368,58 @@ class CSVExportService:
             return cur.fetchall()   # [(id, name, type_name), ...]
 
     @staticmethod
-    def generate_for_platform(conn, platform_id: int, platform_name: str,
-                              platform_type: str, year: int, month: int) -> str | None:
-        """Genera un CSV (formato largo) para una plataforma y mes dados."""
-        period_start = datetime(year, month, 1)
-        last_day     = monthrange(year, month)[1]
-        period_end   = datetime(year, month, last_day) + timedelta(days=1)
-
-        slug   = slugify(platform_name)
-        folder = os.path.join(EXPORT_DIR, slug, str(year))
-        os.makedirs(folder, exist_ok=True)
+    def _fingerprint(conn, platform_id: int, period_start: datetime, period_end: datetime) -> tuple:
+        """(row_count, max_timestamp, max_measurement_id) de la plataforma en el período."""
+        with conn.cursor() as cur:
+            cur.execute(FINGERPRINT_QUERY, (platform_id, period_start, period_end))
+            return tuple(cur.fetchone())
 
-        filepath = os.path.join(folder, f"{year}_{month:02d}_{slug}.csv")
+    @staticmethod
+    def _manifest_entry(conn, platform_id: int, period_start: datetime):
+        """(row_count, max_timestamp) de la última exportación registrada, o None."""
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT row_count, max_timestamp
+                FROM oogsj_data.export_manifest
+                WHERE platform_id = %s AND period = %s;
+            """, (platform_id, period_start.date()))
+            row = cur.fetchone()
+        return tuple(row) if row else None
 
+    @staticmethod
+    def _record_export(conn, platform_id: int, period_start: datetime, fingerprint: tuple):
+        row_count, max_ts, max_id = fingerprint
         with conn.cursor() as cur:
-            cur.execute(MEASUREMENT_QUERY, (platform_id, period_start, period_end))
-            rows = cur.fetchall()
+            cur.execute("""
+                INSERT INTO oogsj_data.export_manifest
+                    (platform_id, period, row_count, max_timestamp, max_measurement_id)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (platform_id, period) DO UPDATE SET
+                    row_count          = EXCLUDED.row_count,
+                    max_timestamp      = EXCLUDED.max_timestamp,
+                    max_measurement_id = EXCLUDED.max_measurement_id,
+                    exported_at        = NOW();
+            """, (platform_id, period_start.date(), row_count, max_ts, max_id))
+        conn.commit()
 
-        if not rows:
+    @staticmethod
+    def generate_for_platform(conn, platform_id: int, platform_name: str,
+                              platform_type: str, year: int, month: int) -> str | None:
+        """Genera un CSV (formato largo) para una plataforma y mes dados."""
+        period_start, period_last, period_end = _period(year, month)
+        writer = _LongCSVWriter(_export_path(platform_name, year, month, "csv"))
+        try:
+            for row in _stream_measurements(conn, platform_id, period_start, period_end):
+                writer.add(row)
+            filepath = writer.finish(platform_name, platform_type, period_start, period_last)
+        finally:
+            writer.close()
+
+        if not filepath:
             print(f"⚠️  Sin datos: {platform_name} {year}-{month:02d}")
             return None
 
-        display_rows = []
-        for ts, variable, unit, value, qf, qfd, pl in rows:
-            unit_d, value_d = _to_display(variable, unit, value)
-            display_rows.append((ts, variable, unit_d, value_d, qf, qfd, pl))
-
-        with open(filepath, "w", newline="", encoding="utf-8") as fh:
-            fh.write(f"# Plataforma: {platform_name}\n")
-            fh.write(f"# Tipo: {platform_type}\n")
-            fh.write(f"# Período: {period_start.strftime('%Y-%m-%d')} / {datetime(year, month, last_day).strftime('%Y-%m-%d')}\n")
-            fh.write(f"# Generado: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC\n")
-            fh.write(f"# Registros: {len(display_rows)}\n")
-            writer = csv.writer(fh)
-            writer.writerow(CSV_HEADER)
-            writer.writerows(display_rows)
-
-        print(f"✅ {filepath}  ({len(rows):,} registros)")
+        print(f"✅ {filepath}  ({writer.rows:,} registros)")
         return filepath
 
     @staticmethod
@@ -138,57 +430,76 @@ class CSVExportService:
         Cada fila = un timestamp; cada columna = una variable[unidad].
         Separador: TAB. Valores ausentes: NaN.
         """
-        period_start = datetime(year, month, 1)
-        last_day     = monthrange(year, month)[1]
-        period_end   = datetime(year, month, last_day) + timedelta(days=1)
+        period_start, period_last, period_end = _period(year, month)
+        writer = _PivotTXTWriter(_export_path(platform_name, year, month, "txt"))
+        try:
+            for row in _stream_measurements(conn, platform_id, period_start, period_end):
+                writer.add(row)
+            filepath = writer.finish(platform_name, platform_type, period_start, period_last)
+        finally:
+            writer.close()
 
-        slug   = slugify(platform_name)
-        folder = os.path.join(EXPORT_DIR, slug, str(year))
-        os.makedirs(folder, exist_ok=True)
+        if not filepath:
+            return None
 
-        filepath = os.path.join(folder, f"{year}_{month:02d}_{slug}.txt")
+        print(f"✅ {filepath}  ({writer.timestamps:,} timestamps, {len(writer.columns)} variables)")
+        return filepath
 
-        with conn.cursor() as cur:
-            cur.execute(MEASUREMENT_QUERY, (platform_id, period_start, period_end))
-            rows = cur.fetchall()
+    @staticmethod
+    def generate_exports_for_platform(conn, platform_id: int, platform_name: str,
+                                      platform_type: str, year: int, month: int,
+                                      fingerprint: tuple = None) -> list[str]:
+        """
+        Genera CSV, TXT y Parquet de una plataforma y mes leyendo
+        MEASUREMENT_QUERY una sola vez: cada fila del stream alimenta a todos
+        los writers (Parquet sólo si pyarrow está instalado).
+        Retorna las rutas generadas (vacía si no hay datos).
+
+        Registra la huella de los datos exportados en export_manifest; se
+        toma antes de leer, así una fila que llega durante la exportación
+        hace que la próxima corrida incremental vuelva a generar el mes.
+        """
+        period_start, period_last, period_end = _period(year, month)
+        if fingerprint is None:
+            fingerprint = CSVExportService._fingerprint(conn, platform_id, period_start, period_end)
+        csv_writer = _LongCSVWriter(_export_path(platform_name, year, month, "csv"))
+        txt_writer = _PivotTXTWriter(_export_path(platform_name, year, month, "txt"))
+        writers    = [csv_writer, txt_writer]
+        pq_writer  = None
+        if pa is not None:
+            pq_writer = _ParquetWriter(_parquet_path(platform_name, year, month), {
+                "platform": platform_name,
+                "platform_type": platform_type,
+                "period": f"{period_start.strftime('%Y-%m-%d')}/{period_last.strftime('%Y-%m-%d')}",
+            })
+            writers.append(pq_writer)
+        try:
+            for row in _stream_measurements(conn, platform_id, period_start, period_end):
+                for writer in writers:
+                    writer.add(row)
+            csv_path = csv_writer.finish(platform_name, platform_type, period_start, period_last)
+            txt_path = txt_writer.finish(platform_name, platform_type, period_start, period_last)
+            pq_path  = pq_writer.finish() if pq_writer else None
+        finally:
+            for writer in writers:
+                writer.close()
 
-        if not rows:
-            return None
+        if not csv_path:
+            print(f"⚠️  Sin datos: {platform_name} {year}-{month:02d}")
+            return []
 
-        # Pivot: agrupar por timestamp, variables como columnas
-        data: dict[datetime, dict[str, float]] = defaultdict(dict)
-        col_order: list[str] = []
-        seen_cols: set[str] = set()
-
-        for ts, variable, unit, value, _qf, _qfd, _pl in rows:
-            unit_d, value_d = _to_display(variable, unit, value)
-            col = f"{variable}[{unit_d}]"
-            if col not in seen_cols:
-                col_order.append(col)
-                seen_cols.add(col)
-            data[ts][col] = value_d
-
-        all_timestamps = sorted(data.keys())
-
-        with open(filepath, "w", encoding="utf-8") as fh:
-            fh.write(f"# Plataforma: {platform_name}\n")
-            fh.write(f"# Tipo: {platform_type}\n")
-            fh.write(f"# Periodo: {period_start.strftime('%Y-%m-%d')} / {datetime(year, month, last_day).strftime('%Y-%m-%d')}\n")
-            fh.write(f"# Generado: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC\n")
-            fh.write(f"# Timestamps: {len(all_timestamps)}  Variables: {len(col_order)}\n")
-            fh.write("# Separador: TAB  |  Valor ausente: NaN\n")
-            fh.write("\t".join(["timestamp"] + col_order) + "\n")
-            for ts in all_timestamps:
-                row_vals = [str(data[ts].get(col, "NaN")) for col in col_order]
-                fh.write(str(ts) + "\t" + "\t".join(row_vals) + "\n")
-
-        print(f"✅ {filepath}  ({len(all_timestamps):,} timestamps, {len(col_order)} variables)")
-        return filepath
+        CSVExportService._record_export(conn, platform_id, period_start, fingerprint)
+        print(f"✅ {csv_path}  ({csv_writer.rows:,} registros)")
+        print(f"✅ {txt_path}  ({txt_writer.timestamps:,} timestamps, {len(txt_writer.columns)} variables)")
+        if pq_path:
+            print(f"✅ {pq_path}")
+        return [p for p in (csv_path, txt_path, pq_path) if p]
 
     @staticmethod
     def generate_all_platforms(year: int = None, month: int = None) -> list[str]:
         """
-        Genera CSV y TXT por plataforma para el mes indicado.
+        Genera los archivos de cada plataforma (export_formats(): CSV, TXT y,
+        con pyarrow, Parquet) para el mes indicado.
         Si no se pasa año/mes, usa el mes anterior al día de hoy.
         """
         if year is None or month is None:
@@ -206,67 +517,207 @@ class CSVExportService:
             generated = []
             for pid, pname, ptype in platforms:
                 try:
-                    for gen_fn in (CSVExportService.generate_for_platform,
-                                   CSVExportService.generate_txt_for_platform):
-                        path = gen_fn(conn, pid, pname, ptype, year, month)
-                        if path:
-                            generated.append(path)
+                    generated += CSVExportService.generate_exports_for_platform(
+                        conn, pid, pname, ptype, year, month)
                 except Exception as exc:
                     print(f"❌ Error en '{pname}': {exc}")
-            print(f"📦 Exportación completa: {len(generated)}/{len(platforms) * 2} archivos generados")
+            esperados = len(platforms) * len(export_formats())
+            print(f"📦 Exportación completa: {len(generated)}/{esperados} archivos generados")
             return generated
         finally:
             conn.close()
 
+    @staticmethod
+    def backfill_plan(conn, start_year: int = None, start_month: int = None) -> list[tuple]:
+        """
+        Lista de (platform_id, nombre, tipo, año, mes) a exportar desde el
+        inicio de los datos (o start_year/start_month) hasta el mes anterior
+        al día de hoy, ordenada por mes y plataforma.
+        """
+        if start_year is None:
+            with conn.cursor() as cur:
+                cur.execute("SELECT MIN(timestamp) FROM oogsj_data.measurement")
+                min_ts = cur.fetchone()[0]
+            if not min_ts:
+                return []
+            start_year, start_month = min_ts.year, min_ts.month
+
+        today = date.today()
+        end_year  = today.year  if today.month > 1 else today.year - 1
+        end_month = today.month - 1 if today.month > 1 else 12
+
+        platforms = CSVExportService._get_platforms(conn)
+        return [(pid, pname, ptype, year, month)
+                for year, month in _month_range(start_year, start_month, end_year, end_month)
+                for pid, pname, ptype in platforms]
+
+    @staticmethod
+    def is_up_to_date(conn, platform_id: int, platform_name: str, year: int, month: int,
+                      fingerprint: tuple) -> bool:
+        """
+        True si los archivos del mes (CSV, TXT y Parquet) existen y
+        export_manifest registra la misma huella (cantidad, último timestamp)
+        que tienen hoy los datos.
+        """
+        paths = [_export_path(platform_name, year, month, ext, mkdir=False) for ext in ("csv", "txt")]
+        if pa is not None:
+            paths.append(_parquet_path(platform_name, year, month, mkdir=False))
+        if not all(os.path.exists(p) for p in paths):
+            return False
+        period_start = _period(year, month)[0]
+        return CSVExportService._manifest_entry(conn, platform_id, period_start) == tuple(fingerprint[:2])
+
+    @staticmethod
+    def export_platform_month(platform_id: int, year: int, month: int, force: bool = False) -> dict:
+        """
+        Unidad de trabajo del backfill en paralelo: exporta una plataforma y
+        mes con su propia conexión.
+
+        Retorna {"status": "generated" | "skipped" | "empty" | "not_found",
+        "platform": nombre, "paths": [...]}. "skipped" = los archivos ya
+        estaban al día (ver is_up_to_date) y force=False.
+        """
+        conn = CSVExportService._connect()
+        try:
+            match = next((p for p in CSVExportService._get_platforms(conn) if p[0] == platform_id), None)
+            if not match:
+                return {"status": "not_found", "platform": None, "paths": []}
+            pid, pname, ptype = match
+            period_start, _, period_end = _period(year, month)
+            fingerprint = CSVExportService._fingerprint(conn, pid, period_start, period_end)
+            if not force and CSVExportService.is_up_to_date(conn, pid, pname, year, month, fingerprint):
+                return {"status": "skipped", "platform": pname, "paths": []}
+            paths = CSVExportService.generate_exports_for_platform(conn, pid, pname, ptype, year, month,
+                                                                   fingerprint=fingerprint)
+            return {"status": "generated" if paths else "empty", "platform": pname, "paths": paths}
+        finally:
+            conn.close()
+
     @staticmethod
     def backfill_all_months(start_year: int = None, start_month: int = None) -> list[str]:
         """
-        Genera CSV y TXT para TODAS las plataformas desde el inicio de los datos hasta
-        el mes anterior al día de hoy. Útil para poblar el historial completo.
+        Genera los archivos (ver export_formats) de TODAS las plataformas desde el
+        inicio de los datos hasta el mes anterior al día de hoy, en secuencia sobre
+        una conexión. La tarea Celery backfill_all_exports reparte el mismo plan en
+        subtareas paralelas.
         """
         conn = CSVExportService._connect()
         try:
-            if start_year is None:
-                with conn.cursor() as cur:
-                    cur.execute("SELECT MIN(timestamp) FROM oogsj_data.measurement")
-                    min_ts = cur.fetchone()[0]
-                if min_ts:
-                    start_year, start_month = min_ts.year, min_ts.month
-                else:
-                    print("⚠️  No hay mediciones en la base de datos.")
-                    return []
+            plan = CSVExportService.backfill_plan(conn, start_year, start_month)
+            if not plan:
+                print("⚠️  No hay mediciones en la base de datos.")
+                return []
 
-            today = date.today()
-            end_year  = today.year  if today.month > 1 else today.year - 1
-            end_month = today.month - 1 if today.month > 1 else 12
-
-            platforms  = CSVExportService._get_platforms(conn)
-            generated  = []
-            total_months = sum(1 for _ in _month_range(start_year, start_month, end_year, end_month))
-
-            print(f"🗂️  Backfill: {start_year}-{start_month:02d} → {end_year}-{end_month:02d}  "
-                  f"({total_months} meses × {len(platforms)} plataformas)")
-
-            for year, month in _month_range(start_year, start_month, end_year, end_month):
-                print(f"📅 Procesando {year}-{month:02d} ...")
-                for pid, pname, ptype in platforms:
-                    try:
-                        for gen_fn in (CSVExportService.generate_for_platform,
-                                       CSVExportService.generate_txt_for_platform):
-                            path = gen_fn(conn, pid, pname, ptype, year, month)
-                            if path:
-                                generated.append(path)
-                    except Exception as exc:
-                        print(f"❌ Error en '{pname}' {year}-{month:02d}: {exc}")
+            first, last = plan[0], plan[-1]
+            print(f"🗂️  Backfill: {first[3]}-{first[4]:02d} → {last[3]}-{last[4]:02d}  "
+                  f"({len(plan)} plataforma-mes)")
+
+            generated = []
+            current   = None
+            for pid, pname, ptype, year, month in plan:
+                if (year, month) != current:
+                    current = (year, month)
+                    print(f"📅 Procesando {year}-{month:02d} ...")
+                try:
+                    generated += CSVExportService.generate_exports_for_platform(
+                        conn, pid, pname, ptype, year, month)
+                except Exception as exc:
+                    print(f"❌ Error en '{pname}' {year}-{month:02d}: {exc}")
 
             print(f"🏁 Backfill completo: {len(generated)} archivos generados")
             return generated
         finally:
             conn.close()
 
+    @staticmethod
+    def sync_exports() -> dict:
+        """
+        Exportación incremental: regenera sólo los (plataforma, mes) cerrados
+        cuyas mediciones cambiaron desde la última exportación.
+
+        Candidatos: los meses con mediciones ingresadas desde la última
+        corrida (measurement.id > export_state 'last_measurement_id', con
+        EXPORT_ID_OVERLAP de margen) más el mes anterior de todas las
+        plataformas, que recién se exporta cuando cierra. Para cada candidato
+        se compara la huella actual (cantidad, último timestamp) con
+        export_manifest y sólo se regenera si difiere o faltan los archivos.
+
+        El último id revisado sólo avanza si no hubo errores, así lo que
+        falló se vuelve a intentar en la próxima corrida.
+        """
+        conn = CSVExportService._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT MAX(id) FROM oogsj_data.measurement")
+                max_id = cur.fetchone()[0]
+                cur.execute("""
+                    SELECT value FROM oogsj_data.export_state
+                    WHERE name = 'last_measurement_id';
+                """)
+                row = cur.fetchone()
+            last_id = row[0] if row else None
+            if max_id is None:
+                print("⚠️  No hay mediciones en la base de datos.")
+                return {"checked": 0, "regenerated": 0, "unchanged": 0, "failed": 0, "paths": []}
+
+            today         = date.today()
+            current_start = datetime(today.year, today.month, 1)
+            prev_start    = (current_start - timedelta(days=1)).replace(day=1)
+            platforms     = {pid: (pname, ptype) for pid, pname, ptype in CSVExportService._get_platforms(conn)}
+
+            candidates = {(pid, prev_start) for pid in platforms}
+            since = max(0, last_id - EXPORT_ID_OVERLAP) if last_id is not None else 0
+            with conn.cursor() as cur:
+                cur.execute(CHANGED_MONTHS_QUERY, (since, max_id))
+                for pid, month_start in cur.fetchall():
+                    if pid in platforms and month_start < current_start:
+                        candidates.add((pid, month_start))
+            conn.rollback()
+
+            summary = {"checked": len(candidates), "regenerated": 0, "unchanged": 0,
+                       "failed": 0, "paths": []}
+            for pid, month_start in sorted(candidates, key=lambda c: (c[1], c[0])):
+                pname, ptype = platforms[pid]
+                year, month  = month_start.year, month_start.month
+                period_start, _, period_end = _period(year, month)
+                try:
+                    fingerprint = CSVExportService._fingerprint(conn, pid, period_start, period_end)
+                    if not fingerprint[0]:
+                        continue
+                    if CSVExportService.is_up_to_date(conn, pid, pname, year, month, fingerprint):
+                        summary["unchanged"] += 1
+                        continue
+                    summary["paths"] += CSVExportService.generate_exports_for_platform(
+                        conn, pid, pname, ptype, year, month, fingerprint=fingerprint)
+                    summary["regenerated"] += 1
+                except Exception as exc:
+                    conn.rollback()
+                    summary["failed"] += 1
+                    print(f"❌ Error en '{pname}' {year}-{month:02d}: {exc}")
+
+            if not summary["failed"]:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        INSERT INTO oogsj_data.export_state (name, value)
+                        VALUES ('last_measurement_id', %s)
+                        ON CONFLICT (name) DO UPDATE SET
+                            value = EXCLUDED.value, updated_at = NOW();
+                    """, (max_id,))
+                conn.commit()
+
+            print(f"🔄 Exportación incremental: {summary['regenerated']} regenerados, "
+                  f"{summary['unchanged']} sin cambios, {summary['failed']} con error "
+                  f"({summary['checked']} revisados)")
+            return summary
+        finally:
+            conn.close()
+
     @staticmethod
     def generate_platform_by_name(platform_name: str, year: int, month: int) -> str | None:
-        """Genera CSV y TXT para una plataforma específica por nombre exacto."""
+        """
+        Genera los archivos del mes (ver export_formats) para una plataforma
+        por nombre exacto. Retorna la ruta del CSV.
+        """
         conn = CSVExportService._connect()
         try:
             platforms = CSVExportService._get_platforms(conn)
@@ -275,8 +726,7 @@ class CSVExportService:
                 print(f"❌ Plataforma no encontrada: '{platform_name}'")
                 return None
             pid, pname, ptype = match
-            csv_path = CSVExportService.generate_for_platform(conn, pid, pname, ptype, year, month)
-            txt_path = CSVExportService.generate_txt_for_platform(conn, pid, pname, ptype, year, month)
-            return csv_path or txt_path
+            paths = CSVExportService.generate_exports_for_platform(conn, pid, pname, ptype, year, month)
+            return paths[0] if paths else None
         finally:
             conn.close()
@@ -1,12 +1,89 @@
+import os
+
 import psycopg2
 from psycopg2.extras import execute_values
 from .config import DB_CONFIG
+from .rollups import INSERTED_TOUCHED, refresh_touched
+from . import sensor_latest, sensor_stats
+
+
+# ── Conexión por proceso ──────────────────────────────────────────
+# Cada proceso hijo del worker de Celery reutiliza una única conexión durante
+# toda su vida en lugar de abrir una nueva por tarea. Se guarda el pid porque
+# una conexión heredada por fork no puede usarse en el proceso hijo.
+_worker_conn = None
+_worker_pid  = None
+
+
+def _get_worker_connection():
+    global _worker_conn, _worker_pid
+    pid = os.getpid()
+    if _worker_conn is not None and _worker_pid == pid and not _worker_conn.closed:
+        try:
+            cur = _worker_conn.cursor()
+            cur.execute("SELECT 1;")
+            cur.close()
+            _worker_conn.rollback()
+            return _worker_conn
+        except Exception as e:
+            print(f"⚠️ Conexión reutilizada inválida, reconectando: {e}")
+            try:
+                _worker_conn.close()
+            except Exception:
+                pass
+
+    _worker_conn = psycopg2.connect(**DB_CONFIG)
+    _worker_pid  = pid
+    return _worker_conn
+
+
+def _drop_worker_connection(conn):
+    global _worker_conn, _worker_pid
+    if conn is _worker_conn:
+        _worker_conn = None
+        _worker_pid  = None
+
+
+# ── COPY ──────────────────────────────────────────────────────────
+_MEASUREMENT_COLUMNS = "timestamp, value, quality_flag, processing_level_id, sensor_id, location_id"
+_STAGING_COLUMNS     = "st.timestamp, st.value, st.quality_flag, st.processing_level_id, st.sensor_id, st.location_id"
+
+
+def _copy_field(v) -> str:
+    if v is None:
+        return r"\N"
+    return (str(v).replace("\\", "\\\\").replace("\t", "\\t")
+                  .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+class _CopyStream:
+    """
+    Objeto tipo archivo que copy_expert() lee por bloques: genera las líneas
+    de COPY (formato text) a medida que se piden, sin armar el payload
+    completo en memoria.
+    """
+
+    def __init__(self, rows):
+        self._lines = ("\t".join(_copy_field(v) for v in row) + "\n" for row in rows)
+        self._buf   = ""
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buf) < size:
+            try:
+                self._buf += next(self._lines)
+            except StopIteration:
+                break
+        if size < 0:
+            out, self._buf = self._buf, ""
+        else:
+            out, self._buf = self._buf[:size], self._buf[size:]
+        return out
 
 
 class DBHandler:
     def __init__(self):
         try:
-            self.conn = psycopg2.connect(**DB_CONFIG)
+            self.conn = _get_worker_connection()
             self.cur  = self.conn.cursor()
             print("✅ Conexión a PostgreSQL establecida.")
         except Exception as e:
@@ -32,6 +109,103 @@ class DBHandler:
         except Exception as e:
             print(f"⚠️ Error al insertar mediciones: {e}")
 
+    # ── Mediciones vía COPY + merge ───────────────────────────────
+    def copy_measurements(self, data):
+        """
+        Ingesta masiva: COPY de las tuplas a una tabla temporal y merge en
+        oogsj_data.measurement con una sola sentencia.
+
+        Cada tupla: (timestamp, value, quality_flag, processing_level_id,
+        sensor_id, location_id), igual que insert_measurements.
+
+        Las filas que ya existen se filtran con NOT EXISTS antes del INSERT,
+        así no consumen valores de la secuencia de measurement.id (un
+        ON CONFLICT DO NOTHING sí los consume). Los duplicados dentro del
+        mismo lote se descartan con DISTINCT ON.
+
+        Retorna {"inserted": n, "skipped": m}, o None si no hay conexión o
+        el merge falló (en ese caso hace rollback).
+        """
+        if not self.conn or not self.cur:
+            print("⚠️ Conexión no activa.")
+            return None
+        if not data:
+            return {"inserted": 0, "skipped": 0}
+        try:
+            self.cur.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS measurement_staging (
+                    timestamp           TIMESTAMP,
+                    value               FLOAT,
+                    quality_flag        INT,
+                    processing_level_id INT,
+                    sensor_id           INT,
+                    location_id         INT
+                ) ON COMMIT DELETE ROWS;
+            """)
+            self.cur.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS measurement_inserted (
+                    sensor_id           INT,
+                    timestamp           TIMESTAMP
+                ) ON COMMIT DELETE ROWS;
+            """)
+            self.cur.copy_expert(
+                f"COPY measurement_staging ({_MEASUREMENT_COLUMNS}) FROM STDIN",
+                _CopyStream(data),
+            )
+            # Las claves de las filas realmente insertadas quedan en
+            # measurement_inserted para los contadores (sensor_stats.py) y
+            # los rollups (rollups.py).
+            self.cur.execute(f"""
+                WITH nuevas AS (
+                    INSERT INTO oogsj_data.measurement ({_MEASUREMENT_COLUMNS})
+                    SELECT DISTINCT ON (st.sensor_id, st.timestamp) {_STAGING_COLUMNS}
+                    FROM measurement_staging st
+                    WHERE st.timestamp IS NOT NULL AND st.value IS NOT NULL
+                      AND NOT EXISTS (
+                          SELECT 1 FROM oogsj_data.measurement m
+                          WHERE m.sensor_id = st.sensor_id AND m.timestamp = st.timestamp
+                      )
+                    ORDER BY st.sensor_id, st.timestamp
+                    ON CONFLICT DO NOTHING
+                    RETURNING sensor_id, timestamp
+                )
+                INSERT INTO measurement_inserted (sensor_id, timestamp)
+                SELECT sensor_id, timestamp FROM nuevas;
+            """)
+            inserted = self.cur.rowcount
+            if inserted:
+                self._refresh_derived("latest", "el último dato por sensor",
+                                      sensor_latest.refresh_from_staging)
+                self._refresh_derived("stats", "los contadores por sensor",
+                                      sensor_stats.refresh_from_inserted)
+                self._refresh_derived("rollups", "los rollups",
+                                      lambda cur: refresh_touched(cur, INSERTED_TOUCHED))
+            self.conn.commit()
+            skipped = len(data) - inserted
+            print(f"✅ {inserted} registros nuevos, {skipped} ya existentes.")
+            return {"inserted": inserted, "skipped": skipped}
+        except Exception as e:
+            self.conn.rollback()
+            print(f"⚠️ Error al copiar mediciones: {e}")
+            return None
+
+    def _refresh_derived(self, savepoint, descripcion, refresh):
+        """
+        Actualiza una tabla derivada de measurement (sensor_latest,
+        sensor_stats, measurement_hourly/daily) con las filas del lote,
+        todavía en measurement_staging / measurement_inserted, en la misma
+        transacción que el merge. Va en un savepoint: si falla, el lote se
+        guarda igual y la tabla se repara con su script o tarea
+        (check_sensor_latest.py, reconcile_sensor_stats, reconcile_rollups).
+        """
+        try:
+            self.cur.execute(f"SAVEPOINT {savepoint};")
+            refresh(self.cur)
+            self.cur.execute(f"RELEASE SAVEPOINT {savepoint};")
+        except Exception as e:
+            self.cur.execute(f"ROLLBACK TO SAVEPOINT {savepoint};")
+            print(f"⚠️ No se pudo actualizar {descripcion}: {e}")
+
     # ── Avisos del navegante (nuevo) ──────────────────────────────
     def insert_avisos(self, data: list[tuple]):
         """
@@ -64,8 +238,10 @@ class DBHandler:
             print(f"⚠️ Error al insertar avisos: {e}")
 
     def close(self):
+        """Cierra el cursor y la conexión del proceso (la próxima tarea reconecta)."""
         if self.cur:
             self.cur.close()
         if self.conn:
+            _drop_worker_connection(self.conn)
             self.conn.close()
-            print("🔌 Conexión cerrada.")
\ No newline at end of file
+            print("🔌 Conexión cerrada.")
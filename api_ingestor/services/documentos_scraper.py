@@ -324,7 +324,9 @@ class ScientificDocScraper:
                         errors += 1
                         logging.exception(f"Error procesando doc '{doc.get('title')}' (DOI={doc.get('doi')}): {e}")
         finally:
-            db.close()
+            # Sólo el cursor: la conexión es la del proceso del worker
+            # (db_handler._get_worker_connection) y la reusan las demás tareas.
+            db.cur.close()
 
         resumen = {"found": found, "inserted": inserted, "updated": updated, "skipped": skipped, "errors": errors}
         logging.info(f"Resumen scraper documentos: {resumen}")
@@ -17,18 +17,19 @@ momento de la ejecución, por lo que son independientes del entorno
 (desarrollo, producción, etc.).
 """
 
-import io
-
 import psycopg2
 import requests
 import pandas as pd
 
 from .config import DB_CONFIG
+from .history_csv import build_measurement_tuples, parse_history_csv
+from .http_fetch import fetch_all
 
 
 _KMH_TO_MS = 1.0 / 3.6
 
 # Mapeo: nombre del sensor (contenido en s.name) → (var_code, conversion_fn)
+# conversion_fn se aplica sobre la columna completa (ver history_csv).
 _SENSOR_MAP = {
     "Sensor de Nivel del Agua - CMD0":         ("16", None),
     "Sensor de Temperatura del Agua - CMD0":   ("13", None),
@@ -44,16 +45,23 @@ _PLATFORM_NAME = "Estación EMAC - Caleta Córdova CMD0"
 def _resolve_ids():
     """
     Consulta la BD y devuelve:
-      variables   → {var_code: (sensor_id, convert_fn)}
+      variables   → {var_code: (sensor_id, convert_fn, last_ts)}
       location_id → int
 
+    last_ts es el último timestamp ya almacenado para el sensor (None si no
+    tiene datos). Sale del índice UNIQUE (sensor_id, timestamp), así que
+    cuesta un index scan por sensor dentro de la misma consulta.
+
     Lanza RuntimeError si la plataforma no existe o no tiene sensores.
     """
     conn = psycopg2.connect(**DB_CONFIG)
     cur  = conn.cursor()
     try:
         cur.execute("""
-            SELECT s.name, s.id
+            SELECT s.name, s.id,
+                   (SELECT MAX(m."timestamp")
+                    FROM oogsj_data.measurement m
+                    WHERE m.sensor_id = s.id) AS last_ts
             FROM oogsj_data.sensor s
             JOIN oogsj_data.platform p ON p.id = s.platform_id
             WHERE p.name = %s
@@ -67,10 +75,10 @@ def _resolve_ids():
             )
 
         variables = {}
-        for sensor_name, sensor_id in sensor_rows:
+        for sensor_name, sensor_id, last_ts in sensor_rows:
             if sensor_name in _SENSOR_MAP:
                 var_code, convert_fn = _SENSOR_MAP[sensor_name]
-                variables[var_code] = (sensor_id, convert_fn)
+                variables[var_code] = (sensor_id, convert_fn, last_ts)
 
         cur.execute("""
             SELECT plh.id
@@ -95,19 +103,24 @@ def _resolve_ids():
 class EMACCMD0Scraper:
     """
     Scraper de histórico (30 días) de la estación EMAC CMD0 - Caleta Córdova.
-    Retorna una lista de tuplas listas para insertar en oogsj_data.measurement.
+    Retorna una lista de tuplas listas para insertar en oogsj_data.measurement,
+    solo con los registros posteriores al último ya almacenado por sensor.
+    Una lista vacía es normal cuando no hay datos nuevos; si falla la BD o
+    fallan todas las consultas a la API, lanza RuntimeError.
     """
 
     BASE_URL    = "http://emac.criba.edu.ar/servicios/getHistoryValues.php"
     STATION_CODE = "CMD0"
     QUALITY_FLAG        = 1
     PROCESSING_LEVEL_ID = 1
+    TIMEOUT             = 15     # segundos por variable
 
     @staticmethod
     def fetch_station_data():
         """
         Resuelve sensor IDs y location_id desde la BD, luego consulta la API
-        EMAC/CRIBA por cada variable y retorna las tuplas para inserción.
+        EMAC/CRIBA por todas las variables en paralelo y retorna las tuplas
+        para inserción.
 
         Formato de cada tupla:
             (timestamp, value, quality_flag, processing_level_id, sensor_id, location_id)
@@ -116,68 +129,74 @@ class EMACCMD0Scraper:
             variables, location_id = _resolve_ids()
         except Exception as e:
             print(f"[CMD0][ERROR BD] No se pudieron resolver IDs: {e}")
-            return []
-
-        results = []
-
-        for var_code, (sensor_id, convert_fn) in variables.items():
-            url = (
-                f"{EMACCMD0Scraper.BASE_URL}"
-                f"?station_code={EMACCMD0Scraper.STATION_CODE}"
-                f"&var_code={var_code}"
-            )
+            raise
+
+        results  = []
+        fallidas = 0
+
+        # Todas las variables se piden en paralelo; una que tarde o falle no
+        # demora ni corta al resto.
+        respuestas = fetch_all(
+            {
+                var_code: (
+                    f"{EMACCMD0Scraper.BASE_URL}"
+                    f"?station_code={EMACCMD0Scraper.STATION_CODE}"
+                    f"&var_code={var_code}"
+                )
+                for var_code in variables
+            },
+            timeout=EMACCMD0Scraper.TIMEOUT,
+        )
+
+        for var_code, (sensor_id, convert_fn, last_ts) in variables.items():
             try:
-                response = requests.get(url, timeout=15)
+                response = respuestas[var_code].result()
                 response.raise_for_status()
 
-                if not response.text.strip():
-                    raise ValueError("La API devolvió una respuesta vacía")
-
-                df = pd.read_csv(io.StringIO(response.text), header=0)
-
-                if df.shape[1] < 2:
-                    raise ValueError(
-                        f"Formato CSV inesperado: se esperaban ≥2 columnas, "
-                        f"se encontraron {df.shape[1]}"
-                    )
-
-                df.columns = ["timestamp", "value"] + list(df.columns[2:])
-                df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
-                df["value"]     = pd.to_numeric(df["value"], errors="coerce")
-                df = df.dropna(subset=["timestamp", "value"])
+                df = parse_history_csv(response.text)
 
                 if df.empty:
                     print(f"[CMD0][WARN] var_code={var_code} sensor_id={sensor_id}: sin datos válidos tras parseo")
                     continue
 
-                if convert_fn is not None:
-                    df["value"] = df["value"].apply(convert_fn)
-
-                tuples = [
-                    (
-                        row["timestamp"],
-                        float(row["value"]),
-                        EMACCMD0Scraper.QUALITY_FLAG,
-                        EMACCMD0Scraper.PROCESSING_LEVEL_ID,
-                        sensor_id,
-                        location_id,
-                    )
-                    for _, row in df.iterrows()
-                ]
+                # La API siempre devuelve 30 días: quedarse solo con lo posterior
+                # a lo que ya está en la BD.
+                if last_ts is not None:
+                    df = df[df["timestamp"] > pd.Timestamp(last_ts)]
+                    if df.empty:
+                        print(f"[CMD0][OK] var_code={var_code} sensor_id={sensor_id}: sin registros nuevos desde {last_ts}")
+                        continue
+
+                tuples = build_measurement_tuples(
+                    df, sensor_id, location_id,
+                    EMACCMD0Scraper.QUALITY_FLAG,
+                    EMACCMD0Scraper.PROCESSING_LEVEL_ID,
+                    convert_fn,
+                )
                 results.extend(tuples)
                 print(f"[CMD0][OK] var_code={var_code} sensor_id={sensor_id}: {len(tuples)} registros obtenidos")
 
             except requests.exceptions.Timeout:
                 print(f"[CMD0][ERROR HTTP] var_code={var_code} sensor_id={sensor_id}: timeout")
+                fallidas += 1
             except requests.exceptions.HTTPError as e:
                 print(f"[CMD0][ERROR HTTP] var_code={var_code} sensor_id={sensor_id}: {e}")
+                fallidas += 1
             except requests.exceptions.RequestException as e:
                 print(f"[CMD0][ERROR RED] var_code={var_code} sensor_id={sensor_id}: {e}")
+                fallidas += 1
             except ValueError as e:
                 print(f"[CMD0][ERROR DATOS] var_code={var_code} sensor_id={sensor_id}: {e}")
+                fallidas += 1
             except Exception as e:
                 print(f"[CMD0][ERROR INESPERADO] var_code={var_code} sensor_id={sensor_id}: {e}")
+                fallidas += 1
 
+        # Con todas las consultas caídas, una lista vacía se confundiría con
+        # "sin registros nuevos" (allow_empty): se lanza para que la tarea
+        # reintente.
+        if variables and fallidas == len(variables):
+            raise RuntimeError(f"[CMD0] Fallaron las {fallidas} consultas a la API EMAC.")
         if not results:
             print("[CMD0][WARN] No se obtuvieron datos de ninguna variable.")
 
@@ -0,0 +1,67 @@
+"""
+history_csv.py
+==============
+Parseo y armado de tuplas para los CSV de histórico de la API EMAC/CRIBA
+(getHistoryValues.php), compartido por los scrapers EMAC CMD0/CMD1 y la
+boya EACC.
+
+Todo el camino parseo → conversión → tuplas es por columnas (pandas /
+numpy): nada de iterrows() ni Series.apply() por fila, que con 30 días de
+datos por variable dominaban el tiempo de la tarea.
+"""
+
+import io
+from itertools import repeat
+
+import pandas as pd
+
+
+def parse_history_csv(text: str) -> pd.DataFrame:
+    """
+    Convierte el cuerpo CSV de la API en un DataFrame con columnas
+    `timestamp` (datetime64) y `value` (float64), sin filas inválidas.
+
+    Lanza ValueError si la respuesta está vacía o no tiene ≥2 columnas.
+    """
+    if not text.strip():
+        raise ValueError("La API devolvió una respuesta vacía")
+
+    df = pd.read_csv(io.StringIO(text), header=0)
+
+    if df.shape[1] < 2:
+        raise ValueError(
+            f"Formato CSV inesperado: se esperaban ≥2 columnas, "
+            f"se encontraron {df.shape[1]}"
+        )
+
+    df = df.iloc[:, :2]
+    df.columns = ["timestamp", "value"]
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    df["value"]     = pd.to_numeric(df["value"], errors="coerce")
+    return df.dropna(subset=["timestamp", "value"])
+
+
+def build_measurement_tuples(df: pd.DataFrame, sensor_id: int, location_id: int,
+                             quality_flag: int, processing_level_id: int,
+                             convert_fn=None) -> list:
+    """
+    Arma las tuplas (timestamp, value, quality_flag, processing_level_id,
+    sensor_id, location_id) para oogsj_data.measurement.
+
+    convert_fn, si se pasa, recibe la columna completa de valores (una
+    pandas.Series) y debe devolver otra del mismo largo; las conversiones
+    de unidades del proyecto son aritmética simple (`lambda v: v * k`) y
+    funcionan igual sobre un escalar que sobre una columna.
+    """
+    values = df["value"]
+    if convert_fn is not None:
+        values = convert_fn(values)
+
+    return list(zip(
+        df["timestamp"].tolist(),
+        values.astype("float64").tolist(),
+        repeat(quality_flag),
+        repeat(processing_level_id),
+        repeat(sensor_id),
+        repeat(location_id),
+    ))
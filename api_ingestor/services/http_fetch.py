@@ -0,0 +1,149 @@
+"""
+http_fetch.py
+=============
+Motor de descargas HTTP compartido por los scrapers que consultan varias
+variables de una misma estación (EMAC CMD0/CMD1, boya EACC).
+
+- Una requests.Session por proceso con pool de conexiones keep-alive, en
+  lugar de un requests.get() (conexión TCP nueva) por variable.
+- Las URLs de un lote se piden en paralelo desde un ThreadPoolExecutor,
+  con un tope de requests simultáneos por host para no saturar al servidor.
+- Cada request tiene su timeout y el lote completo un deadline: lo que no
+  terminó a tiempo se devuelve como error y el resto sigue su curso
+  (resultados parciales).
+
+Uso:
+    resultados = fetch_all({"16": url_16, "13": url_13}, timeout=15)
+    resp = resultados["16"].result()   # devuelve la respuesta o relanza el error
+"""
+
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+MAX_WORKERS       = int(os.getenv("HTTP_FETCH_MAX_WORKERS", 8))
+MAX_PER_HOST      = int(os.getenv("HTTP_FETCH_MAX_PER_HOST", 4))
+DEFAULT_TIMEOUT   = 15      # segundos por request (connect + read)
+DEADLINE_MARGIN   = 5       # segundos de gracia del lote sobre sus tandas
+
+_session       = None
+_session_pid   = None
+_host_limits   = {}
+_lock          = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Session del proceso actual (los workers de Celery son procesos forkeados)."""
+    global _session, _session_pid, _host_limits
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _lock:
+            if _session is None or _session_pid != pid:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session, _session_pid, _host_limits = session, pid, {}
+    return _session
+
+
+def _host_semaphore(url):
+    host = urlsplit(url).netloc
+    with _lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(MAX_PER_HOST)
+        return _host_limits[host]
+
+
+class FetchResult:
+    """Resultado de una descarga: la respuesta o la excepción que la hizo fallar."""
+
+    def __init__(self, url, response=None, error=None, elapsed=None):
+        self.url      = url
+        self.response = response
+        self.error    = error
+        self.elapsed  = elapsed
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def result(self):
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+def _fetch_one(url, timeout):
+    start = time.monotonic()
+    try:
+        with _host_semaphore(url):
+            response = get_session().get(url, timeout=timeout)
+        return FetchResult(url, response=response, elapsed=time.monotonic() - start)
+    except Exception as e:
+        return FetchResult(url, error=e, elapsed=time.monotonic() - start)
+
+
+def default_deadline(urls: dict, timeout) -> float:
+    """
+    Deadline del lote: una tanda de requests ocupa hasta `timeout`, y las
+    URLs de un host que exceden MAX_PER_HOST (o el lote que excede
+    MAX_WORKERS) esperan a la tanda anterior. Con un deadline fijo, las de
+    la segunda tanda vencían aunque el host respondiera bien.
+    """
+    por_host = {}
+    for url in urls.values():
+        host = urlsplit(url).netloc
+        por_host[host] = por_host.get(host, 0) + 1
+    tandas = max(
+        max(math.ceil(n / MAX_PER_HOST) for n in por_host.values()),
+        math.ceil(len(urls) / MAX_WORKERS),
+    )
+    return tandas * timeout + DEADLINE_MARGIN
+
+
+def fetch_all(urls: dict, timeout=DEFAULT_TIMEOUT, deadline=None) -> dict:
+    """
+    Descarga en paralelo {clave: url} y devuelve {clave: FetchResult}.
+
+    timeout  → timeout de cada request (se pasa a requests).
+    deadline → segundos máximos para el lote completo; por defecto
+               default_deadline(urls, timeout), que cuenta las tandas por
+               host. Las descargas que no terminaron a tiempo quedan como
+               requests.exceptions.Timeout.
+
+    Nunca lanza: los errores quedan dentro de cada FetchResult.
+    """
+    if not urls:
+        return {}
+    if deadline is None:
+        deadline = default_deadline(urls, timeout)
+
+    executor = ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(urls)),
+                                  thread_name_prefix="http_fetch")
+    try:
+        futures = {key: executor.submit(_fetch_one, url, timeout) for key, url in urls.items()}
+        wait(futures.values(), timeout=deadline)
+
+        results = {}
+        for key, future in futures.items():
+            if future.done():
+                results[key] = future.result()
+            else:
+                future.cancel()
+                results[key] = FetchResult(
+                    urls[key],
+                    error=requests.exceptions.Timeout(f"deadline de {deadline}s superado"),
+                )
+        return results
+    finally:
+        # No bloquear por descargas colgadas: sus threads terminan solos al
+        # vencer el timeout del request.
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,134 @@
+"""
+partitions.py
+=============
+Particiones mensuales de oogsj_data.measurement
+(migración 20261020_partition_measurement.sql).
+
+Cada mes es una partición oogsj_data.measurement_yYYYYmMM con el rango
+[primer día del mes, primer día del mes siguiente). Lo que no cae en ninguna
+va a oogsj_data.measurement_default; al crear la partición de un mes que ya
+tiene filas en la default, esas filas se mueven en la misma transacción
+(Postgres no deja crear la partición mientras la default las contenga).
+
+Antes del cutover de partition_measurement.py la tabla particionada es
+measurement_new; después, measurement. parent_table() devuelve la que
+corresponda, o None si la migración no está aplicada.
+"""
+
+import os
+from datetime import datetime
+
+SCHEMA = "oogsj_data"
+DEFAULT_PARTITION = "measurement_default"
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", 3))
+
+_PARENT_QUERY = """
+    SELECT c.relname
+    FROM pg_partitioned_table pt
+    JOIN pg_class     c ON c.oid = pt.partrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = %s AND c.relname IN ('measurement', 'measurement_new')
+    ORDER BY c.relname = 'measurement' DESC
+    LIMIT 1;
+"""
+
+
+def partition_name(year: int, month: int) -> str:
+    return f"measurement_y{year}m{month:02d}"
+
+
+def _next_month(year: int, month: int) -> tuple:
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def months_between(desde: datetime, hasta: datetime) -> list:
+    """(año, mes) desde el mes de `desde` hasta el de `hasta`, inclusive."""
+    y, m = desde.year, desde.month
+    months = []
+    while (y, m) <= (hasta.year, hasta.month):
+        months.append((y, m))
+        y, m = _next_month(y, m)
+    return months
+
+
+def parent_table(cur):
+    cur.execute(_PARENT_QUERY, (SCHEMA,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def create_month_partition(cur, parent: str, year: int, month: int) -> bool:
+    """
+    Crea la partición del mes si no existe. No hace commit.
+    Retorna True si la creó.
+    """
+    name = partition_name(year, month)
+    cur.execute("SELECT to_regclass(%s);", (f"{SCHEMA}.{name}",))
+    if cur.fetchone()[0] is not None:
+        return False
+
+    start = datetime(year, month, 1)
+    end   = datetime(*_next_month(year, month), 1)
+    # Los límites y nombres se arman acá (no vienen de afuera): el DDL no
+    # acepta parámetros.
+    bounds = f"FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+
+    cur.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {SCHEMA}.{DEFAULT_PARTITION} "
+        f"WHERE timestamp >= %s AND timestamp < %s);",
+        (start, end),
+    )
+    if not cur.fetchone()[0]:
+        cur.execute(f"CREATE TABLE {SCHEMA}.{name} PARTITION OF {SCHEMA}.{parent} FOR VALUES {bounds};")
+        return True
+
+    # Hay filas del mes en la default: se crea la tabla suelta, se mueven y
+    # recién entonces se adjunta (ATTACH crea los índices del padre).
+    cur.execute(f"CREATE TABLE {SCHEMA}.{name} (LIKE {SCHEMA}.{parent} INCLUDING DEFAULTS);")
+    cur.execute(f"""
+        WITH movidas AS (
+            DELETE FROM {SCHEMA}.{DEFAULT_PARTITION}
+            WHERE timestamp >= %s AND timestamp < %s
+            RETURNING *
+        )
+        INSERT INTO {SCHEMA}.{name} SELECT * FROM movidas;
+    """, (start, end))
+    cur.execute(f"ALTER TABLE {SCHEMA}.{parent} ATTACH PARTITION {SCHEMA}.{name} FOR VALUES {bounds};")
+    return True
+
+
+def ensure_partitions(conn, desde: datetime, hasta: datetime, log=print) -> list:
+    """
+    Crea las particiones que falten entre el mes de `desde` y el de `hasta`
+    (inclusive), con un commit por mes. Retorna los nombres creados; [] si
+    measurement todavía no está particionada.
+    """
+    with conn.cursor() as cur:
+        parent = parent_table(cur)
+    conn.commit()
+    if parent is None:
+        log("⚠️  oogsj_data.measurement no está particionada (falta la migración 20261020).")
+        return []
+
+    created = []
+    for year, month in months_between(desde, hasta):
+        try:
+            with conn.cursor() as cur:
+                if create_month_partition(cur, parent, year, month):
+                    created.append(partition_name(year, month))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    if created:
+        log(f"🧱 Particiones creadas en {parent}: {', '.join(created)}")
+    return created
+
+
+def ensure_upcoming_partitions(conn, months_ahead: int = PARTITION_MONTHS_AHEAD, log=print) -> list:
+    """Mes actual y los `months_ahead` siguientes (tarea de Celery beat)."""
+    now = datetime.utcnow()
+    y, m = now.year, now.month
+    for _ in range(months_ahead):
+        y, m = _next_month(y, m)
+    return ensure_partitions(conn, now, datetime(y, m, 1), log=log)
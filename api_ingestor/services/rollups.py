@@ -0,0 +1,148 @@
+"""
+rollups.py
+==========
+Mantenimiento de oogsj_data.measurement_hourly y measurement_daily
+(migración 20261019_add_measurement_rollups.sql).
+
+Cada intervalo tocado se recalcula completo desde la fuente, con
+INSERT ... ON CONFLICT DO UPDATE: es idempotente y no importa si el lote
+traía filas repetidas o ya existentes.
+
+  - Horario: desde oogsj_data.measurement.
+  - Diario:  desde measurement_hourly (24 filas por sensor y día en lugar
+             de cientos de mediciones crudas).
+
+Las variables angulares (variable.is_angular) guardan la media circular en
+mean_value, sin_mean / cos_mean para re-agregarla y min/max en NULL
+(migración 20261026_add_rollup_angular_means.sql).
+
+Los "intervalos tocados" son una subconsulta que devuelve
+(sensor_id, timestamp): las filas que el lote realmente insertó
+(measurement_inserted, ver DBHandler.copy_measurements; los duplicados
+descartados por el merge no tocan nada) o un rango de fechas para el
+backfill (refresh_rollups.py) y la reconciliación diaria
+(celery_tasks.reconcile_rollups).
+"""
+
+from datetime import datetime, timedelta
+
+
+INSERTED_TOUCHED = "SELECT sensor_id, timestamp FROM measurement_inserted"
+
+# Días hacia atrás que recalcula la reconciliación diaria: cubre lotes cuyo
+# refresh falló y cargas recientes por fuera de copy_measurements (backfills;
+# las tareas de TASKS pasan todas por ahí, ver tests/test_task_config.py).
+RECONCILE_DAYS = 3
+
+RANGE_TOUCHED = """
+    SELECT sensor_id, timestamp FROM oogsj_data.measurement
+    WHERE timestamp >= %(desde)s AND timestamp < %(hasta)s
+"""
+
+# Media circular en grados [0, 360) a partir de sumas o medias de sin/cos
+# (igual que web_app/downsampling.py).
+_CIRCULAR = "MOD((DEGREES(ATAN2({sin}, {cos})) + 360)::numeric, 360)::float"
+
+_HOURLY_SQL = """
+    INSERT INTO oogsj_data.measurement_hourly
+        (sensor_id, bucket, n, min_value, max_value, mean_value, sin_mean, cos_mean,
+         last_timestamp, last_value)
+    SELECT m.sensor_id, t.bucket, COUNT(*),
+           CASE WHEN t.is_angular THEN NULL ELSE MIN(m.value) END,
+           CASE WHEN t.is_angular THEN NULL ELSE MAX(m.value) END,
+           CASE WHEN t.is_angular THEN """ + _CIRCULAR.format(
+               sin="AVG(SIN(RADIANS(m.value)))", cos="AVG(COS(RADIANS(m.value)))") + """
+                ELSE AVG(m.value) END,
+           CASE WHEN t.is_angular THEN AVG(SIN(RADIANS(m.value))) END,
+           CASE WHEN t.is_angular THEN AVG(COS(RADIANS(m.value))) END,
+           MAX(m.timestamp), (ARRAY_AGG(m.value ORDER BY m.timestamp DESC))[1]
+    FROM (
+        SELECT DISTINCT tocadas.sensor_id, date_trunc('hour', tocadas.timestamp) AS bucket,
+               COALESCE(v.is_angular, FALSE) AS is_angular
+        FROM ({touched}) tocadas
+        LEFT JOIN oogsj_data.sensor   s ON s.id = tocadas.sensor_id
+        LEFT JOIN oogsj_data.variable v ON v.id = s.variable_id
+    ) t
+    JOIN oogsj_data.measurement m
+      ON m.sensor_id = t.sensor_id
+     AND m.timestamp >= t.bucket AND m.timestamp < t.bucket + INTERVAL '1 hour'
+    GROUP BY m.sensor_id, t.bucket, t.is_angular
+    ON CONFLICT (sensor_id, bucket) DO UPDATE SET
+        n              = EXCLUDED.n,
+        min_value      = EXCLUDED.min_value,
+        max_value      = EXCLUDED.max_value,
+        mean_value     = EXCLUDED.mean_value,
+        sin_mean       = EXCLUDED.sin_mean,
+        cos_mean       = EXCLUDED.cos_mean,
+        last_timestamp = EXCLUDED.last_timestamp,
+        last_value     = EXCLUDED.last_value;
+"""
+
+# Las horas angulares traen sin_mean/cos_mean (las demás, NULL): el día
+# las re-agrega ponderadas por n y saca de ahí la media circular.
+_DAILY_SQL = """
+    INSERT INTO oogsj_data.measurement_daily
+        (sensor_id, bucket, n, min_value, max_value, mean_value, sin_mean, cos_mean,
+         last_timestamp, last_value)
+    SELECT h.sensor_id, t.bucket, SUM(h.n), MIN(h.min_value), MAX(h.max_value),
+           CASE WHEN SUM(h.sin_mean * h.n) IS NULL THEN SUM(h.mean_value * h.n) / SUM(h.n)
+                ELSE """ + _CIRCULAR.format(sin="SUM(h.sin_mean * h.n)",
+                                            cos="SUM(h.cos_mean * h.n)") + """ END,
+           SUM(h.sin_mean * h.n) / SUM(h.n), SUM(h.cos_mean * h.n) / SUM(h.n),
+           MAX(h.last_timestamp), (ARRAY_AGG(h.last_value ORDER BY h.last_timestamp DESC))[1]
+    FROM (
+        SELECT DISTINCT sensor_id, date_trunc('day', timestamp) AS bucket
+        FROM ({touched}) tocadas
+    ) t
+    JOIN oogsj_data.measurement_hourly h
+      ON h.sensor_id = t.sensor_id
+     AND h.bucket >= t.bucket AND h.bucket < t.bucket + INTERVAL '1 day'
+    GROUP BY h.sensor_id, t.bucket
+    ON CONFLICT (sensor_id, bucket) DO UPDATE SET
+        n              = EXCLUDED.n,
+        min_value      = EXCLUDED.min_value,
+        max_value      = EXCLUDED.max_value,
+        mean_value     = EXCLUDED.mean_value,
+        sin_mean       = EXCLUDED.sin_mean,
+        cos_mean       = EXCLUDED.cos_mean,
+        last_timestamp = EXCLUDED.last_timestamp,
+        last_value     = EXCLUDED.last_value;
+"""
+
+
+def refresh_touched(cur, touched_sql: str, params=None) -> tuple:
+    """
+    Recalcula las horas y los días tocados por touched_sql (con params).
+    No hace commit. Retorna (horas, días) actualizados.
+    """
+    cur.execute(_HOURLY_SQL.format(touched=touched_sql), params)
+    hours = cur.rowcount
+    cur.execute(_DAILY_SQL.format(touched=touched_sql), params)
+    return hours, cur.rowcount
+
+
+def refresh_range(conn, desde, hasta, step=timedelta(days=7), log=print) -> tuple:
+    """
+    Backfill: recalcula los rollups de [desde, hasta) de a `step`, con un
+    commit por tramo para no sostener una transacción larga.
+    Retorna el total (horas, días) actualizados.
+    """
+    total_h = total_d = 0
+    inicio = desde
+    while inicio < hasta:
+        fin = min(inicio + step, hasta)
+        with conn.cursor() as cur:
+            h, d = refresh_touched(cur, RANGE_TOUCHED, {"desde": inicio, "hasta": fin})
+        conn.commit()
+        total_h += h
+        total_d += d
+        log(f"📈 Rollups {inicio:%Y-%m-%d} → {fin:%Y-%m-%d}: {h} horas, {d} días")
+        inicio = fin
+    return total_h, total_d
+
+
+def reconcile_recent(conn, days=RECONCILE_DAYS, log=print) -> tuple:
+    """Recalcula los rollups de los últimos `days` días, hasta la hora en curso."""
+    hasta = datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    desde = (hasta - timedelta(days=days)).replace(hour=0)
+    return refresh_range(conn, desde, hasta, log=log)
@@ -0,0 +1,86 @@
+"""
+sensor_latest.py
+================
+Mantenimiento de oogsj_data.sensor_latest
+(migración 20261021_add_sensor_latest.sql): la medición de mayor timestamp
+de cada sensor, para los endpoints de "último dato".
+
+  - refresh_from_staging: en cada lote, sólo los sensores del lote. Lee la
+    fila de measurement (no la de staging): si el timestamp ya existía, el
+    lote no la pisó y el valor vigente es el de measurement.
+  - check / rebuild: comparación y reconstrucción completa desde
+    measurement (check_sensor_latest.py).
+"""
+
+_STAGING_UPSERT = """
+    INSERT INTO oogsj_data.sensor_latest AS sl (sensor_id, timestamp, value, quality_flag)
+    SELECT m.sensor_id, m.timestamp, m.value, m.quality_flag
+    FROM (
+        SELECT sensor_id, MAX(timestamp) AS timestamp
+        FROM measurement_staging
+        WHERE timestamp IS NOT NULL AND value IS NOT NULL
+        GROUP BY sensor_id
+    ) t
+    JOIN oogsj_data.measurement m
+      ON m.sensor_id = t.sensor_id AND m.timestamp = t.timestamp
+    ON CONFLICT (sensor_id) DO UPDATE SET
+        timestamp    = EXCLUDED.timestamp,
+        value        = EXCLUDED.value,
+        quality_flag = EXCLUDED.quality_flag,
+        updated_at   = NOW()
+    WHERE EXCLUDED.timestamp > sl.timestamp;
+"""
+
+# Último dato de cada sensor calculado desde measurement (un index scan
+# por sensor sobre UNIQUE (sensor_id, timestamp)).
+_RAW_LATEST = """
+    SELECT s.id AS sensor_id, m.timestamp, m.value, m.quality_flag
+    FROM oogsj_data.sensor s
+    JOIN LATERAL (
+        SELECT m2.timestamp, m2.value, m2.quality_flag
+        FROM oogsj_data.measurement m2
+        WHERE m2.sensor_id = s.id
+        ORDER BY m2.timestamp DESC LIMIT 1
+    ) m ON TRUE
+"""
+
+_CHECK_SQL = f"""
+    SELECT COALESCE(r.sensor_id, sl.sensor_id), r.timestamp, r.value, sl.timestamp, sl.value
+    FROM ({_RAW_LATEST}) r
+    FULL JOIN oogsj_data.sensor_latest sl ON sl.sensor_id = r.sensor_id
+    WHERE r.sensor_id IS NULL OR sl.sensor_id IS NULL
+       OR r.timestamp IS DISTINCT FROM sl.timestamp
+       OR r.value     IS DISTINCT FROM sl.value
+    ORDER BY 1;
+"""
+
+
+def refresh_from_staging(cur) -> int:
+    """Actualiza los sensores del lote en measurement_staging. No hace commit."""
+    cur.execute(_STAGING_UPSERT)
+    return cur.rowcount
+
+
+def check(conn) -> list:
+    """
+    Sensores donde sensor_latest no coincide con measurement:
+    [(sensor_id, ts_crudo, valor_crudo, ts_tabla, valor_tabla)].
+    """
+    with conn.cursor() as cur:
+        cur.execute(_CHECK_SQL)
+        rows = cur.fetchall()
+    conn.rollback()
+    return rows
+
+
+def rebuild(conn) -> int:
+    """Reconstruye sensor_latest completa en una transacción. Retorna las filas."""
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM oogsj_data.sensor_latest;")
+        cur.execute(f"""
+            INSERT INTO oogsj_data.sensor_latest (sensor_id, timestamp, value, quality_flag)
+            SELECT sensor_id, timestamp, value, quality_flag FROM ({_RAW_LATEST}) r;
+        """)
+        count = cur.rowcount
+    conn.commit()
+    return count
@@ -0,0 +1,113 @@
+"""
+sensor_stats.py
+===============
+Mantenimiento de oogsj_data.sensor_stats y sensor_stats_recent
+(migración 20261023_add_sensor_stats.sql): contadores por sensor que lee
+el dashboard admin en lugar de contar sobre measurement.
+
+  - refresh_from_inserted: en cada lote suma las filas que el merge
+    realmente insertó (measurement_inserted, ver
+    DBHandler.copy_measurements); las que ya existían no cuentan.
+  - reconcile: recuento desde measurement, sensor por sensor, para cargas
+    que no pasan por el ingestor (backfills, borrados) o lotes cuyo
+    refresh falló. También descarta los intervalos de más de
+    RECENT_RETENTION. Lo corre a diario celery_tasks.reconcile_sensor_stats.
+
+Los intervalos de sensor_stats_recent son de 5 minutos: "últimas 24h" y
+"última hora" en el dashboard tienen ese margen en el borde de la ventana.
+"""
+
+RECENT_RETENTION = "25 hours"
+
+_BUCKET = ("date_trunc('hour', timestamp)"
+           " + floor(date_part('minute', timestamp) / 5) * INTERVAL '5 minutes'")
+
+# El ORDER BY fija el orden en que se bloquean las filas: dos lotes
+# concurrentes con sensores en común no se traban entre sí.
+_STATS_UPSERT = """
+    INSERT INTO oogsj_data.sensor_stats AS ss (sensor_id, total, last_timestamp)
+    SELECT sensor_id, COUNT(*), MAX(timestamp)
+    FROM measurement_inserted
+    GROUP BY sensor_id
+    ORDER BY sensor_id
+    ON CONFLICT (sensor_id) DO UPDATE SET
+        total          = ss.total + EXCLUDED.total,
+        last_timestamp = GREATEST(ss.last_timestamp, EXCLUDED.last_timestamp),
+        updated_at     = NOW();
+"""
+
+_RECENT_UPSERT = f"""
+    INSERT INTO oogsj_data.sensor_stats_recent AS r (sensor_id, bucket, n)
+    SELECT sensor_id, {_BUCKET}, COUNT(*)
+    FROM measurement_inserted
+    WHERE timestamp >= NOW() - INTERVAL '{RECENT_RETENTION}'
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+    ON CONFLICT (sensor_id, bucket) DO UPDATE SET n = r.n + EXCLUDED.n;
+"""
+
+_SEED_SQL = """
+    INSERT INTO oogsj_data.sensor_stats (sensor_id)
+    SELECT id FROM oogsj_data.sensor
+    ON CONFLICT (sensor_id) DO NOTHING;
+"""
+
+_RECENT_REBUILD = f"""
+    INSERT INTO oogsj_data.sensor_stats_recent (sensor_id, bucket, n)
+    SELECT sensor_id, {_BUCKET}, COUNT(*)
+    FROM oogsj_data.measurement
+    WHERE sensor_id = %(sensor_id)s
+      AND timestamp >= NOW() - INTERVAL '{RECENT_RETENTION}'
+    GROUP BY 1, 2;
+"""
+
+
+def refresh_from_inserted(cur) -> int:
+    """Suma las filas de measurement_inserted a los contadores. No hace commit."""
+    cur.execute(_STATS_UPSERT)
+    sensores = cur.rowcount
+    cur.execute(_RECENT_UPSERT)
+    return sensores
+
+
+def reconcile(conn, log=print) -> int:
+    """
+    Recalcula los contadores de cada sensor desde measurement, con un commit
+    por sensor. La fila de sensor_stats se bloquea antes de contar: un lote
+    del mismo sensor espera y suma después, sin perderse ni contarse dos
+    veces. Retorna la cantidad de sensores que estaban desfasados.
+    """
+    with conn.cursor() as cur:
+        cur.execute(_SEED_SQL)
+        cur.execute("SELECT sensor_id FROM oogsj_data.sensor_stats ORDER BY sensor_id;")
+        sensores = [r[0] for r in cur.fetchall()]
+    conn.commit()
+
+    corregidos = 0
+    for sensor_id in sensores:
+        params = {"sensor_id": sensor_id}
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT total, last_timestamp FROM oogsj_data.sensor_stats
+                WHERE sensor_id = %(sensor_id)s FOR UPDATE;
+            """, params)
+            antes = cur.fetchone()
+            cur.execute("""
+                SELECT COUNT(*), MAX(timestamp) FROM oogsj_data.measurement
+                WHERE sensor_id = %(sensor_id)s;
+            """, params)
+            total, ultima = cur.fetchone()
+            cur.execute("""
+                UPDATE oogsj_data.sensor_stats
+                SET total = %(total)s, last_timestamp = %(ultima)s, updated_at = NOW()
+                WHERE sensor_id = %(sensor_id)s;
+            """, {**params, "total": total, "ultima": ultima})
+            cur.execute("DELETE FROM oogsj_data.sensor_stats_recent WHERE sensor_id = %(sensor_id)s;",
+                        params)
+            cur.execute(_RECENT_REBUILD, params)
+        conn.commit()
+        if antes is not None and tuple(antes) != (total, ultima):
+            corregidos += 1
+            log(f"❗ Sensor {sensor_id}: sensor_stats={antes[0]} {antes[1]} | "
+                f"measurement={total} {ultima}")
+    return corregidos
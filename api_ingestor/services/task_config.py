@@ -11,6 +11,9 @@ from services.shn_avisos_scraper       import SHNAvisosScraper
 from services.emac_cmd0_scraper        import EMACCMD0Scraper     # ← Estación CMD0 Caleta Córdova
 from services.emac_cmd1_scraper        import EMACCMD1Scraper     # ← Estación CMD1
 
+# El período de cada schedule es también el TTL de sus respuestas en el
+# cache de web_app (web_app/cache.py, TTLS): al cambiarlo, actualizar allá
+# (tests/test_task_config.py los compara).
 TASKS = {
     "buoy": {
         "scraper":  BuoyScraper.fetch_buoy_data,
@@ -43,13 +46,19 @@ TASKS = {
     # Estación hidrometeorológica EMAC CMD0 – Caleta Córdova
     # La API EMAC entrega histórico de 30 días; consultar cada 30 min
     # equilibra frescura de datos con carga sobre el servidor EMAC.
+    # allow_empty: el scraper solo devuelve registros nuevos, así que una
+    # lista vacía es un resultado válido y no dispara reintentos. Si la BD
+    # o todas las consultas a la API fallan, el scraper lanza y la tarea
+    # reintenta igual.
     "emac_cmd0_station": {
-        "scraper":  EMACCMD0Scraper.fetch_station_data,
-        "schedule": crontab(minute="*/30"),           # cada 30 minutos
+        "scraper":     EMACCMD0Scraper.fetch_station_data,
+        "schedule":    crontab(minute="*/30"),        # cada 30 minutos
+        "allow_empty": True,
     },
     # Estación hidrometeorológica EMAC CMD1
     "emac_cmd1_station": {
-        "scraper":  EMACCMD1Scraper.fetch_station_data,
-        "schedule": crontab(minute="*/30"),           # cada 30 minutos
+        "scraper":     EMACCMD1Scraper.fetch_station_data,
+        "schedule":    crontab(minute="*/30"),        # cada 30 minutos
+        "allow_empty": True,
     },
 }
\ No newline at end of file
@@ -31,3 +31,20 @@ def db_double(mocker):
     cur = mocker.MagicMock(name="cursor")
     conn.cursor.return_value = cur
     return conn, cur
+
+
+@pytest.fixture()
+def http_get(mocker):
+    """
+    Doble del GET de services/http_fetch.py (la Session compartida por los
+    scrapers). Uso: http_get.return_value = resp / http_get.side_effect = fn.
+    """
+    session = mocker.MagicMock(name="session")
+    mocker.patch("services.http_fetch.get_session", return_value=session)
+    return session.get
+
+
+@pytest.fixture(autouse=True)
+def invalidate_web_cache(mocker):
+    """Las tareas de ingesta invalidan el cache web en Redis; en tests no hay Redis."""
+    return mocker.patch("services.cache_invalidation._get_client")
@@ -10,8 +10,9 @@ import pytest
 import celery_tasks
 
 
-def test_task_exitosa_llama_al_scraper_e_inserta_measurements(mocker):
+def test_task_exitosa_llama_al_scraper_y_copia_measurements(mocker):
     mock_db = mocker.MagicMock()
+    mock_db.copy_measurements.return_value = {"inserted": 1, "skipped": 1}
     mocker.patch("celery_tasks.DBHandler", return_value=mock_db)
     scraper = mocker.MagicMock(return_value=[("fila1",), ("fila2",)])
 
@@ -19,9 +20,22 @@ def test_task_exitosa_llama_al_scraper_e_inserta_measurements(mocker):
     resultado = task.run()
 
     scraper.assert_called_once()
-    mock_db.insert_measurements.assert_called_once_with([("fila1",), ("fila2",)])
+    mock_db.copy_measurements.assert_called_once_with([("fila1",), ("fila2",)])
     mock_db.insert_avisos.assert_not_called()
-    assert resultado == {"status": "success", "records": 2}
+    assert resultado == {"status": "success", "records": 2, "inserted": 1, "skipped": 1}
+
+
+def test_task_falla_si_no_se_pudieron_persistir_las_mediciones(mocker):
+    """Antes el error de inserción se tragaba y la tarea reportaba éxito."""
+    mock_db = mocker.MagicMock()
+    mock_db.copy_measurements.return_value = None
+    mocker.patch("celery_tasks.DBHandler", return_value=mock_db)
+    scraper = mocker.MagicMock(return_value=[("fila1",)])
+
+    task = celery_tasks.create_celery_task("tarea_sin_db", scraper)
+
+    with pytest.raises(Exception):
+        task.run()
 
 
 def test_task_de_avisos_usa_insert_avisos_no_insert_measurements(mocker):
@@ -33,10 +47,22 @@ def test_task_de_avisos_usa_insert_avisos_no_insert_measurements(mocker):
     task.run()
 
     mock_db.insert_avisos.assert_called_once_with([("aviso1",)])
-    mock_db.insert_measurements.assert_not_called()
+    mock_db.copy_measurements.assert_not_called()
+
+
+def test_task_que_persiste_sola_devuelve_su_resumen_sin_tocar_dbhandler(mocker):
+    """documentos_scraper escribe sus filas y devuelve un dict: no va a COPY."""
+    db_cls = mocker.patch("celery_tasks.DBHandler")
+    resumen = {"found": 3, "inserted": 1, "updated": 1, "skipped": 1, "errors": 0}
+    scraper = mocker.MagicMock(return_value=resumen)
 
+    task = celery_tasks.create_celery_task("documentos_scraper", scraper)
 
-def test_task_con_datos_vacios_no_llama_a_insert_measurements(mocker):
+    assert task.run() == {"status": "success", **resumen}
+    db_cls.assert_not_called()
+
+
+def test_task_con_datos_vacios_no_llama_a_copy_measurements(mocker):
     mock_db = mocker.MagicMock()
     mocker.patch("celery_tasks.DBHandler", return_value=mock_db)
     scraper = mocker.MagicMock(return_value=[])
@@ -46,7 +72,18 @@ def test_task_con_datos_vacios_no_llama_a_insert_measurements(mocker):
     with pytest.raises(Exception):
         task.run()
 
-    mock_db.insert_measurements.assert_not_called()
+    mock_db.copy_measurements.assert_not_called()
+
+
+def test_task_incremental_sin_datos_nuevos_no_toca_la_db_ni_reintenta(mocker):
+    mock_db_cls = mocker.patch("celery_tasks.DBHandler")
+    scraper = mocker.MagicMock(return_value=[])
+
+    task = celery_tasks.create_celery_task("tarea_incremental", scraper, allow_empty=True)
+    resultado = task.run()
+
+    mock_db_cls.assert_not_called()
+    assert resultado == {"status": "success", "records": 0, "inserted": 0, "skipped": 0}
 
 
 def test_task_propaga_si_el_scraper_lanza_excepcion(mocker):
@@ -59,6 +96,20 @@ def test_task_propaga_si_el_scraper_lanza_excepcion(mocker):
         task.run()
 
 
+def test_task_incremental_con_la_fuente_caida_reintenta(mocker):
+    """allow_empty no debe tapar una caída: el scraper lanza y la tarea reintenta."""
+    mock_db_cls = mocker.patch("celery_tasks.DBHandler")
+    scraper = mocker.MagicMock(side_effect=RuntimeError("Fallaron las 6 consultas"))
+
+    task = celery_tasks.create_celery_task("tarea_incremental_caida", scraper, allow_empty=True)
+    retry = mocker.patch.object(task, "retry", side_effect=RuntimeError("retry"))
+
+    with pytest.raises(RuntimeError, match="retry"):
+        task.run()
+    assert isinstance(retry.call_args.kwargs["exc"], RuntimeError)
+    mock_db_cls.assert_not_called()
+
+
 def test_emac_cmd0_y_cmd1_quedan_registradas_como_tareas_celery():
     """
     Regresión directa a la sesión de hoy: task_config.py define las entradas,
@@ -76,3 +127,147 @@ def test_beat_schedule_incluye_emac_cmd0_y_cmd1():
     assert "emac_cmd1_station" in schedule
     assert schedule["emac_cmd0_station"]["task"] == "celery_tasks.fetch_emac_cmd0_station"
     assert schedule["emac_cmd1_station"]["task"] == "celery_tasks.fetch_emac_cmd1_station"
+
+
+# ── Backfill de exports en paralelo ──────────────────────────────
+
+def test_export_platform_month_acumula_el_progreso_del_carril(mocker):
+    mocker.patch("celery_tasks.CSVExportService.export_platform_month",
+                 return_value={"status": "generated", "platform": "Boya", "paths": ["a.csv", "a.txt"]})
+    previo = {"generated": 1, "skipped": 2, "empty": 0, "failed": 0, "files": 2, "failures": []}
+
+    progreso = celery_tasks.export_platform_month.run(previo, platform_id=1, year=2025, month=3)
+
+    assert progreso["generated"] == 2
+    assert progreso["skipped"] == 2
+    assert progreso["files"] == 4
+    assert previo["generated"] == 1          # no muta el resultado del paso anterior
+
+
+def test_export_platform_month_registra_la_falla_sin_cortar_el_carril(mocker):
+    mocker.patch("celery_tasks.CSVExportService.export_platform_month",
+                 side_effect=RuntimeError("timeout"))
+    task = celery_tasks.export_platform_month
+    task.push_request(retries=task.max_retries)
+    try:
+        progreso = task.run(None, platform_id=1, year=2025, month=3)
+    finally:
+        task.pop_request()
+
+    assert progreso["failed"] == 1
+    assert "2025-03" in progreso["failures"][0]
+
+
+def test_backfill_exports_summary_suma_los_carriles():
+    carril = {"generated": 2, "skipped": 1, "empty": 0, "failed": 0, "files": 4, "failures": []}
+    con_error = dict(carril, failed=1, failures=["plataforma 2 2025-01: x"])
+
+    resumen = celery_tasks.backfill_exports_summary.run([carril, con_error], total=7)
+
+    assert resumen["generated"] == 4
+    assert resumen["failed"] == 1
+    assert resumen["status"] == "partial"
+
+
+def test_backfill_all_exports_reparte_el_plan_en_carriles(mocker, db_double):
+    conn, _ = db_double
+    mocker.patch("celery_tasks.CSVExportService._connect", return_value=conn)
+    plan = [(pid, f"P{pid}", "t", 2025, m) for m in (1, 2, 3) for pid in (1, 2)]
+    mocker.patch("celery_tasks.CSVExportService.backfill_plan", return_value=plan)
+    chord = mocker.patch("celery_tasks.chord")
+
+    resultado = celery_tasks.backfill_all_exports.run(concurrency=4)
+
+    header = chord.call_args.args[0]
+    carriles = list(header.tasks)
+    assert len(carriles) == 4
+    assert sum(len(c.tasks) for c in carriles) == 6
+    assert resultado["status"] == "dispatched" and resultado["lanes"] == 4
+    conn.close.assert_called_once()
+
+
+def test_beat_schedule_exporta_en_forma_incremental_cada_hora():
+    schedule = celery_tasks.app.conf.beat_schedule
+
+    assert schedule["incremental_csv_export"]["task"] == "celery_tasks.incremental_csv_export"
+    assert "monthly_csv_export" not in schedule     # queda sólo para pedidos manuales
+
+
+def test_ensure_measurement_partitions_usa_su_conexion_y_la_cierra(mocker, db_double):
+    conn, _cur = db_double
+    mocker.patch("celery_tasks.psycopg2.connect", return_value=conn)
+    ensure = mocker.patch("celery_tasks.ensure_upcoming_partitions",
+                          return_value=["measurement_y2027m01"])
+
+    resultado = celery_tasks.ensure_measurement_partitions.run()
+
+    ensure.assert_called_once_with(conn)
+    conn.close.assert_called_once()
+    assert resultado == {"status": "success", "created": ["measurement_y2027m01"]}
+    assert "ensure_measurement_partitions" in celery_tasks.app.conf.beat_schedule
+
+
+def test_task_con_filas_nuevas_invalida_el_cache_web(mocker, invalidate_web_cache):
+    mock_db = mocker.MagicMock()
+    mock_db.copy_measurements.return_value = {"inserted": 3, "skipped": 0}
+    mocker.patch("celery_tasks.DBHandler", return_value=mock_db)
+
+    celery_tasks.create_celery_task("ingesta_con_cache", mocker.MagicMock(return_value=[("fila",)])).run()
+
+    invalidate_web_cache.return_value.incr.assert_called_once_with("oogsj:cache:ver:ingesta_con_cache")
+
+
+def test_task_sin_filas_nuevas_no_invalida_el_cache_web(mocker, invalidate_web_cache):
+    mock_db = mocker.MagicMock()
+    mock_db.copy_measurements.return_value = {"inserted": 0, "skipped": 1}
+    mocker.patch("celery_tasks.DBHandler", return_value=mock_db)
+
+    celery_tasks.create_celery_task("ingesta_sin_novedades", mocker.MagicMock(return_value=[("fila",)])).run()
+
+    invalidate_web_cache.return_value.incr.assert_not_called()
+
+
+def test_reconcile_sensor_stats_usa_su_conexion_y_la_cierra(mocker, db_double):
+    conn, _cur = db_double
+    mocker.patch("celery_tasks.psycopg2.connect", return_value=conn)
+    reconcile = mocker.patch("celery_tasks.sensor_stats.reconcile", return_value=2)
+
+    resultado = celery_tasks.reconcile_sensor_stats.run()
+
+    reconcile.assert_called_once_with(conn)
+    conn.close.assert_called_once()
+    assert resultado == {"status": "success", "corrected": 2}
+    assert "reconcile_sensor_stats" in celery_tasks.app.conf.beat_schedule
+
+
+def test_reconcile_rollups_usa_su_conexion_y_la_cierra(mocker, db_double):
+    conn, _cur = db_double
+    mocker.patch("celery_tasks.psycopg2.connect", return_value=conn)
+    reconcile = mocker.patch("celery_tasks.rollups.reconcile_recent", return_value=(72, 4))
+
+    resultado = celery_tasks.reconcile_rollups.run()
+
+    reconcile.assert_called_once_with(conn)
+    conn.close.assert_called_once()
+    assert resultado == {"status": "success", "hours": 72, "days": 4}
+    assert "reconcile_rollups" in celery_tasks.app.conf.beat_schedule
+
+
+def test_tareas_weatherlink_de_appcr_persisten_con_copy_measurements(mocker):
+    """
+    Puerto CR y Muelle CC pasan por copy_measurements, que suma a
+    sensor_stats / sensor_stats_recent (contadores del dashboard admin).
+    """
+    from services.caleta_muelle_scraper import WeatherCMScraper
+
+    mock_db = mocker.MagicMock()
+    mock_db.copy_measurements.return_value = {"inserted": 1, "skipped": 0}
+    mocker.patch("celery_tasks.DBHandler", return_value=mock_db)
+    mocker.patch.object(WeatherCMScraper, "obtener_datos_estacion",
+                        return_value={"bar": {"value": 30.0, "unit": "inHg"}})
+
+    resultado = celery_tasks.app.tasks["celery_tasks.fetch_caleta_muelle_dock"].run()
+
+    (filas,), _ = mock_db.copy_measurements.call_args
+    assert [f[4] for f in filas] == [56]
+    assert resultado["inserted"] == 1
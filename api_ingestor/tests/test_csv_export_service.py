@@ -0,0 +1,296 @@
+"""
+Tests de services/csv_export_service.py — exportación mensual CSV/TXT/Parquet.
+
+Se usa un doble de conexión cuyo named cursor itera filas en memoria; lo que
+interesa es el contenido de los archivos generados y que la lectura sea por
+cursor del lado del servidor (sin fetchall).
+"""
+from datetime import datetime
+
+import pytest
+
+from services import csv_export_service
+from services.csv_export_service import CHANGED_MONTHS_QUERY, MEASUREMENT_QUERY, CSVExportService
+
+
+T1 = datetime(2026, 6, 1, 0, 0)
+T2 = datetime(2026, 6, 1, 0, 10)
+T3 = datetime(2026, 6, 1, 0, 20)
+
+ROWS = [
+    (T1, "Temp Out",       "°C",  10.5, "1", "good", "L0"),
+    (T1, "Wind Speed Avg", "m/s", 10.0, "1", "good", "L0"),
+    (T2, "Temp Out",       "°C",  11.0, "1", "good", "L0"),
+    (T3, "Hum Out",        "%",   80.0, "1", "good", "L0"),
+]
+
+
+@pytest.fixture()
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_export_service, "EXPORT_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture()
+def stream_conn(db_double):
+    """conn.cursor(name=...) devuelve un cursor que itera ROWS."""
+    conn, cur = db_double
+    cur.__enter__.return_value = cur
+    cur.__iter__.side_effect = lambda: iter(ROWS)
+    cur.fetchone.return_value = (len(ROWS), T3, 99)     # huella de FINGERPRINT_QUERY
+    return conn, cur
+
+
+def _stream_reads(cur):
+    return sum(1 for c in cur.execute.call_args_list if c.args[0] is MEASUREMENT_QUERY)
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as fh:
+        return fh.read().splitlines()
+
+
+def test_csv_usa_named_cursor_con_itersize(export_dir, stream_conn):
+    conn, cur = stream_conn
+
+    CSVExportService.generate_for_platform(conn, 7, "Estación Muelle", "estacion", 2026, 6)
+
+    assert conn.cursor.call_args.kwargs["name"]
+    assert cur.itersize == csv_export_service.EXPORT_ITERSIZE
+    cur.fetchall.assert_not_called()
+    conn.rollback.assert_called_once()
+
+
+def test_csv_escribe_encabezado_y_filas_convertidas(export_dir, stream_conn):
+    conn, _ = stream_conn
+
+    path = CSVExportService.generate_for_platform(conn, 7, "Estación Muelle", "estacion", 2026, 6)
+
+    assert path == str(export_dir / "estacion_muelle" / "2026" / "2026_06_estacion_muelle.csv")
+    lines = _lines(path)
+    assert lines[0] == "# Plataforma: Estación Muelle"
+    assert lines[2] == "# Período: 2026-06-01 / 2026-06-30"
+    assert lines[4] == "# Registros: 4"
+    assert lines[5] == "timestamp,variable,unidad,valor,quality_flag,flag_descripcion,nivel_procesamiento"
+    assert lines[7] == "2026-06-01 00:00:00,Wind Speed Avg,km/h,36.0,1,good,L0"
+    assert len(lines) == 10
+    assert not list(export_dir.rglob("*.part"))
+
+
+def test_txt_pivotea_por_timestamp_y_completa_con_nan(export_dir, stream_conn):
+    conn, _ = stream_conn
+
+    path = CSVExportService.generate_txt_for_platform(conn, 7, "Estación Muelle", "estacion", 2026, 6)
+
+    lines = _lines(path)
+    assert lines[4] == "# Timestamps: 3  Variables: 3"
+    assert lines[6] == "timestamp\tTemp Out[°C]\tWind Speed Avg[km/h]\tHum Out[%]"
+    assert lines[7:] == [
+        "2026-06-01 00:00:00\t10.5\t36.0\tNaN",
+        "2026-06-01 00:10:00\t11.0\tNaN\tNaN",
+        "2026-06-01 00:20:00\tNaN\tNaN\t80.0",
+    ]
+
+
+def test_sin_datos_no_deja_archivos(export_dir, db_double):
+    conn, cur = db_double
+    cur.__enter__.return_value = cur
+    cur.__iter__.return_value = iter([])
+
+    assert CSVExportService.generate_for_platform(conn, 7, "Boya", "boya", 2026, 6) is None
+    assert not [p for p in export_dir.rglob("*") if p.is_file()]
+
+
+def test_error_a_mitad_de_stream_no_pisa_el_export_anterior(export_dir, db_double):
+    conn, cur = db_double
+    cur.__enter__.return_value = cur
+
+    def filas_con_error():
+        yield ROWS[0]
+        raise RuntimeError("conexión perdida")
+    cur.__iter__.side_effect = filas_con_error
+
+    destino = export_dir / "boya" / "2026"
+    destino.mkdir(parents=True)
+    (destino / "2026_06_boya.csv").write_text("export previo", encoding="utf-8")
+
+    with pytest.raises(RuntimeError):
+        CSVExportService.generate_for_platform(conn, 7, "Boya", "boya", 2026, 6)
+
+    assert (destino / "2026_06_boya.csv").read_text(encoding="utf-8") == "export previo"
+    conn.rollback.assert_called_once()
+
+
+def test_export_combinado_lee_una_sola_vez_y_genera_ambos(export_dir, stream_conn):
+    conn, cur = stream_conn
+
+    paths = CSVExportService.generate_exports_for_platform(conn, 7, "Estación Muelle", "estacion", 2026, 6)
+
+    assert [p.rsplit(".", 1)[1] for p in paths] == ["csv", "txt", "parquet"]
+    assert _stream_reads(cur) == 1
+    assert _lines(paths[0])[4] == "# Registros: 4"
+    assert _lines(paths[1])[4] == "# Timestamps: 3  Variables: 3"
+
+
+def test_generate_all_platforms_una_consulta_por_plataforma(export_dir, stream_conn, mocker):
+    conn, cur = stream_conn
+    mocker.patch.object(CSVExportService, "_connect", return_value=conn)
+    mocker.patch.object(CSVExportService, "_get_platforms",
+                        return_value=[(1, "Boya", "boya"), (2, "Muelle", "estacion")])
+
+    generated = CSVExportService.generate_all_platforms(year=2026, month=6)
+
+    assert len(generated) == 6
+    assert _stream_reads(cur) == 2
+    conn.close.assert_called_once()
+
+
+@pytest.mark.parametrize("con_pyarrow,esperados", [(True, 6), (False, 4)])
+def test_generate_all_platforms_resume_con_los_formatos_habilitados(
+        export_dir, stream_conn, mocker, monkeypatch, capsys, con_pyarrow, esperados):
+    conn, _cur = stream_conn
+    if not con_pyarrow:
+        monkeypatch.setattr(csv_export_service, "pa", None)
+    mocker.patch.object(CSVExportService, "_connect", return_value=conn)
+    mocker.patch.object(CSVExportService, "_get_platforms",
+                        return_value=[(1, "Boya", "boya"), (2, "Muelle", "estacion")])
+
+    generated = CSVExportService.generate_all_platforms(year=2026, month=6)
+
+    assert len(generated) == esperados
+    assert f"{esperados}/{esperados} archivos generados" in capsys.readouterr().out
+
+
+def test_export_registra_la_huella_en_el_manifiesto(export_dir, stream_conn):
+    conn, cur = stream_conn
+
+    CSVExportService.generate_exports_for_platform(conn, 7, "Boya", "boya", 2026, 6)
+
+    manifest = [c for c in cur.execute.call_args_list if "export_manifest" in c.args[0]]
+    assert manifest[-1].args[1] == (7, datetime(2026, 6, 1).date(), 4, T3, 99)
+    conn.commit.assert_called()
+
+
+def test_is_up_to_date_exige_archivos_y_manifiesto_con_la_misma_huella(export_dir, db_double, mocker):
+    conn, _ = db_double
+    manifest = mocker.patch.object(CSVExportService, "_manifest_entry", return_value=(4, T3))
+    destino = export_dir / "boya" / "2026"
+    destino.mkdir(parents=True)
+    (destino / "2026_05_boya.csv").write_text("x")
+
+    assert not CSVExportService.is_up_to_date(conn, 7, "Boya", 2026, 5, (4, T3, 99))
+
+    (destino / "2026_05_boya.txt").write_text("x")
+    assert not CSVExportService.is_up_to_date(conn, 7, "Boya", 2026, 5, (4, T3, 99))
+
+    parquet = export_dir / "boya" / "parquet" / "year=2026" / "month=05"
+    parquet.mkdir(parents=True)
+    (parquet / "2026_05_boya.parquet").write_bytes(b"x")
+    assert CSVExportService.is_up_to_date(conn, 7, "Boya", 2026, 5, (4, T3, 99))
+
+    # Llegaron datos tardíos: cambia la cantidad de filas.
+    assert not CSVExportService.is_up_to_date(conn, 7, "Boya", 2026, 5, (5, T3, 120))
+    manifest.return_value = None
+    assert not CSVExportService.is_up_to_date(conn, 7, "Boya", 2026, 5, (4, T3, 99))
+
+
+def test_export_platform_month_saltea_lo_que_esta_al_dia(export_dir, stream_conn, mocker):
+    conn, cur = stream_conn
+    mocker.patch.object(CSVExportService, "_connect", return_value=conn)
+    mocker.patch.object(CSVExportService, "_get_platforms", return_value=[(7, "Boya", "boya")])
+    mocker.patch.object(CSVExportService, "_manifest_entry", return_value=(len(ROWS), T3))
+
+    primero = CSVExportService.export_platform_month(7, 2026, 5)
+    segundo = CSVExportService.export_platform_month(7, 2026, 5)
+    forzado = CSVExportService.export_platform_month(7, 2026, 5, force=True)
+
+    assert primero["status"] == "generated" and len(primero["paths"]) == 3
+    assert segundo == {"status": "skipped", "platform": "Boya", "paths": []}
+    assert forzado["status"] == "generated"
+    assert _stream_reads(cur) == 2
+
+
+def test_sync_exports_regenera_solo_meses_cerrados_que_cambiaron(db_double, mocker):
+    conn, cur = db_double
+    cur.__enter__.return_value = cur
+    mocker.patch.object(CSVExportService, "_connect", return_value=conn)
+    mocker.patch.object(CSVExportService, "_get_platforms", return_value=[(1, "A", "t"), (2, "B", "t")])
+    hoy = datetime.now()
+    mes_actual = datetime(hoy.year, hoy.month, 1)
+    cur.fetchone.side_effect = [(500,), (100,)]          # MAX(id), último id revisado
+    cur.fetchall.return_value = [(1, datetime(2024, 3, 1)), (2, mes_actual)]
+    mocker.patch.object(CSVExportService, "_fingerprint", return_value=(10, T3, 500))
+    # El mes viejo de la plataforma 1 cambió; el mes anterior ya está al día.
+    mocker.patch.object(CSVExportService, "is_up_to_date",
+                        side_effect=lambda conn, pid, name, year, month, fp: year != 2024)
+    generar = mocker.patch.object(CSVExportService, "generate_exports_for_platform",
+                                  return_value=["a.csv", "a.txt"])
+
+    resumen = CSVExportService.sync_exports()
+
+    cambios = [c for c in cur.execute.call_args_list if c.args[0] is CHANGED_MONTHS_QUERY]
+    assert cambios[0].args[1] == (0, 500)
+    assert generar.call_count == 1
+    assert generar.call_args.args[1:6] == (1, "A", "t", 2024, 3)
+    assert resumen["regenerated"] == 1
+    assert resumen["unchanged"] == 2                     # mes anterior de ambas plataformas
+    estado = [c for c in cur.execute.call_args_list if "export_state" in c.args[0] and "INSERT" in c.args[0]]
+    assert estado[0].args[1] == (500,)
+
+
+def test_sync_exports_no_avanza_el_id_si_hubo_errores(db_double, mocker):
+    conn, cur = db_double
+    cur.__enter__.return_value = cur
+    mocker.patch.object(CSVExportService, "_connect", return_value=conn)
+    mocker.patch.object(CSVExportService, "_get_platforms", return_value=[(1, "A", "t")])
+    cur.fetchone.side_effect = [(500,), None]
+    cur.fetchall.return_value = []
+    mocker.patch.object(CSVExportService, "_fingerprint", return_value=(10, T3, 500))
+    mocker.patch.object(CSVExportService, "is_up_to_date", return_value=False)
+    mocker.patch.object(CSVExportService, "generate_exports_for_platform", side_effect=OSError("disco lleno"))
+
+    resumen = CSVExportService.sync_exports()
+
+    assert resumen["failed"] == 1
+    assert not [c for c in cur.execute.call_args_list if "INSERT INTO oogsj_data.export_state" in c.args[0]]
+
+
+def test_backfill_plan_cubre_meses_por_plataforma(db_double, mocker):
+    conn, cur = db_double
+    cur.__enter__.return_value = cur
+    mocker.patch.object(CSVExportService, "_get_platforms", return_value=[(1, "A", "t"), (2, "B", "t")])
+
+    plan = CSVExportService.backfill_plan(conn, 2025, 11)
+
+    assert plan[:3] == [(1, "A", "t", 2025, 11), (2, "B", "t", 2025, 11), (1, "A", "t", 2025, 12)]
+    assert len(plan) % 2 == 0
+
+
+def test_parquet_tipado_y_leible_como_dataset_particionado(export_dir, stream_conn):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    conn, _ = stream_conn
+
+    paths = CSVExportService.generate_exports_for_platform(conn, 7, "Estación Muelle", "estacion", 2026, 6)
+
+    assert paths[2] == str(export_dir / "estacion_muelle" / "parquet" / "year=2026" / "month=06"
+                           / "2026_06_estacion_muelle.parquet")
+    df = pd.read_parquet(export_dir / "estacion_muelle" / "parquet")
+    assert len(df) == 4
+    assert str(df["timestamp"].dtype).startswith("datetime64")
+    assert df["valor"].dtype == "float64"
+    viento = df[df["variable"] == "Wind Speed Avg"].iloc[0]
+    assert (viento["unidad"], viento["valor"]) == ("km/h", 36.0)
+    assert int(df["year"].iloc[0]) == 2026 and int(df["month"].iloc[0]) == 6
+
+
+def test_parquet_se_escribe_por_row_groups(export_dir, stream_conn, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(csv_export_service, "PARQUET_ROW_GROUP", 3)
+    conn, _ = stream_conn
+
+    paths = CSVExportService.generate_exports_for_platform(conn, 7, "Boya", "boya", 2026, 6)
+
+    meta = pq.ParquetFile(paths[2]).metadata
+    assert (meta.num_rows, meta.num_row_groups) == (4, 2)
+    assert pq.read_schema(paths[2]).metadata[b"platform"] == b"Boya"
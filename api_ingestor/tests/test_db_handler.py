@@ -62,6 +62,63 @@ def test_insert_measurements_si_falla_no_propaga_excepcion(mocker):
     handler.conn.rollback.assert_not_called()
 
 
+def test_copy_measurements_devuelve_insertados_y_omitidos(mocker):
+    handler = _make_handler_with_mock_conn(mocker)
+    handler.cur.rowcount = 1
+
+    resultado = handler.copy_measurements([("t1", 1.0, 1, 1, 10, 5), ("t2", 2.0, 1, 1, 10, 5)])
+
+    assert resultado == {"inserted": 1, "skipped": 1}
+    handler.cur.copy_expert.assert_called_once()
+    handler.conn.commit.assert_called_once()
+
+
+def test_copy_measurements_transmite_las_tuplas_en_formato_copy(mocker):
+    from datetime import datetime
+    handler = _make_handler_with_mock_conn(mocker)
+    handler.cur.rowcount = 2
+    leido = []
+    handler.cur.copy_expert.side_effect = lambda sql, f: leido.append(f.read(8) + f.read())
+
+    handler.copy_measurements([
+        (datetime(2026, 7, 6, 10, 0), 1.5, 1, 1, 10, 5),
+        (datetime(2026, 7, 6, 10, 10), 2.0, None, 1, 10, 5),
+    ])
+
+    assert leido[0] == (
+        "2026-07-06 10:00:00\t1.5\t1\t1\t10\t5\n"
+        "2026-07-06 10:10:00\t2.0\t\\N\t1\t10\t5\n"
+    )
+
+
+def test_copy_measurements_con_lista_vacia_no_toca_la_db(mocker):
+    handler = _make_handler_with_mock_conn(mocker)
+
+    assert handler.copy_measurements([]) == {"inserted": 0, "skipped": 0}
+    handler.cur.execute.assert_not_called()
+
+
+def test_copy_measurements_si_falla_hace_rollback_y_devuelve_none(mocker):
+    handler = _make_handler_with_mock_conn(mocker)
+    handler.cur.copy_expert.side_effect = Exception("COPY falló")
+
+    assert handler.copy_measurements([("t1", 1.0, 1, 1, 10, 5)]) is None
+    handler.conn.rollback.assert_called_once()
+
+
+def test_dos_handlers_del_mismo_proceso_reutilizan_la_conexion(mocker, db_double):
+    conn, _ = db_double
+    conn.closed = 0
+    connect = mocker.patch.object(db_handler_module.psycopg2, "connect", return_value=conn)
+    mocker.patch.object(db_handler_module, "_worker_conn", None)
+
+    primero = DBHandler()
+    segundo = DBHandler()
+
+    assert primero.conn is segundo.conn is conn
+    connect.assert_called_once()
+
+
 def test_insert_avisos_con_lista_vacia_no_opera(mocker):
     handler = _make_handler_with_mock_conn(mocker)
     mock_execute_values = mocker.patch.object(db_handler_module, "execute_values")
@@ -106,3 +163,78 @@ def test_close_no_rompe_si_conn_y_cur_son_none():
     handler.cur = None
 
     handler.close()  # no debe lanzar
+
+
+def _sqls(handler):
+    return [c.args[0] for c in handler.cur.execute.call_args_list]
+
+
+def test_copy_measurements_actualiza_rollups_del_lote_antes_del_commit(mocker):
+    handler = _make_handler_with_mock_conn(mocker)
+    handler.cur.rowcount = 2
+
+    handler.copy_measurements([("t1", 1.0, 1, 1, 10, 5), ("t2", 2.0, 1, 1, 10, 5)])
+
+    sqls = _sqls(handler)
+    hourly = next(s for s in sqls if "INTO oogsj_data.measurement_hourly" in s)
+    # Sólo las claves insertadas: los duplicados del lote no recalculan nada.
+    assert "FROM measurement_inserted" in hourly
+    assert "measurement_staging" not in hourly
+    assert any("INTO oogsj_data.measurement_daily" in s for s in sqls)
+    assert "RELEASE SAVEPOINT rollups;" in sqls
+    handler.conn.commit.assert_called_once()
+
+
+def test_copy_measurements_sin_filas_nuevas_no_toca_rollups(mocker):
+    handler = _make_handler_with_mock_conn(mocker)
+    handler.cur.rowcount = 0
+
+    handler.copy_measurements([("t1", 1.0, 1, 1, 10, 5)])
+
+    assert not any("measurement_hourly" in s for s in _sqls(handler))
+
+
+def test_copy_measurements_si_fallan_los_rollups_guarda_el_lote_igual(mocker):
+    handler = _make_handler_with_mock_conn(mocker)
+    handler.cur.rowcount = 1
+
+    def execute(sql, params=None):
+        if "measurement_hourly" in sql:
+            raise Exception('relation "oogsj_data.measurement_hourly" does not exist')
+    handler.cur.execute.side_effect = execute
+
+    resultado = handler.copy_measurements([("t1", 1.0, 1, 1, 10, 5)])
+
+    assert resultado == {"inserted": 1, "skipped": 0}
+    assert "ROLLBACK TO SAVEPOINT rollups;" in _sqls(handler)
+    handler.conn.commit.assert_called_once()
+    handler.conn.rollback.assert_not_called()
+
+
+def test_copy_measurements_actualiza_sensor_latest_desde_measurement(mocker):
+    handler = _make_handler_with_mock_conn(mocker)
+    handler.cur.rowcount = 1
+
+    handler.copy_measurements([("t1", 1.0, 1, 1, 10, 5)])
+
+    sqls = _sqls(handler)
+    upsert = next(s for s in sqls if "INTO oogsj_data.sensor_latest" in s)
+    assert "JOIN oogsj_data.measurement m" in upsert
+    assert "WHERE EXCLUDED.timestamp > sl.timestamp" in upsert
+    assert "RELEASE SAVEPOINT latest;" in sqls
+    handler.conn.commit.assert_called_once()
+
+
+def test_copy_measurements_suma_a_los_contadores_solo_las_filas_insertadas(mocker):
+    handler = _make_handler_with_mock_conn(mocker)
+    handler.cur.rowcount = 1
+
+    handler.copy_measurements([("t1", 1.0, 1, 1, 10, 5)])
+
+    sqls = _sqls(handler)
+    merge = next(s for s in sqls if "INTO oogsj_data.measurement (" in s)
+    assert "RETURNING sensor_id, timestamp" in merge
+    assert "INSERT INTO measurement_inserted" in merge
+    stats = next(s for s in sqls if "INTO oogsj_data.sensor_stats " in s)
+    assert "FROM measurement_inserted" in stats
+    assert "RELEASE SAVEPOINT stats;" in sqls
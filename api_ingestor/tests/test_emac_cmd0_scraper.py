@@ -49,7 +49,7 @@ def test_resolve_ids_sin_sensores_lanza_runtime_error_con_pista_de_migracion(moc
 def test_resolve_ids_sin_location_activa_lanza_runtime_error(mocker):
     mocker.patch(
         "services.emac_cmd0_scraper.psycopg2.connect",
-        return_value=_conn_con([("Sensor de Nivel del Agua - CMD0", 10)], None),
+        return_value=_conn_con([("Sensor de Nivel del Agua - CMD0", 10, None)], None),
     )
     with pytest.raises(RuntimeError, match="location activa"):
         _resolve_ids()
@@ -60,8 +60,8 @@ def test_resolve_ids_ignora_sensores_no_mapeados(mocker):
         "services.emac_cmd0_scraper.psycopg2.connect",
         return_value=_conn_con(
             [
-                ("Sensor de Nivel del Agua - CMD0", 10),
-                ("Sensor de Otra Estación Sin Relación", 999),
+                ("Sensor de Nivel del Agua - CMD0", 10, None),
+                ("Sensor de Otra Estación Sin Relación", 999, None),
             ],
             (7,),
         ),
@@ -74,7 +74,7 @@ def test_resolve_ids_ignora_sensores_no_mapeados(mocker):
 
 
 def test_resolve_ids_cierra_conexion_y_cursor_siempre(mocker):
-    conn = _conn_con([("Sensor de Nivel del Agua - CMD0", 10)], (7,))
+    conn = _conn_con([("Sensor de Nivel del Agua - CMD0", 10, None)], (7,))
     mocker.patch("services.emac_cmd0_scraper.psycopg2.connect", return_value=conn)
 
     _resolve_ids()
@@ -85,21 +85,22 @@ def test_resolve_ids_cierra_conexion_y_cursor_siempre(mocker):
 
 # ── fetch_station_data ───────────────────────────────────────────────────────
 
-def test_fetch_station_data_sin_ids_resueltos_devuelve_lista_vacia(mocker):
+def test_fetch_station_data_sin_ids_resueltos_lanza_para_reintentar(mocker):
     mocker.patch(
         "services.emac_cmd0_scraper._resolve_ids",
         side_effect=RuntimeError("migración no aplicada"),
     )
-    assert EMACCMD0Scraper.fetch_station_data() == []
+    with pytest.raises(RuntimeError, match="migración no aplicada"):
+        EMACCMD0Scraper.fetch_station_data()
 
 
-def test_fetch_station_data_parsea_y_arma_tuplas_correctamente(mocker):
+def test_fetch_station_data_parsea_y_arma_tuplas_correctamente(mocker, http_get):
     mocker.patch(
         "services.emac_cmd0_scraper._resolve_ids",
-        return_value=({"16": (10, None)}, 5),
+        return_value=({"16": (10, None, None)}, 5),
     )
     csv = "ts,val\n2026-07-06 10:00:00,1.23\n2026-07-06 10:10:00,1.30\n"
-    mocker.patch("services.emac_cmd0_scraper.requests.get", return_value=_csv_response(csv))
+    http_get.return_value = _csv_response(csv)
 
     resultados = EMACCMD0Scraper.fetch_station_data()
 
@@ -112,26 +113,26 @@ def test_fetch_station_data_parsea_y_arma_tuplas_correctamente(mocker):
     assert location_id == 5
 
 
-def test_fetch_station_data_convierte_viento_de_kmh_a_ms(mocker):
+def test_fetch_station_data_convierte_viento_de_kmh_a_ms(mocker, http_get):
     mocker.patch(
         "services.emac_cmd0_scraper._resolve_ids",
-        return_value=({"03": (11, lambda v: v / 3.6)}, 5),
+        return_value=({"03": (11, lambda v: v / 3.6, None)}, 5),
     )
     csv = "ts,val\n2026-07-06 10:00:00,36.0\n"
-    mocker.patch("services.emac_cmd0_scraper.requests.get", return_value=_csv_response(csv))
+    http_get.return_value = _csv_response(csv)
 
     resultados = EMACCMD0Scraper.fetch_station_data()
 
     assert resultados[0][1] == pytest.approx(10.0)
 
 
-def test_fetch_station_data_descarta_filas_con_timestamp_o_valor_invalido(mocker):
+def test_fetch_station_data_descarta_filas_con_timestamp_o_valor_invalido(mocker, http_get):
     mocker.patch(
         "services.emac_cmd0_scraper._resolve_ids",
-        return_value=({"16": (10, None)}, 5),
+        return_value=({"16": (10, None, None)}, 5),
     )
     csv = "ts,val\nno-es-fecha,no-es-numero\n2026-07-06 10:00:00,1.23\n"
-    mocker.patch("services.emac_cmd0_scraper.requests.get", return_value=_csv_response(csv))
+    http_get.return_value = _csv_response(csv)
 
     resultados = EMACCMD0Scraper.fetch_station_data()
 
@@ -139,30 +140,54 @@ def test_fetch_station_data_descarta_filas_con_timestamp_o_valor_invalido(mocker
     assert resultados[0][1] == 1.23
 
 
-def test_fetch_station_data_respuesta_vacia_no_agrega_nada(mocker):
+def test_fetch_station_data_respuesta_vacia_cuenta_como_falla(mocker, http_get):
     mocker.patch(
         "services.emac_cmd0_scraper._resolve_ids",
-        return_value=({"16": (10, None)}, 5),
+        return_value=({"16": (10, None, None)}, 5),
     )
-    mocker.patch("services.emac_cmd0_scraper.requests.get", return_value=_csv_response("   "))
+    http_get.return_value = _csv_response("   ")
 
-    assert EMACCMD0Scraper.fetch_station_data() == []
+    with pytest.raises(RuntimeError, match="Fallaron las 1 consultas"):
+        EMACCMD0Scraper.fetch_station_data()
 
 
-def test_fetch_station_data_csv_con_una_sola_columna_no_rompe(mocker):
+def test_fetch_station_data_csv_con_una_sola_columna_no_corta_las_demas(mocker, http_get):
     mocker.patch(
         "services.emac_cmd0_scraper._resolve_ids",
-        return_value=({"16": (10, None)}, 5),
+        return_value=({"16": (10, None, None), "13": (11, None, None)}, 5),
     )
-    mocker.patch("services.emac_cmd0_scraper.requests.get", return_value=_csv_response("solo_una_columna\nabc\n"))
 
-    assert EMACCMD0Scraper.fetch_station_data() == []
+    def fake_get(url, timeout):
+        if "var_code=16" in url:
+            return _csv_response("solo_una_columna\nabc\n")
+        return _csv_response("ts,val\n2026-07-06 10:00:00,5.0\n")
+
+    http_get.side_effect = fake_get
+
+    resultados = EMACCMD0Scraper.fetch_station_data()
+
+    assert [r[4] for r in resultados] == [11]
 
 
-def test_fetch_station_data_timeout_en_una_variable_no_corta_las_demas(mocker):
+def test_fetch_station_data_todas_las_consultas_fallan_lanza_para_reintentar(mocker, http_get):
+    """
+    Con la API EMAC caída, una lista vacía se confundiría con "sin registros
+    nuevos" (allow_empty) y la tarea no reintentaría.
+    """
     mocker.patch(
         "services.emac_cmd0_scraper._resolve_ids",
-        return_value=({"16": (10, None), "13": (11, None)}, 5),
+        return_value=({"16": (10, None, None), "13": (11, None, None)}, 5),
+    )
+    http_get.side_effect = requests.exceptions.Timeout()
+
+    with pytest.raises(RuntimeError, match="Fallaron las 2 consultas"):
+        EMACCMD0Scraper.fetch_station_data()
+
+
+def test_fetch_station_data_timeout_en_una_variable_no_corta_las_demas(mocker, http_get):
+    mocker.patch(
+        "services.emac_cmd0_scraper._resolve_ids",
+        return_value=({"16": (10, None, None), "13": (11, None, None)}, 5),
     )
     csv_ok = "ts,val\n2026-07-06 10:00:00,5.0\n"
 
@@ -171,7 +196,7 @@ def test_fetch_station_data_timeout_en_una_variable_no_corta_las_demas(mocker):
             raise requests.exceptions.Timeout()
         return _csv_response(csv_ok)
 
-    mocker.patch("services.emac_cmd0_scraper.requests.get", side_effect=fake_get)
+    http_get.side_effect = fake_get
 
     resultados = EMACCMD0Scraper.fetch_station_data()
 
@@ -179,10 +204,10 @@ def test_fetch_station_data_timeout_en_una_variable_no_corta_las_demas(mocker):
     assert resultados[0][4] == 11  # sensor_id de la variable que sí funcionó
 
 
-def test_fetch_station_data_http_error_en_una_variable_no_corta_las_demas(mocker):
+def test_fetch_station_data_http_error_en_una_variable_no_corta_las_demas(mocker, http_get):
     mocker.patch(
         "services.emac_cmd0_scraper._resolve_ids",
-        return_value=({"16": (10, None), "13": (11, None)}, 5),
+        return_value=({"16": (10, None, None), "13": (11, None, None)}, 5),
     )
     csv_ok = "ts,val\n2026-07-06 10:00:00,5.0\n"
 
@@ -191,9 +216,38 @@ def test_fetch_station_data_http_error_en_una_variable_no_corta_las_demas(mocker
             return _csv_response("", raise_error=requests.exceptions.HTTPError("500"))
         return _csv_response(csv_ok)
 
-    mocker.patch("services.emac_cmd0_scraper.requests.get", side_effect=fake_get)
+    http_get.side_effect = fake_get
 
     resultados = EMACCMD0Scraper.fetch_station_data()
 
     assert len(resultados) == 1
     assert resultados[0][4] == 11
+
+
+# ── high-water mark ──────────────────────────────────────────────────────────
+
+def test_fetch_station_data_solo_devuelve_registros_posteriores_al_ultimo_almacenado(mocker, http_get):
+    from datetime import datetime
+    mocker.patch(
+        "services.emac_cmd0_scraper._resolve_ids",
+        return_value=({"16": (10, None, datetime(2026, 7, 6, 10, 0, 0))}, 5),
+    )
+    csv = "ts,val\n2026-07-06 09:50:00,1.10\n2026-07-06 10:00:00,1.23\n2026-07-06 10:10:00,1.30\n"
+    http_get.return_value = _csv_response(csv)
+
+    resultados = EMACCMD0Scraper.fetch_station_data()
+
+    assert len(resultados) == 1
+    assert resultados[0][1] == 1.30
+
+
+def test_fetch_station_data_sin_registros_nuevos_devuelve_lista_vacia(mocker, http_get):
+    from datetime import datetime
+    mocker.patch(
+        "services.emac_cmd0_scraper._resolve_ids",
+        return_value=({"16": (10, None, datetime(2026, 7, 6, 10, 10, 0))}, 5),
+    )
+    csv = "ts,val\n2026-07-06 10:00:00,1.23\n2026-07-06 10:10:00,1.30\n"
+    http_get.return_value = _csv_response(csv)
+
+    assert EMACCMD0Scraper.fetch_station_data() == []
@@ -43,7 +43,7 @@ def test_resolve_ids_sin_sensores_lanza_runtime_error_con_pista_de_migracion(moc
 def test_resolve_ids_sin_location_activa_lanza_runtime_error(mocker):
     mocker.patch(
         "services.emac_cmd1_scraper.psycopg2.connect",
-        return_value=_conn_con([("Sensor de Nivel del Agua - CMD1", 203)], None),
+        return_value=_conn_con([("Sensor de Nivel del Agua - CMD1", 203, None)], None),
     )
     with pytest.raises(RuntimeError, match="location activa"):
         _resolve_ids()
@@ -51,12 +51,12 @@ def test_resolve_ids_sin_location_activa_lanza_runtime_error(mocker):
 
 def test_resolve_ids_mapea_los_6_sensores_esperados(mocker):
     sensores = [
-        ("Sensor de Nivel del Agua - CMD1", 203),
-        ("Sensor de Temperatura del Agua - CMD1", 204),
-        ("Sensor de Conductividad - CMD1", 205),
-        ("Sensor de Temperatura del Aire - CMD1", 206),
-        ("Sensor de Velocidad del Viento - CMD1", 207),
-        ("Sensor de Dirección del Viento - CMD1", 208),
+        ("Sensor de Nivel del Agua - CMD1", 203, None),
+        ("Sensor de Temperatura del Agua - CMD1", 204, None),
+        ("Sensor de Conductividad - CMD1", 205, None),
+        ("Sensor de Temperatura del Aire - CMD1", 206, None),
+        ("Sensor de Velocidad del Viento - CMD1", 207, None),
+        ("Sensor de Dirección del Viento - CMD1", 208, None),
     ]
     mocker.patch(
         "services.emac_cmd1_scraper.psycopg2.connect",
@@ -71,21 +71,22 @@ def test_resolve_ids_mapea_los_6_sensores_esperados(mocker):
     assert variables["03"][0] == 207
 
 
-def test_fetch_station_data_sin_ids_resueltos_devuelve_lista_vacia(mocker):
+def test_fetch_station_data_sin_ids_resueltos_lanza_para_reintentar(mocker):
     mocker.patch(
         "services.emac_cmd1_scraper._resolve_ids",
         side_effect=RuntimeError("migración no aplicada"),
     )
-    assert EMACCMD1Scraper.fetch_station_data() == []
+    with pytest.raises(RuntimeError, match="migración no aplicada"):
+        EMACCMD1Scraper.fetch_station_data()
 
 
-def test_fetch_station_data_convierte_viento_de_kmh_a_ms(mocker):
+def test_fetch_station_data_convierte_viento_de_kmh_a_ms(mocker, http_get):
     mocker.patch(
         "services.emac_cmd1_scraper._resolve_ids",
-        return_value=({"03": (207, lambda v: v / 3.6)}, 12),
+        return_value=({"03": (207, lambda v: v / 3.6, None)}, 12),
     )
     csv = "ts,val\n2026-07-06 10:40:00,50.0\n"
-    mocker.patch("services.emac_cmd1_scraper.requests.get", return_value=_csv_response(csv))
+    http_get.return_value = _csv_response(csv)
 
     resultados = EMACCMD1Scraper.fetch_station_data()
 
@@ -94,13 +95,13 @@ def test_fetch_station_data_convierte_viento_de_kmh_a_ms(mocker):
     assert resultados[0][5] == 12
 
 
-def test_fetch_station_data_descarta_filas_invalidas(mocker):
+def test_fetch_station_data_descarta_filas_invalidas(mocker, http_get):
     mocker.patch(
         "services.emac_cmd1_scraper._resolve_ids",
-        return_value=({"16": (203, None)}, 12),
+        return_value=({"16": (203, None, None)}, 12),
     )
     csv = "ts,val\nfecha-mala,5\n2026-07-06 10:40:00,8.13\n"
-    mocker.patch("services.emac_cmd1_scraper.requests.get", return_value=_csv_response(csv))
+    http_get.return_value = _csv_response(csv)
 
     resultados = EMACCMD1Scraper.fetch_station_data()
 
@@ -108,7 +109,7 @@ def test_fetch_station_data_descarta_filas_invalidas(mocker):
     assert resultados[0][1] == 8.13
 
 
-def test_fetch_station_data_una_variable_sin_datos_no_bloquea_las_demas(mocker):
+def test_fetch_station_data_una_variable_sin_datos_no_bloquea_las_demas(mocker, http_get):
     """
     Regresión directa a lo observado en producción hoy: 'Nivel del Agua' y
     'Conductividad' vinieron sin datos válidos tras el parseo, pero las
@@ -116,7 +117,7 @@ def test_fetch_station_data_una_variable_sin_datos_no_bloquea_las_demas(mocker):
     """
     mocker.patch(
         "services.emac_cmd1_scraper._resolve_ids",
-        return_value=({"16": (203, None), "05": (206, None)}, 12),
+        return_value=({"16": (203, None, None), "05": (206, None, None)}, 12),
     )
 
     def fake_get(url, timeout):
@@ -124,7 +125,7 @@ def test_fetch_station_data_una_variable_sin_datos_no_bloquea_las_demas(mocker):
             return _csv_response("ts,val\nfecha-invalida,no-numero\n")  # todo NaN tras el parseo
         return _csv_response("ts,val\n2026-07-06 10:40:00,10.19\n")
 
-    mocker.patch("services.emac_cmd1_scraper.requests.get", side_effect=fake_get)
+    http_get.side_effect = fake_get
 
     resultados = EMACCMD1Scraper.fetch_station_data()
 
@@ -132,14 +133,26 @@ def test_fetch_station_data_una_variable_sin_datos_no_bloquea_las_demas(mocker):
     assert resultados[0][4] == 206  # solo la variable con datos válidos
 
 
-def test_fetch_station_data_request_exception_generica_no_rompe(mocker):
+def test_fetch_station_data_todas_las_consultas_fallan_lanza_para_reintentar(mocker, http_get):
     mocker.patch(
         "services.emac_cmd1_scraper._resolve_ids",
-        return_value=({"16": (203, None)}, 12),
+        return_value=({"16": (203, None, None), "13": (204, None, None)}, 12),
     )
+    http_get.side_effect = requests.exceptions.ConnectionError("DNS falló")
+
+    with pytest.raises(RuntimeError, match="Fallaron las 2 consultas"):
+        EMACCMD1Scraper.fetch_station_data()
+
+
+def test_fetch_station_data_filtra_por_ultimo_timestamp_almacenado(mocker, http_get):
+    from datetime import datetime
     mocker.patch(
-        "services.emac_cmd1_scraper.requests.get",
-        side_effect=requests.exceptions.ConnectionError("DNS falló"),
+        "services.emac_cmd1_scraper._resolve_ids",
+        return_value=({"16": (203, None, datetime(2026, 7, 6, 10, 0, 0))}, 12),
     )
+    csv = "ts,val\n2026-07-06 10:00:00,1.23\n2026-07-06 10:10:00,1.30\n"
+    http_get.return_value = _csv_response(csv)
+
+    resultados = EMACCMD1Scraper.fetch_station_data()
 
-    assert EMACCMD1Scraper.fetch_station_data() == []
+    assert [r[1] for r in resultados] == [1.30]
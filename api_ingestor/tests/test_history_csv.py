@@ -0,0 +1,47 @@
+"""
+Tests de services/history_csv.py — parseo y armado de tuplas compartido por
+los scrapers EMAC CMD0/CMD1 y la boya.
+"""
+from datetime import datetime
+
+import pytest
+
+from services.history_csv import build_measurement_tuples, parse_history_csv
+
+
+def test_parse_descarta_filas_invalidas_y_columnas_extra():
+    df = parse_history_csv("ts,val,extra\nno-fecha,1\n2026-07-06 10:00:00,2.5,x\n2026-07-06 10:10:00,abc,y\n")
+
+    assert list(df.columns) == ["timestamp", "value"]
+    assert len(df) == 1
+    assert df["value"].iloc[0] == 2.5
+
+
+@pytest.mark.parametrize("texto", ["", "   \n", "solo_una_columna\nabc\n"])
+def test_parse_respuesta_vacia_o_una_columna_lanza_value_error(texto):
+    with pytest.raises(ValueError):
+        parse_history_csv(texto)
+
+
+def test_build_aplica_la_conversion_sobre_la_columna_completa():
+    df = parse_history_csv("ts,val\n2026-07-06 10:00:00,36.0\n2026-07-06 10:10:00,72.0\n")
+    llamadas = []
+
+    def a_ms(v):
+        llamadas.append(v)
+        return v / 3.6
+
+    tuplas = build_measurement_tuples(df, 11, 5, 1, 1, a_ms)
+
+    assert len(llamadas) == 1                       # una sola llamada, no una por fila
+    assert [t[1] for t in tuplas] == pytest.approx([10.0, 20.0])
+
+
+def test_build_devuelve_tipos_nativos_listos_para_la_db():
+    df = parse_history_csv("ts,val\n2026-07-06 10:00:00,1.23\n")
+
+    (ts, value, quality, level, sensor_id, location_id), = build_measurement_tuples(df, 10, 5, 1, 2)
+
+    assert isinstance(ts, datetime) and ts == datetime(2026, 7, 6, 10, 0, 0)
+    assert type(value) is float
+    assert (quality, level, sensor_id, location_id) == (1, 2, 10, 5)
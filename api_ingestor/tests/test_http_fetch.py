@@ -0,0 +1,91 @@
+"""
+Tests de services/http_fetch.py — motor de descargas en paralelo usado por
+los scrapers EMAC CMD0/CMD1 y la boya.
+
+Lo importante: una URL que falla o se cuelga no debe tumbar ni demorar
+indefinidamente al resto del lote (resultados parciales).
+"""
+import threading
+
+import pytest
+import requests
+
+from services import http_fetch
+from services.http_fetch import default_deadline, fetch_all
+
+
+def test_fetch_all_devuelve_un_resultado_por_clave(http_get):
+    http_get.side_effect = lambda url, timeout: f"resp:{url}"
+
+    resultados = fetch_all({"a": "http://x/a", "b": "http://x/b"}, timeout=5)
+
+    assert resultados["a"].result() == "resp:http://x/a"
+    assert resultados["b"].result() == "resp:http://x/b"
+    http_get.assert_any_call("http://x/a", timeout=5)
+
+
+def test_fetch_all_un_error_no_afecta_a_las_demas(http_get):
+    def fake_get(url, timeout):
+        if url.endswith("/a"):
+            raise requests.exceptions.Timeout()
+        return "ok"
+    http_get.side_effect = fake_get
+
+    resultados = fetch_all({"a": "http://x/a", "b": "http://x/b"})
+
+    assert not resultados["a"].ok
+    with pytest.raises(requests.exceptions.Timeout):
+        resultados["a"].result()
+    assert resultados["b"].result() == "ok"
+
+
+def test_fetch_all_corta_por_deadline_y_devuelve_parciales(http_get):
+    liberar = threading.Event()
+
+    def fake_get(url, timeout):
+        if url.endswith("/lenta"):
+            liberar.wait(2)
+        return "ok"
+    http_get.side_effect = fake_get
+
+    try:
+        resultados = fetch_all({"lenta": "http://x/lenta", "rapida": "http://x/rapida"},
+                               timeout=1, deadline=0.2)
+    finally:
+        liberar.set()
+
+    assert resultados["rapida"].result() == "ok"
+    with pytest.raises(requests.exceptions.Timeout):
+        resultados["lenta"].result()
+
+
+def test_fetch_all_sin_urls_no_crea_threads(http_get):
+    assert fetch_all({}) == {}
+    http_get.assert_not_called()
+
+
+def test_default_deadline_cuenta_las_tandas_por_host(monkeypatch):
+    monkeypatch.setattr(http_fetch, "MAX_PER_HOST", 4)
+    monkeypatch.setattr(http_fetch, "MAX_WORKERS", 8)
+    urls = {i: f"http://emac/{i}" for i in range(6)}
+    urls["boya"] = "http://boya/x"
+
+    assert default_deadline(urls, timeout=15) == 2 * 15 + http_fetch.DEADLINE_MARGIN
+    assert default_deadline({"a": "http://emac/a"}, timeout=15) == 15 + http_fetch.DEADLINE_MARGIN
+
+
+def test_fetch_all_la_segunda_tanda_de_un_host_sano_no_vence(http_get, monkeypatch):
+    """Con MAX_PER_HOST=1, la tercera URL arranca tras dos requests completos."""
+    monkeypatch.setattr(http_fetch, "MAX_PER_HOST", 1)
+    monkeypatch.setattr(http_fetch, "DEADLINE_MARGIN", 0.05)
+    evento = threading.Event()
+
+    def fake_get(url, timeout):
+        evento.wait(0.1)      # cada request tarda ~0.1s, dentro de su timeout
+        return "ok"
+    http_get.side_effect = fake_get
+
+    urls = {i: f"http://host-en-tandas/{i}" for i in range(3)}
+    resultados = fetch_all(urls, timeout=0.15)
+
+    assert all(r.ok for r in resultados.values())
@@ -0,0 +1,59 @@
+"""
+Tests de services/partitions.py — creación de las particiones mensuales de
+oogsj_data.measurement. Se usa un cursor doble: sólo se verifica el SQL que
+se emite y en qué orden.
+"""
+from datetime import datetime
+
+from services import partitions
+
+
+def _sqls(cur):
+    return [c.args[0] for c in cur.execute.call_args_list]
+
+
+def test_months_between_cruza_el_fin_de_anio():
+    assert partitions.months_between(datetime(2025, 11, 20), datetime(2026, 2, 1)) == [
+        (2025, 11), (2025, 12), (2026, 1), (2026, 2),
+    ]
+
+
+def test_crea_la_particion_del_mes_si_la_default_no_tiene_filas(db_double):
+    _conn, cur = db_double
+    cur.fetchone.side_effect = [(None,), (False,)]      # no existe; default vacía
+
+    assert partitions.create_month_partition(cur, "measurement", 2026, 12) is True
+
+    ddl = _sqls(cur)[-1]
+    assert ddl == ("CREATE TABLE oogsj_data.measurement_y2026m12 PARTITION OF oogsj_data.measurement "
+                   "FOR VALUES FROM ('2026-12-01') TO ('2027-01-01');")
+
+
+def test_mueve_las_filas_de_la_default_antes_de_adjuntar(db_double):
+    _conn, cur = db_double
+    cur.fetchone.side_effect = [(None,), (True,)]       # no existe; default con filas del mes
+
+    partitions.create_month_partition(cur, "measurement_new", 2026, 10)
+
+    sqls = _sqls(cur)
+    assert "(LIKE oogsj_data.measurement_new INCLUDING DEFAULTS)" in sqls[2]
+    assert "DELETE FROM oogsj_data.measurement_default" in sqls[3]
+    assert sqls[4].startswith("ALTER TABLE oogsj_data.measurement_new ATTACH PARTITION "
+                              "oogsj_data.measurement_y2026m10")
+
+
+def test_no_toca_nada_si_la_particion_ya_existe(db_double):
+    _conn, cur = db_double
+    cur.fetchone.return_value = ("oogsj_data.measurement_y2026m10",)
+
+    assert partitions.create_month_partition(cur, "measurement", 2026, 10) is False
+    assert len(_sqls(cur)) == 1
+
+
+def test_ensure_partitions_sin_tabla_particionada_no_crea_nada(db_double):
+    conn, cur = db_double
+    conn.cursor.return_value.__enter__.return_value = cur
+    cur.fetchone.return_value = None
+
+    assert partitions.ensure_partitions(conn, datetime(2026, 10, 1), datetime(2027, 1, 1), log=lambda m: None) == []
+    assert len(_sqls(cur)) == 1
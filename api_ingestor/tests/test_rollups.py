@@ -0,0 +1,48 @@
+"""
+Tests de services/rollups.py — rangos que recalcula la reconciliación y
+agregación de las variables angulares.
+"""
+from datetime import datetime
+
+from freezegun import freeze_time
+
+from services import rollups
+
+
+@freeze_time("2026-10-18 14:25:00")
+def test_reconcile_recent_cubre_los_ultimos_dias_hasta_la_hora_en_curso(mocker):
+    refresh_range = mocker.patch("services.rollups.refresh_range", return_value=(10, 2))
+    conn = mocker.MagicMock()
+
+    assert rollups.reconcile_recent(conn, days=3) == (10, 2)
+
+    _conn, desde, hasta = refresh_range.call_args.args
+    assert desde == datetime(2026, 10, 15, 0, 0)
+    assert hasta == datetime(2026, 10, 18, 15, 0)
+
+
+def test_refresh_range_recalcula_por_tramos_con_commit(mocker):
+    conn = mocker.MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.rowcount = 1
+
+    rollups.refresh_range(conn, datetime(2026, 10, 1), datetime(2026, 10, 15), log=lambda _m: None)
+
+    assert conn.commit.call_count == 2
+    tramos = [c.args[1] for c in cur.execute.call_args_list if c.args[1]]
+    assert tramos[0] == {"desde": datetime(2026, 10, 1), "hasta": datetime(2026, 10, 8)}
+    assert tramos[-1] == {"desde": datetime(2026, 10, 8), "hasta": datetime(2026, 10, 15)}
+
+
+def test_rollups_de_direcciones_usan_media_circular_sin_min_max(mocker):
+    cur = mocker.MagicMock()
+
+    rollups.refresh_touched(cur, rollups.INSERTED_TOUCHED)
+
+    hourly, daily = (c.args[0] for c in cur.execute.call_args_list)
+    assert "COALESCE(v.is_angular, FALSE) AS is_angular" in hourly
+    assert "CASE WHEN t.is_angular THEN NULL ELSE MIN(m.value) END" in hourly
+    assert "ATAN2(AVG(SIN(RADIANS(m.value))), AVG(COS(RADIANS(m.value))))" in hourly
+    # El día re-agrega sin/cos ponderados por n, no las medias en grados.
+    assert "ATAN2(SUM(h.sin_mean * h.n), SUM(h.cos_mean * h.n))" in daily
+    assert "sin_mean       = EXCLUDED.sin_mean" in daily
@@ -0,0 +1,54 @@
+"""
+Tests de services/sensor_stats.py — contadores por sensor del dashboard
+admin. Cursor doble: se verifica el SQL emitido y el orden de los commits.
+"""
+from datetime import datetime
+
+from services import sensor_stats
+
+
+def _sqls(cur):
+    return [c.args[0] for c in cur.execute.call_args_list]
+
+
+def test_refresh_suma_sobre_el_contador_existente(db_double):
+    _conn, cur = db_double
+
+    sensor_stats.refresh_from_inserted(cur)
+
+    stats, recent = _sqls(cur)
+    assert "FROM measurement_inserted" in stats
+    assert "total          = ss.total + EXCLUDED.total" in stats
+    assert "GREATEST(ss.last_timestamp, EXCLUDED.last_timestamp)" in stats
+    assert "n = r.n + EXCLUDED.n" in recent
+
+
+def test_reconcile_bloquea_el_sensor_antes_de_contar(db_double):
+    conn, cur = db_double
+    cur.__enter__.return_value = cur
+    ultima = datetime(2026, 10, 1, 12, 0)
+    cur.fetchall.return_value = [(10,)]
+    cur.fetchone.side_effect = [(100, ultima), (100, ultima)]
+
+    assert sensor_stats.reconcile(conn, log=lambda *_: None) == 0
+
+    sqls = _sqls(cur)
+    lock = next(i for i, s in enumerate(sqls) if "FOR UPDATE" in s)
+    count = next(i for i, s in enumerate(sqls) if "COUNT(*), MAX(timestamp)" in s)
+    assert lock < count
+    assert conn.commit.call_count == 2      # siembra + un sensor
+
+
+def test_reconcile_cuenta_los_sensores_desfasados(db_double):
+    conn, cur = db_double
+    cur.__enter__.return_value = cur
+    ultima = datetime(2026, 10, 1, 12, 0)
+    cur.fetchall.return_value = [(10,), (11,)]
+    cur.fetchone.side_effect = [(90, ultima), (100, ultima), (5, None), (5, None)]
+    log = []
+
+    assert sensor_stats.reconcile(conn, log=log.append) == 1
+
+    update = next(c for c in cur.execute.call_args_list if "UPDATE oogsj_data.sensor_stats" in c.args[0])
+    assert update.args[1] == {"sensor_id": 10, "total": 100, "ultima": ultima}
+    assert "Sensor 10" in log[0]
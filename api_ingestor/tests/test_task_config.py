@@ -6,10 +6,21 @@ inválido), celery_tasks.py falla al armar el beat_schedule y TODO el
 scheduler de Celery deja de arrancar, tumbando la ingesta de TODAS las
 estaciones, no solo la nueva.
 """
+import ast
+import inspect
+import re
+from pathlib import Path
+
+import pytest
 from celery.schedules import crontab
 
+from celery_tasks import AVISOS_TASKS, SELF_PERSISTING_TASKS
 from services.task_config import TASKS
 
+# Sólo existe en un checkout completo del repo: el contenedor de
+# api_ingestor monta únicamente su carpeta.
+WEB_CACHE_PY = Path(__file__).resolve().parents[2] / "web_app" / "cache.py"
+
 ESTACIONES_ESPERADAS = {
     "buoy", "mareograph", "tide_forecast", "comodoro_rivadavia_port",
     "caleta_muelle_dock", "documentos_scraper", "shn_avisos",
@@ -42,3 +53,54 @@ def test_emac_cmd0_y_cmd1_corren_cada_30_minutos():
 def test_emac_cmd0_y_cmd1_usan_scrapers_distintos():
     """Si por error ambas entradas apuntaran al mismo scraper, CMD1 nunca se scrapearía."""
     assert TASKS["emac_cmd0_station"]["scraper"] != TASKS["emac_cmd1_station"]["scraper"]
+
+
+def test_emac_cmd0_y_cmd1_aceptan_resultado_vacio():
+    """Son incrementales: sin datos nuevos devuelven [] y eso no debe reintentarse."""
+    assert TASKS["emac_cmd0_station"].get("allow_empty") is True
+    assert TASKS["emac_cmd1_station"].get("allow_empty") is True
+
+
+def _constantes_web_cache():
+    """TTLS y MEASUREMENT_TAGS de web_app/cache.py, leídos sin importarlo."""
+    valores = {}
+    for nodo in ast.parse(WEB_CACHE_PY.read_text(encoding="utf-8")).body:
+        if isinstance(nodo, ast.Assign) and isinstance(nodo.targets[0], ast.Name):
+            if nodo.targets[0].id in ("TTLS", "MEASUREMENT_TAGS"):
+                valores[nodo.targets[0].id] = ast.literal_eval(nodo.value)
+    return valores["TTLS"], valores["MEASUREMENT_TAGS"]
+
+
+def _periodo_segundos(schedule):
+    return 86400 // (len(schedule.minute) * len(schedule.hour))
+
+
+@pytest.mark.skipif(not WEB_CACHE_PY.exists(), reason="web_app no está en este checkout")
+def test_ningun_scraper_de_mediciones_inserta_en_measurement_por_su_cuenta():
+    """
+    Las mediciones tienen que volver a la tarea y pasar por
+    DBHandler.copy_measurements: es lo que mantiene sensor_latest,
+    sensor_stats y los rollups. Un INSERT propio los deja sin actualizar
+    hasta la reconciliación diaria.
+    """
+    insert = re.compile(r"INSERT\s+INTO\s+oogsj_data\.measurement\b", re.I)
+    for nombre, cfg in TASKS.items():
+        if nombre in AVISOS_TASKS or nombre in SELF_PERSISTING_TASKS:
+            continue
+        fuente = inspect.getsource(inspect.getmodule(cfg["scraper"]))
+        assert not insert.search(fuente), f"{nombre} inserta mediciones por fuera de copy_measurements"
+
+
+def test_ttls_del_cache_web_coinciden_con_el_schedule_de_cada_tarea():
+    """
+    web_app/cache.py repite el período de cada tarea como TTL de sus
+    respuestas. Si el schedule cambia acá y allá no, el cache sirve datos
+    viejos (TTL más largo) o recalcula de más (más corto).
+    """
+    ttls, measurement_tags = _constantes_web_cache()
+    for tag in set(measurement_tags) | {"shn_avisos"}:
+        assert tag in TASKS, f"web_app/cache.py usa la etiqueta '{tag}', que no es una tarea"
+        assert ttls[tag] == _periodo_segundos(TASKS[tag]["schedule"]), (
+            f"TTL de '{tag}' en web_app/cache.py ({ttls[tag]}s) distinto del período "
+            f"de su schedule ({_periodo_segundos(TASKS[tag]['schedule'])}s)"
+        )
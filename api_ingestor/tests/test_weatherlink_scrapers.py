@@ -0,0 +1,67 @@
+"""
+Tests de los scrapers WeatherLink de APPCR (comodoro_rivadavia_scraper.py y
+caleta_muelle_scraper.py).
+
+Ambos devuelven tuplas de measurement para que la tarea Celery las persista
+con DBHandler.copy_measurements (y con él sensor_latest, sensor_stats y los
+rollups); ninguno inserta mediciones por su cuenta.
+"""
+from datetime import datetime
+
+from services.caleta_muelle_scraper import WeatherCMScraper
+from services.comodoro_rivadavia_scraper import WeatherCRScraper
+
+
+def _sqls(cur):
+    return [c.args[0] for c in cur.execute.call_args_list]
+
+
+def test_cr_devuelve_tuplas_en_si_sin_insertar_mediciones(mocker, db_double):
+    conn, cur = db_double
+    mocker.patch("services.comodoro_rivadavia_scraper.psycopg2.connect", return_value=conn)
+    mocker.patch.object(WeatherCRScraper, "fetch_data", return_value={
+        "generated_at": 1_760_000_000, "temp_out": 50.0, "hum_out": 80,
+        "bar": 32767, "wind_speed": 10.0,
+    })
+    mocker.patch.object(WeatherCRScraper, "asegurar_sensor_y_variable",
+                        side_effect=lambda conn, nombre, *a: {"Temperatura Exterior": 1,
+                                                              "Humedad Exterior": 2,
+                                                              "Velocidad del Viento": 4}[nombre])
+    cur.fetchone.side_effect = [(7,), (0, 1)]   # plataforma; (quality_flag, nivel 'Raw')
+
+    filas = WeatherCRScraper.fetch_station_data()
+
+    ts = datetime(2025, 10, 9, 8, 53, 20)
+    assert filas == [
+        (ts, 10.0, 0, 1, 1, 1),                    # 50 °F → 10 °C
+        (ts, 80.0, 0, 1, 2, 1),
+        (ts, 10.0 * 0.44704, 0, 1, 4, 1),          # bar es centinela: se omite
+    ]
+    assert not any("INSERT INTO oogsj_data.measurement" in sql for sql in _sqls(cur))
+    conn.close.assert_called_once()
+
+
+def test_cr_sin_respuesta_de_la_api_no_abre_conexion(mocker):
+    connect = mocker.patch("services.comodoro_rivadavia_scraper.psycopg2.connect")
+    mocker.patch.object(WeatherCRScraper, "fetch_data", return_value=None)
+
+    assert not WeatherCRScraper.fetch_station_data()
+    connect.assert_not_called()
+
+
+def test_muelle_devuelve_tuplas_con_flag_y_omite_valores_nulos(mocker):
+    mocker.patch.object(WeatherCMScraper, "obtener_datos_estacion", return_value={
+        "bar":      {"value": 30.0, "unit": "inHg"},
+        "temp_out": {"value": 60.0, "unit": "°F"},
+        "wind_dir": {"value": None, "unit": "grados"},
+        "uv":       {"value": 3,    "unit": "índice UV"},
+    })
+
+    filas = WeatherCMScraper.fetch_station_data()
+
+    assert [(f[1], f[2], f[3], f[4], f[5]) for f in filas] == [
+        (round(30.0 * 33.8639, 2), 1, 6, 56, 4),
+        (60.0, 4, 6, 58, 4),                       # centinela: sin convertir, flag 4
+    ]
+    assert len({f[0] for f in filas}) == 1
+    assert filas[0][0].tzinfo is None
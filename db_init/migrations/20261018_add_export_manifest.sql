@@ -0,0 +1,36 @@
+-- =============================================================================
+-- Migración: Manifiesto de exportaciones CSV/TXT
+-- Fecha: 2026-10-18
+-- Descripción: Registra, por plataforma y mes, qué datos tenía la última
+--              exportación generada en /app/exports (cantidad de mediciones,
+--              último timestamp y último measurement.id). La tarea horaria
+--              incremental_csv_export compara contra esto y regenera sólo los
+--              (plataforma, mes) cuyas mediciones cambiaron, incluidos meses
+--              viejos que reciben datos tardíos (backfill WeatherLink, etc.).
+--
+--              export_state guarda el último measurement.id ya revisado, para
+--              que cada corrida sólo mire las filas nuevas.
+--
+-- Cómo aplicar:
+--   psql -U <user> -d <dbname> -f 20261018_add_export_manifest.sql
+-- =============================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS oogsj_data.export_manifest (
+    platform_id         INT       NOT NULL REFERENCES oogsj_data.platform(id) ON DELETE CASCADE,
+    period              DATE      NOT NULL,   -- primer día del mes exportado
+    row_count           BIGINT    NOT NULL,
+    max_timestamp       TIMESTAMP,
+    max_measurement_id  BIGINT,
+    exported_at         TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (platform_id, period)
+);
+
+CREATE TABLE IF NOT EXISTS oogsj_data.export_state (
+    name        VARCHAR(50) PRIMARY KEY,
+    value       BIGINT      NOT NULL,
+    updated_at  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMIT;
@@ -0,0 +1,46 @@
+-- =============================================================================
+-- Migración: Rollups horarios y diarios de measurement
+-- Fecha: 2026-10-19
+-- Descripción: Tablas de agregados por sensor e intervalo (cantidad, mínimo,
+--              máximo, media y último valor), mantenidas por el ingestor en la
+--              misma transacción de cada lote (DBHandler.copy_measurements).
+--              Los históricos con resolution ≥ 1h y el panel admin leen de acá
+--              en lugar de recorrer oogsj_data.measurement.
+--
+--              La media se guarda ya calculada; para re-agregar varios
+--              intervalos se pondera por n: SUM(mean_value * n) / SUM(n).
+--
+-- Después de aplicarla, poblar con los datos existentes:
+--   docker compose exec api_ingestor python refresh_rollups.py
+--
+-- Cómo aplicar:
+--   psql -U <user> -d <dbname> -f 20261019_add_measurement_rollups.sql
+-- =============================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS oogsj_data.measurement_hourly (
+    sensor_id       INT       NOT NULL REFERENCES oogsj_data.sensor(id) ON DELETE CASCADE,
+    bucket          TIMESTAMP NOT NULL,     -- inicio de la hora
+    n               INT       NOT NULL,
+    min_value       FLOAT     NOT NULL,
+    max_value       FLOAT     NOT NULL,
+    mean_value      FLOAT     NOT NULL,
+    last_timestamp  TIMESTAMP NOT NULL,
+    last_value      FLOAT     NOT NULL,
+    PRIMARY KEY (sensor_id, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS oogsj_data.measurement_daily (
+    sensor_id       INT       NOT NULL REFERENCES oogsj_data.sensor(id) ON DELETE CASCADE,
+    bucket          TIMESTAMP NOT NULL,     -- inicio del día (UTC)
+    n               INT       NOT NULL,
+    min_value       FLOAT     NOT NULL,
+    max_value       FLOAT     NOT NULL,
+    mean_value      FLOAT     NOT NULL,
+    last_timestamp  TIMESTAMP NOT NULL,
+    last_value      FLOAT     NOT NULL,
+    PRIMARY KEY (sensor_id, bucket)
+);
+
+COMMIT;
@@ -0,0 +1,56 @@
+-- =============================================================================
+-- Migración: Particionado mensual de oogsj_data.measurement
+-- Fecha: 2026-10-20
+-- Descripción: Crea oogsj_data.measurement_new, particionada por rango de
+--              timestamp (una partición por mes, measurement_yYYYYmMM), con las
+--              mismas columnas que measurement y la misma secuencia para id.
+--
+--              Postgres exige que las claves únicas de una tabla particionada
+--              incluyan la columna de partición: la PK pasa a ser
+--              (id, timestamp). UNIQUE (sensor_id, timestamp) se mantiene, así
+--              que los ON CONFLICT del ingestor siguen igual.
+--
+--              measurement_default recibe lo que no cae en ninguna partición
+--              mensual (p. ej. predicciones de marea muy adelantadas). Las
+--              particiones mensuales las crea la tarea Celery
+--              ensure_measurement_partitions (services/partitions.py), que
+--              mueve a la partición nueva las filas que ya estuvieran en la
+--              default.
+--
+-- Esta migración NO mueve datos. Después de aplicarla:
+--   1) Copiar el histórico en lotes, con el ingestor funcionando:
+--        docker compose exec api_ingestor python partition_measurement.py
+--      (se puede cortar y relanzar: retoma desde el último id copiado)
+--   2) Cutover (bloquea escrituras unos segundos y renombra las tablas):
+--        docker compose exec api_ingestor python partition_measurement.py --cutover
+--   3) Verificado el sistema, borrar la tabla vieja:
+--        DROP TABLE oogsj_data.measurement_old;
+--
+-- Meses viejos: una partición se puede separar de la tabla y archivar
+--   ALTER TABLE oogsj_data.measurement DETACH PARTITION oogsj_data.measurement_y2025m01;
+--   pg_dump -Fc -t oogsj_data.measurement_y2025m01 ... > measurement_y2025m01.dump
+--   DROP TABLE oogsj_data.measurement_y2025m01;
+-- (los rollups y los exports de ese mes quedan como estaban).
+--
+-- Cómo aplicar:
+--   psql -U <user> -d <dbname> -f 20261020_partition_measurement.sql
+-- =============================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS oogsj_data.measurement_new (
+    id INT NOT NULL DEFAULT nextval('oogsj_data.measurement_id_seq'),
+    sensor_id INT REFERENCES oogsj_data.sensor(id) ON DELETE CASCADE,
+    timestamp TIMESTAMP NOT NULL,
+    value FLOAT NOT NULL,
+    quality_flag INT REFERENCES oogsj_data.quality_flag(flag) ON DELETE SET NULL,
+    processing_level_id INT REFERENCES oogsj_data.processing_level(id) ON DELETE SET NULL,
+    location_id INT REFERENCES oogsj_data.platform_location_history(id) ON DELETE SET NULL,
+    PRIMARY KEY (id, timestamp),
+    UNIQUE (sensor_id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE IF NOT EXISTS oogsj_data.measurement_default
+    PARTITION OF oogsj_data.measurement_new DEFAULT;
+
+COMMIT;
@@ -0,0 +1,41 @@
+-- =============================================================================
+-- Migración: Último dato por sensor
+-- Fecha: 2026-10-21
+-- Descripción: oogsj_data.sensor_latest guarda la medición más reciente
+--              (mayor timestamp) de cada sensor. El ingestor la actualiza en
+--              la misma transacción de cada lote (DBHandler.copy_measurements)
+--              y los endpoints de "último dato" leen de acá: una fila por
+--              sensor en lugar de un LATERAL / DISTINCT ON sobre measurement.
+--
+--              Como en measurement, el mayor timestamp puede ser futuro
+--              (predicción de marea).
+--
+-- La carga inicial va en la migración. Para verificarla o reconstruirla:
+--   docker compose exec api_ingestor python check_sensor_latest.py [--reparar]
+--
+-- Cómo aplicar:
+--   psql -U <user> -d <dbname> -f 20261021_add_sensor_latest.sql
+-- =============================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS oogsj_data.sensor_latest (
+    sensor_id       INT       PRIMARY KEY REFERENCES oogsj_data.sensor(id) ON DELETE CASCADE,
+    timestamp       TIMESTAMP NOT NULL,
+    value           FLOAT     NOT NULL,
+    quality_flag    INT,
+    updated_at      TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO oogsj_data.sensor_latest (sensor_id, timestamp, value, quality_flag)
+SELECT s.id, m.timestamp, m.value, m.quality_flag
+FROM oogsj_data.sensor s
+JOIN LATERAL (
+    SELECT m2.timestamp, m2.value, m2.quality_flag
+    FROM oogsj_data.measurement m2
+    WHERE m2.sensor_id = s.id
+    ORDER BY m2.timestamp DESC LIMIT 1
+) m ON TRUE
+ON CONFLICT (sensor_id) DO NOTHING;
+
+COMMIT;
@@ -0,0 +1,53 @@
+-- =============================================================================
+-- Migración: Conversiones de unidad para la API
+-- Fecha: 2026-10-22
+-- Descripción: oogsj_data.unit_conversion reemplaza los mapas de conversión
+--              que tenía cada blueprint (_VARIABLE_MAP, _VARIABLE_MAP_CC,
+--              _normalizar_unidad_y_valor). La API genérica
+--              /api/platforms/<id>/latest|history (web_app/platform_data.py)
+--              muestra valor * factor + "offset" en to_symbol.
+--
+--              La conversión se busca por (unidad del sensor, variable) y, si
+--              no hay, por la unidad sola (variable_id NULL). Sin fila, el
+--              valor sale como está guardado.
+--
+-- Cómo aplicar:
+--   psql -U <user> -d <dbname> -f 20261022_add_unit_conversion.sql
+-- =============================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS oogsj_data.unit_conversion (
+    id           SERIAL PRIMARY KEY,
+    unit_id      INT   NOT NULL REFERENCES oogsj_data.unit(id) ON DELETE CASCADE,
+    variable_id  INT   REFERENCES oogsj_data.variable(id) ON DELETE CASCADE,
+    to_symbol    VARCHAR(10) NOT NULL,
+    factor       FLOAT NOT NULL DEFAULT 1,
+    "offset"     FLOAT NOT NULL DEFAULT 0,
+    UNIQUE NULLS NOT DISTINCT (unit_id, variable_id)
+);
+
+-- Viento: se guarda en m/s y se muestra en km/h (EMAC y APPCR).
+INSERT INTO oogsj_data.unit_conversion (unit_id, variable_id, to_symbol, factor)
+SELECT u.id, v.id, 'km/h', 3.6
+FROM oogsj_data.unit u, oogsj_data.variable v
+WHERE u.symbol = 'm/s'
+  AND v.name IN ('Velocidad del Viento', 'Wind Speed Avg', 'Wind Speed Hi')
+ON CONFLICT DO NOTHING;
+
+-- Pluviómetro Davis: cada click son 0,2 mm.
+INSERT INTO oogsj_data.unit_conversion (unit_id, variable_id, to_symbol, factor)
+SELECT DISTINCT s.unit_id, s.variable_id, 'mm', 0.2
+FROM oogsj_data.sensor s
+JOIN oogsj_data.variable v ON v.id = s.variable_id
+WHERE v.name = 'Rainfall Clicks'
+ON CONFLICT DO NOTHING;
+
+-- "degrees" de WeatherLink → símbolo de grados.
+INSERT INTO oogsj_data.unit_conversion (unit_id, variable_id, to_symbol)
+SELECT u.id, NULL, '°'
+FROM oogsj_data.unit u
+WHERE u.symbol = 'degrees'
+ON CONFLICT DO NOTHING;
+
+COMMIT;
@@ -0,0 +1,66 @@
+-- =============================================================================
+-- Migración: Contadores por sensor para el dashboard admin
+-- Fecha: 2026-10-23
+-- Descripción: /api/admin/stats y /api/admin/plataformas dejan de contar
+--              sobre measurement en cada carga de página:
+--
+--              oogsj_data.sensor_stats         total de mediciones y última
+--                                              transmisión de cada sensor.
+--              oogsj_data.sensor_stats_recent  mediciones por sensor en
+--                                              intervalos de 5 minutos de las
+--                                              últimas 25 horas (para "últimas
+--                                              24h" y "última hora").
+--
+--              El ingestor suma las filas que inserta cada lote en la misma
+--              transacción (DBHandler.copy_measurements) y la tarea diaria
+--              celery_tasks.reconcile_sensor_stats las recuenta desde
+--              measurement y descarta los intervalos vencidos.
+--
+-- La carga inicial va en la migración. Si el ingestor estuvo corriendo
+-- mientras se aplicaba, o para corregir a mano después de un backfill:
+--   docker compose exec api_ingestor celery -A celery_tasks call celery_tasks.reconcile_sensor_stats
+--
+-- Cómo aplicar:
+--   psql -U <user> -d <dbname> -f 20261023_add_sensor_stats.sql
+-- =============================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS oogsj_data.sensor_stats (
+    sensor_id       INT       PRIMARY KEY REFERENCES oogsj_data.sensor(id) ON DELETE CASCADE,
+    total           BIGINT    NOT NULL DEFAULT 0,
+    last_timestamp  TIMESTAMP,
+    updated_at      TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS oogsj_data.sensor_stats_recent (
+    sensor_id       INT       NOT NULL REFERENCES oogsj_data.sensor(id) ON DELETE CASCADE,
+    bucket          TIMESTAMP NOT NULL,
+    n               INT       NOT NULL,
+    PRIMARY KEY (sensor_id, bucket)
+);
+
+CREATE INDEX IF NOT EXISTS idx_sensor_stats_recent_bucket
+    ON oogsj_data.sensor_stats_recent (bucket);
+
+INSERT INTO oogsj_data.sensor_stats (sensor_id, total, last_timestamp)
+SELECT s.id, COALESCE(m.total, 0), m.ultima
+FROM oogsj_data.sensor s
+LEFT JOIN (
+    SELECT sensor_id, COUNT(*) AS total, MAX(timestamp) AS ultima
+    FROM oogsj_data.measurement
+    GROUP BY sensor_id
+) m ON m.sensor_id = s.id
+ON CONFLICT (sensor_id) DO NOTHING;
+
+INSERT INTO oogsj_data.sensor_stats_recent (sensor_id, bucket, n)
+SELECT sensor_id,
+       date_trunc('hour', timestamp)
+         + floor(date_part('minute', timestamp) / 5) * INTERVAL '5 minutes',
+       COUNT(*)
+FROM oogsj_data.measurement
+WHERE timestamp >= NOW() - INTERVAL '25 hours'
+GROUP BY 1, 2
+ON CONFLICT (sensor_id, bucket) DO NOTHING;
+
+COMMIT;
@@ -0,0 +1,88 @@
+-- =============================================================================
+-- Migración: Índices según las consultas reales sobre measurement
+-- Fecha: 2026-10-24
+-- Descripción: Hasta ahora measurement sólo tenía la PK y UNIQUE (sensor_id,
+--              timestamp). Esta migración agrega:
+--
+--              - sensor.station_code: código de la estación WeatherLink que
+--                ya va al final del nombre ('temp_out - 160710' → '160710'),
+--                como columna generada e indexada. /api/appcr/muelle_cc/history
+--                filtra por ella en lugar de s.name LIKE '%160710%', que no
+--                puede usar ningún índice.
+--
+--              - UNIQUE (sensor_id, timestamp) INCLUDE (value): reemplaza a la
+--                restricción UNIQUE original (misma unicidad, mismos ON
+--                CONFLICT del ingestor) y permite index-only scans en los
+--                históricos por sensor y rango, que sólo leen ts y value.
+--
+--              - BRIN sobre timestamp: rangos de tiempo sin sensor fijo
+--                (ventanas "últimas N horas", revisiones por fecha). Las
+--                mediciones entran casi en orden de timestamp, así que el
+--                BRIN ocupa unos pocos KB y descarta casi toda la tabla.
+--
+--              - Índice parcial de valores negativos, ordenado por timestamp:
+--                /api/mediciones_negativas deja de recorrer toda la tabla.
+--
+--              Los índices se crean en measurement y, si existe porque el
+--              particionado (20261020_partition_measurement.sql) todavía no
+--              hizo el cutover, también en measurement_new.
+--
+-- CREATE INDEX bloquea las escrituras de measurement mientras se construye:
+-- aplicar con celery_worker detenido o en una ventana de mantenimiento.
+--
+-- Para medir antes/después sobre datos sintéticos (en un schema aparte, no
+-- toca oogsj_data):
+--   docker compose exec api_ingestor python bench_queries.py --anios 3
+--
+-- Cómo aplicar:
+--   psql -U <user> -d <dbname> -f 20261024_add_query_indexes.sql
+-- =============================================================================
+
+BEGIN;
+
+ALTER TABLE oogsj_data.sensor
+    ADD COLUMN IF NOT EXISTS station_code VARCHAR(32)
+    GENERATED ALWAYS AS (substring(name from ' - ([0-9]+)$')) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_sensor_station_code
+    ON oogsj_data.sensor (station_code);
+
+DO $$
+DECLARE
+    t      TEXT;
+    rel    REGCLASS;
+    unico  NAME;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['measurement', 'measurement_new'] LOOP
+        rel := to_regclass('oogsj_data.' || t);
+        CONTINUE WHEN rel IS NULL;
+
+        EXECUTE format('CREATE UNIQUE INDEX IF NOT EXISTS %I ON %s (sensor_id, timestamp) INCLUDE (value)',
+                       'uq_' || t || '_sensor_ts_value', rel);
+
+        -- La restricción UNIQUE original, se llame como se llame (measurement
+        -- renombrada por el cutover conserva el nombre de measurement_new).
+        FOR unico IN
+            SELECT c.conname
+            FROM pg_constraint c
+            WHERE c.conrelid = rel AND c.contype = 'u'
+              AND ARRAY(SELECT a.attname
+                        FROM unnest(c.conkey) WITH ORDINALITY k(attnum, ord)
+                        JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum
+                        ORDER BY k.ord) = ARRAY['sensor_id', 'timestamp']::NAME[]
+        LOOP
+            EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', rel, unico);
+        END LOOP;
+
+        EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON %s USING brin (timestamp) WITH (pages_per_range = 32)',
+                       'idx_' || t || '_ts_brin', rel);
+
+        EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON %s (timestamp DESC) INCLUDE (sensor_id, value) WHERE value < 0',
+                       'idx_' || t || '_negativas', rel);
+    END LOOP;
+END $$;
+
+ANALYZE oogsj_data.sensor;
+ANALYZE oogsj_data.measurement;
+
+COMMIT;
@@ -0,0 +1,29 @@
+-- =============================================================================
+-- Migración: Variables angulares
+-- Fecha: 2026-10-25
+-- Descripción: oogsj_data.variable.is_angular marca las variables que son
+--              direcciones en grados (0°–360°). Los históricos con
+--              resolution (web_app/downsampling.py) las agregan con la
+--              media circular, atan2(avg(sin), avg(cos)), en lugar de
+--              AVG(value): la media aritmética de 350° y 10° da 180°.
+--              Para ellas min y max salen en null.
+--
+-- Cómo aplicar:
+--   psql -U <user> -d <dbname> -f 20261025_add_angular_variables.sql
+-- =============================================================================
+
+BEGIN;
+
+ALTER TABLE oogsj_data.variable
+    ADD COLUMN IF NOT EXISTS is_angular BOOLEAN NOT NULL DEFAULT FALSE;
+
+UPDATE oogsj_data.variable SET is_angular = TRUE
+WHERE name IN (
+    'Dirección de Olas',
+    'Dirección de la corriente',
+    'Dirección del Viento',
+    'Wind Dir Of Hi',
+    'Wind Dir Of Prevail'
+);
+
+COMMIT;
@@ -0,0 +1,34 @@
+-- =============================================================================
+-- Migración: Media circular en los rollups
+-- Fecha: 2026-10-26
+-- Descripción: Para las variables angulares (variable.is_angular, migración
+--              20261025_add_angular_variables.sql) los rollups guardan la
+--              media de sin y cos del ángulo (sin_mean, cos_mean) y
+--              mean_value pasa a ser la media circular en [0, 360).
+--              Re-agregar varios intervalos pondera por n igual que la
+--              media: atan2(SUM(sin_mean * n), SUM(cos_mean * n)).
+--              min_value / max_value quedan en NULL para ellas; para el
+--              resto de las variables sin_mean / cos_mean son NULL.
+--
+-- Después de aplicarla, recalcular los rollups existentes:
+--   docker compose exec api_ingestor python refresh_rollups.py
+--
+-- Cómo aplicar:
+--   psql -U <user> -d <dbname> -f 20261026_add_rollup_angular_means.sql
+-- =============================================================================
+
+BEGIN;
+
+ALTER TABLE oogsj_data.measurement_hourly
+    ADD COLUMN IF NOT EXISTS sin_mean FLOAT,
+    ADD COLUMN IF NOT EXISTS cos_mean FLOAT,
+    ALTER COLUMN min_value DROP NOT NULL,
+    ALTER COLUMN max_value DROP NOT NULL;
+
+ALTER TABLE oogsj_data.measurement_daily
+    ADD COLUMN IF NOT EXISTS sin_mean FLOAT,
+    ADD COLUMN IF NOT EXISTS cos_mean FLOAT,
+    ALTER COLUMN min_value DROP NOT NULL,
+    ALTER COLUMN max_value DROP NOT NULL;
+
+COMMIT;
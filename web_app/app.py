@@ -4,6 +4,8 @@ from flasgger import Swagger
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 import config
+import db
+import profiling
 from blueprints.avisos_bp   import avisos_bp
 from blueprints.admin_bp    import admin_bp
 from blueprints.auth_bp     import auth_bp
@@ -17,6 +19,7 @@ from blueprints.especies_bp import especies_bp
 from blueprints.exports_bp    import exports_bp
 from blueprints.emac_cmd0_bp  import emac_cmd0_bp
 from blueprints.emac_cmd1_bp  import emac_cmd1_bp
+from blueprints.platforms_bp  import platforms_bp
 from blueprints.users_bp      import users_bp
 
 SWAGGER_CONFIG = {
@@ -59,6 +62,7 @@ SWAGGER_CONFIG = {
         {"name": "Files",     "description": "Archivos y documentos subidos"},
         {"name": "Exports",   "description": "Archivos CSV exportados por plataforma y mes"},
         {"name": "EMAC",      "description": "Estaciones hidrometeorológicas EMAC (CMD0 - Caleta Córdova, CMD1)"},
+        {"name": "Platforms", "description": "Último dato e histórico genéricos por plataforma"},
     ],
 }
 
@@ -77,6 +81,8 @@ def create_app() -> Flask:
         UPLOAD_FOLDER       = config.UPLOAD_FOLDER,
     )
     Mail(app)
+    db.init_app(app)
+    profiling.init_app(app)
     Swagger(app, config=SWAGGER_CONFIG, merge=True)
 
     app.register_blueprint(auth_bp)
@@ -92,6 +98,7 @@ def create_app() -> Flask:
     app.register_blueprint(exports_bp)
     app.register_blueprint(emac_cmd0_bp)
     app.register_blueprint(emac_cmd1_bp)
+    app.register_blueprint(platforms_bp)
     app.register_blueprint(users_bp)
 
     return app
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+bench_load.py
+=============
+Prueba de carga de los endpoints de datos con volúmenes realistas.
+
+Los tests de web_app/tests usan fixtures chicas: esto mide cómo responde la
+API con años de mediciones. Dos pasos:
+
+  sembrar   Genera mediciones sintéticas cada --intervalo minutos durante
+            --anios para todos los sensores existentes y, con --estaciones,
+            para estaciones extra "Bench N" de --sensores sensores cada una.
+            Escribe en oogsj_data: sólo contra una base local o de prueba
+            (hay que repetir el nombre de la base con --confirmar). Es
+            idempotente (ON CONFLICT DO NOTHING), un commit por mes.
+
+            Las tablas derivadas se reconstruyen con las herramientas del
+            ingestor, como después de cualquier backfill (el script
+            imprime los comandos).
+
+  correr    Con la app levantada (gunicorn), le pega a cada endpoint de
+            ocean, stations, emac_cmd0/1, platforms, exports y admin con
+            --clientes clientes concurrentes durante --duracion segundos, y
+            reporta por endpoint p50/p95/p99, pedidos por segundo, errores,
+            bytes y el pico de RSS de los procesos de gunicorn (si corren
+            en la misma máquina o contenedor).
+
+            Con --json guarda los resultados; con --comparar contra un JSON
+            anterior marca los endpoints cuyo p95 empeoró más de --umbral y
+            termina con código 1, para usarlo antes de un deploy.
+
+El cache de respuestas (cache.py) atiende los pedidos repetidos: la corrida
+por defecto mide lo que ve un cliente real. --sin-cache agrega un parámetro
+distinto por pedido para medir siempre la consulta a la base (las entradas
+que deja en Redis expiran por TTL).
+
+Uso (dentro del contenedor web_app):
+    python bench_load.py sembrar --anios 3 --estaciones 10 --sensores 20 --confirmar oogsj_dev
+    python bench_load.py correr --clientes 16 --duracion 20 --json base.json
+    python bench_load.py correr --sin-cache --comparar base.json --umbral 0.2
+    python bench_load.py correr --solo "history"
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import count
+
+import psycopg2
+import requests
+
+import config
+
+# ── Siembra ─────────────────────────────────────────────────────────────────
+
+_ESTACIONES_SQL = """
+    INSERT INTO oogsj_data.platform (name, platform_type_id)
+    SELECT 'Bench ' || n, (SELECT MIN(id) FROM oogsj_data.platform_type)
+    FROM generate_series(1, %(estaciones)s) n
+    WHERE NOT EXISTS (SELECT 1 FROM oogsj_data.platform p WHERE p.name = 'Bench ' || n);
+
+    INSERT INTO oogsj_data.sensor (platform_id, name, variable_id, unit_id)
+    SELECT p.id, 'bench_' || k || ' - ' || p.id,
+           (SELECT MIN(id) FROM oogsj_data.variable), (SELECT MIN(id) FROM oogsj_data.unit)
+    FROM oogsj_data.platform p, generate_series(1, %(sensores)s) k
+    WHERE p.name ~ '^Bench [0-9]+$'
+      AND substring(p.name from '[0-9]+$')::int <= %(estaciones)s
+      AND NOT EXISTS (SELECT 1 FROM oogsj_data.sensor s
+                      WHERE s.platform_id = p.id AND s.name = 'bench_' || k || ' - ' || p.id);
+"""
+
+# Serie diaria por sensor con ruido y ~0,5 % de negativos (mediciones_negativas).
+_MES_SQL = """
+    INSERT INTO oogsj_data.measurement (sensor_id, timestamp, value, quality_flag, processing_level_id)
+    SELECT s.id, t.ts,
+           CASE WHEN random() < 0.005 THEN -5 * random()
+                ELSE 10 + 5 * sin(extract(epoch FROM t.ts) / 86400 * 2 * pi() + s.id) + random()
+           END,
+           (SELECT MIN(flag) FROM oogsj_data.quality_flag),
+           (SELECT MIN(id) FROM oogsj_data.processing_level)
+    FROM generate_series(%(desde)s::timestamp, %(hasta)s::timestamp - INTERVAL '1 second',
+                         %(intervalo)s * INTERVAL '1 minute') t(ts)
+    CROSS JOIN oogsj_data.sensor s
+    ORDER BY t.ts, s.id
+    ON CONFLICT DO NOTHING;
+"""
+
+_DERIVADAS = """
+Siguiente paso, en el contenedor api_ingestor (tablas derivadas):
+    python refresh_rollups.py --desde {desde:%Y-%m-%d}
+    python check_sensor_latest.py --reparar
+    celery -A celery_tasks call celery_tasks.reconcile_sensor_stats
+Con measurement particionada, los meses sin partición quedan en
+measurement_default hasta que se creen (services/partitions.py).
+"""
+
+
+def _meses(desde, hasta):
+    inicio = desde
+    while inicio < hasta:
+        fin = (inicio.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+        yield inicio, min(fin, hasta)
+        inicio = fin
+
+
+def sembrar(args):
+    if args.confirmar != config.DB_CONFIG["dbname"]:
+        sys.exit(f"❌ Para escribir datos sintéticos en '{config.DB_CONFIG['dbname']}' "
+                 f"hay que pasar --confirmar {config.DB_CONFIG['dbname']}")
+
+    hasta = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    desde = hasta - timedelta(days=round(365 * args.anios))
+    conn = psycopg2.connect(**config.DB_CONFIG)
+    try:
+        with conn.cursor() as cur:
+            if args.estaciones:
+                cur.execute(_ESTACIONES_SQL, {"estaciones": args.estaciones, "sensores": args.sensores})
+            cur.execute("SELECT setseed(%s);", (args.semilla,))
+            cur.execute("SELECT COUNT(*) FROM oogsj_data.sensor;")
+            sensores = cur.fetchone()[0]
+        conn.commit()
+        print(f"🌱 {sensores} sensores, {desde:%Y-%m-%d} → {hasta:%Y-%m-%d} cada {args.intervalo} min")
+
+        total, inicio = 0, time.perf_counter()
+        for mes_desde, mes_hasta in _meses(desde, hasta):
+            with conn.cursor() as cur:
+                cur.execute(_MES_SQL, {"desde": mes_desde, "hasta": mes_hasta,
+                                       "intervalo": args.intervalo})
+                filas = cur.rowcount
+            conn.commit()
+            total += filas
+            print(f"   {mes_desde:%Y-%m}: {filas:,} filas "
+                  f"({total / (time.perf_counter() - inicio):,.0f} filas/s)")
+        print(f"🏁 {total:,} mediciones nuevas en {time.perf_counter() - inicio:.0f} s")
+        print(_DERIVADAS.format(desde=desde))
+    finally:
+        conn.close()
+
+
+# ── Carga ───────────────────────────────────────────────────────────────────
+
+Endpoint = namedtuple("Endpoint", ["nombre", "path", "admin"])
+
+
+def endpoints(platform_id, hace_un_anio):
+    anio = f"from={hace_un_anio}"
+    return [
+        Endpoint("mareograph",               "/api/mareograph", False),
+        Endpoint("mareograph_columnar",      "/api/mareograph?format=columnar", False),
+        Endpoint("mareograph_1anio_1h",      f"/api/mareograph?{anio}&resolution=1h", False),
+        Endpoint("mareograph_latest",        "/api/mareograph/latest", False),
+        Endpoint("buoy",                     "/api/buoy", False),
+        Endpoint("buoy_ndjson",              "/api/buoy?format=ndjson", False),
+        Endpoint("buoy_latest",              "/api/buoy/latest", False),
+        Endpoint("tide_forecast",            "/api/tide_forecast", False),
+        Endpoint("plataforma_estado",        "/api/plataforma/3/estado", False),
+        Endpoint("mediciones_negativas",     "/api/mediciones_negativas", False),
+        Endpoint("puerto",                   "/api/appcr/puerto", False),
+        Endpoint("puerto_history",           "/api/appcr/puerto/history", False),
+        Endpoint("puerto_history_1anio_1d",  f"/api/appcr/puerto/history?{anio}&resolution=1d", False),
+        Endpoint("muelle_cc",                "/api/appcr/muelle_cc", False),
+        Endpoint("muelle_cc_history",        "/api/appcr/muelle_cc/history", False),
+        Endpoint("emac_cmd0",                "/api/emac_cmd0/", False),
+        Endpoint("emac_cmd0_history",        "/api/emac_cmd0/history", False),
+        Endpoint("emac_cmd1",                "/api/emac_cmd1/", False),
+        Endpoint("emac_cmd1_estado",         "/api/emac_cmd1/estado", False),
+        Endpoint("emac_cmd1_history",        "/api/emac_cmd1/history", False),
+        Endpoint("platform_latest",          f"/api/platforms/{platform_id}/latest", False),
+        Endpoint("platform_history",         f"/api/platforms/{platform_id}/history", False),
+        Endpoint("platform_history_ndjson",  f"/api/platforms/{platform_id}/history?format=ndjson&{anio}", False),
+        Endpoint("exports",                  "/api/exports/", False),
+        Endpoint("admin_stats",              "/api/admin/stats", True),
+        Endpoint("admin_plataformas",        "/api/admin/plataformas", True),
+    ]
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) por rango más cercano de una lista ordenada."""
+    if not valores:
+        return None
+    k = max(0, math.ceil(p / 100 * len(valores)) - 1)
+    return valores[min(k, len(valores) - 1)]
+
+
+def _pids_gunicorn():
+    pids = []
+    for entrada in os.listdir("/proc"):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entrada}/cmdline", "rb") as f:
+                if b"gunicorn" in f.read():
+                    pids.append(int(entrada))
+        except OSError:
+            continue
+    return pids
+
+
+def _rss_mb(pids):
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for linea in f:
+                    if linea.startswith("VmRSS:"):
+                        total += int(linea.split()[1])
+        except OSError:
+            continue
+    return total / 1024
+
+
+class _MuestreoRSS(threading.Thread):
+    """Pico de RSS de los procesos de gunicorn mientras dura un endpoint."""
+
+    def __init__(self, pids, cada=0.1):
+        super().__init__(daemon=True)
+        self.pids, self.cada = pids, cada
+        self.pico = 0.0
+        self._fin = threading.Event()
+
+    def run(self):
+        while not self._fin.is_set():
+            self.pico = max(self.pico, _rss_mb(self.pids))
+            self._fin.wait(self.cada)
+
+    def detener(self):
+        self._fin.set()
+        self.join()
+        return round(self.pico, 1) if self.pids else None
+
+
+def _cliente(base_url, endpoint, cookies, hasta, sin_cache, nonce):
+    """Pide el endpoint en loop hasta `hasta`. Retorna (latencias ms, errores, bytes)."""
+    latencias, errores, total_bytes = [], 0, 0
+    with requests.Session() as sesion:
+        if endpoint.admin:
+            sesion.cookies.update(cookies)
+        while time.perf_counter() < hasta:
+            url = base_url + endpoint.path
+            if sin_cache:
+                url += ("&" if "?" in url else "?") + f"_bench={next(nonce)}"
+            inicio = time.perf_counter()
+            try:
+                resp = sesion.get(url, timeout=60)
+                cuerpo = resp.content
+            except requests.RequestException:
+                errores += 1
+                continue
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            total_bytes += len(cuerpo)
+            if resp.status_code >= 400:
+                errores += 1
+    return latencias, errores, total_bytes
+
+
+def medir_endpoint(args, endpoint, cookies, pids, nonce):
+    # Un pedido de calentamiento (conexiones del pool, metadata en memoria).
+    _cliente(args.url, endpoint, cookies, time.perf_counter(), args.sin_cache, nonce)
+    muestreo = _MuestreoRSS(pids)
+    muestreo.start()
+    inicio = time.perf_counter()
+    hasta = inicio + args.duracion
+    with ThreadPoolExecutor(max_workers=args.clientes) as pool:
+        partes = list(pool.map(lambda _: _cliente(args.url, endpoint, cookies, hasta,
+                                                  args.sin_cache, nonce),
+                               range(args.clientes)))
+    duracion = time.perf_counter() - inicio
+    rss = muestreo.detener()
+
+    latencias = sorted(l for parte in partes for l in parte[0])
+    return {
+        "path":     endpoint.path,
+        "pedidos":  len(latencias),
+        "errores":  sum(p[1] for p in partes),
+        "rps":      round(len(latencias) / duracion, 1),
+        "p50_ms":   _redondear(percentil(latencias, 50)),
+        "p95_ms":   _redondear(percentil(latencias, 95)),
+        "p99_ms":   _redondear(percentil(latencias, 99)),
+        "kb_medio": round(sum(p[2] for p in partes) / max(len(latencias), 1) / 1024, 1),
+        "rss_mb":   rss,
+    }
+
+
+def _redondear(ms):
+    return round(ms, 1) if ms is not None else None
+
+
+def _platform_id(args, cookies):
+    """Primera plataforma con datos según /api/admin/plataformas (o --platform-id)."""
+    if args.platform_id:
+        return args.platform_id
+    try:
+        resp = requests.get(args.url + "/api/admin/plataformas", cookies=cookies, timeout=30)
+        plataformas = [p for p in resp.json()["plataformas"] if p["total_mediciones"]]
+        return plataformas[0]["id"] if plataformas else 3
+    except (requests.RequestException, ValueError, KeyError):
+        return 3
+
+
+def comparar(resultados, base, umbral):
+    """Endpoints cuyo p95 empeoró más de `umbral` (fracción) respecto de `base`."""
+    regresiones = []
+    for nombre, actual in resultados.items():
+        anterior = base.get(nombre)
+        if not anterior or not anterior.get("p95_ms") or actual["p95_ms"] is None:
+            continue
+        cambio = actual["p95_ms"] / anterior["p95_ms"] - 1
+        if cambio > umbral:
+            regresiones.append((nombre, anterior["p95_ms"], actual["p95_ms"], cambio))
+    return regresiones
+
+
+def correr(args):
+    from core_auth import create_jwt
+
+    cookies = {"auth_token": create_jwt({"uid": 0, "email": "bench@oogsj",
+                                         "is_admin": True, "admin_role": "viewer"})}
+    hace_un_anio = (datetime.utcnow() - timedelta(days=365)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    lista = endpoints(_platform_id(args, cookies), hace_un_anio)
+    if args.solo:
+        lista = [e for e in lista if re.search(args.solo, e.nombre)]
+    pids = _pids_gunicorn()
+    nonce = count()
+    if not pids:
+        print("ℹ️  No se encontraron procesos de gunicorn en esta máquina: sin RSS.")
+
+    print(f"🚀 {len(lista)} endpoints · {args.clientes} clientes · {args.duracion:g} s c/u · {args.url}")
+    print(f"{'endpoint':<26} {'pedidos':>8} {'err':>5} {'req/s':>8} {'p50':>8} {'p95':>8} "
+          f"{'p99':>8} {'KB':>8} {'RSS MB':>8}")
+    resultados = {}
+    for endpoint in lista:
+        r = medir_endpoint(args, endpoint, cookies, pids, nonce)
+        resultados[endpoint.nombre] = r
+        print(f"{endpoint.nombre:<26} {r['pedidos']:>8} {r['errores']:>5} {r['rps']:>8} "
+              f"{r['p50_ms'] or '-':>8} {r['p95_ms'] or '-':>8} {r['p99_ms'] or '-':>8} "
+              f"{r['kb_medio']:>8} {r['rss_mb'] or '-':>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"fecha": datetime.utcnow().isoformat() + "Z",
+                       "parametros": {k: v for k, v in vars(args).items() if k != "func"},
+                       "endpoints": resultados}, f, indent=2, ensure_ascii=False)
+        print(f"💾 Resultados en {args.json}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)["endpoints"]
+        regresiones = comparar(resultados, base, args.umbral)
+        for nombre, antes, ahora, cambio in regresiones:
+            print(f"❗ {nombre}: p95 {antes} → {ahora} ms (+{cambio:.0%})")
+        if regresiones:
+            return 1
+        print(f"✅ Ningún p95 empeoró más de {args.umbral:.0%} respecto de {args.comparar}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de los endpoints de datos.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("sembrar", help="generar mediciones sintéticas en la base local")
+    p.add_argument("--anios", type=float, default=2, help="default: 2")
+    p.add_argument("--intervalo", type=int, default=10, help="minutos entre mediciones (default: 10)")
+    p.add_argument("--estaciones", type=int, default=0, help="estaciones extra 'Bench N' (default: 0)")
+    p.add_argument("--sensores", type=int, default=10, help="sensores por estación extra (default: 10)")
+    p.add_argument("--semilla", type=float, default=0.42, help="setseed() de Postgres, entre -1 y 1")
+    p.add_argument("--confirmar", metavar="BASE", required=True,
+                   help="nombre de la base conectada, para confirmar que se puede escribir")
+    p.set_defaults(func=sembrar)
+
+    p = sub.add_parser("correr", help="medir los endpoints con clientes concurrentes")
+    p.add_argument("--url", default="http://localhost:5001", help="default: http://localhost:5001")
+    p.add_argument("--clientes", type=int, default=8, help="default: 8")
+    p.add_argument("--duracion", type=float, default=10, help="segundos por endpoint (default: 10)")
+    p.add_argument("--solo", help="regex: sólo los endpoints cuyo nombre coincide")
+    p.add_argument("--platform-id", type=int, help="plataforma de /api/platforms/<id>/*")
+    p.add_argument("--sin-cache", action="store_true", help="evitar el cache de respuestas")
+    p.add_argument("--json", help="archivo donde guardar los resultados")
+    p.add_argument("--comparar", metavar="JSON", help="resultados anteriores contra los que comparar")
+    p.add_argument("--umbral", type=float, default=0.2,
+                   help="empeoramiento de p95 tolerado al comparar (default: 0.2 = 20%%)")
+    p.set_defaults(func=correr)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
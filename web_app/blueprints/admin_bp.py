@@ -1,11 +1,23 @@
+import os
 from datetime import datetime, timezone
 
 from flask import Blueprint, jsonify, request
+
+from cache import invalidate
 from core_auth import admin_required, master_required
-from db import get_db_connection
+from db import get_db_connection, get_pool
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
 
+# Mediciones de las últimas 24h por sensor, de los intervalos de 5 minutos
+# de sensor_stats_recent (ver api_ingestor/services/sensor_stats.py).
+_RECIENTES_24H = """
+    SELECT sensor_id, SUM(n) AS n
+    FROM oogsj_data.sensor_stats_recent
+    WHERE bucket >= NOW() - INTERVAL '24h'
+    GROUP BY sensor_id
+"""
+
 
 @admin_bp.get("/stats")
 @admin_required
@@ -23,25 +35,24 @@ def get_stats():
     conn = get_db_connection()
     cur  = conn.cursor()
     try:
-        # ── Mediciones generales ──────────────────────────────
+        # ── Mediciones y plataformas con datos ────────────────
+        # De los contadores por sensor que mantiene el ingestor
+        # (sensor_stats / sensor_stats_recent): una fila por sensor y por
+        # intervalo de 5 minutos, sin recorrer measurement.
         cur.execute("""
             SELECT
-                COUNT(*)                                                    AS total,
-                COUNT(*) FILTER (WHERE timestamp >= NOW() - INTERVAL '24h') AS ultimas_24h,
-                COUNT(*) FILTER (WHERE timestamp >= NOW() - INTERVAL '1h')  AS ultima_hora,
-                MAX(timestamp)                                              AS ultima_medicion
-            FROM oogsj_data.measurement;
+                COALESCE(SUM(st.total), 0)                                  AS total,
+                (SELECT COALESCE(SUM(n), 0) FROM oogsj_data.sensor_stats_recent
+                  WHERE bucket >= NOW() - INTERVAL '24h')                   AS ultimas_24h,
+                (SELECT COALESCE(SUM(n), 0) FROM oogsj_data.sensor_stats_recent
+                  WHERE bucket >= NOW() - INTERVAL '1h')                    AS ultima_hora,
+                MAX(st.last_timestamp)                                      AS ultima_medicion,
+                COUNT(DISTINCT s.platform_id) FILTER (WHERE st.total > 0)   AS plataformas_activas
+            FROM oogsj_data.sensor_stats st
+            JOIN oogsj_data.sensor s ON s.id = st.sensor_id;
         """)
         m = cur.fetchone()
-
-        # ── Plataformas con datos (sin duplicados) ────────────
-        cur.execute("""
-            SELECT COUNT(DISTINCT p.id)
-            FROM oogsj_data.platform p
-            JOIN oogsj_data.sensor s ON s.platform_id = p.id
-            JOIN oogsj_data.measurement me ON me.sensor_id = s.id;
-        """)
-        plats_activas = cur.fetchone()[0]
+        plats_activas = m[4]
 
         # ── Avisos al navegante ───────────────────────────────
         cur.execute("""
@@ -105,25 +116,26 @@ def get_plataformas():
     conn = get_db_connection()
     cur  = conn.cursor()
     try:
-        cur.execute("""
+        # Totales, última transmisión y últimas 24h por sensor: de los
+        # contadores del ingestor en lugar de recorrer measurement.
+        cur.execute(f"""
             SELECT
                 p.id,
                 p.name                                  AS nombre,
                 pt.name                                 AS tipo,
                 p.maintenance_mode,
                 p.maintenance_message,
-                COUNT(DISTINCT s.id)                    AS sensores,
-                MAX(m.timestamp)                        AS ultima_transmision,
-                COUNT(m.id)                             AS total_mediciones,
-                COUNT(m.id) FILTER (
-                    WHERE m.timestamp >= NOW() - INTERVAL '24h'
-                )                                       AS mediciones_24h
+                COUNT(s.id)                             AS sensores,
+                MAX(t.last_timestamp)                   AS ultima_transmision,
+                COALESCE(SUM(t.total), 0)               AS total_mediciones,
+                COALESCE(SUM(r.n), 0)                   AS mediciones_24h
             FROM oogsj_data.platform p
             LEFT JOIN oogsj_data.platform_type pt  ON pt.id = p.platform_type_id
             LEFT JOIN oogsj_data.sensor s           ON s.platform_id = p.id
-            LEFT JOIN oogsj_data.measurement m      ON m.sensor_id   = s.id
+            LEFT JOIN oogsj_data.sensor_stats t     ON t.sensor_id   = s.id
+            LEFT JOIN ({_RECIENTES_24H}) r          ON r.sensor_id   = s.id
             GROUP BY p.id, p.name, pt.name, p.maintenance_mode, p.maintenance_message
-            HAVING COUNT(DISTINCT s.id) > 0
+            HAVING COUNT(s.id) > 0
             ORDER BY ultima_transmision DESC NULLS LAST;
         """)
         rows = cur.fetchall()
@@ -232,6 +244,7 @@ def set_mantenimiento(platform_id):
         """, (modo, mensaje, platform_id))
         row = cur.fetchone()
         conn.commit()
+        invalidate("plataformas")
     finally:
         cur.close()
         conn.close()
@@ -245,3 +258,19 @@ def set_mantenimiento(platform_id):
         "en_mantenimiento":    bool(row[2]),
         "maintenance_message": row[3],
     })
+
+
+@admin_bp.get("/db_pool")
+@admin_required
+def get_db_pool():
+    """
+    Métricas del pool de conexiones a Postgres del worker que atiende el request.
+    ---
+    tags: [Admin]
+    responses:
+      200:
+        description: Conexiones en uso/ociosas, esperas y latencia de checkout
+      401:
+        description: No autorizado
+    """
+    return jsonify({"pid": os.getpid(), "pool": get_pool().metrics()})
@@ -2,12 +2,14 @@ from datetime import datetime, timedelta, timezone
 
 from flask import Blueprint, jsonify, request
 
+from cache import cached
 from db import get_db_connection
 
 avisos_bp = Blueprint("avisos", __name__, url_prefix="/api/avisos")
 
 
 @avisos_bp.get("/navegante")
+@cached("shn_avisos")
 def get_avisos_navegante():
     """
     Avisos al navegante — últimos 30 días filtrados por Golfo San Jorge / Chubut
@@ -83,6 +85,7 @@ def get_avisos_navegante():
 
 
 @avisos_bp.get("/navegante/latest")
+@cached("shn_avisos")
 def get_aviso_latest():
     """
     Aviso al navegante más reciente
@@ -1,7 +1,12 @@
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta, timezone
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 
+import downsampling
+import pagination
+import series_format
+from cache import cached
+from conditional import conditional
 from db import get_db_connection
 
 emac_cmd1_bp = Blueprint("emac_cmd1", __name__, url_prefix="/api/emac_cmd1")
@@ -50,6 +55,8 @@ def _convert(variable_name, raw):
 
 # ── Último dato ─────────────────────────────────────────────────────────────
 @emac_cmd1_bp.get("/")
+@conditional("emac_cmd1_station")
+@cached("emac_cmd1_station")
 def get_emac_cmd1_data():
     """
     Estación EMAC CMD1 — último dato
@@ -87,12 +94,7 @@ def get_emac_cmd1_data():
             JOIN oogsj_data.sensor s ON s.platform_id = p.id
             JOIN oogsj_data.variable v ON v.id = s.variable_id
             JOIN oogsj_data.unit u ON u.id = s.unit_id
-            JOIN LATERAL (
-                SELECT m2."timestamp", m2.value
-                FROM oogsj_data.measurement m2
-                WHERE m2.sensor_id = s.id
-                ORDER BY m2."timestamp" DESC LIMIT 1
-            ) m ON TRUE
+            JOIN oogsj_data.sensor_latest m ON m.sensor_id = s.id
             WHERE p.name = %s
             ORDER BY v.name, s.name;
         """, (_PLATFORM_NAME,))
@@ -132,6 +134,7 @@ def get_emac_cmd1_data():
 
 # ── Estado de mantenimiento ───────────────────────────────────────────────────
 @emac_cmd1_bp.get("/estado")
+@cached("plataformas")
 def get_emac_cmd1_estado():
     """
     Estación EMAC CMD1 — estado de mantenimiento
@@ -166,16 +169,63 @@ def get_emac_cmd1_estado():
 
 # ── Histórico ───────────────────────────────────────────────────────────────
 @emac_cmd1_bp.get("/history")
+@conditional("emac_cmd1_station")
+@cached("emac_cmd1_station")
 def get_emac_cmd1_history():
     """
     Estación EMAC CMD1 — histórico 10 días
     ---
     tags: [EMAC]
+    parameters:
+      - name: resolution
+        in: query
+        required: false
+        schema: { type: string, enum: [10min, 30min, 1h, 3h, 6h, 12h, 1d] }
+        description: Agrega por intervalo en SQL (media, con min y max). Alias bucket.
+      - name: max_points
+        in: query
+        required: false
+        schema: { type: integer, minimum: 3, maximum: 10000 }
+        description: Máximo de puntos por variable (downsampling visual LTTB)
+      - name: from
+        in: query
+        required: false
+        schema: { type: string, format: date-time }
+        description: Inicio del rango (ISO-8601). Por defecto, la ventana de 10 días hasta to.
+      - name: to
+        in: query
+        required: false
+        schema: { type: string, format: date-time }
+        description: Fin del rango, excluido. Por defecto, ahora.
+      - name: limit
+        in: query
+        required: false
+        schema: { type: integer, minimum: 1 }
+        description: Filas por página (tope HISTORY_PAGE_MAX)
+      - name: cursor
+        in: query
+        required: false
+        schema: { type: string }
+        description: X-Next-Cursor de la página anterior
+      - name: format
+        in: query
+        required: false
+        schema: { type: string, enum: [json, columnar] }
+        description: columnar reemplaza data por arreglos paralelos t (epoch ms) / v (ver series_format.py)
+      - name: delta
+        in: query
+        required: false
+        schema: { type: integer, enum: [0, 1] }
+        description: Con format=columnar, t en diferencias respecto del punto anterior
     responses:
       200:
         description: >
           Serie temporal de los últimos 10 días agrupada por variable.
           La velocidad del viento se devuelve en km/h (almacenada en m/s).
+        headers:
+          X-Next-Cursor:
+            description: Cursor de la página siguiente; ausente en la última
+            schema: { type: string }
         content:
           application/json:
             schema:
@@ -193,36 +243,58 @@ def get_emac_cmd1_history():
                       properties:
                         timestamp: { type: string, format: date-time }
                         value:     { type: number }
+                        min:       { type: number, description: Sólo con resolution }
+                        max:       { type: number, description: Sólo con resolution }
+      400:
+        description: resolution, max_points, from/to, limit o cursor inválidos
     """
+    try:
+        ds   = downsampling.parse_args(request.args)
+        fmt  = series_format.parse_format(request.args, allowed=("json", "columnar"))
+        page = pagination.parse_args(request.args, timedelta(days=10))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    serie = downsampling.series_sql(ds, group_cols=3)
+
     conn  = get_db_connection()
     cur   = conn.cursor()
-    desde = datetime.utcnow() - timedelta(days=10)
     try:
-        cur.execute("""
-            SELECT v.name, u.symbol, m."timestamp", m.value
-            FROM oogsj_data.measurement m
+        cur.execute(pagination.page_sql(f"""
+            SELECT m.sensor_id, v.name, u.symbol, {serie.ts}, {serie.values}
+            FROM {serie.table}
             JOIN oogsj_data.sensor   s ON s.id = m.sensor_id
             JOIN oogsj_data.platform p ON p.id = s.platform_id
             JOIN oogsj_data.variable v ON v.id = s.variable_id
             JOIN oogsj_data.unit     u ON u.id = s.unit_id
-            WHERE p.name = %s AND m."timestamp" >= %s
-            ORDER BY v.name, m."timestamp";
-        """, (_PLATFORM_NAME, desde))
-        rows = cur.fetchall()
+            WHERE p.name = %(platform)s
+              AND {serie.time_col} >= %(desde)s AND {serie.time_col} < %(hasta)s
+            {serie.group}
+        """, page), pagination.page_params(page, platform=_PLATFORM_NAME))
+        rows, next_cursor = pagination.split(cur.fetchall(), page,
+                                             ts=lambda r: r[3], sensor_id=lambda r: r[0])
     finally:
         cur.close()
         conn.close()
 
+    rows = downsampling.thin_rows(rows, ds.max_points, series=lambda r: r[1],
+                                  ts=lambda r: r[3], value=lambda r: r[4])
     data = {}
-    for variable_name, db_unit, ts, raw in rows:
+    for _sid, variable_name, db_unit, ts, raw, *rango in rows:
         converted, final_unit = _convert(variable_name, raw)
         cfg = _VARIABLE_MAP.get(variable_name)
         key = cfg["key"] if cfg else variable_name.lower().replace(" ", "_")
         if key not in data:
             data[key] = {"unit": final_unit or db_unit, "data": []}
-        data[key]["data"].append({
+        punto = {
             "timestamp": _ts_to_iso(ts),
             "value":     converted,
-        })
+        }
+        if rango:
+            # Las conversiones son lineales: min/max convierten igual que la media.
+            punto["min"] = _convert(variable_name, rango[0])[0]
+            punto["max"] = _convert(variable_name, rango[1])[0]
+        data[key]["data"].append(punto)
 
-    return jsonify(data), 200
+    if fmt == "columnar":
+        data = {k: {"unit": v["unit"], **series_format.to_columns(v["data"])} for k, v in data.items()}
+    return pagination.with_next(jsonify(data), next_cursor), 200
@@ -1,4 +1,5 @@
 from flask import Blueprint, jsonify, request
+from cache import cached, invalidate
 from core_auth import admin_required
 from db import get_db_connection
 
@@ -20,6 +21,7 @@ def _serialize(r):
 
 # ── Público: lista de especies ────────────────────────────────────────────
 @especies_bp.get("/")
+@cached("especies")
 def list_especies():
     """
     Lista de especies del catálogo (público)
@@ -112,6 +114,7 @@ def admin_create():
               data.get("imagen_url") or None))
         row = cur.fetchone()
         conn.commit()
+        invalidate("especies")
     finally:
         cur.close()
         conn.close()
@@ -160,6 +163,7 @@ def admin_update(eid: int):
               eid))
         row = cur.fetchone()
         conn.commit()
+        invalidate("especies")
     finally:
         cur.close()
         conn.close()
@@ -194,6 +198,7 @@ def admin_delete(eid: int):
         cur.execute("DELETE FROM oogsj_data.especie WHERE id = %s RETURNING id;", (eid,))
         row = cur.fetchone()
         conn.commit()
+        invalidate("especies")
     finally:
         cur.close()
         conn.close()
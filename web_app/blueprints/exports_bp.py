@@ -17,7 +17,13 @@ _MONTH_NAMES = {
     9: "Septiembre", 10: "Octubre", 11: "Noviembre", 12: "Diciembre",
 }
 
-_FILE_RE = re.compile(r"^(\d{4})_(\d{2})_.+\.(csv|txt)$")
+_FILE_RE = re.compile(r"^(\d{4})_(\d{2})_.+\.(csv|txt|parquet)$")
+
+_MIMETYPES = {
+    ".csv":     "text/csv",
+    ".txt":     "text/plain",
+    ".parquet": "application/vnd.apache.parquet",
+}
 
 
 def _human_size(n: int) -> str:
@@ -28,8 +34,33 @@ def _human_size(n: int) -> str:
     return f"{n:.1f} TB"
 
 
+def _file_entry(f: Path, root: Path):
+    m = _FILE_RE.match(f.name)
+    if not m:
+        return None
+    year  = int(m.group(1))
+    month = int(m.group(2))
+    stat  = f.stat()
+    rel   = f.relative_to(root).as_posix()
+    return {
+        "filename":     f.name,
+        "format":       f.suffix.lstrip("."),
+        "year":         year,
+        "month":        month,
+        "month_name":   _MONTH_NAMES.get(month, ""),
+        "size_bytes":   stat.st_size,
+        "size_human":   _human_size(stat.st_size),
+        "generated_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+        "download_url": f"/api/exports/download/{rel}",
+    }
+
+
 def _scan_exports(platform_filter: str = None, year_filter: int = None) -> list[dict]:
-    """Recorre EXPORTS_FOLDER y devuelve metadata de cada CSV encontrado."""
+    """
+    Recorre EXPORTS_FOLDER y devuelve metadata de cada export encontrado:
+    CSV/TXT en <slug>/<año>/ y Parquet en el dataset particionado
+    <slug>/parquet/year=YYYY/month=MM/.
+    """
     root = Path(config.EXPORTS_FOLDER)
     if not root.exists():
         return []
@@ -41,37 +72,27 @@ def _scan_exports(platform_filter: str = None, year_filter: int = None) -> list[
         if platform_filter and platform_dir.name != platform_filter:
             continue
 
-        files = []
+        candidates = []
         for year_dir in sorted(platform_dir.iterdir()):
-            if not year_dir.is_dir():
+            if not year_dir.is_dir() or not year_dir.name.isdigit():
                 continue
             if year_filter and year_dir.name != str(year_filter):
                 continue
+            candidates += [f for f in year_dir.iterdir() if f.suffix in (".csv", ".txt")]
+
+        year_glob = f"year={year_filter}" if year_filter else "year=*"
+        candidates += list(platform_dir.glob(f"parquet/{year_glob}/month=*/*.parquet"))
 
-            for f in sorted(year_dir.iterdir()):
-                if not f.is_file() or f.suffix not in (".csv", ".txt"):
-                    continue
-                m = _FILE_RE.match(f.name)
-                if not m:
-                    continue
-                year  = int(m.group(1))
-                month = int(m.group(2))
-                stat  = f.stat()
-                rel   = f.relative_to(root).as_posix()
-                files.append({
-                    "filename":     f.name,
-                    "format":       f.suffix.lstrip("."),
-                    "year":         year,
-                    "month":        month,
-                    "month_name":   _MONTH_NAMES.get(month, ""),
-                    "size_bytes":   stat.st_size,
-                    "size_human":   _human_size(stat.st_size),
-                    "generated_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                    "download_url": f"/api/exports/download/{rel}",
-                })
+        files = [e for e in (_file_entry(f, root) for f in candidates if f.is_file()) if e]
+        files.sort(key=lambda e: (e["year"], e["month"], e["filename"]))
 
         if files:
-            platforms.append({"slug": platform_dir.name, "files": files})
+            platforms.append({
+                "slug":            platform_dir.name,
+                "parquet_dataset": f"{platform_dir.name}/parquet"
+                                   if any(e["format"] == "parquet" for e in files) else None,
+                "files":           files,
+            })
 
     return platforms
 
@@ -83,10 +104,10 @@ def _scan_exports(platform_filter: str = None, year_filter: int = None) -> list[
 @exports_bp.get("/")
 def list_exports():
     """
-    Listar archivos CSV exportados
+    Listar archivos exportados (CSV, TXT y Parquet)
     ---
     tags: [Exports]
-    summary: Lista todos los archivos CSV generados, agrupados por plataforma
+    summary: Lista todos los archivos generados, agrupados por plataforma
     parameters:
       - name: platform
         in: query
@@ -115,12 +136,18 @@ def list_exports():
                     type: object
                     properties:
                       slug:  { type: string, example: boya_cidmar_2 }
+                      parquet_dataset:
+                        type: string
+                        nullable: true
+                        example: boya_cidmar_2/parquet
+                        description: Carpeta del dataset Parquet particionado por year=/month=
                       files:
                         type: array
                         items:
                           type: object
                           properties:
                             filename:     { type: string, example: "2026_04_boya_cidmar_2.csv" }
+                            format:       { type: string, enum: [csv, txt, parquet] }
                             year:         { type: integer, example: 2026 }
                             month:        { type: integer, example: 4 }
                             month_name:   { type: string,  example: Abril }
@@ -140,10 +167,10 @@ def list_exports():
 @exports_bp.get("/download/<path:filepath>")
 def download_export(filepath: str):
     """
-    Descargar un archivo CSV exportado
+    Descargar un archivo exportado
     ---
     tags: [Exports]
-    summary: Descarga un CSV por su ruta relativa dentro del directorio de exports
+    summary: Descarga un CSV, TXT o Parquet por su ruta relativa dentro del directorio de exports
     parameters:
       - name: filepath
         in: path
@@ -152,10 +179,14 @@ def download_export(filepath: str):
         description: "Ruta relativa (ej. boya_cidmar_2/2026/2026_04_boya_cidmar_2.csv)"
     responses:
       200:
-        description: Archivo CSV
+        description: Archivo exportado
         content:
           text/csv:
             schema: { type: string, format: binary }
+          text/plain:
+            schema: { type: string, format: binary }
+          application/vnd.apache.parquet:
+            schema: { type: string, format: binary }
       403:
         description: Ruta fuera del directorio permitido
       404:
@@ -172,7 +203,7 @@ def download_export(filepath: str):
     if not target.is_file():
         return jsonify({"error": "not_found"}), 404
 
-    mime = "text/plain" if target.suffix == ".txt" else "text/csv"
+    mime = _MIMETYPES.get(target.suffix, "application/octet-stream")
     return send_file(
         str(target),
         mimetype=mime,
@@ -1,4 +1,5 @@
 from flask import Blueprint, jsonify, request
+from cache import cached, invalidate
 from core_auth import admin_required
 from db import get_db_connection
 
@@ -20,6 +21,7 @@ def _serialize(r):
 
 # ── Público: lista de noticias publicadas ─────────────────────────────────
 @noticias_bp.get("/")
+@cached("noticias")
 def list_noticias():
     """
     Lista noticias publicadas (público)
@@ -132,6 +134,7 @@ def admin_create():
               bool(data.get("publicado", False))))
         row = cur.fetchone()
         conn.commit()
+        invalidate("noticias")
     finally:
         cur.close()
         conn.close()
@@ -180,6 +183,7 @@ def admin_update(nid: int):
               nid))
         row = cur.fetchone()
         conn.commit()
+        invalidate("noticias")
     finally:
         cur.close()
         conn.close()
@@ -214,6 +218,7 @@ def admin_delete(nid: int):
         cur.execute("DELETE FROM oogsj_data.noticia WHERE id = %s RETURNING id;", (nid,))
         row = cur.fetchone()
         conn.commit()
+        invalidate("noticias")
     finally:
         cur.close()
         conn.close()
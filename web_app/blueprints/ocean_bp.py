@@ -1,5 +1,11 @@
-from datetime import datetime, timedelta
-from flask import Blueprint, jsonify
+from datetime import timedelta
+from flask import Blueprint, jsonify, request
+import downsampling
+import pagination
+import series_format
+import streaming
+from cache import MEASUREMENT_TAGS, cached
+from conditional import conditional
 from db import get_db_connection, safe_float
 
 ocean_bp = Blueprint("ocean", __name__, url_prefix="/api")
@@ -14,16 +20,88 @@ BUOY_SENSORS = {
     9: "Batería",
 }
 
+# La tabla del SHN cubre el mes en curso: el histórico por defecto incluye
+# la predicción cargada hacia adelante.
+TIDE_FORECAST_AHEAD = timedelta(days=45)
+
+
+def _buoy_name(sensor_id):
+    return BUOY_SENSORS.get(sensor_id, f"Sensor {sensor_id}")
+
+
+def _nivel(ts, value, *rango):
+    """Punto de mareógrafo / predicción de marea."""
+    punto = {"timestamp": ts, "level": safe_float(value)}
+    if rango:
+        punto["min"], punto["max"] = safe_float(rango[0]), safe_float(rango[1])
+    return punto
+
+
+def _punto_boya(ts, value, *rango):
+    punto = {"timestamp": ts, "value": value}
+    if rango:
+        punto["min"], punto["max"] = rango
+    return punto
+
 
 @ocean_bp.get("/mareograph")
+@conditional("mareograph")
+@cached("mareograph")
 def get_mareograph_data():
     """
     Nivel del mareógrafo — últimos 30 días
     ---
     tags: [Ocean]
+    parameters:
+      - name: resolution
+        in: query
+        required: false
+        schema: { type: string, enum: [10min, 30min, 1h, 3h, 6h, 12h, 1d] }
+        description: Agrega por intervalo en SQL (media, con min y max). Alias bucket.
+      - name: max_points
+        in: query
+        required: false
+        schema: { type: integer, minimum: 3, maximum: 10000 }
+        description: Máximo de puntos por serie (downsampling visual LTTB)
+      - name: from
+        in: query
+        required: false
+        schema: { type: string, format: date-time }
+        description: Inicio del rango (ISO-8601). Por defecto, la ventana de 30 días hasta to.
+      - name: to
+        in: query
+        required: false
+        schema: { type: string, format: date-time }
+        description: Fin del rango, excluido. Por defecto, ahora.
+      - name: limit
+        in: query
+        required: false
+        schema: { type: integer, minimum: 1 }
+        description: Filas por página (tope HISTORY_PAGE_MAX)
+      - name: cursor
+        in: query
+        required: false
+        schema: { type: string }
+        description: X-Next-Cursor de la página anterior
+      - name: format
+        in: query
+        required: false
+        schema: { type: string, enum: [json, ndjson, columnar] }
+        description: >
+          ndjson devuelve una línea por punto en streaming (ver streaming.py);
+          columnar, arreglos paralelos t (epoch ms) / v por serie (ver series_format.py)
+      - name: delta
+        in: query
+        required: false
+        schema: { type: integer, enum: [0, 1] }
+        description: Con format=columnar, t en diferencias respecto del punto anterior
     responses:
       200:
         description: Serie temporal del nivel del mar
+        headers:
+          X-Next-Cursor:
+            description: Cursor de la página siguiente; ausente en la última
+            schema: { type: string }
         content:
           application/json:
             schema:
@@ -33,20 +111,47 @@ def get_mareograph_data():
                 properties:
                   timestamp: { type: string, format: date-time }
                   level:     { type: number, example: 2.34 }
+                  min:       { type: number, description: Sólo con resolution }
+                  max:       { type: number, description: Sólo con resolution }
+      400:
+        description: resolution o max_points inválidos
     """
+    try:
+        ds   = downsampling.parse_args(request.args)
+        page = pagination.parse_args(request.args, timedelta(days=30))
+        fmt  = series_format.parse_format(request.args, ds)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if fmt == "ndjson":
+        page = streaming.stream_page(page, request.args)
+    serie = downsampling.series_sql(ds, group_cols=1)
+    sql = pagination.page_sql(f"""
+        SELECT m.sensor_id, {serie.ts}, {serie.values} FROM {serie.table}
+        WHERE m.sensor_id = 1
+          AND {serie.time_col} >= %(desde)s AND {serie.time_col} < %(hasta)s
+        {serie.group}
+    """, page)
     conn = get_db_connection()
+    if fmt == "ndjson":
+        return streaming.ndjson_response(conn, sql, pagination.page_params(page),
+                                         lines=lambda r: [_nivel(*r[1:])],
+                                         page=page, key=lambda r: (r[1], r[0]))
     cur  = conn.cursor()
-    cur.execute("""
-        SELECT timestamp, value FROM oogsj_data.measurement
-        WHERE sensor_id = 1 AND timestamp >= NOW() - INTERVAL '30 days'
-        ORDER BY timestamp;
-    """)
-    data = [{"timestamp": row[0], "level": safe_float(row[1])} for row in cur.fetchall()]
+    cur.execute(sql, pagination.page_params(page))
+    rows, next_cursor = pagination.split(cur.fetchall(), page,
+                                         ts=lambda r: r[1], sensor_id=lambda r: r[0])
+    rows = downsampling.thin_rows(rows, ds.max_points, series=lambda r: 1,
+                                  ts=lambda r: r[1], value=lambda r: r[2])
     cur.close(); conn.close()
-    return jsonify(data)
+    data = [_nivel(*r[1:]) for r in rows]
+    if fmt == "columnar":
+        data = series_format.to_columns(data, value_key="level")
+    return pagination.with_next(jsonify(data), next_cursor)
 
 
 @ocean_bp.get("/mareograph/latest")
+@conditional("mareograph", "tide_forecast")
+@cached("mareograph", "tide_forecast")
 def get_latest_mareograph_data():
     """
     Último dato del mareógrafo
@@ -69,12 +174,12 @@ def get_latest_mareograph_data():
     conn = get_db_connection()
     cur  = conn.cursor()
     cur.execute("""
-        SELECT DISTINCT ON (m.sensor_id) s.name, m.timestamp, m.value, u.symbol
-        FROM oogsj_data.measurement m
+        SELECT s.name, m.timestamp, m.value, u.symbol
+        FROM oogsj_data.sensor_latest m
         JOIN oogsj_data.sensor s ON m.sensor_id = s.id
         JOIN oogsj_data.unit   u ON s.unit_id   = u.id
         WHERE s.platform_id = 1
-        ORDER BY m.sensor_id, m.timestamp DESC;
+        ORDER BY m.sensor_id;
     """)
     rows = cur.fetchall()
     cur.close(); conn.close()
@@ -87,14 +192,63 @@ def get_latest_mareograph_data():
 
 
 @ocean_bp.get("/buoy")
+@conditional("buoy")
+@cached("buoy")
 def get_buoy_data():
     """
     Datos de la boya — últimos 10 días
     ---
     tags: [Ocean]
+    parameters:
+      - name: resolution
+        in: query
+        required: false
+        schema: { type: string, enum: [10min, 30min, 1h, 3h, 6h, 12h, 1d] }
+        description: Agrega por intervalo en SQL (media, con min y max). Alias bucket.
+      - name: max_points
+        in: query
+        required: false
+        schema: { type: integer, minimum: 3, maximum: 10000 }
+        description: Máximo de puntos por serie (downsampling visual LTTB)
+      - name: from
+        in: query
+        required: false
+        schema: { type: string, format: date-time }
+        description: Inicio del rango (ISO-8601). Por defecto, la ventana de 10 días hasta to.
+      - name: to
+        in: query
+        required: false
+        schema: { type: string, format: date-time }
+        description: Fin del rango, excluido. Por defecto, ahora.
+      - name: limit
+        in: query
+        required: false
+        schema: { type: integer, minimum: 1 }
+        description: Filas por página (tope HISTORY_PAGE_MAX)
+      - name: cursor
+        in: query
+        required: false
+        schema: { type: string }
+        description: X-Next-Cursor de la página anterior
+      - name: format
+        in: query
+        required: false
+        schema: { type: string, enum: [json, ndjson, columnar] }
+        description: >
+          ndjson devuelve una línea por punto en streaming (ver streaming.py);
+          columnar, arreglos paralelos t (epoch ms) / v por serie (ver series_format.py)
+      - name: delta
+        in: query
+        required: false
+        schema: { type: integer, enum: [0, 1] }
+        description: Con format=columnar, t en diferencias respecto del punto anterior
     responses:
       200:
         description: Series temporales por variable de la boya oceanográfica
+        headers:
+          X-Next-Cursor:
+            description: Cursor de la página siguiente; ausente en la última
+            schema: { type: string }
         content:
           application/json:
             schema:
@@ -106,25 +260,49 @@ def get_buoy_data():
                   properties:
                     timestamp: { type: string, format: date-time }
                     value:     { type: number }
+                    min:       { type: number, description: Sólo con resolution }
+                    max:       { type: number, description: Sólo con resolution }
+      400:
+        description: resolution o max_points inválidos
     """
+    try:
+        ds   = downsampling.parse_args(request.args)
+        page = pagination.parse_args(request.args, timedelta(days=10))
+        fmt  = series_format.parse_format(request.args, ds)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if fmt == "ndjson":
+        page = streaming.stream_page(page, request.args)
+    serie = downsampling.series_sql(ds, group_cols=1)
+    sql = pagination.page_sql(f"""
+        SELECT m.sensor_id, {serie.ts}, {serie.values} FROM {serie.table}
+        WHERE m.sensor_id IN (3,4,5,6,7,8,9)
+          AND {serie.time_col} >= %(desde)s AND {serie.time_col} < %(hasta)s
+        {serie.group}
+    """, page)
     conn  = get_db_connection()
+    if fmt == "ndjson":
+        return streaming.ndjson_response(
+            conn, sql, pagination.page_params(page), page=page, key=lambda r: (r[1], r[0]),
+            lines=lambda r: [{"variable": _buoy_name(r[0]), **_punto_boya(*r[1:])}])
     cur   = conn.cursor()
-    desde = datetime.utcnow() - timedelta(days=10)
-    cur.execute("""
-        SELECT sensor_id, timestamp, value FROM oogsj_data.measurement
-        WHERE sensor_id IN (3,4,5,6,7,8,9) AND timestamp >= %s
-        ORDER BY timestamp;
-    """, (desde,))
-    raw  = cur.fetchall()
+    cur.execute(sql, pagination.page_params(page))
+    raw, next_cursor = pagination.split(cur.fetchall(), page,
+                                        ts=lambda r: r[1], sensor_id=lambda r: r[0])
+    raw  = downsampling.thin_rows(raw, ds.max_points, series=lambda r: r[0],
+                                  ts=lambda r: r[1], value=lambda r: r[2])
     cur.close(); conn.close()
     data = {name: [] for name in BUOY_SENSORS.values()}
-    for sensor_id, timestamp, value in raw:
-        name = BUOY_SENSORS.get(sensor_id, f"Sensor {sensor_id}")
-        data.setdefault(name, []).append({"timestamp": timestamp, "value": value})
-    return jsonify(data)
+    for sensor_id, *punto in raw:
+        data.setdefault(_buoy_name(sensor_id), []).append(_punto_boya(*punto))
+    if fmt == "columnar":
+        data = {name: series_format.to_columns(puntos) for name, puntos in data.items()}
+    return pagination.with_next(jsonify(data), next_cursor)
 
 
 @ocean_bp.get("/buoy/latest")
+@conditional("buoy")
+@cached("buoy")
 def get_latest_buoy_data():
     """
     Último dato de la boya por sensor
@@ -147,12 +325,12 @@ def get_latest_buoy_data():
     conn = get_db_connection()
     cur  = conn.cursor()
     cur.execute("""
-        SELECT DISTINCT ON (m.sensor_id) s.name, m.timestamp, m.value, u.symbol
-        FROM oogsj_data.measurement m
+        SELECT s.name, m.timestamp, m.value, u.symbol
+        FROM oogsj_data.sensor_latest m
         JOIN oogsj_data.sensor s ON m.sensor_id = s.id
         JOIN oogsj_data.unit   u ON s.unit_id   = u.id
         WHERE s.platform_id = 3
-        ORDER BY m.sensor_id, m.timestamp DESC;
+        ORDER BY m.sensor_id;
     """)
     rows = cur.fetchall()
     cur.close(); conn.close()
@@ -165,14 +343,53 @@ def get_latest_buoy_data():
 
 
 @ocean_bp.get("/tide_forecast")
+@conditional("tide_forecast")
+@cached("tide_forecast")
 def get_tide_forecast_data():
     """
-    Predicción de marea — últimos 10 días
+    Predicción de marea — últimos 10 días y próximos
     ---
     tags: [Ocean]
+    parameters:
+      - name: from
+        in: query
+        required: false
+        schema: { type: string, format: date-time }
+        description: Inicio del rango (ISO-8601). Por defecto, la ventana de 10 días hasta ahora.
+      - name: to
+        in: query
+        required: false
+        schema: { type: string, format: date-time }
+        description: Fin del rango, excluido. Por defecto, el fin de la predicción cargada.
+      - name: limit
+        in: query
+        required: false
+        schema: { type: integer, minimum: 1 }
+        description: Filas por página (tope HISTORY_PAGE_MAX)
+      - name: cursor
+        in: query
+        required: false
+        schema: { type: string }
+        description: X-Next-Cursor de la página anterior
+      - name: format
+        in: query
+        required: false
+        schema: { type: string, enum: [json, ndjson, columnar] }
+        description: >
+          ndjson devuelve una línea por punto en streaming (ver streaming.py);
+          columnar, arreglos paralelos t (epoch ms) / v por serie (ver series_format.py)
+      - name: delta
+        in: query
+        required: false
+        schema: { type: integer, enum: [0, 1] }
+        description: Con format=columnar, t en diferencias respecto del punto anterior
     responses:
       200:
         description: Serie temporal de predicción de marea
+        headers:
+          X-Next-Cursor:
+            description: Cursor de la página siguiente; ausente en la última
+            schema: { type: string }
         content:
           application/json:
             schema:
@@ -183,19 +400,35 @@ def get_tide_forecast_data():
                   timestamp: { type: string, format: date-time }
                   level:     { type: number, example: 1.85 }
     """
+    try:
+        page = pagination.parse_args(request.args, timedelta(days=10), ahead=TIDE_FORECAST_AHEAD)
+        fmt  = series_format.parse_format(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if fmt == "ndjson":
+        page = streaming.stream_page(page, request.args)
+    sql = pagination.page_sql("""
+        SELECT m.sensor_id, m.timestamp AS ts, m.value FROM oogsj_data.measurement m
+        WHERE m.sensor_id = 2 AND m.timestamp >= %(desde)s AND m.timestamp < %(hasta)s
+    """, page)
     conn  = get_db_connection()
+    if fmt == "ndjson":
+        return streaming.ndjson_response(conn, sql, pagination.page_params(page),
+                                         lines=lambda r: [_nivel(*r[1:])],
+                                         page=page, key=lambda r: (r[1], r[0]))
     cur   = conn.cursor()
-    desde = datetime.utcnow() - timedelta(days=10)
-    cur.execute("""
-        SELECT timestamp, value FROM oogsj_data.measurement
-        WHERE sensor_id = 2 AND timestamp >= %s ORDER BY timestamp;
-    """, (desde,))
-    data = [{"timestamp": row[0], "level": safe_float(row[1])} for row in cur.fetchall()]
+    cur.execute(sql, pagination.page_params(page))
+    rows, next_cursor = pagination.split(cur.fetchall(), page,
+                                         ts=lambda r: r[1], sensor_id=lambda r: r[0])
+    data = [_nivel(*row[1:]) for row in rows]
+    if fmt == "columnar":
+        data = series_format.to_columns(data, value_key="level")
     cur.close(); conn.close()
-    return jsonify(data)
+    return pagination.with_next(jsonify(data), next_cursor)
 
 
 @ocean_bp.get("/plataforma/<int:platform_id>/estado")
+@cached("plataformas")
 def get_plataforma_estado(platform_id):
     """
     Estado de mantenimiento de una plataforma
@@ -231,6 +464,7 @@ def get_plataforma_estado(platform_id):
 
 
 @ocean_bp.get("/mediciones_negativas")
+@cached(*MEASUREMENT_TAGS)
 def mediciones_negativas():
     """
     Mediciones negativas (debug)
@@ -0,0 +1,280 @@
+from flask import Blueprint, jsonify, request
+
+import config
+import downsampling
+import pagination
+import series_format
+import platform_data
+import streaming
+from cache import MEASUREMENT_TAGS, cached
+from conditional import conditional
+from db import get_db_connection
+
+platforms_bp = Blueprint("platforms", __name__, url_prefix="/api/platforms")
+
+
+def _platform_json(platform):
+    return {"id": platform.id, "name": platform.name, "type": platform.type}
+
+
+def _sensor_json(sensor):
+    return {
+        "sensor_id": sensor.id,
+        "sensor":    sensor.name,
+        "variable":  sensor.key,
+        "label":     sensor.label,
+        "unit":      sensor.unit,
+    }
+
+
+def _punto(sensor, ts, raw, *rango):
+    punto = {"timestamp": platform_data.ts_to_iso(ts),
+             "value":     platform_data.convert(sensor, raw)}
+    if rango:
+        punto["min"] = platform_data.convert(sensor, rango[0])
+        punto["max"] = platform_data.convert(sensor, rango[1])
+    return punto
+
+
+# ── Último dato ─────────────────────────────────────────────────────────────
+@platforms_bp.get("/<int:platform_id>/latest")
+@conditional(*MEASUREMENT_TAGS)
+@cached(*MEASUREMENT_TAGS)
+def get_platform_latest(platform_id):
+    """
+    Plataforma — último dato de cada sensor
+    ---
+    tags: [Platforms]
+    parameters:
+      - name: platform_id
+        in: path
+        required: true
+        schema: { type: integer }
+      - name: variables
+        in: query
+        required: false
+        schema: { type: string, example: "wind_speed,air_temperature" }
+        description: Claves de variable separadas por coma (por defecto, todas)
+    responses:
+      200:
+        description: Último valor de cada sensor, con la conversión de unidad aplicada
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                platform:
+                  type: object
+                  properties:
+                    id:   { type: integer }
+                    name: { type: string }
+                    type: { type: string }
+                timestamp: { type: string, format: date-time }
+                sensors:
+                  type: array
+                  items:
+                    type: object
+                    properties:
+                      sensor_id: { type: integer }
+                      sensor:    { type: string }
+                      variable:  { type: string, example: wind_speed }
+                      label:     { type: string }
+                      unit:      { type: string }
+                      value:     { type: number }
+                      timestamp: { type: string, format: date-time }
+      400:
+        description: variables desconocidas
+      404:
+        description: Plataforma inexistente
+    """
+    conn = get_db_connection()
+    try:
+        platform = platform_data.get_platform(conn, platform_id)
+        if platform is None:
+            return jsonify({"error": "plataforma inexistente"}), 404
+        try:
+            sensors = platform_data.select_sensors(platform, request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        cur = conn.cursor()
+        try:
+            latest = platform_data.fetch_latest(cur, sensors)
+        finally:
+            cur.close()
+    finally:
+        conn.close()
+
+    items, latest_ts = [], None
+    for sensor in sensors:
+        ts, raw = latest.get(sensor.id, (None, None))
+        if ts and (latest_ts is None or ts > latest_ts):
+            latest_ts = ts
+        items.append({**_sensor_json(sensor),
+                      "value":     platform_data.convert(sensor, raw),
+                      "timestamp": platform_data.ts_to_iso(ts)})
+
+    return jsonify({"platform":  _platform_json(platform),
+                    "timestamp": platform_data.ts_to_iso(latest_ts),
+                    "sensors":   items}), 200
+
+
+# ── Histórico ───────────────────────────────────────────────────────────────
+@platforms_bp.get("/<int:platform_id>/history")
+@conditional(*MEASUREMENT_TAGS)
+@cached(*MEASUREMENT_TAGS)
+def get_platform_history(platform_id):
+    """
+    Plataforma — histórico por rango, paginado
+    ---
+    tags: [Platforms]
+    parameters:
+      - name: platform_id
+        in: path
+        required: true
+        schema: { type: integer }
+      - name: from
+        in: query
+        required: false
+        schema: { type: string, format: date-time }
+        description: Inicio del rango (ISO-8601, UTC si no trae zona). Por defecto, to - 10 días.
+      - name: to
+        in: query
+        required: false
+        schema: { type: string, format: date-time }
+        description: Fin del rango, excluido. Por defecto, ahora.
+      - name: variables
+        in: query
+        required: false
+        schema: { type: string, example: "wind_speed,air_temperature" }
+        description: Claves de variable separadas por coma (por defecto, todas)
+      - name: resolution
+        in: query
+        required: false
+        schema: { type: string, enum: [10min, 30min, 1h, 3h, 6h, 12h, 1d] }
+        description: Agrega por intervalo en SQL (media, con min y max). Alias bucket.
+      - name: max_points
+        in: query
+        required: false
+        schema: { type: integer, minimum: 3, maximum: 10000 }
+        description: Máximo de puntos por variable dentro de cada página (LTTB)
+      - name: limit
+        in: query
+        required: false
+        schema: { type: integer, minimum: 1 }
+        description: Filas por página (por defecto HISTORY_PAGE_SIZE, tope HISTORY_PAGE_MAX)
+      - name: cursor
+        in: query
+        required: false
+        schema: { type: string }
+        description: next_cursor de la página anterior
+      - name: format
+        in: query
+        required: false
+        schema: { type: string, enum: [json, ndjson, columnar] }
+        description: >
+          ndjson devuelve una línea por punto en streaming (sin limit, todo el
+          rango; con limit, la última línea es {"next_cursor": ...}). No
+          admite max_points. columnar reemplaza data de cada serie por
+          arreglos paralelos t (epoch ms) / v (ver series_format.py).
+      - name: delta
+        in: query
+        required: false
+        schema: { type: integer, enum: [0, 1] }
+        description: Con format=columnar, t en diferencias respecto del punto anterior
+    responses:
+      200:
+        description: >
+          Series de la plataforma ordenadas por timestamp, con la conversión
+          de unidad aplicada. next_cursor es null en la última página.
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                platform:    { type: object }
+                from:        { type: string, format: date-time }
+                to:          { type: string, format: date-time }
+                next_cursor: { type: string, nullable: true }
+                series:
+                  type: array
+                  items:
+                    type: object
+                    properties:
+                      sensor_id: { type: integer }
+                      sensor:    { type: string }
+                      variable:  { type: string }
+                      label:     { type: string }
+                      unit:      { type: string }
+                      data:
+                        type: array
+                        items:
+                          type: object
+                          properties:
+                            timestamp: { type: string, format: date-time }
+                            value:     { type: number }
+                            min:       { type: number, description: Sólo con resolution }
+                            max:       { type: number, description: Sólo con resolution }
+          application/x-ndjson:
+            schema:
+              type: string
+              description: Una línea JSON por punto (sensor_id, variable, unit, timestamp, value[, min, max])
+      400:
+        description: Parámetros inválidos
+      404:
+        description: Plataforma inexistente
+    """
+    try:
+        ds   = downsampling.parse_args(request.args)
+        page = pagination.parse_args(request.args, platform_data.DEFAULT_RANGE,
+                                     default_limit=config.HISTORY_PAGE_SIZE)
+        fmt  = series_format.parse_format(request.args, ds)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = get_db_connection()
+    try:
+        platform = platform_data.get_platform(conn, platform_id)
+        if platform is None:
+            return jsonify({"error": "plataforma inexistente"}), 404
+        try:
+            sensors = platform_data.select_sensors(platform, request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        by_id = {s.id: s for s in sensors}
+
+        if fmt == "ndjson":
+            stream_page = streaming.stream_page(page, request.args)
+            sql, params = platform_data.history_sql(sensors, ds, stream_page)
+            resp = streaming.ndjson_response(
+                conn, sql, params, page=stream_page, key=lambda r: (r[1], r[0]),
+                lines=lambda r: [{"sensor_id": r[0], "variable": by_id[r[0]].key,
+                                  "unit": by_id[r[0]].unit, **_punto(by_id[r[0]], *r[1:])}])
+            conn = None     # la devuelve el stream al terminar
+            return resp
+
+        rows, next_cursor = [], None
+        if sensors:
+            cur = conn.cursor()
+            try:
+                rows, next_cursor = platform_data.fetch_history_page(cur, sensors, ds, page)
+            finally:
+                cur.close()
+    finally:
+        if conn is not None:
+            conn.close()
+
+    rows = downsampling.thin_rows(rows, ds.max_points, series=lambda r: r[0],
+                                  ts=lambda r: r[1], value=lambda r: r[2])
+    series = {s.id: {**_sensor_json(s), "data": []} for s in sensors}
+    for sid, *punto in rows:
+        series[sid]["data"].append(_punto(by_id[sid], *punto))
+    if fmt == "columnar":
+        for serie in series.values():
+            serie.update(series_format.to_columns(serie.pop("data")))
+
+    return jsonify({"platform":    _platform_json(platform),
+                    "from":        platform_data.ts_to_iso(page.desde),
+                    "to":          platform_data.ts_to_iso(page.hasta),
+                    "series":      list(series.values()),
+                    "next_cursor": next_cursor}), 200
@@ -1,7 +1,12 @@
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta, timezone
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 
+import downsampling
+import pagination
+import series_format
+from cache import cached
+from conditional import conditional
 from db import get_db_connection
 
 stations_bp = Blueprint("stations", __name__, url_prefix="/api/appcr")
@@ -113,6 +118,8 @@ def _convert_cc(variable_name, raw):
 
 # ── Puerto CR — último dato ────────────────────────────────
 @stations_bp.get("/puerto")
+@conditional("comodoro_rivadavia_port")
+@cached("comodoro_rivadavia_port")
 def get_puerto_data():
     """
     Estación Puerto CR — último dato
@@ -150,12 +157,7 @@ def get_puerto_data():
             JOIN oogsj_data.sensor s ON s.platform_id = p.id
             JOIN oogsj_data.variable v ON v.id = s.variable_id
             JOIN oogsj_data.unit u ON u.id = s.unit_id
-            JOIN LATERAL (
-                SELECT m2."timestamp", m2.value
-                FROM oogsj_data.measurement m2
-                WHERE m2.sensor_id = s.id
-                ORDER BY m2."timestamp" DESC LIMIT 1
-            ) m ON TRUE
+            JOIN oogsj_data.sensor_latest m ON m.sensor_id = s.id
             WHERE p.name = %s
             ORDER BY v.name, s.name;
         """, ("APPCR Puerto CR",))
@@ -191,14 +193,61 @@ def get_puerto_data():
 
 # ── Puerto CR — histórico ──────────────────────────────────
 @stations_bp.get("/puerto/history")
+@conditional("comodoro_rivadavia_port")
+@cached("comodoro_rivadavia_port")
 def get_puerto_history():
     """
     Estación Puerto CR — histórico 10 días
     ---
     tags: [Stations]
+    parameters:
+      - name: resolution
+        in: query
+        required: false
+        schema: { type: string, enum: [10min, 30min, 1h, 3h, 6h, 12h, 1d] }
+        description: Agrega por intervalo en SQL (media, con min y max). Alias bucket.
+      - name: max_points
+        in: query
+        required: false
+        schema: { type: integer, minimum: 3, maximum: 10000 }
+        description: Máximo de puntos por variable (downsampling visual LTTB)
+      - name: from
+        in: query
+        required: false
+        schema: { type: string, format: date-time }
+        description: Inicio del rango (ISO-8601). Por defecto, la ventana de 10 días hasta to.
+      - name: to
+        in: query
+        required: false
+        schema: { type: string, format: date-time }
+        description: Fin del rango, excluido. Por defecto, ahora.
+      - name: limit
+        in: query
+        required: false
+        schema: { type: integer, minimum: 1 }
+        description: Filas por página (tope HISTORY_PAGE_MAX)
+      - name: cursor
+        in: query
+        required: false
+        schema: { type: string }
+        description: X-Next-Cursor de la página anterior
+      - name: format
+        in: query
+        required: false
+        schema: { type: string, enum: [json, columnar] }
+        description: columnar reemplaza data por arreglos paralelos t (epoch ms) / v (ver series_format.py)
+      - name: delta
+        in: query
+        required: false
+        schema: { type: integer, enum: [0, 1] }
+        description: Con format=columnar, t en diferencias respecto del punto anterior
     responses:
       200:
         description: Serie temporal de los últimos 10 días agrupada por variable
+        headers:
+          X-Next-Cursor:
+            description: Cursor de la página siguiente; ausente en la última
+            schema: { type: string }
         content:
           application/json:
             schema:
@@ -214,39 +263,61 @@ def get_puerto_history():
                       properties:
                         timestamp: { type: string, format: date-time }
                         value:     { type: number }
+                        min:       { type: number, description: Sólo con resolution }
+                        max:       { type: number, description: Sólo con resolution }
+      400:
+        description: resolution, max_points, from/to, limit o cursor inválidos
     """
+    try:
+        ds   = downsampling.parse_args(request.args)
+        fmt  = series_format.parse_format(request.args, allowed=("json", "columnar"))
+        page = pagination.parse_args(request.args, timedelta(days=10))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    serie = downsampling.series_sql(ds, group_cols=3)
+
     conn  = get_db_connection()
     cur   = conn.cursor()
-    desde = datetime.utcnow() - timedelta(days=10)
     try:
-        cur.execute("""
-            SELECT v.name, u.symbol, m."timestamp", m.value
-            FROM oogsj_data.measurement m
+        cur.execute(pagination.page_sql(f"""
+            SELECT m.sensor_id, v.name, u.symbol, {serie.ts}, {serie.values}
+            FROM {serie.table}
             JOIN oogsj_data.sensor   s ON s.id = m.sensor_id
             JOIN oogsj_data.platform p ON p.id = s.platform_id
             JOIN oogsj_data.variable v ON v.id = s.variable_id
             JOIN oogsj_data.unit     u ON u.id = s.unit_id
-            WHERE p.name = %s AND m."timestamp" >= %s
-            ORDER BY v.name, m."timestamp";
-        """, ("APPCR Puerto CR", desde))
-        rows = cur.fetchall()
+            WHERE p.name = %(platform)s
+              AND {serie.time_col} >= %(desde)s AND {serie.time_col} < %(hasta)s
+            {serie.group}
+        """, page), pagination.page_params(page, platform="APPCR Puerto CR"))
+        rows, next_cursor = pagination.split(cur.fetchall(), page,
+                                             ts=lambda r: r[3], sensor_id=lambda r: r[0])
     finally:
         cur.close()
         conn.close()
 
+    rows = downsampling.thin_rows(rows, ds.max_points, series=lambda r: r[1],
+                                  ts=lambda r: r[3], value=lambda r: r[4])
     data = {}
-    for variable_name, unit, ts, val in rows:
+    for _sid, variable_name, unit, ts, val, *rango in rows:
         if variable_name not in data:
             data[variable_name] = {"unit": unit, "data": []}
-        data[variable_name]["data"].append({
+        punto = {
             "timestamp": ts.isoformat() if ts else None,
             "value":     float(val) if val is not None else None,
-        })
-    return jsonify(data)
+        }
+        if rango:
+            punto["min"], punto["max"] = (float(x) if x is not None else None for x in rango)
+        data[variable_name]["data"].append(punto)
+    if fmt == "columnar":
+        data = {k: {"unit": v["unit"], **series_format.to_columns(v["data"])} for k, v in data.items()}
+    return pagination.with_next(jsonify(data), next_cursor)
 
 
 # ── Muelle CC — último dato ────────────────────────────────
 @stations_bp.get("/muelle_cc")
+@conditional("caleta_muelle_dock")
+@cached("caleta_muelle_dock")
 def get_muelle_cc_data():
     """
     Estación Muelle CC — último dato
@@ -284,12 +355,7 @@ def get_muelle_cc_data():
             JOIN oogsj_data.sensor   s ON s.platform_id = p.id
             JOIN oogsj_data.unit     u ON u.id = s.unit_id
             JOIN oogsj_data.variable v ON v.id = s.variable_id
-            JOIN LATERAL (
-                SELECT m2."timestamp", m2.value
-                FROM oogsj_data.measurement m2
-                WHERE m2.sensor_id = s.id
-                ORDER BY m2."timestamp" DESC LIMIT 1
-            ) m ON TRUE
+            JOIN oogsj_data.sensor_latest m ON m.sensor_id = s.id
             WHERE p.name = %s
             ORDER BY v.name, s.name;
         """, ("APPCR Muelle CC",))
@@ -327,14 +393,61 @@ def get_muelle_cc_data():
 
 # ── Muelle CC — histórico ──────────────────────────────────
 @stations_bp.get("/muelle_cc/history")
+@conditional("caleta_muelle_dock")
+@cached("caleta_muelle_dock")
 def get_muelle_cc_history():
     """
     Estación Muelle CC — histórico 15 días
     ---
     tags: [Stations]
+    parameters:
+      - name: resolution
+        in: query
+        required: false
+        schema: { type: string, enum: [10min, 30min, 1h, 3h, 6h, 12h, 1d] }
+        description: Agrega por intervalo en SQL (media, con min y max). Alias bucket.
+      - name: max_points
+        in: query
+        required: false
+        schema: { type: integer, minimum: 3, maximum: 10000 }
+        description: Máximo de puntos por variable (downsampling visual LTTB)
+      - name: from
+        in: query
+        required: false
+        schema: { type: string, format: date-time }
+        description: Inicio del rango (ISO-8601). Por defecto, la ventana de 15 días hasta to.
+      - name: to
+        in: query
+        required: false
+        schema: { type: string, format: date-time }
+        description: Fin del rango, excluido. Por defecto, ahora.
+      - name: limit
+        in: query
+        required: false
+        schema: { type: integer, minimum: 1 }
+        description: Filas por página (tope HISTORY_PAGE_MAX)
+      - name: cursor
+        in: query
+        required: false
+        schema: { type: string }
+        description: X-Next-Cursor de la página anterior
+      - name: format
+        in: query
+        required: false
+        schema: { type: string, enum: [json, columnar] }
+        description: columnar reemplaza data por arreglos paralelos t (epoch ms) / v (ver series_format.py)
+      - name: delta
+        in: query
+        required: false
+        schema: { type: integer, enum: [0, 1] }
+        description: Con format=columnar, t en diferencias respecto del punto anterior
     responses:
       200:
         description: Serie temporal de los últimos 15 días agrupada por variable
+        headers:
+          X-Next-Cursor:
+            description: Cursor de la página siguiente; ausente en la última
+            schema: { type: string }
         content:
           application/json:
             schema:
@@ -350,32 +463,51 @@ def get_muelle_cc_history():
                       properties:
                         timestamp: { type: string, format: date-time }
                         value:     { type: number }
+                        min:       { type: number, description: Sólo con resolution }
+                        max:       { type: number, description: Sólo con resolution }
+      400:
+        description: resolution, max_points, from/to, limit o cursor inválidos
     """
+    try:
+        ds   = downsampling.parse_args(request.args)
+        fmt  = series_format.parse_format(request.args, allowed=("json", "columnar"))
+        page = pagination.parse_args(request.args, timedelta(days=15))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    serie = downsampling.series_sql(ds, group_cols=3)
+
     conn  = get_db_connection()
     cur   = conn.cursor()
-    desde = datetime.utcnow() - timedelta(days=15)
     try:
-        cur.execute("""
-            SELECT v.name, m.timestamp, m.value, u.symbol
-            FROM oogsj_data.measurement m
+        cur.execute(pagination.page_sql(f"""
+            SELECT m.sensor_id, v.name, u.symbol, {serie.ts}, {serie.values}
+            FROM {serie.table}
             JOIN oogsj_data.sensor   s ON s.id = m.sensor_id
             JOIN oogsj_data.variable v ON v.id = s.variable_id
             JOIN oogsj_data.unit     u ON u.id = s.unit_id
-            WHERE s.name LIKE '%%160710%%'
-              AND m.timestamp >= %s
-            ORDER BY v.name, m.timestamp;
-        """, (desde,))
-        rows = cur.fetchall()
+            WHERE s.station_code = %(station)s
+              AND {serie.time_col} >= %(desde)s AND {serie.time_col} < %(hasta)s
+            {serie.group}
+        """, page), pagination.page_params(page, station="160710"))
+        rows, next_cursor = pagination.split(cur.fetchall(), page,
+                                             ts=lambda r: r[3], sensor_id=lambda r: r[0])
     finally:
         cur.close()
         conn.close()
 
+    rows = downsampling.thin_rows(rows, ds.max_points, series=lambda r: r[1],
+                                  ts=lambda r: r[3], value=lambda r: r[4])
     data = {}
-    for variable_name, ts, val, unit in rows:
+    for _sid, variable_name, unit, ts, val, *rango in rows:
         if variable_name not in data:
             data[variable_name] = {"unit": unit, "data": []}
-        data[variable_name]["data"].append({
+        punto = {
             "timestamp": ts.isoformat(),
             "value":     float(val),
-        })
-    return jsonify(data)
\ No newline at end of file
+        }
+        if rango:
+            punto["min"], punto["max"] = (float(x) if x is not None else None for x in rango)
+        data[variable_name]["data"].append(punto)
+    if fmt == "columnar":
+        data = {k: {"unit": v["unit"], **series_format.to_columns(v["data"])} for k, v in data.items()}
+    return pagination.with_next(jsonify(data), next_cursor)
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+cache.py
+========
+Cache de respuestas en Redis (servicio `cache`, el mismo broker de Celery,
+en otra base: CACHE_REDIS_URL) para los GET públicos.
+
+    @ocean_bp.get("/mareograph")
+    @cached("mareograph")
+    def get_mareograph_data(): ...
+
+  - Clave: ruta + query string + versión de cada etiqueta. Las etiquetas
+    son los nombres de las tareas de ingesta de api_ingestor
+    (services/task_config.py), más "plataformas", "noticias" y "especies"
+    para lo que se edita desde el panel admin.
+  - Invalidación: invalidate(tag) incrementa la versión de la etiqueta y
+    todas las claves viejas dejan de usarse (expiran solas por TTL); además
+    guarda el instante, que conditional.py usa como Last-Modified. Las
+    tareas Celery de ingesta lo hacen al insertar datos nuevos
+    (api_ingestor/services/cache_invalidation.py, mismas claves).
+  - TTL: el período de la tarea de ingesta, como techo por si la
+    invalidación se pierde. Con varias etiquetas, el menor.
+  - Single-flight: ante un miss recalcula un solo worker (lock SET NX); el
+    resto espera a que aparezca el valor en lugar de ir todos a la base.
+  - Se guarda el cuerpo, el mimetype y STORED_HEADERS (el cursor de la
+    página siguiente, ver pagination.py). Sólo respuestas 200. Los streams
+    NDJSON (?format=ndjson, streaming.py) no pasan por el cache.
+  - Si Redis no responde, las vistas se ejecutan sin cache y se reintenta
+    la conexión a los CACHE_RETRY_SECONDS.
+
+Las respuestas llevan X-Cache: HIT / MISS.
+"""
+
+import json
+import time
+from functools import wraps
+
+import redis
+from flask import Response, current_app, request
+
+import config
+
+KEY_PREFIX  = "oogsj:cache"
+VERSION_KEY = KEY_PREFIX + ":ver:{tag}"
+LASTMOD_KEY = KEY_PREFIX + ":lastmod:{tag}"     # epoch de la última invalidación (conditional.py)
+
+# Período de cada tarea en api_ingestor/services/task_config.py (segundos).
+# Los contenedores no comparten código: al cambiar un schedule allá hay que
+# cambiarlo acá. api_ingestor/tests/test_task_config.py compara ambos.
+TTLS = {
+    "mareograph":              600,
+    "comodoro_rivadavia_port": 600,
+    "caleta_muelle_dock":      600,
+    "emac_cmd0_station":       1800,
+    "emac_cmd1_station":       1800,
+    "buoy":                    3600,
+    "shn_avisos":              3600,
+    "tide_forecast":           21600,
+    # Editados desde el panel admin, que invalida al guardar.
+    "plataformas":             300,
+    "noticias":                3600,
+    "especies":                3600,
+}
+
+# Tareas que escriben en oogsj_data.measurement.
+MEASUREMENT_TAGS = ("mareograph", "tide_forecast", "buoy", "comodoro_rivadavia_port",
+                    "caleta_muelle_dock", "emac_cmd0_station", "emac_cmd1_station")
+
+LOCK_SECONDS = 30       # tope de un recálculo; después otro worker puede intentar
+WAIT_SECONDS = 5        # cuánto espera un worker el valor que calcula otro
+POLL_SECONDS = 0.05
+
+STORED_HEADERS = ("X-Next-Cursor", "Link")
+
+_client     = None
+_down_until = 0.0
+
+
+def get_client():
+    """Cliente Redis compartido por el proceso, o None si el cache está apagado/caído."""
+    global _client
+    if not config.CACHE_ENABLED or time.monotonic() < _down_until:
+        return None
+    if _client is None:
+        _client = redis.Redis.from_url(config.CACHE_REDIS_URL,
+                                       socket_connect_timeout=0.25, socket_timeout=0.5)
+    return _client
+
+
+def _mark_down(exc):
+    global _down_until
+    _down_until = time.monotonic() + config.CACHE_RETRY_SECONDS
+    print(f"⚠️ Cache Redis no disponible, se sigue sin cache: {exc}")
+
+
+def invalidate(*tags):
+    """Invalida las respuestas de esas etiquetas (no falla si Redis está caído)."""
+    client = get_client()
+    if client is None:
+        return
+    try:
+        now = int(time.time())
+        for tag in tags:
+            client.incr(VERSION_KEY.format(tag=tag))
+            client.set(LASTMOD_KEY.format(tag=tag), now)
+    except redis.RedisError as e:
+        _mark_down(e)
+
+
+def _cache_key(client, tags):
+    versions = client.mget([VERSION_KEY.format(tag=t) for t in tags])
+    version  = ".".join((v.decode() if v else "0") for v in versions)
+    query    = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+    return f"{KEY_PREFIX}:resp:{request.path}?{query}:{version}"
+
+
+def _dump(resp):
+    headers = {h: resp.headers[h] for h in STORED_HEADERS if h in resp.headers}
+    return (resp.mimetype.encode() + b"\n" + json.dumps(headers).encode() + b"\n"
+            + resp.get_data())
+
+
+def _load(raw, estado):
+    mimetype, _, rest = raw.partition(b"\n")
+    headers, _, body  = rest.partition(b"\n")
+    resp = Response(body, status=200, mimetype=mimetype.decode())
+    resp.headers.update(json.loads(headers))
+    resp.headers["X-Cache"] = estado
+    return resp
+
+
+def cached(*tags):
+    """Decorador de vistas GET públicas; ver el docstring del módulo."""
+    ttl = min(TTLS[t] for t in tags)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            client = get_client()
+            if client is None or request.args.get("format") == "ndjson":
+                return view(*args, **kwargs)
+            try:
+                key = _cache_key(client, tags)
+                hit = client.get(key)
+                if hit is not None:
+                    return _load(hit, "HIT")
+
+                lock = key + ":lock"
+                if not client.set(lock, 1, nx=True, ex=LOCK_SECONDS):
+                    # Otro worker ya está recalculando esta clave.
+                    deadline = time.monotonic() + WAIT_SECONDS
+                    while time.monotonic() < deadline:
+                        time.sleep(POLL_SECONDS)
+                        hit = client.get(key)
+                        if hit is not None:
+                            return _load(hit, "HIT")
+                    return view(*args, **kwargs)
+            except redis.RedisError as e:
+                _mark_down(e)
+                return view(*args, **kwargs)
+
+            try:
+                resp = current_app.make_response(view(*args, **kwargs))
+                if resp.status_code == 200 and not (resp.direct_passthrough or resp.is_streamed):
+                    client.set(key, _dump(resp), ex=ttl)
+                resp.headers["X-Cache"] = "MISS"
+                return resp
+            except redis.RedisError as e:
+                _mark_down(e)
+                return resp
+            finally:
+                try:
+                    client.delete(lock)
+                except redis.RedisError:
+                    pass
+        return wrapper
+    return decorator
@@ -0,0 +1,92 @@
+"""
+conditional.py
+==============
+Respuestas condicionales (ETag / Last-Modified → 304) para los endpoints de
+datos, que el frontend consulta en loop aunque los datos cambien cada 10-30
+minutos.
+
+    @ocean_bp.get("/buoy/latest")
+    @conditional("buoy")
+    @cached("buoy")
+    def get_latest_buoy_data(): ...
+
+El validador es el instante de la última ingesta con datos nuevos de cada
+etiqueta (las mismas de cache.py): cache.invalidate y las tareas Celery lo
+guardan en Redis junto con la versión (LASTMOD_KEY). Leerlo es un GET a
+Redis por pedido, sin tocar la base.
+
+  - Last-Modified = el más reciente de las etiquetas.
+  - ETag = hash de ruta + query string + ese instante, así cada
+    resolution/max_points tiene el suyo.
+  - If-None-Match (o, si no viene, If-Modified-Since) vigente → 304 sin
+    ejecutar la vista ni serializar JSON.
+  - Cache-Control: public, max-age=HTTP_CACHE_MAX_AGE; pasado ese tiempo el
+    navegador / nginx revalidan con los encabezados de arriba.
+
+Va por encima de @cached. Sin Redis, o antes de la primera ingesta que deje
+el instante, las respuestas salen sin validadores (sólo Cache-Control).
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+import redis
+from flask import Response, current_app, request
+
+import config
+from cache import LASTMOD_KEY, get_client
+
+
+def _last_modified(tags):
+    client = get_client()
+    if client is None:
+        return None
+    try:
+        values = client.mget([LASTMOD_KEY.format(tag=t) for t in tags])
+    except redis.RedisError:
+        return None
+    epochs = [int(v) for v in values if v]
+    if not epochs:
+        return None
+    return datetime.fromtimestamp(max(epochs), tz=timezone.utc)
+
+
+def _etag(last_modified):
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+    raw   = f"{request.path}?{query}|{last_modified.isoformat()}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        # nginx debilita el ETag al comprimir: se compara en modo débil.
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return since is not None and since >= last_modified
+
+
+def _set_validators(resp, etag, last_modified):
+    resp.headers["Cache-Control"] = f"public, max-age={config.HTTP_CACHE_MAX_AGE}"
+    if etag:
+        resp.set_etag(etag)
+        resp.last_modified = last_modified
+    return resp
+
+
+def conditional(*tags):
+    """Decorador de vistas GET de datos; ver el docstring del módulo."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            last_modified = _last_modified(tags)
+            etag = _etag(last_modified) if last_modified else None
+            if etag and _not_modified(etag, last_modified):
+                return _set_validators(Response(status=304), etag, last_modified)
+
+            resp = current_app.make_response(view(*args, **kwargs))
+            if resp.status_code != 200:
+                return resp
+            return _set_validators(resp, etag, last_modified)
+        return wrapper
+    return decorator
@@ -10,6 +10,42 @@ DB_CONFIG = {
     "port":     5432,
 }
 
+# Pool por worker de gunicorn (ver db.ConnectionPool)
+DB_POOL_MIN              = int(os.getenv("DB_POOL_MIN", 0))
+DB_POOL_MAX              = int(os.getenv("DB_POOL_MAX", 10))
+DB_POOL_TIMEOUT          = float(os.getenv("DB_POOL_TIMEOUT", 10))           # seg. esperando una conexión libre
+DB_POOL_MAX_LIFETIME     = float(os.getenv("DB_POOL_MAX_LIFETIME", 1800))    # seg. antes de reciclar una conexión
+DB_POOL_HEALTHCHECK_IDLE = float(os.getenv("DB_POOL_HEALTHCHECK_IDLE", 30))  # seg. ociosa antes de validar con SELECT 1
+
+# Históricos con resolution ≥ 1h leen de measurement_hourly/daily (ver downsampling.py)
+ROLLUPS_ENABLED = os.getenv("ROLLUPS_ENABLED", "true").lower() == "true"
+
+# /api/platforms/<id>/* (ver platform_data.py)
+PLATFORM_META_TTL  = float(os.getenv("PLATFORM_META_TTL", 300))     # seg. de metadata de sensores en memoria
+HISTORY_PAGE_SIZE  = int(os.getenv("HISTORY_PAGE_SIZE", 5000))      # filas por página por defecto
+
+# Tope de filas por página de los históricos con limit, cursor o from/to (ver
+# pagination.py). La ventana por defecto de los endpoints por estación no
+# tiene tope.
+HISTORY_PAGE_MAX   = int(os.getenv("HISTORY_PAGE_MAX", 50000))
+
+# ?format=ndjson (ver streaming.py)
+STREAM_FETCH_ROWS  = int(os.getenv("STREAM_FETCH_ROWS", 2000))      # filas por viaje del cursor server-side
+STREAM_CHUNK_LINES = int(os.getenv("STREAM_CHUNK_LINES", 500))      # líneas por chunk HTTP
+
+# ── Cache de respuestas (ver cache.py) ─────────────────────
+CACHE_ENABLED       = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+CACHE_REDIS_URL     = os.getenv("CACHE_REDIS_URL", os.getenv("REDIS_URL", "redis://cache:6379") + "/1")
+CACHE_RETRY_SECONDS = float(os.getenv("CACHE_RETRY_SECONDS", 30))  # seg. sin cache tras un error de Redis
+
+# Cache-Control de los endpoints de datos (ver conditional.py)
+HTTP_CACHE_MAX_AGE  = int(os.getenv("HTTP_CACHE_MAX_AGE", 60))
+
+# Perfilado de requests y GET /metrics (ver profiling.py)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_SLOW_MS = float(os.getenv("PROFILING_SLOW_MS", 1000))      # ms a partir de los que se loguea el request
+METRICS_TOKEN     = os.getenv("METRICS_TOKEN")                       # Bearer de /metrics; sin él, sólo pedidos directos
+
 # ── JWT ────────────────────────────────────────────────────
 JWT_SECRET      = os.getenv("JWT_SECRET", "cambia-esta-clave")
 JWT_ISS         = "oogsj-auth"
@@ -1,11 +1,316 @@
 import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
 import psycopg2
+from flask import g, has_app_context
+
+import config
+import profiling
 from config import DB_CONFIG
 
 
+# ── Pool de conexiones ─────────────────────────────────────
+class PoolTimeout(Exception):
+    """No se liberó ninguna conexión dentro de DB_POOL_TIMEOUT segundos."""
+
+
+class _PooledConnection:
+    """
+    Envoltorio de una conexión psycopg2 prestada por el pool.
+
+    Se comporta igual que la conexión real (cursor, commit, rollback, ...),
+    pero close() la devuelve al pool en lugar de cerrar el socket. Así los
+    blueprints mantienen el patrón `conn = get_db_connection() ... conn.close()`.
+
+    Usado como context manager hace commit si el bloque termina bien,
+    rollback si lanza, y siempre la devuelve al pool.
+    """
+
+    def __init__(self, pool, raw, created_at):
+        self._pool       = pool
+        self._raw        = raw
+        self._created_at = created_at
+        self._released   = False
+
+    def __getattr__(self, name):
+        if self._released:
+            raise psycopg2.InterfaceError("connection already returned to pool")
+        return getattr(self._raw, name)
+
+    @property
+    def closed(self):
+        return 1 if self._released else self._raw.closed
+
+    def cursor(self, *args, **kwargs):
+        # Con PROFILING_ENABLED, el cursor mide sus consultas (profiling.py).
+        return profiling.wrap_cursor(self.__getattr__("cursor")(*args, **kwargs))
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        self._pool._release(self._raw, self._created_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if not self._released:
+                if exc_type is None:
+                    self._raw.commit()
+                else:
+                    self._raw.rollback()
+        finally:
+            self.close()
+        return False
+
+
+class ConnectionPool:
+    """
+    Pool acotado de conexiones psycopg2, seguro entre threads.
+
+    - Nunca abre más de `maxconn` conexiones; si están todas prestadas, el
+      caller espera hasta `timeout` segundos y luego recibe PoolTimeout.
+    - Conexiones ociosas más de `healthcheck_idle` segundos se validan con
+      `SELECT 1` antes de prestarse; las rotas se descartan.
+    - Conexiones con más de `max_lifetime` segundos se cierran al devolverse
+      (o al intentar prestarse) y se reemplazan por una nueva.
+    """
+
+    def __init__(self, connect=None, minconn=0, maxconn=10, timeout=10.0,
+                 max_lifetime=1800.0, healthcheck_idle=30.0):
+        self._connect          = connect or (lambda: psycopg2.connect(**DB_CONFIG))
+        self.minconn           = minconn
+        self.maxconn           = maxconn
+        self.timeout           = timeout
+        self.max_lifetime      = max_lifetime
+        self.healthcheck_idle  = healthcheck_idle
+
+        self._cond     = threading.Condition()
+        self._idle     = deque()   # (raw, created_at, idle_since)
+        self._size     = 0         # conexiones abiertas (prestadas + ociosas)
+        self._in_use   = 0
+        self._waiting  = 0
+        self._closed   = False
+
+        self._stats = {
+            "checkouts":           0,
+            "timeouts":            0,
+            "connections_opened":  0,
+            "connections_closed":  0,
+            "healthcheck_failures": 0,
+            "recycled":            0,
+            "checkout_wait_total": 0.0,
+            "checkout_wait_max":   0.0,
+        }
+
+        for _ in range(minconn):
+            raw = self._open()
+            self._size += 1
+            self._idle.append((raw, time.monotonic(), time.monotonic()))
+
+    # ── Internos ────────────────────────────────────────────
+    def _open(self):
+        raw = self._connect()
+        with self._cond:
+            self._stats["connections_opened"] += 1
+        return raw
+
+    def _discard(self, raw):
+        """Cierra una conexión y libera su lugar. Se llama con el lock tomado."""
+        self._size -= 1
+        self._stats["connections_closed"] += 1
+        self._cond.notify()
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _expired(self, created_at, now):
+        return bool(self.max_lifetime) and now - created_at >= self.max_lifetime
+
+    def _usable(self, raw, created_at, idle_since):
+        """Valida una conexión ociosa antes de prestarla (fuera del lock)."""
+        now = time.monotonic()
+        if self._expired(created_at, now):
+            with self._cond:
+                self._stats["recycled"] += 1
+            return False
+        if raw.closed:
+            return False
+        if now - idle_since < self.healthcheck_idle:
+            return True
+        try:
+            cur = raw.cursor()
+            cur.execute("SELECT 1;")
+            cur.close()
+            raw.rollback()
+            return True
+        except Exception:
+            with self._cond:
+                self._stats["healthcheck_failures"] += 1
+            return False
+
+    # ── API pública ─────────────────────────────────────────
+    def getconn(self):
+        """Presta una conexión envuelta en _PooledConnection."""
+        start    = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            candidate = None
+            with self._cond:
+                if self._closed:
+                    raise psycopg2.InterfaceError("connection pool is closed")
+                while not self._idle and self._size >= self.maxconn:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"Sin conexiones libres tras {self.timeout}s "
+                            f"({self._in_use}/{self.maxconn} en uso)"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                if self._idle:
+                    candidate = self._idle.pop()
+                else:
+                    self._size += 1   # reservar el lugar antes de conectar
+
+            # El connect y el health check van fuera del lock: pueden tardar.
+            if candidate:
+                raw, created_at, idle_since = candidate
+                if not self._usable(raw, created_at, idle_since):
+                    with self._cond:
+                        self._discard(raw)
+                    continue
+            else:
+                try:
+                    raw = self._open()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                created_at = time.monotonic()
+            break
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+            self._stats["checkout_wait_total"] += waited
+            self._stats["checkout_wait_max"] = max(self._stats["checkout_wait_max"], waited)
+
+        return _PooledConnection(self, raw, created_at)
+
+    def _release(self, raw, created_at):
+        # Cerrar la transacción abierta (un SELECT deja la conexión "idle in
+        # transaction"); equivale a lo que hacía conn.close() sin commit.
+        ok = not raw.closed
+        if ok:
+            try:
+                raw.rollback()
+            except Exception:
+                ok = False
+
+        with self._cond:
+            self._in_use -= 1
+            now = time.monotonic()
+            if not ok or self._closed:
+                self._discard(raw)
+            elif self._expired(created_at, now):
+                self._stats["recycled"] += 1
+                self._discard(raw)
+            else:
+                self._idle.append((raw, created_at, now))
+                self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                raw, _, _ = self._idle.pop()
+                self._discard(raw)
+            self._cond.notify_all()
+
+    def metrics(self) -> dict:
+        with self._cond:
+            checkouts = self._stats["checkouts"]
+            return {
+                "max_size":               self.maxconn,
+                "size":                   self._size,
+                "in_use":                 self._in_use,
+                "idle":                   len(self._idle),
+                "waiting":                self._waiting,
+                "checkouts":              checkouts,
+                "timeouts":               self._stats["timeouts"],
+                "connections_opened":     self._stats["connections_opened"],
+                "connections_closed":     self._stats["connections_closed"],
+                "healthcheck_failures":   self._stats["healthcheck_failures"],
+                "recycled":               self._stats["recycled"],
+                "checkout_wait_avg_ms":   round(self._stats["checkout_wait_total"] / checkouts * 1000, 3) if checkouts else 0.0,
+                "checkout_wait_max_ms":   round(self._stats["checkout_wait_max"] * 1000, 3),
+            }
+
+
+# Un pool por proceso: gunicorn hace fork de los workers después de importar
+# la app, y un socket de Postgres no puede compartirse entre procesos.
+_pool     = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ConnectionPool(
+                    minconn          = config.DB_POOL_MIN,
+                    maxconn          = config.DB_POOL_MAX,
+                    timeout          = config.DB_POOL_TIMEOUT,
+                    max_lifetime     = config.DB_POOL_MAX_LIFETIME,
+                    healthcheck_idle = config.DB_POOL_HEALTHCHECK_IDLE,
+                )
+                _pool_pid = pid
+    return _pool
+
+
 def get_db_connection():
-    """Retorna una conexión psycopg2. El caller es responsable de cerrarla."""
-    return psycopg2.connect(**DB_CONFIG)
+    """
+    Presta una conexión del pool del worker. El caller la devuelve con
+    conn.close(); si se olvida (o el handler lanza antes), el teardown de la
+    app la devuelve al terminar el request.
+    """
+    conn = get_pool().getconn()
+    if has_app_context():
+        g.setdefault("_db_conns", []).append(conn)
+    return conn
+
+
+@contextmanager
+def db_connection():
+    """`with db_connection() as conn:` — commit al salir bien, rollback si lanza."""
+    with get_db_connection() as conn:
+        yield conn
+
+
+def _release_request_connections(_exc=None):
+    for conn in g.pop("_db_conns", []):
+        conn.close()
+
+
+def init_app(app):
+    app.teardown_appcontext(_release_request_connections)
 
 
 def safe_float(val):
@@ -14,4 +319,4 @@ def safe_float(val):
         f = float(val)
         return f if not math.isnan(f) else 0.0
     except Exception:
-        return 0.0
\ No newline at end of file
+        return 0.0
@@ -0,0 +1,224 @@
+"""
+downsampling.py
+===============
+Reducción de series temporales para los endpoints de histórico
+(/api/appcr/*/history, /api/emac_cmd0|1/history, /api/buoy, /api/mareograph).
+
+Dos mecanismos, combinables, que el cliente pide por query string:
+
+  ?resolution=1h  (alias: bucket)
+      Agrega en SQL por intervalos fijos (date_bin de Postgres ≥14): cada
+      punto es la media del intervalo y trae además "min" y "max". Las
+      direcciones (variable.is_angular) usan la media circular y min/max
+      salen en null: no tienen sentido para ángulos.
+
+  ?max_points=500
+      Downsampling visual LTTB (Largest-Triangle-Three-Buckets) por serie:
+      conserva la forma de la curva (picos y valles) con a lo sumo
+      max_points puntos. Si se combina con resolution, se aplica sobre las
+      medias ya agregadas.
+
+Sin parámetros, los endpoints devuelven los datos crudos como siempre.
+
+Con resolution múltiplo de 1h (1h, 3h, 6h, 12h, 1d) la serie se lee de los
+rollups oogsj_data.measurement_hourly / measurement_daily en lugar de
+recorrer measurement (ver series_sql). ROLLUPS_ENABLED=false lo desactiva.
+"""
+
+from collections import namedtuple
+
+from config import ROLLUPS_ENABLED
+
+
+RESOLUTIONS = {
+    "10min": 600,
+    "30min": 1800,
+    "1h":    3600,
+    "3h":    10800,
+    "6h":    21600,
+    "12h":   43200,
+    "1d":    86400,
+}
+
+MIN_POINTS = 3          # LTTB conserva siempre el primer y el último punto
+MAX_POINTS = 10000
+
+# Rollups por tamaño de intervalo, del más grueso al más fino.
+ROLLUP_TABLES = (
+    (86400, "oogsj_data.measurement_daily"),
+    (3600,  "oogsj_data.measurement_hourly"),
+)
+
+Downsampling = namedtuple("Downsampling", ["bucket_seconds", "max_points"])
+
+# Sensores de variables angulares (direcciones en grados, migración
+# 20261025_add_angular_variables.sql).
+_ANGULAR_SENSORS = """
+    SELECT sa.id FROM oogsj_data.sensor sa
+    JOIN oogsj_data.variable va ON va.id = sa.variable_id
+    WHERE va.is_angular
+"""
+
+# Partes del SELECT de una serie: tabla (FROM ... alias), columna de tiempo
+# para el WHERE, y los fragmentos ts / valores / GROUP BY de sql_fragments.
+SeriesSQL = namedtuple("SeriesSQL", ["table", "time_col", "ts", "values", "group"])
+
+
+def parse_args(args) -> Downsampling:
+    """
+    Lee resolution/bucket y max_points de request.args.
+    Lanza ValueError con un mensaje para el cliente si son inválidos.
+    """
+    resolution = args.get("resolution") or args.get("bucket")
+    bucket_seconds = None
+    if resolution:
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"resolution inválida; opciones: {', '.join(RESOLUTIONS)}")
+        bucket_seconds = RESOLUTIONS[resolution]
+
+    max_points = args.get("max_points")
+    if max_points is not None:
+        try:
+            max_points = int(max_points)
+        except ValueError:
+            raise ValueError("max_points debe ser un entero")
+        if not MIN_POINTS <= max_points <= MAX_POINTS:
+            raise ValueError(f"max_points debe estar entre {MIN_POINTS} y {MAX_POINTS}")
+
+    return Downsampling(bucket_seconds, max_points)
+
+
+def _circular_mean(sin_sql: str, cos_sql: str) -> str:
+    """Media circular en grados [0, 360) a partir de sumas o medias de sin/cos."""
+    return f"MOD((DEGREES(ATAN2({sin_sql}, {cos_sql})) + 360)::numeric, 360)::float"
+
+
+def sql_fragments(ds: Downsampling, group_cols: int,
+                  ts_col: str = 'm."timestamp"', value_col: str = "m.value",
+                  sensor_col: str = "m.sensor_id"):
+    """
+    Fragmentos (ts, valores, group_by) para armar el SELECT de una serie.
+
+    Sin bucket devuelve las columnas crudas (ts, valor). Con bucket, el
+    timestamp es el inicio del intervalo y los valores son AVG, MIN, MAX
+    (media circular, NULL, NULL para los sensores angulares); group_cols es
+    la cantidad de columnas no agregadas que van antes del timestamp en el
+    SELECT, y entre ellas tiene que estar sensor_col. El timestamp sale con
+    alias ts, para usar en ORDER BY en los dos casos.
+    """
+    if not ds.bucket_seconds:
+        return f"{ts_col} AS ts", value_col, ""
+    ts_sql  = (f"date_bin(INTERVAL '{int(ds.bucket_seconds)} seconds', {ts_col}, "
+               f"TIMESTAMP '2000-01-01') AS ts")
+    angular = f"{sensor_col} IN ({_ANGULAR_SENSORS})"
+    media   = _circular_mean(f"AVG(SIN(RADIANS({value_col})))", f"AVG(COS(RADIANS({value_col})))")
+    val_sql = (f"CASE WHEN {angular} THEN {media} ELSE AVG({value_col}) END, "
+               f"CASE WHEN {angular} THEN NULL ELSE MIN({value_col}) END, "
+               f"CASE WHEN {angular} THEN NULL ELSE MAX({value_col}) END")
+    group   = "GROUP BY " + ", ".join(str(i) for i in range(1, group_cols + 2))
+    return ts_sql, val_sql, group
+
+
+def rollup_table(ds: Downsampling):
+    """
+    Rollup del que se puede leer la serie pedida, o None si hay que ir a
+    measurement (sin resolution, resolution < 1h o rollups desactivados).
+    """
+    if not (ROLLUPS_ENABLED and ds.bucket_seconds):
+        return None
+    for seconds, table in ROLLUP_TABLES:
+        if ds.bucket_seconds % seconds == 0:
+            return table
+    return None
+
+
+def series_sql(ds: Downsampling, group_cols: int, alias: str = "m") -> SeriesSQL:
+    """
+    Como sql_fragments, pero eligiendo además la tabla de origen. Con rollup,
+    la media se re-agrega ponderada por la cantidad de mediciones de cada
+    hora/día (las angulares, por sin_mean/cos_mean: sólo ellas los tienen y
+    su min/max ya es NULL) y el filtro de tiempo va sobre el inicio del
+    intervalo (bucket).
+    La consulta debe usar `FROM {table}` y `WHERE {time_col} >= ...`.
+    """
+    table = rollup_table(ds)
+    if table is None:
+        time_col = f'{alias}."timestamp"'
+        ts_sql, val_sql, group = sql_fragments(ds, group_cols, ts_col=time_col,
+                                               value_col=f"{alias}.value",
+                                               sensor_col=f"{alias}.sensor_id")
+        return SeriesSQL(f"oogsj_data.measurement {alias}", time_col, ts_sql, val_sql, group)
+
+    time_col = f"{alias}.bucket"
+    ts_sql, _, group = sql_fragments(ds, group_cols, ts_col=time_col)
+    sin_sum = f"SUM({alias}.sin_mean * {alias}.n)"
+    cos_sum = f"SUM({alias}.cos_mean * {alias}.n)"
+    val_sql = (f"CASE WHEN {sin_sum} IS NULL THEN SUM({alias}.mean_value * {alias}.n) / SUM({alias}.n) "
+               f"ELSE {_circular_mean(sin_sum, cos_sum)} END, "
+               f"MIN({alias}.min_value), MAX({alias}.max_value)")
+    return SeriesSQL(f"{table} {alias}", time_col, ts_sql, val_sql, group)
+
+
+def _as_float(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def lttb(points: list, max_points: int, x, y) -> list:
+    """
+    Largest-Triangle-Three-Buckets: elige max_points puntos de `points`
+    (ordenados por x) que preservan la forma visual de la serie.
+    x e y son funciones que extraen del punto el eje (número) y el valor.
+    Los puntos sin valor numérico se descartan antes de elegir.
+    """
+    points = [p for p in points if _as_float(y(p)) is not None]
+    n = len(points)
+    if max_points is None or n <= max_points or max_points < MIN_POINTS:
+        return points
+
+    xs = [x(p) for p in points]
+    ys = [_as_float(y(p)) for p in points]
+
+    sampled = [points[0]]
+    every   = (n - 2) / (max_points - 2)
+    a       = 0
+    for i in range(max_points - 2):
+        # Promedio del bucket siguiente: tercer vértice del triángulo.
+        avg_start = int((i + 1) * every) + 1
+        avg_end   = min(int((i + 2) * every) + 1, n)
+        span      = avg_end - avg_start
+        avg_x     = sum(xs[avg_start:avg_end]) / span
+        avg_y     = sum(ys[avg_start:avg_end]) / span
+
+        # En el bucket actual, el punto que forma el triángulo de mayor área.
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        ax, ay     = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def thin_rows(rows: list, max_points: int, series, ts, value) -> list:
+    """
+    Aplica LTTB a cada serie de un resultado de cursor.fetchall().
+    series/ts/value extraen de cada fila la clave de la serie, el timestamp
+    (datetime) y el valor. Respeta el orden de las filas dentro de cada serie.
+    """
+    if not max_points:
+        return rows
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(series(row), []).append(row)
+    out = []
+    for serie_rows in grouped.values():
+        out += lttb(serie_rows, max_points, x=lambda r: ts(r).timestamp(), y=value)
+    return out
@@ -0,0 +1,145 @@
+"""
+pagination.py
+=============
+Rango de tiempo y paginado keyset de los históricos (/api/platforms/<id>/history,
+/api/appcr/*/history, /api/emac_cmd0|1/history, /api/buoy, /api/mareograph,
+/api/tide_forecast).
+
+  ?from=2025-01-01T00:00:00Z&to=2025-02-01T00:00:00Z
+      Rango [from, to) en ISO-8601 (UTC si no trae zona). Por defecto, la
+      ventana fija de cada endpoint hasta ahora (10, 15 o 30 días).
+
+  ?limit=5000&cursor=...
+      Las filas salen ordenadas por (ts, sensor_id) y nunca más de limit.
+      Si quedan filas, la respuesta trae el cursor de la siguiente página:
+      en el cuerpo (next_cursor) en la API genérica, y en los encabezados
+      X-Next-Cursor / Link rel="next" en los endpoints por estación, que
+      conservan su formato de respuesta.
+
+      Sin limit, el tope es HISTORY_PAGE_MAX en cuanto el cliente pagina
+      (cursor) o elige el rango (from/to). La ventana por defecto de los
+      endpoints por estación sale completa, sin tope, como antes de
+      paginar: sus clientes actuales (oogsj-web) hacen un solo fetch y no
+      leen X-Next-Cursor.
+
+El cursor es la clave (ts, sensor_id) de la última fila entregada: la página
+siguiente filtra (ts, sensor_id) > cursor en SQL, sin OFFSET, así que el
+costo de una página no crece con la cantidad de páginas anteriores.
+
+Una consulta paginada arma su SELECT interno con m.sensor_id, una columna
+ts y parámetros con nombre %(desde)s / %(hasta)s, y lo envuelve con
+page_sql(inner, page) / page_params(page, ...).
+"""
+
+import base64
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from flask import request, url_for
+
+import config
+
+Page = namedtuple("Page", ["desde", "hasta", "limit", "cursor"])
+
+
+def _parse_ts(texto, nombre):
+    try:
+        ts = datetime.fromisoformat(texto.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"{nombre} debe ser una fecha ISO-8601")
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def encode_cursor(ts, sensor_id):
+    return base64.urlsafe_b64encode(f"{ts.isoformat()}|{sensor_id}".encode()).decode()
+
+
+def decode_cursor(texto):
+    """(ts, sensor_id) del cursor de la página anterior; ValueError si no es válido."""
+    if not texto:
+        return None
+    try:
+        ts, sid = base64.urlsafe_b64decode(texto.encode()).decode().split("|")
+        return datetime.fromisoformat(ts), int(sid)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("cursor inválido")
+
+
+def parse_args(args, window, default_limit=None, ahead=timedelta(0)) -> Page:
+    """
+    Lee from/to/limit/cursor de request.args. Por defecto el rango es
+    [to - window, ahora + ahead): `ahead` es para series con datos futuros
+    (predicción de marea). Los datetimes salen en UTC naive, como
+    measurement. Lanza ValueError con un mensaje para el cliente si son
+    inválidos.
+    """
+    now   = datetime.utcnow()
+    hasta = _parse_ts(args["to"], "to") if args.get("to") else now + ahead
+    desde = _parse_ts(args["from"], "from") if args.get("from") else min(hasta, now) - window
+    if desde >= hasta:
+        raise ValueError("from debe ser anterior a to")
+
+    limit = args.get("limit")
+    if limit is None:
+        if default_limit:
+            limit = default_limit
+        elif any(args.get(k) for k in ("cursor", "from", "to")):
+            limit = config.HISTORY_PAGE_MAX
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("limit debe ser un entero")
+        if not 1 <= limit <= config.HISTORY_PAGE_MAX:
+            raise ValueError(f"limit debe estar entre 1 y {config.HISTORY_PAGE_MAX}")
+
+    return Page(desde, hasta, limit, decode_cursor(args.get("cursor")))
+
+
+def page_sql(inner, page):
+    """Envuelve el SELECT interno con el orden, el filtro keyset y el LIMIT."""
+    where = "WHERE (q.ts, q.sensor_id) > (%(cursor_ts)s, %(cursor_sid)s)" if page.cursor else ""
+    return f"""
+        SELECT * FROM ({inner}) q
+        {where}
+        ORDER BY q.ts, q.sensor_id
+        LIMIT %(limit)s;
+    """
+
+
+def page_params(page, **extra):
+    """
+    Parámetros de page_sql. Con cursor el rango arranca en su timestamp, así
+    el índice (sensor_id, timestamp) no recorre lo ya entregado. Se pide una
+    fila de más para saber si hay página siguiente. Con limit None (streaming,
+    ver streaming.py) queda LIMIT NULL: sin tope.
+    """
+    params = {"desde": page.desde, "hasta": page.hasta,
+              "limit": page.limit + 1 if page.limit else None, **extra}
+    if page.cursor:
+        params["cursor_ts"], params["cursor_sid"] = page.cursor
+        params["desde"] = max(page.desde, page.cursor[0])
+    return params
+
+
+def split(rows, page, ts, sensor_id):
+    """
+    (filas de la página, next_cursor). ts/sensor_id extraen la clave de una
+    fila. next_cursor es None en la última página (o sin limit).
+    """
+    if page.limit is None or len(rows) <= page.limit:
+        return rows, None
+    rows = rows[:page.limit]
+    return rows, encode_cursor(ts(rows[-1]), sensor_id(rows[-1]))
+
+
+def with_next(resp, next_cursor):
+    """Agrega X-Next-Cursor y Link rel="next" a la respuesta si hay otra página."""
+    if next_cursor:
+        args = {**request.args.to_dict(), "cursor": next_cursor}
+        url  = url_for(request.endpoint, **(request.view_args or {}), **args)
+        resp.headers["X-Next-Cursor"] = next_cursor
+        resp.headers["Link"] = f'<{url}>; rel="next"'
+    return resp
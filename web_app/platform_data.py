@@ -0,0 +1,156 @@
+"""
+platform_data.py
+================
+Motor genérico de datos por plataforma, detrás de /api/platforms/<id>/latest
+y /api/platforms/<id>/history (blueprints/platforms_bp.py).
+
+Todo sale de la metadata de la base, no de nombres ni ids fijos en código:
+
+  - Sensores, variables y unidades de la plataforma se resuelven con una
+    consulta y quedan en memoria del proceso PLATFORM_META_TTL segundos.
+  - La unidad que se muestra y la conversión (valor * factor + offset)
+    vienen de oogsj_data.unit_conversion (migración 20261022).
+  - Último dato: oogsj_data.sensor_latest, una fila por sensor.
+  - Histórico: filtro por variable, resolution / max_points como en
+    downsampling.py (con rollups para resolution ≥ 1h) y rango + paginado
+    keyset de pagination.py.
+"""
+
+import time
+from collections import namedtuple
+from datetime import timedelta, timezone
+
+import config
+import downsampling
+import pagination
+
+Platform = namedtuple("Platform", ["id", "name", "type", "sensors"])
+Sensor   = namedtuple("Sensor", ["id", "name", "key", "label", "unit", "factor", "offset"])
+
+DEFAULT_RANGE = timedelta(days=10)
+
+_META_SQL = """
+    SELECT p.id, p.name, pt.name,
+           s.id, s.name, v.name,
+           COALESCE(c.to_symbol, u.symbol), COALESCE(c.factor, 1), COALESCE(c."offset", 0)
+    FROM oogsj_data.platform p
+    LEFT JOIN oogsj_data.platform_type pt ON pt.id = p.platform_type_id
+    LEFT JOIN oogsj_data.sensor   s ON s.platform_id = p.id
+    LEFT JOIN oogsj_data.variable v ON v.id = s.variable_id
+    LEFT JOIN oogsj_data.unit     u ON u.id = s.unit_id
+    LEFT JOIN LATERAL (
+        SELECT c.to_symbol, c.factor, c."offset"
+        FROM oogsj_data.unit_conversion c
+        WHERE c.unit_id = s.unit_id
+          AND (c.variable_id = s.variable_id OR c.variable_id IS NULL)
+        ORDER BY c.variable_id NULLS LAST
+        LIMIT 1
+    ) c ON TRUE
+    WHERE p.id = %s
+    ORDER BY v.name, s.name;
+"""
+
+_meta_cache = {}        # platform_id → (vence, Platform | None)
+
+
+def slug(name):
+    texto = "".join(ch if ch.isalnum() else "_" for ch in (name or "").strip().lower())
+    while "__" in texto:
+        texto = texto.replace("__", "_")
+    return texto.strip("_") or "unknown"
+
+
+def clear_metadata_cache():
+    _meta_cache.clear()
+
+
+def get_platform(conn, platform_id):
+    """Metadata de la plataforma (cacheada), o None si no existe."""
+    cached = _meta_cache.get(platform_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    cur = conn.cursor()
+    try:
+        cur.execute(_META_SQL, (platform_id,))
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+
+    platform = None
+    if rows:
+        sensors = {}
+        for _pid, _pname, _ptype, sid, sname, vname, unit, factor, offset in rows:
+            if sid is None:
+                continue
+            sensors[sid] = Sensor(sid, sname, slug(vname or sname), vname or sname,
+                                  unit, float(factor), float(offset))
+        platform = Platform(rows[0][0], rows[0][1], rows[0][2], sensors)
+    _meta_cache[platform_id] = (time.monotonic() + config.PLATFORM_META_TTL, platform)
+    return platform
+
+
+def select_sensors(platform, args):
+    """
+    Sensores pedidos con ?variables=clave1,clave2 (claves de variable, ver
+    slug), o todos. Lanza ValueError si alguna clave no existe.
+    """
+    pedido = [v.strip() for v in (args.get("variables") or "").split(",") if v.strip()]
+    sensors = list(platform.sensors.values())
+    if not pedido:
+        return sensors
+    claves = {s.key for s in sensors}
+    desconocidas = [v for v in pedido if v not in claves]
+    if desconocidas:
+        raise ValueError(f"variables desconocidas: {', '.join(desconocidas)}; "
+                         f"opciones: {', '.join(sorted(claves))}")
+    return [s for s in sensors if s.key in pedido]
+
+
+def convert(sensor, value):
+    if value is None:
+        return None
+    value = float(value)
+    if sensor.factor == 1 and sensor.offset == 0:
+        return value
+    return round(value * sensor.factor + sensor.offset, 4)
+
+
+def ts_to_iso(ts):
+    if ts is None:
+        return None
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def fetch_latest(cur, sensors):
+    """{sensor_id: (timestamp, valor crudo)} desde sensor_latest."""
+    cur.execute("""
+        SELECT sensor_id, timestamp, value
+        FROM oogsj_data.sensor_latest
+        WHERE sensor_id = ANY(%s);
+    """, ([s.id for s in sensors],))
+    return {sid: (ts, value) for sid, ts, value in cur.fetchall()}
+
+
+def history_sql(sensors, ds, page):
+    """
+    (sql, params) del histórico de esos sensores para una pagination.Page.
+    Columnas: sensor_id, ts, valor [, min, max].
+    """
+    serie = downsampling.series_sql(ds, group_cols=1)
+    sql = pagination.page_sql(f"""
+        SELECT m.sensor_id, {serie.ts}, {serie.values}
+        FROM {serie.table}
+        WHERE m.sensor_id = ANY(%(sensores)s)
+          AND {serie.time_col} >= %(desde)s AND {serie.time_col} < %(hasta)s
+        {serie.group}
+    """, page)
+    return sql, pagination.page_params(page, sensores=[s.id for s in sensors])
+
+
+def fetch_history_page(cur, sensors, ds, page):
+    """Una página del histórico: (filas, next_cursor)."""
+    cur.execute(*history_sql(sensors, ds, page))
+    return pagination.split(cur.fetchall(), page, ts=lambda r: r[1], sensor_id=lambda r: r[0])
@@ -0,0 +1,322 @@
+"""
+profiling.py
+============
+Perfilado opcional de los requests (PROFILING_ENABLED=true), sin
+dependencias nuevas.
+
+Por endpoint (request.endpoint), método y status acumula:
+  - tiempo total del request (histograma);
+  - tiempo en la base, cantidad de consultas y filas leídas: db.py envuelve
+    cada cursor prestado durante el request (wrap_cursor) y mide execute,
+    fetch* y la iteración, incluida la de los cursores server-side de
+    streaming.py;
+  - tiempo de serialización JSON (jsonify / app.json.dumps). Las líneas
+    NDJSON de streaming.py se serializan fuera de jsonify y no cuentan acá,
+    sí en el tiempo total.
+
+GET /metrics las expone en el formato de texto de Prometheus, junto con el
+estado del pool de conexiones. Los contadores son por proceso: con varios
+workers de gunicorn cada scrape ve uno solo, y la etiqueta `worker` (pid)
+separa las series; sumar con `sum without (worker)`.
+
+nginx publica la raíz de web_app bajo /dashboard, así que /metrics exige
+`Authorization: Bearer <METRICS_TOKEN>`; sin token configurado sólo
+responde a pedidos directos (sin X-Forwarded-For, es decir, desde la red
+de docker y no a través de nginx).
+
+Los requests de más de PROFILING_SLOW_MS se loguean con el desglose y sus
+consultas más lentas.
+"""
+
+import hmac
+import os
+import re
+import threading
+import time
+from functools import partial
+
+from flask import Response, g, has_app_context, request
+from flask.json.provider import DefaultJSONProvider
+
+import config
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_TOP_QUERIES = 5
+SLOW_SQL_CHARS   = 200
+
+_lock    = threading.Lock()
+_metrics = {}     # (endpoint, method, status) → _Serie
+
+
+class RequestProfile:
+    """Lo medido durante un request; vive en g._profile."""
+
+    def __init__(self):
+        self.start      = time.perf_counter()
+        self.db_seconds = 0.0
+        self.queries    = []      # (segundos, sql) por execute
+        self.rows       = 0
+        self.serialize_seconds = 0.0
+
+    def add_query(self, seconds, sql):
+        self.db_seconds += seconds
+        self.queries.append((seconds, sql))
+
+    def add_fetch(self, seconds, rows):
+        self.db_seconds += seconds
+        self.rows += rows
+
+
+class _Serie:
+    __slots__ = ("count", "buckets", "wall", "db", "queries", "rows", "serialize")
+
+    def __init__(self):
+        self.count   = 0
+        self.buckets = [0] * len(BUCKETS)
+        self.wall = self.db = self.serialize = 0.0
+        self.queries = self.rows = 0
+
+
+def current():
+    """El RequestProfile del request en curso, o None si no se perfila."""
+    return g.get("_profile") if has_app_context() else None
+
+
+# ── Cursor ──────────────────────────────────────────────────
+class _ProfiledCursor:
+    """
+    Envoltorio de un cursor psycopg2 que suma al RequestProfile el tiempo de
+    cada execute/fetch y las filas leídas. El resto de los atributos
+    (rowcount, description, itersize, ...) pasan al cursor real.
+    """
+
+    __slots__ = ("_cur", "_profile")
+
+    def __init__(self, cur, profile):
+        object.__setattr__(self, "_cur", cur)
+        object.__setattr__(self, "_profile", profile)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cur, name, value)
+
+    def _timed_execute(self, method, sql, *args):
+        inicio = time.perf_counter()
+        try:
+            return method(sql, *args)
+        finally:
+            self._profile.add_query(time.perf_counter() - inicio, sql)
+
+    def execute(self, sql, *args):
+        return self._timed_execute(self._cur.execute, sql, *args)
+
+    def executemany(self, sql, *args):
+        return self._timed_execute(self._cur.executemany, sql, *args)
+
+    def _timed_fetch(self, method, *args):
+        inicio = time.perf_counter()
+        rows = method(*args)
+        self._profile.add_fetch(time.perf_counter() - inicio, len(rows))
+        return rows
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        row = self._cur.fetchone()
+        self._profile.add_fetch(time.perf_counter() - inicio, int(row is not None))
+        return row
+
+    def fetchmany(self, *args):
+        return self._timed_fetch(self._cur.fetchmany, *args)
+
+    def fetchall(self):
+        return self._timed_fetch(self._cur.fetchall)
+
+    def __iter__(self):
+        it = iter(self._cur)
+        while True:
+            inicio = time.perf_counter()
+            try:
+                row = next(it)
+            except StopIteration:
+                self._profile.add_fetch(time.perf_counter() - inicio, 0)
+                return
+            self._profile.add_fetch(time.perf_counter() - inicio, 1)
+            yield row
+
+    def __enter__(self):
+        self._cur.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._cur.__exit__(*exc)
+
+
+def wrap_cursor(cur):
+    """El cursor envuelto si el request en curso se perfila; si no, el mismo."""
+    profile = current()
+    return _ProfiledCursor(cur, profile) if profile is not None else cur
+
+
+# ── Serialización ───────────────────────────────────────────
+class ProfiledJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        profile = current()
+        if profile is None:
+            return super().dumps(obj, **kwargs)
+        inicio = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            profile.serialize_seconds += time.perf_counter() - inicio
+
+
+# ── Hooks del request ───────────────────────────────────────
+def _start():
+    if request.endpoint != "metrics":
+        g._profile = RequestProfile()
+
+
+def _status(response):
+    """
+    after_request: el registro queda para cuando el servidor cierra la
+    respuesta, así los streams (stream_with_context) cuentan completos.
+    """
+    profile = current()
+    if profile is not None:
+        response.call_on_close(partial(_finish, profile, request.endpoint or "sin_ruta",
+                                       request.method, response.status_code,
+                                       request.full_path.rstrip("?")))
+    return response
+
+
+def _finish(profile, endpoint, method, status, path):
+    wall = time.perf_counter() - profile.start
+    record(endpoint, method, status, wall, profile)
+    if wall * 1000 >= config.PROFILING_SLOW_MS:
+        _log_slow(method, path, status, wall, profile)
+
+
+def record(endpoint, method, status, wall, profile):
+    key = (endpoint, method, str(status))
+    with _lock:
+        serie = _metrics.get(key)
+        if serie is None:
+            serie = _metrics[key] = _Serie()
+        serie.count += 1
+        for i, limite in enumerate(BUCKETS):
+            if wall <= limite:
+                serie.buckets[i] += 1
+        serie.wall      += wall
+        serie.db        += profile.db_seconds
+        serie.queries   += len(profile.queries)
+        serie.rows      += profile.rows
+        serie.serialize += profile.serialize_seconds
+
+
+def _sql_corto(sql):
+    texto = sql.decode(errors="replace") if isinstance(sql, bytes) else str(sql)
+    texto = re.sub(r"\s+", " ", texto).strip()
+    return texto if len(texto) <= SLOW_SQL_CHARS else texto[:SLOW_SQL_CHARS] + "…"
+
+
+def _log_slow(method, path, status, wall, profile):
+    lineas = [
+        f"🐢 {method} {path} → {status} en {wall * 1000:,.0f} ms · "
+        f"DB {profile.db_seconds * 1000:,.0f} ms en {len(profile.queries)} consultas, "
+        f"{profile.rows:,} filas · JSON {profile.serialize_seconds * 1000:,.0f} ms"
+    ]
+    for segundos, sql in sorted(profile.queries, key=lambda q: q[0], reverse=True)[:SLOW_TOP_QUERIES]:
+        lineas.append(f"     {segundos * 1000:>9,.1f} ms  {_sql_corto(sql)}")
+    print("\n".join(lineas), flush=True)
+
+
+# ── /metrics ────────────────────────────────────────────────
+def _escape(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def render():
+    """Las métricas acumuladas y el estado del pool, en texto de Prometheus."""
+    import db   # db importa este módulo para envolver los cursores
+
+    worker = os.getpid()
+    with _lock:
+        series = sorted((k, (s.count, list(s.buckets), s.wall, s.db, s.queries, s.rows, s.serialize))
+                        for k, s in _metrics.items())
+
+    salida = []
+
+    def familia(nombre, tipo, ayuda):
+        salida.append(f"# HELP {nombre} {ayuda}")
+        salida.append(f"# TYPE {nombre} {tipo}")
+
+    familia("oogsj_http_request_duration_seconds", "histogram", "Tiempo total del request.")
+    for (endpoint, method, status), (count, buckets, wall, *_resto) in series:
+        base = dict(endpoint=endpoint, method=method, status=status, worker=worker)
+        for limite, n in zip(BUCKETS, buckets):
+            salida.append(f"oogsj_http_request_duration_seconds_bucket{_labels(**base, le=limite)} {n}")
+        salida.append(f"oogsj_http_request_duration_seconds_bucket{_labels(**base, le='+Inf')} {count}")
+        salida.append(f"oogsj_http_request_duration_seconds_sum{_labels(**base)} {_numero(wall)}")
+        salida.append(f"oogsj_http_request_duration_seconds_count{_labels(**base)} {count}")
+
+    contadores = (
+        ("oogsj_db_seconds_total",            3, "Tiempo en execute y fetch de los cursores."),
+        ("oogsj_db_queries_total",            4, "Consultas ejecutadas."),
+        ("oogsj_db_rows_fetched_total",       5, "Filas leídas de los cursores."),
+        ("oogsj_serialization_seconds_total", 6, "Tiempo de serialización JSON."),
+    )
+    for nombre, i, ayuda in contadores:
+        familia(nombre, "counter", ayuda)
+        for (endpoint, method, status), valores in series:
+            etiquetas = _labels(endpoint=endpoint, method=method, status=status, worker=worker)
+            salida.append(f"{nombre}{etiquetas} {_numero(valores[i])}")
+
+    pool = db.get_pool().metrics()
+    familia("oogsj_db_pool_connections", "gauge", "Conexiones del pool del worker por estado.")
+    for estado in ("in_use", "idle"):
+        salida.append(f"oogsj_db_pool_connections{_labels(state=estado, worker=worker)} {pool[estado]}")
+    familia("oogsj_db_pool_waiting", "gauge", "Requests esperando una conexión libre.")
+    salida.append(f"oogsj_db_pool_waiting{_labels(worker=worker)} {pool['waiting']}")
+    familia("oogsj_db_pool_timeouts_total", "counter", "Esperas que terminaron en PoolTimeout.")
+    salida.append(f"oogsj_db_pool_timeouts_total{_labels(worker=worker)} {pool['timeouts']}")
+
+    return "\n".join(salida) + "\n"
+
+
+def _autorizado():
+    if config.METRICS_TOKEN:
+        return hmac.compare_digest(request.headers.get("Authorization", ""),
+                                   f"Bearer {config.METRICS_TOKEN}")
+    return "X-Forwarded-For" not in request.headers
+
+
+def metrics():
+    if not _autorizado():
+        return Response("Not Found", status=404, mimetype="text/plain")
+    return Response(render(), mimetype="text/plain; version=0.0.4")
+
+
+def reset():
+    """Descarta lo acumulado (tests)."""
+    with _lock:
+        _metrics.clear()
+
+
+def init_app(app):
+    """Registra los hooks y /metrics si PROFILING_ENABLED; si no, no hace nada."""
+    if not config.PROFILING_ENABLED:
+        return
+    app.json = ProfiledJSONProvider(app)
+    app.before_request(_start)
+    app.after_request(_status)
+    app.add_url_rule("/metrics", "metrics", metrics, methods=["GET"])
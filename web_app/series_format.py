@@ -0,0 +1,72 @@
+"""
+series_format.py
+================
+Formato de respuesta de los endpoints de series (?format=):
+
+  json      (por defecto) lista de puntos {"timestamp": ..., "value": ...}.
+  ndjson    una línea por punto, en streaming (streaming.py).
+  columnar  por serie, arreglos paralelos en lugar de un objeto por punto:
+
+              {"unit": "m", "t": [1751796000000, ...], "v": [2.34, ...],
+               "min": [...], "max": [...]}       # min/max sólo con resolution
+
+            t son epoch en milisegundos (UTC). Con &delta=1, t[0] es
+            absoluto y cada t[i] la diferencia con el anterior (una serie
+            cada 10 minutos queda como [t0, 600000, 600000, ...]); el
+            cliente los acumula. El resto de la respuesta (claves de
+            variable, unit, next_cursor, ...) no cambia.
+
+Evita repetir claves y fechas ISO por punto: el JSON resultante es varias
+veces más chico y más barato de serializar. La compresión gzip la hace
+nginx (nginx/nginx.prod.conf).
+"""
+
+from datetime import datetime, timezone
+
+from flask import request
+
+FORMATS = ("json", "ndjson", "columnar")
+
+
+def parse_format(args, ds=None, allowed=FORMATS):
+    """
+    Formato pedido con ?format= (por defecto json), entre los que admite el
+    endpoint (`allowed`). Lanza ValueError si no es uno de ellos, si se
+    combina ndjson con max_points (LTTB necesita la serie entera en
+    memoria) o si delta viene sin columnar.
+    """
+    fmt = args.get("format") or "json"
+    if fmt not in allowed:
+        raise ValueError(f"format inválido; opciones: {', '.join(allowed)}")
+    if fmt == "ndjson" and ds is not None and ds.max_points:
+        raise ValueError("max_points no se combina con format=ndjson")
+    delta = args.get("delta")
+    if delta not in (None, "0", "1"):
+        raise ValueError("delta debe ser 0 o 1")
+    if delta == "1" and fmt != "columnar":
+        raise ValueError("delta sólo aplica a format=columnar")
+    return fmt
+
+
+def epoch_ms(ts):
+    """datetime (naive = UTC, como measurement) o ISO-8601 → epoch en ms."""
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp() * 1000)
+
+
+def to_columns(points, value_key="value"):
+    """
+    Puntos [{"timestamp", value_key, "min"?, "max"?}] → {"t", "v", "min"?, "max"?}.
+    Codifica t en deltas si el pedido trae delta=1.
+    """
+    t = [epoch_ms(p["timestamp"]) for p in points]
+    if request.args.get("delta") == "1":
+        t = t[:1] + [b - a for a, b in zip(t, t[1:])]
+    cols = {"t": t, "v": [p[value_key] for p in points]}
+    if points and "min" in points[0]:
+        cols["min"] = [p["min"] for p in points]
+        cols["max"] = [p["max"] for p in points]
+    return cols
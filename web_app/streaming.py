@@ -0,0 +1,82 @@
+"""
+streaming.py
+============
+Respuestas NDJSON en streaming para los históricos (?format=ndjson).
+
+En lugar de armar el resultado completo y pasarlo a jsonify, la consulta
+se lee con un cursor con nombre de psycopg2 (server-side: Postgres entrega
+STREAM_FETCH_ROWS filas por vez) y cada fila sale como una línea JSON a
+medida que llega. La memoria por pedido queda acotada por el lote del
+cursor, no por el tamaño del rango, y el primer byte sale con el primer
+lote en vez de al final de la consulta.
+
+  - Una línea por punto: {"timestamp": ..., "value": ..., ...}.
+  - Sin limit el stream cubre todo [from, to). Con limit corta ahí y la
+    última línea es {"next_cursor": "..."} (mismo cursor que pagination.py).
+  - max_points (LTTB) necesita la serie entera en memoria: no se combina
+    con ndjson (series_format.parse_format); resolution sí, porque agrega
+    en SQL.
+  - El cache de respuestas no guarda streams (ver cache.py); los
+    encabezados ETag / Last-Modified de conditional.py aplican igual.
+"""
+
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import Response, stream_with_context
+
+import config
+import pagination
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def stream_page(page, args):
+    """La Page de pagination sin el tope por defecto: el stream no acumula filas."""
+    return page if args.get("limit") else page._replace(limit=None)
+
+
+def _default(o):
+    if isinstance(o, datetime) and o.tzinfo is None:
+        return o.isoformat() + "Z"          # measurement guarda UTC naive
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, Decimal):
+        return float(o)
+    raise TypeError(f"{type(o).__name__} no es serializable")
+
+
+def ndjson_response(conn, sql, params, lines, page, key):
+    """
+    Response que ejecuta `sql` en un cursor server-side de `conn` y emite
+    las líneas de cada fila. lines(row) devuelve los dicts de la fila;
+    key(row) su clave (ts, sensor_id) para el next_cursor. Cierra la
+    conexión al terminar el stream (o si el cliente corta).
+    """
+    def generate():
+        cur = conn.cursor(name=f"stream_{uuid.uuid4().hex}")
+        cur.itersize = config.STREAM_FETCH_ROWS
+        try:
+            cur.execute(sql, params)
+            buf, count = [], 0
+            for row in cur:
+                count += 1
+                if page.limit and count > page.limit:
+                    buf.append(json.dumps({"next_cursor": pagination.encode_cursor(*key(prev))}))
+                    break
+                buf += [json.dumps(item, default=_default) for item in lines(row)]
+                prev = row
+                if len(buf) >= config.STREAM_CHUNK_LINES:
+                    yield "\n".join(buf) + "\n"
+                    buf = []
+            if buf:
+                yield "\n".join(buf) + "\n"
+        finally:
+            cur.close()
+            conn.close()
+
+    resp = Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+    resp.headers["X-Accel-Buffering"] = "no"    # que nginx no junte el stream entero
+    return resp
@@ -25,6 +25,7 @@ os.environ.setdefault("JWT_SECRET", "test-secret-key-not-for-prod")
 os.environ.setdefault("MAIL_USERNAME", "test@example.com")
 os.environ.setdefault("MAIL_PASSWORD", "test-pass")
 os.environ.setdefault("SECURE_COOKIES", "false")
+os.environ.setdefault("CACHE_ENABLED", "false")  # el fixture fake_redis lo prende con un Redis en memoria
 
 import pytest  # noqa: E402
 
@@ -86,3 +87,40 @@ def non_admin_cookie():
         "uid": 3, "email": "user@test.com",
         "is_admin": False, "admin_role": None,
     })
+
+
+class FakeRedis:
+    """Redis en memoria con los comandos que usan cache.py y conditional.py."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        return True
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, b"0")) + 1).encode()
+
+
+@pytest.fixture()
+def fake_redis(monkeypatch):
+    """Prende el cache de respuestas (cache.py / conditional.py) sobre un FakeRedis."""
+    import cache
+    import config
+    fake = FakeRedis()
+    monkeypatch.setattr(config, "CACHE_ENABLED", True)
+    monkeypatch.setattr(cache, "_client", fake)
+    monkeypatch.setattr(cache, "_down_until", 0.0)
+    return fake
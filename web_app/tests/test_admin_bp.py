@@ -75,8 +75,7 @@ def test_stats_agrega_correctamente(client, admin_viewer_cookie, db_double, mock
     conn, cur = db_double
     ultima_medicion = datetime(2026, 7, 6, 10, 0, 0)
     cur.fetchone.side_effect = [
-        (1000, 50, 5, ultima_medicion),   # mediciones
-        (7,),                              # plataformas activas
+        (1000, 50, 5, ultima_medicion, 7),  # mediciones y plataformas activas
         (20, 3),                           # avisos
         (42,),                             # documentos
         ("123/26", datetime(2026, 7, 1).date(), datetime(2026, 7, 1, 12)),  # ultimo aviso
@@ -185,3 +184,32 @@ def test_plataforma_sin_ninguna_medicion_esta_sin_datos(client, admin_viewer_coo
 
     assert plat["estado"] == "sin_datos"
     assert plat["ultima_transmision"] is None
+
+
+def test_stats_lee_los_contadores_no_measurement(client, admin_viewer_cookie, db_double, mocker):
+    conn, cur = db_double
+    cur.fetchone.side_effect = [(0, 0, 0, None, 0), (0, 0), (0,), None]
+    mocker.patch("blueprints.admin_bp.get_db_connection", return_value=conn)
+
+    client.set_cookie("auth_token", admin_viewer_cookie)
+    body = client.get("/api/admin/stats").get_json()
+
+    sql = cur.execute.call_args_list[0].args[0]
+    assert "FROM oogsj_data.sensor_stats st" in sql
+    assert "oogsj_data.measurement" not in sql
+    assert body["mediciones"]["ultima_ts"] is None
+    assert body["avisos"]["ultimo"] is None
+
+
+def test_plataformas_toma_totales_de_los_contadores(client, admin_viewer_cookie, db_double, mocker):
+    conn, cur = db_double
+    cur.fetchall.side_effect = [[], []]
+    mocker.patch("blueprints.admin_bp.get_db_connection", return_value=conn)
+
+    client.set_cookie("auth_token", admin_viewer_cookie)
+    client.get("/api/admin/plataformas")
+
+    sql = cur.execute.call_args_list[0].args[0]
+    assert "JOIN oogsj_data.sensor_stats t" in sql
+    assert "FROM oogsj_data.sensor_stats_recent" in sql
+    assert "oogsj_data.measurement" not in sql
@@ -11,7 +11,7 @@ import pytest
 EXPECTED_BLUEPRINTS = {
     "auth", "ocean", "stations", "library", "contact", "files",
     "avisos", "admin", "noticias", "especies", "exports",
-    "emac_cmd0", "emac_cmd1", "users",
+    "emac_cmd0", "emac_cmd1", "users", "platforms",
 }
 
 
@@ -0,0 +1,102 @@
+"""
+Tests de cache.py — cache de respuestas en Redis para los GET públicos.
+Se usa el Redis falso en memoria de conftest.py (fixture fake_redis).
+"""
+from datetime import datetime
+
+import redis
+
+import cache
+
+
+def _buoy_latest(mocker, db_double):
+    conn, cur = db_double
+    cur.fetchall.return_value = [("Temperatura", None, 11.5, "°C")]
+    return mocker.patch("blueprints.ocean_bp.get_db_connection", return_value=conn)
+
+
+def test_segundo_pedido_sale_del_cache_sin_tocar_la_db(client, db_double, mocker, fake_redis):
+    get_conn = _buoy_latest(mocker, db_double)
+
+    primero = client.get("/api/buoy/latest")
+    segundo = client.get("/api/buoy/latest")
+
+    assert (primero.headers["X-Cache"], segundo.headers["X-Cache"]) == ("MISS", "HIT")
+    assert segundo.get_json() == primero.get_json()
+    assert segundo.mimetype == "application/json"
+    get_conn.assert_called_once()
+
+
+def test_invalidar_la_etiqueta_fuerza_recalculo(client, db_double, mocker, fake_redis):
+    get_conn = _buoy_latest(mocker, db_double)
+
+    client.get("/api/buoy/latest")
+    cache.invalidate("buoy")
+    resp = client.get("/api/buoy/latest")
+
+    assert resp.headers["X-Cache"] == "MISS"
+    assert get_conn.call_count == 2
+
+
+def test_query_string_distinta_es_otra_entrada(client, db_double, mocker, fake_redis):
+    conn, cur = db_double
+    cur.fetchall.return_value = []
+    mocker.patch("blueprints.ocean_bp.get_db_connection", return_value=conn)
+
+    client.get("/api/buoy?max_points=100")
+    resp = client.get("/api/buoy?resolution=1h")
+
+    assert resp.headers["X-Cache"] == "MISS"
+
+
+def test_errores_no_se_cachean(client, fake_redis):
+    resp = client.get("/api/buoy?max_points=cero")
+
+    assert resp.status_code == 400
+    assert not any("/api/buoy" in k for k in fake_redis.data)
+
+
+def test_si_otro_worker_esta_calculando_espera_su_resultado(client, db_double, mocker, fake_redis):
+    get_conn = _buoy_latest(mocker, db_double)
+    mocker.patch.object(cache, "POLL_SECONDS", 0)
+    real_set = fake_redis.set
+
+    def set_lock_ajeno(key, value, nx=False, ex=None):
+        if nx:
+            # Mientras "otro worker" tiene el lock, su resultado aparece en el cache.
+            real_set(key.replace(":lock", ""), b"application/json\n{}\n{\"ok\": 1}")
+            return None
+        return real_set(key, value, nx=nx, ex=ex)
+    fake_redis.set = set_lock_ajeno
+
+    resp = client.get("/api/buoy/latest")
+
+    assert resp.headers["X-Cache"] == "HIT"
+    assert resp.get_json() == {"ok": 1}
+    get_conn.assert_not_called()
+
+
+def test_redis_caido_sirve_sin_cache(client, db_double, mocker, fake_redis):
+    get_conn = _buoy_latest(mocker, db_double)
+    fake_redis.mget = mocker.MagicMock(side_effect=redis.ConnectionError("sin redis"))
+
+    resp = client.get("/api/buoy/latest")
+
+    assert resp.status_code == 200
+    assert "X-Cache" not in resp.headers
+    get_conn.assert_called_once()
+    assert cache.get_client() is None          # no reintenta hasta CACHE_RETRY_SECONDS
+
+
+def test_hit_conserva_el_cursor_de_la_pagina_siguiente(client, db_double, mocker, fake_redis):
+    conn, cur = db_double
+    t1 = datetime(2025, 1, 1)
+    cur.fetchall.return_value = [(3, t1, 1.0), (4, t1, 8.0)]
+    mocker.patch("blueprints.ocean_bp.get_db_connection", return_value=conn)
+
+    primero = client.get("/api/buoy?limit=1")
+    segundo = client.get("/api/buoy?limit=1")
+
+    assert segundo.headers["X-Cache"] == "HIT"
+    assert segundo.headers["X-Next-Cursor"] == primero.headers["X-Next-Cursor"]
+    assert segundo.headers["Link"] == primero.headers["Link"]
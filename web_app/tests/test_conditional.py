@@ -0,0 +1,75 @@
+"""
+Tests de conditional.py — ETag / Last-Modified / 304 en los endpoints de
+datos, con el instante de la última ingesta guardado en Redis (fake_redis).
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+import cache
+
+
+def _buoy_latest(mocker, db_double):
+    conn, cur = db_double
+    cur.fetchall.return_value = [("Temperatura", None, 11.5, "°C")]
+    return mocker.patch("blueprints.ocean_bp.get_db_connection", return_value=conn)
+
+
+def test_respuesta_lleva_etag_last_modified_y_cache_control(client, db_double, mocker, fake_redis):
+    _buoy_latest(mocker, db_double)
+    fake_redis.set("oogsj:cache:lastmod:buoy", 1790000000)
+
+    resp = client.get("/api/buoy/latest")
+
+    assert resp.status_code == 200
+    assert resp.headers["ETag"]
+    assert resp.last_modified == datetime.fromtimestamp(1790000000, tz=timezone.utc)
+    assert resp.headers["Cache-Control"] == "public, max-age=60"
+
+
+def test_if_none_match_vigente_devuelve_304_sin_ejecutar_la_vista(client, db_double, mocker, fake_redis):
+    get_conn = _buoy_latest(mocker, db_double)
+    fake_redis.set("oogsj:cache:lastmod:buoy", 1790000000)
+    etag = client.get("/api/buoy/latest").headers["ETag"]
+
+    resp = client.get("/api/buoy/latest", headers={"If-None-Match": f"W/{etag}"})
+
+    assert resp.status_code == 304
+    assert resp.data == b""
+    get_conn.assert_called_once()
+
+
+def test_if_modified_since_vigente_devuelve_304(client, fake_redis):
+    fake_redis.set("oogsj:cache:lastmod:buoy", 1790000000)
+    since = format_datetime(datetime.fromtimestamp(1790000000, tz=timezone.utc), usegmt=True)
+
+    resp = client.get("/api/buoy/latest", headers={"If-Modified-Since": since})
+
+    assert resp.status_code == 304
+
+
+def test_una_ingesta_nueva_cambia_el_etag(client, db_double, mocker, fake_redis):
+    _buoy_latest(mocker, db_double)
+    fake_redis.set("oogsj:cache:lastmod:buoy", 1790000000)
+    etag = client.get("/api/buoy/latest").headers["ETag"]
+
+    fake_redis.set("oogsj:cache:lastmod:buoy", 1790000600)
+    resp = client.get("/api/buoy/latest", headers={"If-None-Match": etag})
+
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+
+
+def test_sin_redis_sale_sin_validadores(client, db_double, mocker):
+    _buoy_latest(mocker, db_double)
+
+    resp = client.get("/api/buoy/latest")
+
+    assert resp.status_code == 200
+    assert "ETag" not in resp.headers
+    assert resp.headers["Cache-Control"] == "public, max-age=60"
+
+
+def test_invalidate_guarda_el_instante_para_last_modified(fake_redis):
+    cache.invalidate("noticias")
+
+    assert fake_redis.get("oogsj:cache:lastmod:noticias") is not None
@@ -0,0 +1,138 @@
+"""
+Tests de web_app/db.py — ConnectionPool y get_db_connection().
+
+Todos los blueprints piden conexiones a través del pool, así que si presta
+de más (supera maxconn), pierde conexiones al devolverlas o deja pasar una
+conexión rota, toda la API se degrada a la vez. Se usa un `connect` falso:
+nunca se abre un socket a Postgres.
+"""
+import threading
+
+import pytest
+
+import db
+from db import ConnectionPool, PoolTimeout
+
+
+def _fake_connect(mocker):
+    def connect():
+        raw = mocker.MagicMock(name="raw_conn")
+        raw.closed = 0
+        return raw
+    return mocker.MagicMock(side_effect=connect)
+
+
+def test_close_devuelve_la_conexion_al_pool_y_se_reutiliza(mocker):
+    connect = _fake_connect(mocker)
+    pool = ConnectionPool(connect=connect, maxconn=2)
+
+    c1 = pool.getconn()
+    raw1 = c1._raw
+    c1.close()
+    c2 = pool.getconn()
+
+    assert c2._raw is raw1
+    assert connect.call_count == 1
+    raw1.close.assert_not_called()
+    raw1.rollback.assert_called()   # la transacción abierta se cierra al devolver
+
+
+def test_close_dos_veces_no_devuelve_dos_veces(mocker):
+    pool = ConnectionPool(connect=_fake_connect(mocker), maxconn=2)
+    c = pool.getconn()
+    c.close()
+    c.close()
+    assert pool.metrics()["idle"] == 1
+    assert pool.metrics()["in_use"] == 0
+
+
+def test_pool_acotado_lanza_pool_timeout_si_no_hay_conexiones_libres(mocker):
+    pool = ConnectionPool(connect=_fake_connect(mocker), maxconn=1, timeout=0.05)
+    pool.getconn()
+
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    assert pool.metrics()["timeouts"] == 1
+
+
+def test_el_que_espera_recibe_la_conexion_liberada(mocker):
+    pool = ConnectionPool(connect=_fake_connect(mocker), maxconn=1, timeout=2)
+    c1 = pool.getconn()
+    obtenida = []
+
+    t = threading.Thread(target=lambda: obtenida.append(pool.getconn()))
+    t.start()
+    threading.Timer(0.05, c1.close).start()
+    t.join(timeout=3)
+
+    assert obtenida and obtenida[0]._raw is c1._raw
+    assert pool.metrics()["checkout_wait_max_ms"] > 0
+
+
+def test_conexion_que_falla_el_health_check_se_descarta(mocker):
+    connect = _fake_connect(mocker)
+    pool = ConnectionPool(connect=connect, maxconn=2, healthcheck_idle=0)
+    c = pool.getconn()
+    roto = c._raw
+    c.close()
+    roto.cursor.side_effect = Exception("server closed the connection unexpectedly")
+
+    nueva = pool.getconn()
+
+    assert nueva._raw is not roto
+    roto.close.assert_called_once()
+    assert pool.metrics()["healthcheck_failures"] == 1
+    assert pool.metrics()["size"] == 1
+
+
+def test_conexion_vencida_por_max_lifetime_se_recicla(mocker):
+    connect = _fake_connect(mocker)
+    pool = ConnectionPool(connect=connect, maxconn=2, max_lifetime=0.0001)
+    c = pool.getconn()
+    vieja = c._raw
+    mocker.patch("db.time.monotonic", return_value=10**9)
+    c.close()
+
+    assert pool.metrics()["recycled"] == 1
+    vieja.close.assert_called_once()
+    assert pool.getconn()._raw is not vieja
+
+
+def test_context_manager_hace_commit_o_rollback_y_devuelve(mocker):
+    pool = ConnectionPool(connect=_fake_connect(mocker), maxconn=1)
+
+    with pool.getconn() as conn:
+        raw = conn._raw
+    raw.commit.assert_called_once()
+
+    with pytest.raises(ValueError):
+        with pool.getconn() as conn:
+            raise ValueError("fallo en el handler")
+    assert pool.metrics()["in_use"] == 0
+
+
+def test_teardown_devuelve_conexiones_que_el_handler_no_cerro(app, mocker):
+    pool = ConnectionPool(connect=_fake_connect(mocker), maxconn=1)
+    mocker.patch("db.get_pool", return_value=pool)
+
+    with app.app_context():
+        db.get_db_connection()          # nunca se llama a close()
+        assert pool.metrics()["in_use"] == 1
+
+    assert pool.metrics()["in_use"] == 0
+
+
+def test_endpoint_db_pool_requiere_admin(client):
+    assert client.get("/api/admin/db_pool").status_code == 401
+
+
+def test_endpoint_db_pool_expone_metricas(client, admin_viewer_cookie, mocker):
+    pool = ConnectionPool(connect=_fake_connect(mocker), maxconn=3)
+    mocker.patch("blueprints.admin_bp.get_pool", return_value=pool)
+
+    client.set_cookie("auth_token", admin_viewer_cookie)
+    body = client.get("/api/admin/db_pool").get_json()
+
+    assert body["pool"]["max_size"] == 3
+    for clave in ("in_use", "waiting", "checkout_wait_avg_ms", "checkout_wait_max_ms"):
+        assert clave in body["pool"]
@@ -0,0 +1,104 @@
+"""
+Tests de web_app/downsampling.py — agregación por intervalos y LTTB para los
+endpoints de histórico.
+"""
+import math
+from datetime import datetime, timedelta
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+import downsampling
+
+
+T0 = datetime(2026, 7, 1, 0, 0, 0)
+
+
+def test_parse_args_sin_parametros_no_reduce():
+    assert downsampling.parse_args(MultiDict()) == (None, None)
+
+
+def test_parse_args_acepta_resolution_o_bucket():
+    assert downsampling.parse_args(MultiDict({"resolution": "1h"})).bucket_seconds == 3600
+    assert downsampling.parse_args(MultiDict({"bucket": "10min", "max_points": "300"})) == (600, 300)
+
+
+@pytest.mark.parametrize("args", [{"resolution": "7min"}, {"max_points": "abc"},
+                                  {"max_points": "2"}, {"max_points": "1000000"}])
+def test_parse_args_invalidos_lanzan_value_error(args):
+    with pytest.raises(ValueError):
+        downsampling.parse_args(MultiDict(args))
+
+
+def test_sql_fragments_crudo_y_agregado():
+    assert downsampling.sql_fragments(downsampling.Downsampling(None, None), group_cols=2) == ('m."timestamp" AS ts', "m.value", "")
+
+    ts_sql, val_sql, group_sql = downsampling.sql_fragments(downsampling.Downsampling(3600, None), group_cols=2)
+    assert ts_sql.startswith("date_bin(INTERVAL '3600 seconds', m.\"timestamp\"")
+    media, minimo, maximo = val_sql.split(" END, ")
+    assert "ELSE AVG(m.value)" in media
+    assert "ELSE MIN(m.value)" in minimo and "ELSE MAX(m.value)" in maximo
+    assert group_sql == "GROUP BY 1, 2, 3"
+
+
+def test_sql_fragments_direcciones_con_media_circular_sin_min_max():
+    """La media aritmética de 350° y 10° es 180°; la circular, 0°."""
+    _ts, val_sql, _group = downsampling.sql_fragments(downsampling.Downsampling(3600, None), group_cols=2)
+    media, minimo, maximo = val_sql.split(" END, ")
+
+    assert media.startswith("CASE WHEN m.sensor_id IN (")
+    assert "va.is_angular" in media
+    assert "ATAN2(AVG(SIN(RADIANS(m.value))), AVG(COS(RADIANS(m.value))))" in media
+    assert "THEN NULL ELSE MIN" in minimo and "THEN NULL ELSE MAX" in maximo
+
+
+def test_series_sql_elige_rollup_segun_resolution(monkeypatch):
+    monkeypatch.setattr(downsampling, "ROLLUPS_ENABLED", True)
+    crudo = downsampling.series_sql(downsampling.Downsampling(1800, None), group_cols=0)
+    horario = downsampling.series_sql(downsampling.Downsampling(10800, None), group_cols=0)
+    diario = downsampling.series_sql(downsampling.Downsampling(86400, None), group_cols=0)
+
+    assert crudo.table == "oogsj_data.measurement m" and crudo.time_col == 'm."timestamp"'
+    assert horario.table == "oogsj_data.measurement_hourly m" and horario.time_col == "m.bucket"
+    assert horario.values == (
+        "CASE WHEN SUM(m.sin_mean * m.n) IS NULL THEN SUM(m.mean_value * m.n) / SUM(m.n) "
+        "ELSE MOD((DEGREES(ATAN2(SUM(m.sin_mean * m.n), SUM(m.cos_mean * m.n))) + 360)::numeric, 360)::float END, "
+        "MIN(m.min_value), MAX(m.max_value)")
+    assert diario.table == "oogsj_data.measurement_daily m"
+
+
+def test_series_sql_sin_rollups_lee_measurement(monkeypatch):
+    monkeypatch.setattr(downsampling, "ROLLUPS_ENABLED", False)
+    serie = downsampling.series_sql(downsampling.Downsampling(3600, None), group_cols=1)
+
+    assert serie.table == "oogsj_data.measurement m"
+    assert serie.values == downsampling.sql_fragments(downsampling.Downsampling(3600, None), group_cols=1)[1]
+    assert serie.group == "GROUP BY 1, 2"
+
+
+def test_lttb_respeta_el_tope_y_conserva_extremos_y_picos():
+    puntos = [(T0 + timedelta(minutes=i), math.sin(i / 50)) for i in range(5000)]
+    puntos[2500] = (puntos[2500][0], 10.0)          # pico aislado
+
+    muestra = downsampling.lttb(puntos, 200, x=lambda p: p[0].timestamp(), y=lambda p: p[1])
+
+    assert len(muestra) == 200
+    assert muestra[0] == puntos[0] and muestra[-1] == puntos[-1]
+    assert puntos[2500] in muestra
+    assert [p[0] for p in muestra] == sorted(p[0] for p in muestra)
+
+
+def test_lttb_serie_corta_queda_igual():
+    puntos = [(T0, 1.0), (T0 + timedelta(minutes=1), 2.0)]
+
+    assert downsampling.lttb(puntos, 100, x=lambda p: p[0].timestamp(), y=lambda p: p[1]) == puntos
+
+
+def test_thin_rows_aplica_el_tope_por_serie():
+    filas = [("A", T0 + timedelta(minutes=i), float(i % 7)) for i in range(1000)]
+    filas += [("B", T0 + timedelta(minutes=i), 1.0) for i in range(10)]
+
+    out = downsampling.thin_rows(filas, 50, series=lambda r: r[0], ts=lambda r: r[1], value=lambda r: r[2])
+
+    assert sum(1 for r in out if r[0] == "A") == 50
+    assert sum(1 for r in out if r[0] == "B") == 10
@@ -8,7 +8,7 @@ Cubre:
 La DB nunca se toca de verdad: se mockea get_db_connection() para que
 devuelva un cursor con filas controladas por el test.
 """
-from datetime import datetime
+from datetime import datetime, timedelta
 
 
 def test_get_data_sin_filas_devuelve_estructura_vacia(client, db_double, mocker):
@@ -46,6 +46,7 @@ def test_get_data_con_filas_devuelve_variables_normalizadas(client, db_double, m
     assert resp.status_code == 200
     assert body["station_code"] == "emac_cmd0"
     assert body["timestamp"] == "2026-07-06T10:40:00Z"
+    assert "JOIN oogsj_data.sensor_latest m" in cur.execute.call_args.args[0]
 
     agua = body["variables"]["water_temperature"]
     assert agua["value"] == 8.13
@@ -97,10 +98,10 @@ def test_history_agrupa_por_variable_y_convierte_viento(client, db_double, mocke
     t1 = datetime(2026, 7, 6, 10, 0, 0)
     t2 = datetime(2026, 7, 6, 10, 10, 0)
     cur.fetchall.return_value = [
-        # variable_name, db_unit, ts, raw
-        ("Temperatura del Agua", "°C", t1, "5.0"),
-        ("Temperatura del Agua", "°C", t2, "5.5"),
-        ("Velocidad del Viento", "m/s", t1, "10.0"),
+        # sensor_id, variable_name, db_unit, ts, raw
+        (11, "Temperatura del Agua", "°C", t1, "5.0"),
+        (11, "Temperatura del Agua", "°C", t2, "5.5"),
+        (12, "Velocidad del Viento", "m/s", t1, "10.0"),
     ]
     mocker.patch("blueprints.emac_cmd0_bp.get_db_connection", return_value=conn)
 
@@ -125,3 +126,44 @@ def test_history_sin_filas_devuelve_diccionario_vacio(client, db_double, mocker)
 
     assert resp.status_code == 200
     assert resp.get_json() == {}
+
+
+def test_history_con_resolution_agrega_en_sql_y_devuelve_min_max(client, db_double, mocker):
+    conn, cur = db_double
+    t1 = datetime(2026, 7, 6, 10, 0, 0)
+    cur.fetchall.return_value = [
+        # sensor_id, variable_name, db_unit, bucket, avg, min, max
+        (12, "Velocidad del Viento", "m/s", t1, 10.0, 5.0, 20.0),
+    ]
+    mocker.patch("blueprints.emac_cmd0_bp.get_db_connection", return_value=conn)
+
+    resp = client.get("/api/emac_cmd0/history?resolution=1h")
+
+    sql = cur.execute.call_args.args[0]
+    assert "date_bin(INTERVAL '3600 seconds'" in sql and "GROUP BY 1, 2, 3" in sql
+    assert "FROM oogsj_data.measurement_hourly m" in sql
+    punto = resp.get_json()["wind_speed"]["data"][0]
+    assert punto == {"timestamp": "2026-07-06T10:00:00Z", "value": 36.0, "min": 18.0, "max": 72.0}
+
+
+def test_history_con_max_points_reduce_cada_serie(client, db_double, mocker):
+    conn, cur = db_double
+    t0 = datetime(2026, 7, 6, 0, 0, 0)
+    cur.fetchall.return_value = [
+        (11, "Temperatura del Agua", "°C", t0 + timedelta(minutes=10 * i), float(i % 13))
+        for i in range(1440)
+    ]
+    mocker.patch("blueprints.emac_cmd0_bp.get_db_connection", return_value=conn)
+
+    resp = client.get("/api/emac_cmd0/history?max_points=100")
+
+    assert len(resp.get_json()["water_temperature"]["data"]) == 100
+
+
+def test_history_con_resolution_invalida_es_400_sin_tocar_la_db(client, mocker):
+    get_conn = mocker.patch("blueprints.emac_cmd0_bp.get_db_connection")
+
+    resp = client.get("/api/emac_cmd0/history?resolution=7min")
+
+    assert resp.status_code == 400
+    get_conn.assert_not_called()
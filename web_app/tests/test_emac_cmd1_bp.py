@@ -43,7 +43,7 @@ def test_history_agrupa_por_variable(client, db_double, mocker):
     conn, cur = db_double
     t1 = datetime(2026, 7, 6, 10, 0, 0)
     cur.fetchall.return_value = [
-        ("Dirección del Viento", "°", t1, "247.5"),
+        (209, "Dirección del Viento", "°", t1, "247.5"),
     ]
     mocker.patch("blueprints.emac_cmd1_bp.get_db_connection", return_value=conn)
 
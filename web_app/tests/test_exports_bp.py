@@ -0,0 +1,53 @@
+"""
+Tests de blueprints/exports_bp.py — listado y descarga de los archivos que
+genera CSVExportService en EXPORT_DIR (CSV, TXT y dataset Parquet).
+"""
+import pytest
+
+import config
+
+
+@pytest.fixture()
+def exports_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "EXPORTS_FOLDER", str(tmp_path))
+    year_dir = tmp_path / "boya" / "2026"
+    year_dir.mkdir(parents=True)
+    (year_dir / "2026_04_boya.csv").write_text("csv")
+    (year_dir / "2026_04_boya.txt").write_text("txt")
+    (year_dir / "2026_04_boya.csv.part").write_text("a medio escribir")
+    for year, month in ((2025, 12), (2026, 4)):
+        pq_dir = tmp_path / "boya" / "parquet" / f"year={year}" / f"month={month:02d}"
+        pq_dir.mkdir(parents=True)
+        (pq_dir / f"{year}_{month:02d}_boya.parquet").write_bytes(b"PAR1")
+    return tmp_path
+
+
+def test_lista_csv_txt_y_parquet(client, exports_root):
+    resp = client.get("/api/exports/")
+
+    body = resp.get_json()
+    assert resp.status_code == 200
+    assert body["total_files"] == 4
+    boya = body["platforms"][0]
+    assert boya["parquet_dataset"] == "boya/parquet"
+    assert [(f["year"], f["month"], f["format"]) for f in boya["files"]] == [
+        (2025, 12, "parquet"), (2026, 4, "csv"), (2026, 4, "parquet"), (2026, 4, "txt"),
+    ]
+    parquet = boya["files"][0]
+    assert parquet["download_url"] == "/api/exports/download/boya/parquet/year=2025/month=12/2025_12_boya.parquet"
+
+
+def test_filtro_por_anio_incluye_parquet(client, exports_root):
+    body = client.get("/api/exports/?year=2025").get_json()
+
+    assert body["total_files"] == 1
+    assert body["platforms"][0]["files"][0]["format"] == "parquet"
+
+
+def test_descarga_parquet_con_mimetype(client, exports_root):
+    resp = client.get("/api/exports/download/boya/parquet/year=2026/month=04/2026_04_boya.parquet")
+
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/vnd.apache.parquet"
+    assert resp.data == b"PAR1"
+
@@ -1,13 +1,16 @@
 """
 Tests de web_app/blueprints/ocean_bp.py — mareógrafo, boya, predicción de marea.
 """
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import config
+import pagination
 
 
 def test_mareograph_devuelve_lista_de_niveles(client, db_double, mocker):
     conn, cur = db_double
     ts = datetime(2026, 7, 6, 8, 0, 0)
-    cur.fetchall.return_value = [(ts, "2.34")]
+    cur.fetchall.return_value = [(1, ts, "2.34")]
     mocker.patch("blueprints.ocean_bp.get_db_connection", return_value=conn)
 
     resp = client.get("/api/mareograph")
@@ -28,6 +31,8 @@ def test_mareograph_latest_agrupa_por_sensor(client, db_double, mocker):
 
     assert body["Nivel del Mar"]["value"] == 1.5
     assert body["Nivel del Mar"]["unit"] == "m"
+    sql = cur.execute.call_args.args[0]
+    assert "FROM oogsj_data.sensor_latest m" in sql and "oogsj_data.measurement" not in sql
 
 
 def test_mareograph_latest_con_valor_none(client, db_double, mocker):
@@ -85,7 +90,7 @@ def test_buoy_latest(client, db_double, mocker):
 def test_tide_forecast_devuelve_niveles(client, db_double, mocker):
     conn, cur = db_double
     ts = datetime(2026, 7, 6, 8, 0, 0)
-    cur.fetchall.return_value = [(ts, "1.85")]
+    cur.fetchall.return_value = [(2, ts, "1.85")]
     mocker.patch("blueprints.ocean_bp.get_db_connection", return_value=conn)
 
     resp = client.get("/api/tide_forecast")
@@ -135,3 +140,62 @@ def test_mediciones_negativas_serializa_timestamp(client, db_double, mocker):
     assert body[0]["valor"] == -5.2
     assert body[0]["timestamp"] == ts.isoformat()
     assert body[0]["unidad"] == "m"
+
+
+def test_mareograph_con_resolution_incluye_min_max(client, db_double, mocker):
+    conn, cur = db_double
+    ts = datetime(2026, 7, 6, 8, 0, 0)
+    cur.fetchall.return_value = [(1, ts, 2.0, 1.5, 2.5)]
+    mocker.patch("blueprints.ocean_bp.get_db_connection", return_value=conn)
+
+    body = client.get("/api/mareograph?resolution=1d").get_json()
+
+    assert "GROUP BY 1, 2" in cur.execute.call_args.args[0]
+    assert (body[0]["level"], body[0]["min"], body[0]["max"]) == (2.0, 1.5, 2.5)
+
+
+def test_buoy_con_max_points_invalido_es_400(client):
+    assert client.get("/api/buoy?max_points=cero").status_code == 400
+
+
+def test_buoy_con_rango_y_limit_pagina_con_encabezados(client, db_double, mocker):
+    conn, cur = db_double
+    t1, t2 = datetime(2025, 1, 1, 0, 0, 0), datetime(2025, 1, 1, 0, 10, 0)
+    cur.fetchall.return_value = [(3, t1, 1.0), (4, t1, 8.0), (3, t2, 1.1)]
+    mocker.patch("blueprints.ocean_bp.get_db_connection", return_value=conn)
+
+    resp = client.get("/api/buoy?from=2025-01-01T00:00:00Z&to=2025-02-01T00:00:00Z&limit=2")
+
+    sql, params = cur.execute.call_args.args
+    assert "ORDER BY q.ts, q.sensor_id" in sql and "LIMIT %(limit)s" in sql
+    assert (params["desde"], params["hasta"], params["limit"]) == (
+        datetime(2025, 1, 1), datetime(2025, 2, 1), 3)
+    assert resp.get_json()["Altura de Olas"] == [{"timestamp": "Wed, 01 Jan 2025 00:00:00 GMT", "value": 1.0}]
+    cursor = resp.headers["X-Next-Cursor"]
+    assert pagination.decode_cursor(cursor) == (t1, 4)
+    assert 'rel="next"' in resp.headers["Link"] and "cursor=" in resp.headers["Link"]
+
+
+def test_buoy_ultima_pagina_sin_cursor(client, db_double, mocker):
+    conn, cur = db_double
+    cur.fetchall.return_value = []
+    mocker.patch("blueprints.ocean_bp.get_db_connection", return_value=conn)
+
+    resp = client.get("/api/buoy?from=2025-01-01T00:00:00Z")
+
+    assert "X-Next-Cursor" not in resp.headers
+    assert cur.execute.call_args.args[1]["limit"] == config.HISTORY_PAGE_MAX + 1
+
+
+def test_tide_forecast_por_defecto_incluye_la_prediccion_futura(client, db_double, mocker):
+    conn, cur = db_double
+    cur.fetchall.return_value = []
+    mocker.patch("blueprints.ocean_bp.get_db_connection", return_value=conn)
+
+    client.get("/api/tide_forecast")
+
+    assert cur.execute.call_args.args[1]["hasta"] > datetime.utcnow() + timedelta(days=30)
+
+
+def test_history_con_limit_por_encima_del_tope_es_400(client):
+    assert client.get(f"/api/mareograph?limit={config.HISTORY_PAGE_MAX + 1}").status_code == 400
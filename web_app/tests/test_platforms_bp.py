@@ -0,0 +1,127 @@
+"""
+Tests de web_app/blueprints/platforms_bp.py y platform_data.py — API genérica
+por plataforma.
+
+  - GET /api/platforms/<id>/latest
+  - GET /api/platforms/<id>/history
+
+La primera consulta de cada pedido es la metadata (platform_data._META_SQL);
+el doble de cursor devuelve sus filas y luego las de datos (side_effect).
+"""
+from datetime import datetime
+
+import pytest
+
+import pagination
+import platform_data
+
+# platform_id, platform, tipo, sensor_id, sensor, variable, unidad, factor, offset
+META = [
+    (5, "Estación EMAC - CMD1", "Estación", 207, "Viento CMD1", "Velocidad del Viento", "km/h", 3.6, 0.0),
+    (5, "Estación EMAC - CMD1", "Estación", 208, "Temp CMD1", "Temperatura Exterior", "°C", 1.0, 0.0),
+]
+
+
+@pytest.fixture(autouse=True)
+def _sin_metadata_cacheada():
+    platform_data.clear_metadata_cache()
+    yield
+    platform_data.clear_metadata_cache()
+
+
+def test_latest_aplica_conversion_de_la_tabla(client, db_double, mocker):
+    conn, cur = db_double
+    ts = datetime(2026, 7, 6, 10, 40)
+    cur.fetchall.side_effect = [META, [(207, ts, 3.861), (208, ts, 8.5)]]
+    mocker.patch("blueprints.platforms_bp.get_db_connection", return_value=conn)
+
+    body = client.get("/api/platforms/5/latest").get_json()
+
+    assert body["platform"] == {"id": 5, "name": "Estación EMAC - CMD1", "type": "Estación"}
+    assert body["timestamp"] == "2026-07-06T10:40:00Z"
+    viento = body["sensors"][0]
+    assert viento["variable"] == "velocidad_del_viento"
+    assert viento["unit"] == "km/h"
+    assert viento["value"] == pytest.approx(13.8996)
+
+
+def test_latest_plataforma_inexistente_404(client, db_double, mocker):
+    conn, cur = db_double
+    cur.fetchall.return_value = []
+    mocker.patch("blueprints.platforms_bp.get_db_connection", return_value=conn)
+
+    assert client.get("/api/platforms/99/latest").status_code == 404
+
+
+def test_latest_variable_desconocida_400(client, db_double, mocker):
+    conn, cur = db_double
+    cur.fetchall.return_value = META
+    mocker.patch("blueprints.platforms_bp.get_db_connection", return_value=conn)
+
+    resp = client.get("/api/platforms/5/latest?variables=salinidad")
+    assert resp.status_code == 400
+    assert "salinidad" in resp.get_json()["error"]
+
+
+def test_metadata_se_cachea_entre_pedidos(client, db_double, mocker):
+    conn, cur = db_double
+    ts = datetime(2026, 7, 6, 10, 40)
+    cur.fetchall.side_effect = [META, [(207, ts, 1.0)], [(207, ts, 2.0)]]
+    mocker.patch("blueprints.platforms_bp.get_db_connection", return_value=conn)
+
+    client.get("/api/platforms/5/latest")
+    client.get("/api/platforms/5/latest")
+
+    assert cur.execute.call_count == 3  # metadata una sola vez
+
+
+def test_history_filtra_variables_y_rango(client, db_double, mocker):
+    conn, cur = db_double
+    t1 = datetime(2026, 7, 6, 10, 0)
+    cur.fetchall.side_effect = [META, [(208, t1, 7.25)]]
+    mocker.patch("blueprints.platforms_bp.get_db_connection", return_value=conn)
+
+    resp = client.get("/api/platforms/5/history?variables=temperatura_exterior"
+                      "&from=2026-07-01T00:00:00Z&to=2026-07-07T00:00:00Z")
+    body = resp.get_json()
+
+    assert resp.status_code == 200
+    assert body["from"] == "2026-07-01T00:00:00Z"
+    assert [s["sensor_id"] for s in body["series"]] == [208]
+    assert body["series"][0]["data"] == [{"timestamp": "2026-07-06T10:00:00Z", "value": 7.25}]
+    assert body["next_cursor"] is None
+    params = cur.execute.call_args[0][1]
+    assert params["sensores"] == [208]
+    assert params["desde"] == datetime(2026, 7, 1)
+    assert params["hasta"] == datetime(2026, 7, 7)
+
+
+def test_history_pagina_con_cursor_keyset(client, db_double, mocker):
+    conn, cur = db_double
+    t1, t2, t3 = (datetime(2026, 7, 6, 10, m) for m in (0, 10, 20))
+    cur.fetchall.side_effect = [META, [(207, t1, 1.0), (208, t1, 2.0), (207, t2, 3.0)]]
+    mocker.patch("blueprints.platforms_bp.get_db_connection", return_value=conn)
+
+    body = client.get("/api/platforms/5/history?limit=2").get_json()
+
+    assert body["next_cursor"] == pagination.encode_cursor(t1, 208)
+    assert cur.execute.call_args[0][1]["limit"] == 3  # una fila de más para saber si sigue
+
+    cur.fetchall.side_effect = [[(207, t2, 3.0), (207, t3, 4.0)]]
+    body = client.get(f"/api/platforms/5/history?limit=2&cursor={body['next_cursor']}").get_json()
+
+    sql, params = cur.execute.call_args[0]
+    assert "(q.ts, q.sensor_id) >" in sql
+    assert "OFFSET" not in sql
+    assert (params["cursor_ts"], params["cursor_sid"]) == (t1, 208)
+    assert body["next_cursor"] is None
+
+
+@pytest.mark.parametrize("query", [
+    "from=ayer", "from=2026-07-07&to=2026-07-01", "limit=0", "limit=1000000", "cursor=xyz",
+])
+def test_history_parametros_invalidos_400(client, db_double, mocker, query):
+    conn, _ = db_double
+    mocker.patch("blueprints.platforms_bp.get_db_connection", return_value=conn)
+
+    assert client.get(f"/api/platforms/5/history?{query}").status_code == 400
@@ -0,0 +1,159 @@
+"""
+Tests de web_app/profiling.py — perfilado de requests y /metrics.
+
+El perfilado está apagado por defecto; acá se prende antes de create_app().
+Las conexiones salen de un ConnectionPool con `connect` falso, así el
+cursor pasa por _PooledConnection.cursor() igual que en producción.
+"""
+import re
+
+import pytest
+from flask import Response, jsonify, stream_with_context
+
+import config
+import profiling
+from db import ConnectionPool
+
+
+@pytest.fixture()
+def pool(mocker):
+    def connect():
+        raw = mocker.MagicMock(name="raw_conn")
+        raw.closed = 0
+        cur = raw.cursor.return_value
+        cur.fetchall.return_value = [(1, 1.5), (2, 2.5)]
+        cur.fetchone.return_value = (3,)
+        cur.__iter__.return_value = iter([(1,), (2,), (3,)])
+        return raw
+    return ConnectionPool(connect=connect, maxconn=2)
+
+
+@pytest.fixture()
+def profiled_app(monkeypatch, pool):
+    monkeypatch.setattr(config, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(config, "PROFILING_SLOW_MS", 60_000)
+    monkeypatch.setattr(config, "METRICS_TOKEN", None)
+    profiling.reset()
+
+    from app import create_app
+    app = create_app()
+    app.config.update(TESTING=True)
+
+    @app.get("/_prueba")
+    def prueba():
+        conn = pool.getconn()
+        cur = conn.cursor()
+        cur.execute("SELECT sensor_id, value FROM oogsj_data.measurement")
+        rows = cur.fetchall()
+        cur.execute("SELECT COUNT(*) FROM oogsj_data.sensor")
+        cur.fetchone()
+        conn.close()
+        return jsonify(rows)
+
+    @app.get("/_stream")
+    def stream():
+        conn = pool.getconn()
+        cur = conn.cursor(name="stream_prueba")
+
+        def generate():
+            cur.execute("SELECT ts FROM oogsj_data.measurement")
+            for row in cur:
+                yield f"{row[0]}\n"
+            conn.close()
+        return Response(stream_with_context(generate()), mimetype="text/plain")
+
+    yield app
+    profiling.reset()
+
+
+def _pedir(client, url, **kwargs):
+    """GET cerrando la respuesta, como hace gunicorn: recién ahí se registra."""
+    with client.get(url, **kwargs) as resp:
+        resp.get_data()
+    return resp
+
+
+def _metrica(texto, nombre, endpoint):
+    m = re.search(rf'^{nombre}{{endpoint="{endpoint}",[^}}]*}} (\S+)$', texto, re.M)
+    assert m, f"{nombre} de {endpoint} no aparece en /metrics"
+    return float(m.group(1))
+
+
+def test_apagado_no_registra_metrics_ni_envuelve_cursores(client, pool):
+    assert client.get("/metrics").status_code == 404
+    assert not isinstance(profiling.wrap_cursor(object()), profiling._ProfiledCursor)
+
+
+def test_cuenta_consultas_filas_y_tiempos_por_endpoint(profiled_app):
+    client = profiled_app.test_client()
+    assert _pedir(client, "/_prueba").get_json() == [[1, 1.5], [2, 2.5]]
+    _pedir(client, "/_prueba")
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/plain"
+    texto = resp.get_data(as_text=True)
+
+    assert _metrica(texto, "oogsj_http_request_duration_seconds_count", "prueba") == 2
+    assert _metrica(texto, "oogsj_db_queries_total", "prueba") == 4
+    assert _metrica(texto, "oogsj_db_rows_fetched_total", "prueba") == 6
+    assert _metrica(texto, "oogsj_db_seconds_total", "prueba") > 0
+    assert _metrica(texto, "oogsj_serialization_seconds_total", "prueba") > 0
+    assert 'le="+Inf"' in texto
+    assert "oogsj_db_pool_connections" in texto
+    assert 'endpoint="metrics"' not in texto   # el scrape no se mide a sí mismo
+
+
+def test_stream_cuenta_las_filas_al_terminar(profiled_app):
+    client = profiled_app.test_client()
+    assert _pedir(client, "/_stream").get_data(as_text=True) == "1\n2\n3\n"
+
+    texto = client.get("/metrics").get_data(as_text=True)
+    assert _metrica(texto, "oogsj_db_queries_total", "stream") == 1
+    assert _metrica(texto, "oogsj_db_rows_fetched_total", "stream") == 3
+    assert _metrica(texto, "oogsj_http_request_duration_seconds_count", "stream") == 1
+
+
+def test_sin_ruta_y_status_quedan_en_las_etiquetas(profiled_app):
+    client = profiled_app.test_client()
+    _pedir(client, "/no/existe")
+    texto = client.get("/metrics").get_data(as_text=True)
+    assert re.search(r'oogsj_db_queries_total\{endpoint="sin_ruta",method="GET",status="404",', texto)
+
+
+def test_metrics_a_traves_de_nginx_sin_token_no_responde(profiled_app):
+    client = profiled_app.test_client()
+    resp = client.get("/metrics", headers={"X-Forwarded-For": "200.1.2.3"})
+    assert resp.status_code == 404
+
+
+def test_metrics_con_token_exige_bearer(profiled_app, monkeypatch):
+    monkeypatch.setattr(config, "METRICS_TOKEN", "secreto")
+    client = profiled_app.test_client()
+    assert client.get("/metrics").status_code == 404
+    assert client.get("/metrics", headers={"Authorization": "Bearer otro"}).status_code == 404
+    resp = client.get("/metrics", headers={"Authorization": "Bearer secreto",
+                                           "X-Forwarded-For": "200.1.2.3"})
+    assert resp.status_code == 200
+
+
+def test_request_lento_se_loguea_con_sus_consultas(profiled_app, monkeypatch, capsys):
+    monkeypatch.setattr(config, "PROFILING_SLOW_MS", 0)
+    _pedir(profiled_app.test_client(), "/_prueba?desde=2026-01-01")
+
+    salida = capsys.readouterr().out
+    assert "🐢 GET /_prueba?desde=2026-01-01 → 200" in salida
+    assert "2 consultas, 3 filas" in salida
+    assert "SELECT sensor_id, value FROM oogsj_data.measurement" in salida
+
+
+def test_cursor_envuelto_delega_atributos_y_context_manager(profiled_app, pool):
+    with profiled_app.test_request_context("/_prueba"):
+        profiling._start()
+        conn = pool.getconn()
+        with conn.cursor() as cur:
+            assert isinstance(cur, profiling._ProfiledCursor)
+            cur.itersize = 500
+            assert conn._raw.cursor.return_value.itersize == 500
+        conn._raw.cursor.return_value.__exit__.assert_called_once()
+        conn.close()
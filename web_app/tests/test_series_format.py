@@ -0,0 +1,62 @@
+"""
+Tests de series_format.py — formato columnar (?format=columnar&delta=1) de
+los endpoints de series.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+T0    = datetime(2026, 7, 6, 10, 0, 0)
+T0_MS = 1783332000000
+
+
+def test_mareograph_columnar(client, db_double, mocker):
+    conn, cur = db_double
+    cur.fetchall.return_value = [(1, T0, 2.3), (1, T0 + timedelta(minutes=10), 2.4)]
+    mocker.patch("blueprints.ocean_bp.get_db_connection", return_value=conn)
+
+    body = client.get("/api/mareograph?format=columnar").get_json()
+
+    assert body == {"t": [T0_MS, T0_MS + 600000], "v": [2.3, 2.4]}
+
+
+def test_columnar_con_delta_y_min_max(client, db_double, mocker):
+    conn, cur = db_double
+    cur.fetchall.return_value = [
+        (12, "Velocidad del Viento", "m/s", T0 + timedelta(hours=i), 10.0, 5.0, 20.0) for i in range(3)
+    ]
+    mocker.patch("blueprints.emac_cmd0_bp.get_db_connection", return_value=conn)
+
+    body = client.get("/api/emac_cmd0/history?resolution=1h&format=columnar&delta=1").get_json()
+
+    assert body["wind_speed"] == {
+        "unit": "km/h",
+        "t":    [T0_MS, 3600000, 3600000],
+        "v":    [36.0, 36.0, 36.0],
+        "min":  [18.0, 18.0, 18.0],
+        "max":  [72.0, 72.0, 72.0],
+    }
+
+
+def test_platform_history_columnar_reemplaza_data(client, db_double, mocker):
+    import platform_data
+    platform_data.clear_metadata_cache()
+    conn, cur = db_double
+    meta = [(5, "EMAC", "Estación", 208, "Temp", "Temperatura Exterior", "°C", 1.0, 0.0)]
+    cur.fetchall.side_effect = [meta, [(208, T0, 7.5)]]
+    mocker.patch("blueprints.platforms_bp.get_db_connection", return_value=conn)
+
+    serie = client.get("/api/platforms/5/history?format=columnar").get_json()["series"][0]
+    platform_data.clear_metadata_cache()
+
+    assert "data" not in serie
+    assert (serie["variable"], serie["t"], serie["v"]) == ("temperatura_exterior", [T0_MS], [7.5])
+
+
+@pytest.mark.parametrize("url", [
+    "/api/emac_cmd1/history?format=ndjson",      # ndjson sólo en ocean y platforms
+    "/api/buoy?delta=1",                          # delta sin columnar
+    "/api/appcr/puerto/history?format=columnar&delta=2",
+])
+def test_formatos_invalidos_son_400(client, url):
+    assert client.get(url).status_code == 400
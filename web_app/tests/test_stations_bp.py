@@ -0,0 +1,45 @@
+"""
+Tests de web_app/blueprints/stations_bp.py — estaciones meteorológicas APPCR.
+"""
+from datetime import datetime, timedelta
+
+import config
+
+
+def test_muelle_history_ventana_por_defecto_mayor_al_tope_sale_completa(client, db_double, mocker, monkeypatch):
+    """
+    Regresión: EstacionMuelleVisualizacionDatos.svelte hace un solo fetch sin
+    limit y no lee X-Next-Cursor. Si la ventana de 15 días supera
+    HISTORY_PAGE_MAX, igual tiene que salir entera, incluidos los datos más
+    nuevos.
+    """
+    monkeypatch.setattr(config, "HISTORY_PAGE_MAX", 2)
+    conn, cur = db_double
+    t0 = datetime(2026, 10, 1)
+    cur.fetchall.return_value = [
+        (1, "temp_out", "°C", t0 + timedelta(minutes=10 * i), 10.0 + i) for i in range(5)
+    ]
+    mocker.patch("blueprints.stations_bp.get_db_connection", return_value=conn)
+
+    resp = client.get("/api/appcr/muelle_cc/history")
+
+    assert resp.status_code == 200
+    assert cur.execute.call_args.args[1]["limit"] is None
+    assert len(resp.get_json()["temp_out"]["data"]) == 5
+    assert "X-Next-Cursor" not in resp.headers
+
+
+def test_muelle_history_con_rango_aplica_el_tope(client, db_double, mocker, monkeypatch):
+    monkeypatch.setattr(config, "HISTORY_PAGE_MAX", 2)
+    conn, cur = db_double
+    t0 = datetime(2026, 10, 1)
+    cur.fetchall.return_value = [
+        (1, "temp_out", "°C", t0 + timedelta(minutes=10 * i), 10.0 + i) for i in range(3)
+    ]
+    mocker.patch("blueprints.stations_bp.get_db_connection", return_value=conn)
+
+    resp = client.get("/api/appcr/muelle_cc/history?from=2026-10-01T00:00:00Z")
+
+    assert cur.execute.call_args.args[1]["limit"] == 3
+    assert len(resp.get_json()["temp_out"]["data"]) == 2
+    assert "X-Next-Cursor" in resp.headers
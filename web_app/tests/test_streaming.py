@@ -0,0 +1,89 @@
+"""
+Tests de streaming.py — históricos en NDJSON (?format=ndjson) leídos con un
+cursor server-side.
+"""
+import json
+from datetime import datetime
+
+import pytest
+
+import pagination
+import platform_data
+
+META = [
+    (5, "Estación EMAC - CMD1", "Estación", 207, "Viento CMD1", "Velocidad del Viento", "km/h", 3.6, 0.0),
+    (5, "Estación EMAC - CMD1", "Estación", 208, "Temp CMD1", "Temperatura Exterior", "°C", 1.0, 0.0),
+]
+
+
+@pytest.fixture(autouse=True)
+def _sin_metadata_cacheada():
+    platform_data.clear_metadata_cache()
+    yield
+    platform_data.clear_metadata_cache()
+
+
+def _lineas(resp):
+    return [json.loads(l) for l in resp.get_data(as_text=True).splitlines()]
+
+
+def test_platform_history_ndjson_usa_cursor_con_nombre_y_devuelve_la_conexion(client, db_double, mocker):
+    conn, cur = db_double
+    t1 = datetime(2026, 7, 6, 10, 0)
+    cur.fetchall.return_value = META
+    cur.__iter__.return_value = iter([(207, t1, 10.0), (208, t1, 7.5)])
+    mocker.patch("blueprints.platforms_bp.get_db_connection", return_value=conn)
+
+    resp = client.get("/api/platforms/5/history?format=ndjson")
+
+    assert resp.mimetype == "application/x-ndjson"
+    assert _lineas(resp) == [
+        {"sensor_id": 207, "variable": "velocidad_del_viento", "unit": "km/h",
+         "timestamp": "2026-07-06T10:00:00Z", "value": 36.0},
+        {"sensor_id": 208, "variable": "temperatura_exterior", "unit": "°C",
+         "timestamp": "2026-07-06T10:00:00Z", "value": 7.5},
+    ]
+    assert conn.cursor.call_args.kwargs["name"].startswith("stream_")
+    sql, params = cur.execute.call_args.args
+    assert params["limit"] is None          # sin limit, todo el rango
+    conn.close.assert_called()
+
+
+def test_ndjson_con_limit_termina_con_next_cursor(client, db_double, mocker):
+    conn, cur = db_double
+    t1, t2 = datetime(2025, 1, 1, 0, 0), datetime(2025, 1, 1, 0, 10)
+    cur.__iter__.return_value = iter([(1, t1, 2.0), (1, t2, 2.1)])
+    mocker.patch("blueprints.ocean_bp.get_db_connection", return_value=conn)
+
+    lineas = _lineas(client.get("/api/mareograph?format=ndjson&limit=1"))
+
+    assert lineas == [{"timestamp": "2025-01-01T00:00:00Z", "level": 2.0},
+                      {"next_cursor": pagination.encode_cursor(t1, 1)}]
+
+
+def test_buoy_ndjson_una_linea_por_punto(client, db_double, mocker):
+    conn, cur = db_double
+    t1 = datetime(2025, 1, 1)
+    cur.__iter__.return_value = iter([(3, t1, 1.2, 1.0, 1.5)])
+    mocker.patch("blueprints.ocean_bp.get_db_connection", return_value=conn)
+
+    lineas = _lineas(client.get("/api/buoy?format=ndjson&resolution=1h"))
+
+    assert lineas == [{"variable": "Altura de Olas", "timestamp": "2025-01-01T00:00:00Z",
+                       "value": 1.2, "min": 1.0, "max": 1.5}]
+
+
+@pytest.mark.parametrize("query", ["format=xml", "format=ndjson&max_points=100"])
+def test_formato_invalido_es_400(client, query):
+    assert client.get(f"/api/buoy?{query}").status_code == 400
+
+
+def test_ndjson_no_pasa_por_el_cache(client, db_double, mocker, fake_redis):
+    conn, cur = db_double
+    cur.__iter__.return_value = iter([])
+    mocker.patch("blueprints.ocean_bp.get_db_connection", return_value=conn)
+
+    resp = client.get("/api/tide_forecast?format=ndjson")
+
+    assert resp.status_code == 200 and "X-Cache" not in resp.headers
+    assert not any("/api/tide_forecast" in k for k in fake_redis.data)